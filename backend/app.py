@@ -3,20 +3,38 @@
 A lightweight server to handle logic for vision-impaired assistance in public spaces.
 """
 
+import hmac
 import json
+import math
 import os
 
 # Import VLM service
 import sys
+from collections.abc import Iterator, Mapping
 from datetime import datetime
 from pathlib import Path
 from typing import Literal
 
-from flask import Flask, Response, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-from loriens_guide.vlm_service import VLMService
+from loriens_guide.batch import group_by_camera
+from loriens_guide.camera_store import CameraImportError, CameraStore
+from loriens_guide.clips import MISSING
+from loriens_guide.deadline import Deadline, deadline_from_request
+from loriens_guide.dispatcher import DESCRIPTIVE, URGENT, PriorityDispatcher, classify_query
+from loriens_guide.fanout import MERGE, STRATEGIES, fan_out, fanout_limits, merge_answers
+from loriens_guide.http_cache import ListingCache
+from loriens_guide.profiling import install_profiler, profiler_from_env
+from loriens_guide.ratelimit import (
+    api_keys_from_env,
+    client_key,
+    limiter_from_env,
+    request_cost,
+    trust_forwarded_from_env,
+)
+from loriens_guide.vlm_service import ACCESSIBILITY_SYSTEM_PROMPT, VLMService
 
 app = Flask(__name__)
 
@@ -32,31 +50,223 @@ CORS(
                 "http://127.0.0.1:5000",
             ],
             "methods": ["GET", "POST", "OPTIONS"],
-            "allow_headers": ["Content-Type"],
+            "allow_headers": ["Content-Type", "Authorization", "X-API-Key"],
+            "expose_headers": ["Retry-After"],
         }
     },
 )
 
-# Load camera registry
+# Load camera registry (SQLite store, seeded from the JSON registry on first start)
 CAMERA_REGISTRY_PATH = Path(__file__).parent / "camera_registry.json"
+CAMERA_DB_PATH = Path(os.getenv("CAMERA_DB_PATH", str(Path(__file__).parent / "cameras.db")))
+PROJECT_ROOT = Path(__file__).parent.parent
+
+camera_store = CameraStore(CAMERA_DB_PATH)
+if camera_store.count() == 0 and CAMERA_REGISTRY_PATH.exists():
+    camera_store.import_json(CAMERA_REGISTRY_PATH)
 
 # Initialize VLM service
-vlm_service = VLMService()
+vlm_service = VLMService(camera_store=camera_store, clip_root=PROJECT_ROOT)
+
+# Hazard/navigation questions are served ahead of descriptive ones
+dispatcher = PriorityDispatcher(workers=int(os.getenv("VLM_DISPATCH_WORKERS", "8")))
+
+# Camera listings, serialized and compressed once per registry version
+listings = ListingCache(max_age_s=int(os.getenv("CAMERA_LIST_MAX_AGE_S", "10")))
+
+# Per-client request budget on the endpoints that call the VLM (None when disabled)
+rate_limiter = limiter_from_env()
+TRUST_PROXY = trust_forwarded_from_env()
+API_KEYS = api_keys_from_env()
+RATE_LIMITED_ENDPOINTS = {
+    "analyze_with_vlm",
+    "analyze_detail_with_vlm",
+    "analyze_batch_with_vlm",
+    "request_assistance",
+    "location_heartbeat",
+}
+
+# Best-ranked cameras whose clips a location heartbeat uploads ahead of the question
+PREFETCH_CAMERAS = int(os.getenv("VLM_PREFETCH_CAMERAS", "2"))
+
+# Bearer token allowing bulk camera imports (imports are disabled without it)
+CAMERA_ADMIN_TOKEN = os.getenv("CAMERA_ADMIN_TOKEN", "")
+
+# Sampling profiler for live requests (nothing is installed unless PROFILER_ENABLED is true)
+profiler = profiler_from_env()
+if profiler is not None:
+    install_profiler(app, profiler, prefix="/api/debug/profiles")
 
 
 def load_camera_registry() -> dict:
-    """Load the camera registry from JSON file."""
-    try:
-        with CAMERA_REGISTRY_PATH.open() as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"cameras": []}
+    """Load the camera registry from the camera store."""
+    return {"cameras": camera_store.list_cameras()}
 
 
 def save_camera_registry(registry: dict) -> None:
-    """Save the camera registry to JSON file."""
-    with CAMERA_REGISTRY_PATH.open("w") as f:
-        json.dump(registry, f, indent=2)
+    """Atomically replace the cameras in the camera store."""
+    camera_store.replace_all(registry.get("cameras", []))
+
+
+def camera_listing(headers: Mapping) -> Response:
+    """Return the full camera listing, built at most once per registry version."""
+    return listings.respond("cameras", camera_store.version(), load_camera_registry, headers)
+
+
+def find_cameras_within(lat: float, lon: float, radius: float, *, with_clip: bool = False) -> list[dict]:
+    """Find registry cameras within a radius, nearest first.
+
+    Each returned camera is annotated with its ``distance_m`` from the given point. With
+    ``with_clip``, cameras whose clip cannot be uploaded (missing, stale, too large or too
+    long) are left out, so they are never selected for analysis.
+    """
+    return [
+        {**camera, "distance_m": round(distance, 1)}
+        for distance, camera in camera_store.find_within(lat, lon, radius)
+        if not with_clip or vlm_service.clip_problem(camera) is None
+    ]
+
+
+def clip_path_for(camera: dict) -> Path | None:
+    """Return the absolute path of a camera's video clip, or None if it has none."""
+    video_file = camera.get("video_clip_url", "")
+    return PROJECT_ROOT / video_file.lstrip("/") if video_file else None
+
+
+def user_location(data: dict) -> tuple[float | None, float | None]:
+    """Return the user's latitude and longitude from a request payload, if valid."""
+    try:
+        return float(data["latitude"]), float(data["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+def session_id(data: dict) -> str | None:
+    """Return the client's session id from a request payload or the X-Session-Id header."""
+    value = data.get("session_id") or request.headers.get("X-Session-Id")
+    return str(value)[:128] if value else None
+
+
+def clip_error(camera: dict) -> tuple[Response, int] | None:
+    """Return the error response for a camera without a usable clip, checked before any upload."""
+    if clip_path_for(camera) is None:
+        return jsonify({"error": "No video available for this camera"}), 400
+    problem = vlm_service.clip_problem(camera)
+    if problem == MISSING:
+        return jsonify({"error": f"Video file not found: {camera['video_clip_url']}"}), 404
+    if problem is not None:
+        return jsonify({"error": "Video not usable", "reason": problem}), 422
+    return None
+
+
+def vlm_error(vlm_result: dict) -> tuple[Response, int] | None:
+    """Return the error response for a failed analysis, or None if it succeeded."""
+    if vlm_result.get("rejected"):
+        return jsonify({"error": "VLM service unavailable", "message": vlm_result.get("message")}), 503
+    if vlm_result.get("stage") == "upload":
+        return jsonify({"error": "Failed to upload video", "message": vlm_result.get("message")}), 500
+    if "error" in vlm_result:
+        return jsonify({"error": "VLM analysis failed", "message": vlm_result.get("message")}), 500
+    return None
+
+
+def analysis_response(camera: dict, query: str, vlm_result: dict) -> dict:
+    """Format a successful analysis of a camera's clip."""
+    response = {
+        "camera_id": camera["id"],
+        "camera_name": camera.get("name"),
+        "query": query,
+        "analysis": vlm_result.get("text", "No analysis available"),
+        "voice_response": vlm_result.get("text", "No response available"),
+        "stale": vlm_result.get("stale", False),
+        "degraded": vlm_result.get("degraded", False),
+        "follow_up": vlm_result.get("follow_up", False),
+        "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
+    }
+    if vlm_result.get("stale"):
+        response["cached_at"] = vlm_result["cached_at"]
+    if "phase" in vlm_result:
+        response.update(
+            phase=vlm_result["phase"], session_id=vlm_result["session_id"], timings_ms=vlm_result["timings_ms"]
+        )
+        if "quick" in vlm_result:
+            response["quick"] = vlm_result["quick"]
+    return response
+
+
+def local_response(camera: dict | None, query: str, local_answer: dict) -> dict:
+    """Format a question answered without the VLM like an analysis response."""
+    return {
+        "camera_id": camera["id"] if camera else None,
+        "camera_name": camera.get("name") if camera else None,
+        "query": query,
+        "analysis": local_answer["text"],
+        "voice_response": local_answer["text"],
+        "intent": local_answer["intent"],
+        "stale": False,
+        "degraded": False,
+        "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
+    }
+
+
+def analyze_camera(camera: dict, query: str, deadline: Deadline, session_id: str | None = None) -> dict:
+    """Analyze one camera's clip, returning an error dictionary if it has no usable clip.
+
+    With a ``session_id``, follow-up questions about the same camera reuse the uploaded
+    clip and the session's earlier questions and answers.
+    """
+    problem = vlm_service.clip_problem(camera)
+    if problem is not None:
+        return {"error": True, "stage": "video", "message": f"No usable video for camera {camera['id']} ({problem})"}
+    return vlm_service.analyze_clip(
+        str(clip_path_for(camera)),
+        query,
+        ACCESSIBILITY_SYSTEM_PROMPT,
+        camera_id=camera["id"],
+        deadline=deadline,
+        session_id=session_id,
+    )
+
+
+def create_app() -> Flask:
+    """Return the app with its shared state built, for servers that load it before forking.
+
+    With gunicorn's ``preload_app`` this runs once in the master: the camera registry
+    and the pre-serialized camera listing are then shared copy-on-write by all workers.
+    Connections opened while building are closed so each worker opens its own, and
+    thread pools and background tasks only start on a worker's first request.
+    """
+    vlm_service.warm_up()
+    camera_listing({})
+    vlm_service.close_connections()
+    return app
+
+
+@app.before_request
+def start_background_tasks() -> None:
+    """Start background pre-analysis on the first request, after the worker has forked."""
+    vlm_service.start_background_tasks()
+
+
+@app.before_request
+def limit_vlm_requests() -> tuple[Response, int] | None:
+    """Identify the client and reject its VLM requests with 429 once it is over its rate.
+
+    A batch costs one token per item and a fan-out one per camera it may ask, so neither
+    can be used to get around the limit.
+    """
+    g.client = client_key(request.headers, request.remote_addr, trust_forwarded=TRUST_PROXY, api_keys=API_KEYS)
+    if rate_limiter is None or request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    cost = 1
+    if request.endpoint in ("analyze_batch_with_vlm", "analyze_with_vlm"):
+        cost = request_cost(request.get_json(silent=True), batch=request.endpoint == "analyze_batch_with_vlm")
+    retry_after = rate_limiter.acquire(g.client, cost)
+    if not retry_after:
+        return None
+    response = jsonify({"error": "Too many requests", "retry_after_s": round(retry_after, 3)})
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response, 429
 
 
 @app.route("/", methods=["GET"])
@@ -73,6 +283,10 @@ def root() -> Response:
                 "camera_by_id": "/api/cameras/<id>",
                 "nearby_cameras": "/api/cameras/nearby",
                 "vlm_analyze": "/api/vlm/analyze",
+                "vlm_batch": "/api/vlm/batch",
+                "assistance": "/api/assistance/request",
+                "location_heartbeat": "/api/location/heartbeat",
+                "metrics": "/api/metrics",
             },
             "docs": "https://github.com/osquera/Loriens-Guide",
         }
@@ -85,116 +299,395 @@ def health_check() -> Response:
     return jsonify({"status": "healthy", "service": "Lórien's Guide Backend"})
 
 
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """Expose VLM upstream protection state and per-class queue waits for monitoring."""
+    return jsonify(
+        {
+            **vlm_service.get_metrics(),
+            "dispatcher": dispatcher.snapshot(),
+            "listings": listings.snapshot(),
+            "rate_limit": rate_limiter.snapshot() if rate_limiter else {"enabled": False},
+            "profiler": profiler.snapshot() if profiler else {"enabled": False},
+        }
+    )
+
+
 @app.route("/api/cameras", methods=["GET"])
 def get_cameras() -> Response:
-    """Get all cameras from the registry."""
-    registry = load_camera_registry()
-    return jsonify(registry)
+    """Get all cameras from the registry.
+
+    The response carries a strong ETag of the registry version; a client sending it back
+    in If-None-Match gets 304 Not Modified while the registry is unchanged.
+    """
+    return camera_listing(request.headers)
+
+
+@app.route("/api/cameras/export", methods=["GET"])
+def export_cameras() -> Response:
+    """Stream every camera as NDJSON, one camera document per line.
+
+    The output can be imported again with /api/cameras/import.
+    """
+    return Response(stream_with_context(camera_store.export_ndjson()), mimetype="application/x-ndjson")
+
+
+@app.route("/api/cameras/import", methods=["POST"])
+def import_cameras() -> tuple[Response, int]:
+    """Import cameras streamed as NDJSON, one camera document per line.
+
+    Requires ``Authorization: Bearer <CAMERA_ADMIN_TOKEN>``. With ``?mode=replace`` the
+    import replaces the whole registry, otherwise (``mode=upsert``) cameras are inserted
+    or updated. The import is applied as one registry version, or not at all if any line
+    is invalid.
+    """
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not CAMERA_ADMIN_TOKEN or not hmac.compare_digest(token, CAMERA_ADMIN_TOKEN):
+        return jsonify({"error": "Admin token required"}), 403
+    mode = request.args.get("mode", "upsert")
+    if mode not in {"upsert", "replace"}:
+        return jsonify({"error": "mode must be 'upsert' or 'replace'"}), 400
+
+    try:
+        imported = camera_store.import_ndjson(request.stream, replace=mode == "replace")
+    except CameraImportError as e:
+        return jsonify(
+            {"error": "Invalid cameras, nothing was imported", "invalid": e.invalid, "errors": e.errors}
+        ), 422
+    return jsonify({"imported": imported, "mode": mode, "version": camera_store.version()}), 200
 
 
 @app.route("/api/cameras/<camera_id>", methods=["GET"])
 def get_camera(camera_id: str) -> Response | tuple[Response, int]:
     """Get a specific camera by ID."""
-    registry = load_camera_registry()
-    for camera in registry.get("cameras", []):
-        if camera["id"] == camera_id:
-            return jsonify(camera)
+    camera = camera_store.get_camera(camera_id)
+    if camera:
+        return jsonify(camera)
     return jsonify({"error": "Camera not found"}), 404
 
 
-@app.route("/api/cameras/nearby", methods=["POST"])
+@app.route("/api/cameras/nearby", methods=["GET", "POST"])
 def get_nearby_cameras() -> tuple[Response, Literal[400]] | Response:
-    """Get cameras near a specific location."""
-    data = request.json
+    """Get cameras near a specific location.
+
+    The location is passed as query parameters (GET, which supports If-None-Match
+    revalidation) or as a JSON payload (POST).
+    """
+    data = request.args if request.method == "GET" else request.get_json(silent=True)
     if data is None:
         return jsonify({"error": "Invalid JSON payload"}), 400
     lat = data.get("latitude")
     lon = data.get("longitude")
-    _radius = data.get("radius", 100)  # Default radius in meters
+    radius = data.get("radius", 100)  # Default radius in meters
 
     if lat is None or lon is None:
         return jsonify({"error": "Latitude and longitude required"}), 400
 
-    registry = load_camera_registry()
-    # Simple distance calculation (for hackathon purposes)
-    # Keep only cameras that have a location (replace loop with list comprehension)
-    nearby_cameras = [camera for camera in registry.get("cameras", []) if camera.get("location")]
-
-    return jsonify({"cameras": nearby_cameras})
+    try:
+        lat, lon, radius = float(lat), float(lon), float(radius)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Latitude, longitude and radius must be numbers"}), 400
+
+    # Cameras within the radius, nearest first. Exact locations rarely repeat, so the listing is
+    # not kept; its ETag still lets a client polling from the same spot revalidate it
+    return listings.respond(
+        f"nearby:{lat}:{lon}:{radius}",
+        camera_store.version(),
+        lambda: {"cameras": find_cameras_within(lat, lon, radius)},
+        request.headers,
+        conditional=request.method == "GET",
+        store=False,
+    )
 
 
 @app.route("/api/vlm/analyze", methods=["POST"])
 def analyze_with_vlm() -> tuple[Response, int] | Response:
-    """Endpoint to analyze camera feed with Milestone VLM API."""
+    """Endpoint to analyze camera feed with Milestone VLM API.
+
+    Analyzes a single ``camera_id``, or, with ``mode`` set to "first" or "merge" and a
+    ``latitude``/``longitude``, fans the query out to the nearest cameras in parallel
+    (``max_cameras`` of them within ``radius_m``, at most MAX_FANOUT_CAMERAS and MAX_FANOUT_RADIUS_M).
+    """
     data = request.json
     if data is None:
         return jsonify({"error": "Invalid JSON payload"}), 400
     camera_id = data.get("camera_id")
     query = data.get("query", "Describe what you see")
+    deadline = deadline_from_request(data, request.headers)
+
+    if data.get("mode") in STRATEGIES:
+        return analyze_nearby_cameras(data, query, deadline)
 
     if not camera_id:
         return jsonify({"error": "Camera ID required"}), 400
 
     # Get camera details
-    registry = load_camera_registry()
-    camera = None
-    for cam in registry.get("cameras", []):
-        if cam["id"] == camera_id:
-            camera = cam
-            break
+    camera = camera_store.get_camera(camera_id)
 
     if not camera:
         return jsonify({"error": "Camera not found"}), 404
 
-    # Get video file path
-    video_file = camera.get("video_clip_url", "")
-    if not video_file:
-        return jsonify({"error": "No video available for this camera"}), 400
-
-    # Convert to absolute path
-    video_path = Path(__file__).parent.parent / video_file.lstrip("/")
+    # Questions that do not need the camera ("help", "where am I") are answered without the VLM
+    local_answer = vlm_service.answer_locally(query, *user_location(data), camera=camera)
+    if local_answer is not None:
+        return jsonify(local_response(camera, query, local_answer))
 
-    if not video_path.exists():
-        return jsonify({"error": f"Video file not found: {video_file}"}), 404
+    # Checked against the clip catalog, before anything is uploaded
+    error = clip_error(camera)
+    if error is not None:
+        return error
+    video_path = clip_path_for(camera)
 
     try:
-        # Step 1: Upload video to VLM
-        upload_result = vlm_service.upload_video_asset(str(video_path))
-        if "error" in upload_result:
-            return jsonify({"error": "Failed to upload video", "message": upload_result.get("message")}), 500
-
-        asset_id = upload_result.get("asset_id")
-
-        # Step 2: Analyze with VLM
-        system_prompt = (
-            "You are an accessibility assistant for vision-impaired users navigating public spaces. "
-            "Provide clear, concise guidance using landmarks and directional cues. "
-            "Describe obstacles, safe paths, and important features. "
-            "Use specific directions like 'on your left' or 'straight ahead' instead of colors."
-        )
+        if data.get("quick"):
+            # First phase of a two-phase answer; the rest is fetched from /api/vlm/analyze/detail
+            vlm_result = dispatcher.run(
+                query,
+                vlm_service.quick_answer,
+                str(video_path),
+                query,
+                camera_id,
+                deadline,
+                session_id=session_id(data),
+                client=g.client,
+            )
+        else:
+            # Upload, analyze and clean up; serves a stale answer while the VLM API is shedding load
+            vlm_result = dispatcher.run(
+                query,
+                vlm_service.analyze_clip,
+                str(video_path),
+                query,
+                ACCESSIBILITY_SYSTEM_PROMPT,
+                camera_id=camera_id,
+                deadline=deadline,
+                session_id=session_id(data),
+                client=g.client,
+            )
+        return vlm_error(vlm_result) or jsonify(analysis_response(camera, query, vlm_result))
+
+    except Exception as e:
+        return jsonify({"error": "VLM processing error", "message": str(e)}), 500
 
-        vlm_result = vlm_service.call_vlm_api(asset_id, query, system_prompt)
 
-        # Step 3: Clean up (delete asset)
-        vlm_service.delete_asset(asset_id)
+@app.route("/api/vlm/analyze/detail", methods=["POST"])
+def analyze_detail_with_vlm() -> tuple[Response, int] | Response:
+    """Return the detailed answer to a question first answered with ``quick`` set.
+
+    Takes the ``camera_id``, ``query`` and ``session_id`` of the quick answer. The
+    session's uploaded clip is reused while it lasts.
+    """
+    data = request.json
+    if data is None:
+        return jsonify({"error": "Invalid JSON payload"}), 400
+    camera_id = data.get("camera_id")
+    query = data.get("query")
+    detail_session = session_id(data)
+    if not camera_id or not query or not detail_session:
+        return jsonify({"error": "Camera ID, query and session ID required"}), 400
+    camera = camera_store.get_camera(camera_id)
+    if not camera:
+        return jsonify({"error": "Camera not found"}), 404
+    error = clip_error(camera)
+    if error is not None:
+        return error
+
+    vlm_result = dispatcher.run(
+        query,
+        vlm_service.detailed_answer,
+        str(clip_path_for(camera)),
+        query,
+        camera_id,
+        deadline_from_request(data, request.headers),
+        session_id=detail_session,
+        client=g.client,
+    )
+    return vlm_error(vlm_result) or jsonify(analysis_response(camera, query, vlm_result))
 
-        if "error" in vlm_result:
-            return jsonify({"error": "VLM analysis failed", "message": vlm_result.get("message")}), 500
 
-        # Return successful response
-        response = {
-            "camera_id": camera_id,
-            "camera_name": camera.get("name"),
+def analyze_nearby_cameras(data: dict, query: str, deadline: Deadline) -> tuple[Response, int] | Response:
+    """Fan a query out to the nearest cameras and answer from the first (or merged) result."""
+    lat = data.get("latitude")
+    lon = data.get("longitude")
+    if lat is None or lon is None:
+        return jsonify({"error": "Latitude and longitude required"}), 400
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid parameter types"}), 400
+    try:
+        max_cameras, radius_m = fanout_limits(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    local_answer = vlm_service.answer_locally(query, lat, lon)
+    if local_answer is not None:
+        return jsonify(local_response(None, query, local_answer))
+
+    cameras = vlm_service.rank_cameras(find_cameras_within(lat, lon, radius_m, with_clip=True), lat, lon, query)
+    cameras = cameras[:max_cameras]
+    if not cameras:
+        return jsonify({"error": "No cameras available in this area"}), 404
+
+    query_class = classify_query(query)
+    client = g.client
+    result = fan_out(
+        cameras,
+        lambda camera, branch_deadline: analyze_camera(camera, query, branch_deadline),
+        camera_id=lambda camera: camera["id"],
+        strategy=data["mode"],
+        deadline=deadline,
+        submit=lambda fn, *args: dispatcher.submit(query_class, fn, *args, client=client),
+    )
+    answers = result["answers"] or ([result["fallback"]] if result["fallback"] else [])
+    if not answers:
+        return jsonify({"error": "VLM analysis failed", "cameras": result["outcomes"]}), 500
+
+    first_camera, first_result = answers[0]
+    if data["mode"] == MERGE:
+        text = merge_answers(answers, lambda camera: camera.get("name", camera["id"]))
+    else:
+        text = first_result.get("text", "")
+    return jsonify(
+        {
+            "camera_id": first_camera["id"],
+            "camera_name": first_camera.get("name"),
+            "camera_ids": [camera["id"] for camera, _ in answers],
             "query": query,
-            "analysis": vlm_result.get("text", "No analysis available"),
-            "voice_response": vlm_result.get("text", "No response available"),
+            "analysis": text,
+            "voice_response": text,
+            "stale": first_result.get("stale", False),
+            "degraded": first_result.get("degraded", False),
+            "strategy": data["mode"],
+            "cameras": result["outcomes"],
             "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
         }
+    )
 
-        return jsonify(response)
 
-    except Exception as e:
-        return jsonify({"error": "VLM processing error", "message": str(e)}), 500
+@app.route("/api/vlm/batch", methods=["POST"])
+def analyze_batch_with_vlm() -> tuple[Response, int] | Response:
+    """Answer several queries in one request, uploading each camera's clip only once.
+
+    Each item has a ``query`` and either a ``camera_id`` or a ``latitude``/``longitude``
+    (answered by the nearest camera). With ``stream`` set, one NDJSON line is sent per
+    answer as it completes; otherwise all results are returned together, in item order.
+    """
+    data = request.json
+    if data is None:
+        return jsonify({"error": "Invalid JSON payload"}), 400
+    items = data.get("items")
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "Items required"}), 400
+
+    def resolve(item: dict) -> tuple[str, dict] | dict:
+        if item.get("camera_id"):
+            camera = camera_store.get_camera(item["camera_id"])
+        elif item.get("latitude") is not None and item.get("longitude") is not None:
+            try:
+                lat, lon = float(item["latitude"]), float(item["longitude"])
+            except (TypeError, ValueError):
+                return {"error": "Invalid parameter types"}
+            camera = vlm_service.select_camera(lat, lon, item.get("query", "Describe what you see"), with_clip=True)
+        else:
+            return {"error": "Camera ID or location required"}
+        if not camera:
+            return {"error": "Camera not found"}
+        problem = vlm_service.clip_problem(camera)
+        if problem is not None:
+            return {"error": "No usable video for this camera", "reason": problem}
+        return camera["id"], camera
+
+    queries = [item.get("query", "Describe what you see") for item in items]
+    groups, errors = group_by_camera(items, resolve)
+    clips = {
+        camera_id: {
+            "video_path": str(clip_path_for(group["camera"])),
+            "queries": {index: queries[index] for index in group["indices"]},
+        }
+        for camera_id, group in groups.items()
+    }
+    camera_at = {index: group["camera"] for group in groups.values() for index in group["indices"]}
+
+    # The whole batch runs at the priority of its most urgent query
+    query_class = URGENT if any(classify_query(query) == URGENT for query in queries) else DESCRIPTIVE
+    client = g.client
+    analyses = vlm_service.analyze_batch(
+        clips,
+        ACCESSIBILITY_SYSTEM_PROMPT,
+        deadline=deadline_from_request(data, request.headers),
+        submit=lambda fn, *args: dispatcher.submit(query_class, fn, *args, client=client),
+    )
+
+    def results() -> Iterator[dict]:
+        for index, error in errors.items():
+            yield {"index": index, "query": queries[index], **error}
+        for index, vlm_result in analyses:
+            camera = camera_at[index]
+            result = {
+                "index": index,
+                "camera_id": camera["id"],
+                "camera_name": camera.get("name"),
+                "query": queries[index],
+            }
+            if vlm_result.get("rejected"):
+                result.update({"error": "VLM service unavailable", "message": vlm_result.get("message")})
+            elif "error" in vlm_result:
+                result.update({"error": "VLM analysis failed", "message": vlm_result.get("message")})
+            else:
+                result.update(
+                    {
+                        "analysis": vlm_result.get("text", "No analysis available"),
+                        "voice_response": vlm_result.get("text", "No response available"),
+                        "stale": vlm_result.get("stale", False),
+                        "degraded": vlm_result.get("degraded", False),
+                    }
+                )
+            yield result
+
+    if data.get("stream"):
+        return Response(
+            stream_with_context(json.dumps(result) + "\n" for result in results()), mimetype="application/x-ndjson"
+        )
+    return jsonify(
+        {
+            "results": sorted(results(), key=lambda result: result["index"]),
+            "uploads": len(clips),
+            "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
+        }
+    )
+
+
+@app.route("/api/location/heartbeat", methods=["POST"])
+def location_heartbeat() -> tuple[Response, int] | Response:
+    """Receive the user's location ahead of a question.
+
+    Starts speculative uploads of the clips of the PREFETCH_CAMERAS best-ranked cameras
+    (within ``radius`` meters) so that only the VLM chat completion remains when the
+    question arrives. The question is not known yet and may favor another of the ranked
+    cameras (see VLMService.rank_cameras), so more than the first one are prepared.
+    """
+    data = request.json
+    if data is None:
+        return jsonify({"error": "Invalid JSON payload"}), 400
+    lat, lon = user_location(data)
+    if lat is None or lon is None:
+        return jsonify({"error": "Latitude and longitude required"}), 400
+    try:
+        radius = float(data.get("radius", 1000))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid parameter types"}), 400
+
+    # The cameras a question from here would most likely be answered by
+    nearby_cameras = vlm_service.rank_cameras(find_cameras_within(lat, lon, radius, with_clip=True), lat, lon, "")
+    if not nearby_cameras:
+        return jsonify({"camera_id": None, "prefetch": "no_camera", "cameras": []})
+    prefetched = []
+    for camera in nearby_cameras[:PREFETCH_CAMERAS]:
+        video_path = clip_path_for(camera)
+        outcome = "no_clip" if video_path is None else vlm_service.prefetch_clip(camera["id"], str(video_path))
+        prefetched.append({"camera_id": camera["id"], "prefetch": outcome})
+    return jsonify({**prefetched[0], "cameras": prefetched}), 202
 
 
 @app.route("/api/voice/transcribe", methods=["POST"])
@@ -233,41 +726,67 @@ def synthesize_speech() -> tuple[Response, Literal[400]] | Response:
 
 
 @app.route("/api/assistance/request", methods=["POST"])
-def request_assistance() -> tuple[Response, Literal[400]] | Response:
-    """Endpoint for requesting assistance.
+def request_assistance() -> tuple[Response, int] | Response:
+    """Endpoint for requesting assistance in a single round trip.
 
-    Combines camera lookup, VLM analysis, and voice response.
+    Combines camera lookup, VLM analysis, and voice response: the camera nearest to the
+    user's ``location`` (within ``radius`` meters) is selected on the server and analyzed.
     """
     data = request.json
     if data is None:
         return jsonify({"error": "Invalid JSON payload"}), 400
     location = data.get("location")
-    _query = data.get("query", "What do you see?")
+    query = data.get("query", "What do you see?")
 
     if not location:
         return jsonify({"error": "Location required"}), 400
-
-    # Get nearby cameras
-    registry = load_camera_registry()
-    cameras = registry.get("cameras", [])
-
-    if not cameras:
-        return jsonify({"message": "No cameras available in this area", "cameras": []})
-
-    # Use first available camera (simplified for hackathon)
-    camera = cameras[0] if cameras else None
-
-    if camera:
-        # Simulate VLM analysis
-        response = {
-            "camera": camera,
-            "analysis": f"Analysis from camera {camera['id']}: {camera.get('description', 'Scene description')}",
-            "voice_response": f"I can see {camera.get('description', 'the area around you')}",
-            "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
-        }
-    else:
-        response = {"message": "No cameras available", "voice_response": "Sorry, no cameras are available in your area"}
-
+    lat, lon = user_location(location)
+    if lat is None or lon is None:
+        return jsonify({"error": "Latitude and longitude required"}), 400
+    try:
+        radius = float(data.get("radius", 1000))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid parameter types"}), 400
+    deadline = deadline_from_request(data, request.headers)
+
+    local_answer = vlm_service.answer_locally(query, lat, lon)
+    if local_answer is not None:
+        return jsonify(local_response(None, query, local_answer))
+
+    # Best camera with usable footage (see VLMService.rank_cameras), selected on the server so the client
+    # never downloads the camera list
+    nearby_cameras = vlm_service.rank_cameras(find_cameras_within(lat, lon, radius, with_clip=True), lat, lon, query)
+    if not nearby_cameras:
+        return jsonify(
+            {
+                "message": "No cameras available in this area",
+                "cameras": [],
+                "voice_response": "I'm sorry, there are no cameras available in your current area. "
+                "Please try moving to a different location.",
+            }
+        )
+    camera = nearby_cameras[0]
+
+    vlm_result = dispatcher.run(query, analyze_camera, camera, query, deadline, session_id(data), client=g.client)
+    if vlm_result.get("rejected"):
+        return jsonify({"error": "VLM service unavailable", "message": vlm_result.get("message")}), 503
+    if vlm_result.get("stage") == "video":
+        return jsonify({"error": "No video available for this camera", "message": vlm_result.get("message")}), 404
+    if "error" in vlm_result:
+        return jsonify({"error": "VLM analysis failed", "message": vlm_result.get("message")}), 500
+
+    response = {
+        "camera": camera,
+        "query": query,
+        "analysis": vlm_result.get("text", "No analysis available"),
+        "voice_response": vlm_result.get("text", "No response available"),
+        "stale": vlm_result.get("stale", False),
+        "degraded": vlm_result.get("degraded", False),
+        "follow_up": vlm_result.get("follow_up", False),
+        "timestamp": datetime.now(tz=datetime.now().astimezone().tzinfo).isoformat(),
+    }
+    if vlm_result.get("stale"):
+        response["cached_at"] = vlm_result["cached_at"]
     return jsonify(response)
 
 
@@ -11,23 +11,32 @@ The server will:
 3. Make the latest clip available for VLM analysis
 """
 
+import sys
 import time
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import cv2
+if TYPE_CHECKING:
+    from loriens_guide.profiling import Profiler
+
+# OpenCV is imported by the methods that need it: it is slow to import, and importing
+# this module (e.g. for its settings) should not pay for it
 
 
 class CameraServer:
-    def __init__(self, camera_id: int = 0, clip_duration: int = 5):
+    def __init__(self, camera_id: int = 0, clip_duration: int = 5, profiler: "Profiler | None" = None):
         """Initialize the camera server.
 
         Args:
             camera_id: Camera device ID (0 for default laptop webcam)
             clip_duration: Duration of each video clip in seconds
+            profiler: Optional profiler sampling each clip's capture
         """
         self.camera_id = camera_id
         self.clip_duration = clip_duration
+        self.profiler = profiler
         self.output_dir = Path(__file__).parent.parent / "videos"
         self.output_dir.mkdir(exist_ok=True)
 
@@ -41,6 +50,8 @@ class CameraServer:
 
     def start_camera(self):
         """Start capturing from the camera."""
+        import cv2  # noqa: PLC0415
+
         print(f"🎥 Starting camera {self.camera_id}...")
         self.cap = cv2.VideoCapture(self.camera_id)
 
@@ -67,6 +78,8 @@ class CameraServer:
         Returns:
             Path to the saved video clip
         """
+        import cv2  # noqa: PLC0415
+
         output_path = self.output_dir / output_filename
 
         # Define codec and create VideoWriter
@@ -125,8 +138,10 @@ class CameraServer:
                 # Also keep a "latest" version for easy access
                 latest_filename = "laptop_camera_latest.mp4"
 
-                # Capture clip
-                clip_path = self.capture_clip(filename)
+                # Capture clip (profiled as the clip's name with --profile-dir)
+                profiling = self.profiler.profiling(Path(filename).stem) if self.profiler else nullcontext()
+                with profiling:
+                    clip_path = self.capture_clip(filename)
 
                 # Copy to "latest" for easy backend access
                 import shutil
@@ -150,6 +165,8 @@ class CameraServer:
 
     def cleanup(self):
         """Release camera and close windows."""
+        import cv2  # noqa: PLC0415
+
         if self.cap:
             self.cap.release()
         cv2.destroyAllWindows()
@@ -162,7 +179,15 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Camera Server for Lórien's Guide")
     parser.add_argument("--camera", type=int, default=0, help="Camera device ID (default: 0)")
     parser.add_argument("--duration", type=int, default=5, help="Clip duration in seconds (default: 5)")
+    parser.add_argument("--profile-dir", help="Write a folded-stack profile of each clip's capture to this directory")
     args = parser.parse_args()
 
-    server = CameraServer(camera_id=args.camera, clip_duration=args.duration)
+    profiler = None
+    if args.profile_dir:
+        sys.path.insert(0, str(Path(__file__).parent / "src"))
+        from loriens_guide.profiling import Profiler
+
+        profiler = Profiler(directory=args.profile_dir)
+
+    server = CameraServer(camera_id=args.camera, clip_duration=args.duration, profiler=profiler)
     server.run_continuous()
@@ -6,6 +6,9 @@ const API_BASE_URL = window.location.hostname === 'localhost'
     ? 'http://localhost:5000'  // Local development
     : 'https://loriens-guide-production.up.railway.app';  // Production backend
 
+// Minimum time between location heartbeats, unless the user starts talking
+const HEARTBEAT_INTERVAL_MS = 20000;
+
 class LoriensGuide {
     constructor() {
         this.currentLocation = null;
@@ -14,6 +17,11 @@ class LoriensGuide {
         this.isListening = false;
         this.isProcessing = false;
         this.apiBaseUrl = API_BASE_URL;
+        this.lastHeartbeat = 0;
+        // Lets the backend answer follow-up questions with the same clip and context
+        this.sessionId = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
         
         this.initElements();
         this.initGPS();
@@ -43,6 +51,7 @@ class LoriensGuide {
                     
                     this.locationStatus.textContent = `📍 Location: ${this.currentLocation.lat.toFixed(4)}, ${this.currentLocation.lng.toFixed(4)}`;
                     this.updateStatus('Location acquired! Ready to help.', 'success');
+                    this.sendHeartbeat();
                     
                     // Watch for location changes
                     navigator.geolocation.watchPosition(
@@ -53,6 +62,7 @@ class LoriensGuide {
                                 accuracy: position.coords.accuracy
                             };
                             this.locationStatus.textContent = `📍 Location: ${this.currentLocation.lat.toFixed(4)}, ${this.currentLocation.lng.toFixed(4)}`;
+                            this.sendHeartbeat();
                         },
                         (error) => {
                             console.warn('Location update error:', error);
@@ -92,6 +102,29 @@ class LoriensGuide {
         }
     }
 
+    sendHeartbeat(force = false) {
+        // Lets the backend upload the nearest camera's clip while the user is still talking
+        if (!this.currentLocation) {
+            return;
+        }
+        const now = Date.now();
+        if (!force && now - this.lastHeartbeat < HEARTBEAT_INTERVAL_MS) {
+            return;
+        }
+        this.lastHeartbeat = now;
+        fetch(`${this.apiBaseUrl}/api/location/heartbeat`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                latitude: this.currentLocation.lat,
+                longitude: this.currentLocation.lng,
+                radius: 1000 // 1km radius
+            })
+        }).catch(error => console.warn('Location heartbeat failed:', error));
+    }
+
     initSpeechRecognition() {
         // Check for Web Speech API support
         const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
@@ -120,6 +153,8 @@ class LoriensGuide {
             this.tapButton.classList.add('listening');
             this.updateStatus('🎤 Listening... Speak now!', 'success');
             console.log('Speech recognition started - microphone is active');
+            // The question is coming: have the nearest clip uploaded while the user speaks
+            this.sendHeartbeat(true);
         };
 
         this.recognition.onresult = (event) => {
@@ -288,56 +323,35 @@ class LoriensGuide {
     }
 
     async callBackendAPI(question) {
-        // First, find the nearest camera
         if (!this.currentLocation) {
             throw new Error('Location not available');
         }
 
         try {
-            // Find nearby cameras
-            const camerasResponse = await fetch(`${this.apiBaseUrl}/api/cameras/nearby`, {
+            // One round trip: the backend picks the nearest camera and analyzes it
+            const response = await fetch(`${this.apiBaseUrl}/api/assistance/request`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    latitude: this.currentLocation.lat,
-                    longitude: this.currentLocation.lng,
-                    radius: 1000 // 1km radius
+                    location: {
+                        latitude: this.currentLocation.lat,
+                        longitude: this.currentLocation.lng
+                    },
+                    query: question,
+                    radius: 1000, // 1km radius
+                    session_id: this.sessionId
                 })
             });
 
-            if (!camerasResponse.ok) {
-                throw new Error(`Camera lookup failed: ${camerasResponse.status}`);
-            }
-
-            const camerasData = await camerasResponse.json();
-            
-            if (!camerasData.cameras || camerasData.cameras.length === 0) {
-                return 'I\'m sorry, there are no cameras available in your current area. Please try moving to a different location.';
+            if (!response.ok) {
+                throw new Error(`Assistance request failed: ${response.status}`);
             }
 
-            const nearestCamera = camerasData.cameras[0];
+            const data = await response.json();
 
-            // Now analyze with VLM
-            const vlmResponse = await fetch(`${this.apiBaseUrl}/api/vlm/analyze`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    camera_id: nearestCamera.id,
-                    query: question
-                })
-            });
-
-            if (!vlmResponse.ok) {
-                throw new Error(`VLM analysis failed: ${vlmResponse.status}`);
-            }
-
-            const vlmData = await vlmResponse.json();
-            
-            return vlmData.analysis || vlmData.voice_response || 'I received a response but couldn\'t interpret it.';
+            return data.voice_response || data.analysis || 'I received a response but couldn\'t interpret it.';
 
         } catch (error) {
             console.error('Backend API error:', error);
@@ -0,0 +1,25 @@
+"""Gunicorn configuration for the backend.
+
+The app is loaded once in the master (``preload_app``), so the camera registry and
+pre-serialized camera listing are built once and shared copy-on-write by the workers:
+
+    gunicorn -c gunicorn.conf.py
+"""
+
+import os
+
+wsgi_app = "backend.app:create_app()"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+# Worker threads block on the VLM API, so each worker serves several requests at once
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+# Uploads and chat completions can take minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = True
+
+
+def post_fork(server: object, worker: object) -> None:  # noqa: ARG001
+    """Drop any connection a worker inherited from the master; each opens its own when needed."""
+    from backend.app import vlm_service  # noqa: PLC0415
+
+    vlm_service.close_connections()
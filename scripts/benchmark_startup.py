@@ -0,0 +1,114 @@
+"""Cold-start benchmark.
+
+Measures, in fresh interpreters, how long it takes to:
+1. Import the app module
+2. Build its shared state with create_app() (what gunicorn's preload_app runs in the master)
+3. Answer the first request, and a second one, to a few endpoints
+
+Usage:
+    python scripts/benchmark_startup.py [--app backend.app] [--runs 5] [--max-import-ms 1500]
+
+Exits with status 1 when a median exceeds one of the given limits, so it can guard
+cold start in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter so nothing is imported yet
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+module = __import__(sys.argv[1], fromlist=["create_app"])
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+client = app.test_client()
+requests = {}
+for path in sys.argv[2:]:
+    timings = []
+    for _ in range(2):
+        request_started = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - request_started) * 1000)
+    requests[path] = {"first_ms": timings[0], "second_ms": timings[1]}
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "requests": requests,
+    "heavy_modules": sorted(name for name in ("cv2", "numpy") if name in sys.modules),
+}))
+"""
+
+
+def probe(app_module: str, paths: list[str]) -> dict:
+    """Start a fresh interpreter, load the app and time its first requests.
+
+    Args:
+        app_module: Module of the Flask app, providing create_app()
+        paths: Endpoints to request (GET)
+
+    Returns:
+        The timings measured by the interpreter
+
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(PROJECT_ROOT / "src"), str(PROJECT_ROOT)])}
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", _PROBE, app_module, *paths],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    """Run the benchmark and report median timings."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="backend.app", help="Module of the Flask app (default: backend.app)")
+    parser.add_argument("--path", action="append", help="Endpoint to request (default: /api/health, /api/cameras)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average over")
+    parser.add_argument("--max-import-ms", type=float, help="Fail when the median import time exceeds this")
+    parser.add_argument("--max-first-request-ms", type=float, help="Fail when a median first request exceeds this")
+    args = parser.parse_args()
+    paths = args.path or ["/api/health", "/api/cameras"]
+
+    runs = [probe(args.app, paths) for _ in range(args.runs)]
+    report = {
+        "app": args.app,
+        "runs": args.runs,
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "create_app_ms": round(statistics.median(run["create_app_ms"] for run in runs), 1),
+        "requests": {
+            path: {
+                key: round(statistics.median(run["requests"][path][key] for run in runs), 2)
+                for key in ("first_ms", "second_ms")
+            }
+            for path in paths
+        },
+        "heavy_modules": runs[-1]["heavy_modules"],
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if args.max_import_ms is not None and report["import_ms"] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']} ms (limit {args.max_import_ms} ms)")
+    for path, timings in report["requests"].items():
+        if args.max_first_request_ms is not None and timings["first_ms"] > args.max_first_request_ms:
+            failures.append(f"first {path} took {timings['first_ms']} ms (limit {args.max_first_request_ms} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
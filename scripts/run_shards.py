@@ -0,0 +1,73 @@
+"""Local sharded setup.
+
+Starts several backend shards as separate processes and the shard router in
+front of them, to try camera-affinity routing on one machine:
+1. One process per shard, each on its own port (base port + 1, + 2, ...)
+2. The router on the base port, with SHARDS listing the shards
+3. Everything stopped together on Ctrl-C
+
+Usage:
+    python scripts/run_shards.py [--app backend.app] [--shards 3] [--port 8000]
+
+Shards can then be added or removed at runtime through the router's
+/router/shards endpoint (with ROUTER_ADMIN_TOKEN set).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs one shard: the app with its shared state built, served on the given port
+_SHARD = """
+import sys
+module = __import__(sys.argv[1], fromlist=["create_app"])
+module.create_app().run(host="127.0.0.1", port=int(sys.argv[2]), threaded=True)
+"""
+
+
+def start(command: list[str], env: dict[str, str]) -> subprocess.Popen:
+    """Start a process in the project root with the source directories importable."""
+    return subprocess.Popen(command, cwd=PROJECT_ROOT, env=env)  # noqa: S603
+
+
+def main() -> int:
+    """Run the shards and the router until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="backend.app", help="Module of the Flask app (default: backend.app)")
+    parser.add_argument("--shards", type=int, default=3, help="Number of shard processes")
+    parser.add_argument("--port", type=int, default=8000, help="Router port; shards use the following ports")
+    args = parser.parse_args()
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(PROJECT_ROOT / "src"), str(PROJECT_ROOT)])}
+    shards = [f"http://127.0.0.1:{args.port + index}" for index in range(1, args.shards + 1)]
+    processes = [
+        start([sys.executable, "-c", _SHARD, args.app, str(args.port + index)], env)
+        for index in range(1, args.shards + 1)
+    ]
+    processes.append(
+        start(
+            [sys.executable, "-m", "loriens_guide.router"],
+            {**env, "SHARDS": ",".join(shards), "ROUTER_PORT": str(args.port)},
+        )
+    )
+    print(f"Router on http://127.0.0.1:{args.port}, shards: {', '.join(shards)}")
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
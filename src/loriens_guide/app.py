@@ -4,25 +4,105 @@ This backend server receives requests from the mobile app and processes them
 using the VLM service to provide accessibility assistance.
 """
 
+import json
+import math
 import os
+from collections.abc import Iterator, Mapping
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request, stream_with_context
 from flask.wrappers import Response
 from flask_cors import CORS
 
-from loriens_guide.vlm_service import VLMService
+from loriens_guide.deadline import deadline_from_request
+from loriens_guide.dispatcher import DESCRIPTIVE, URGENT, PriorityDispatcher, classify_query
+from loriens_guide.fanout import STRATEGIES, fanout_limits
+from loriens_guide.http_cache import ListingCache
+from loriens_guide.profiling import install_profiler, profiler_from_env
+from loriens_guide.ratelimit import (
+    api_keys_from_env,
+    client_key,
+    limiter_from_env,
+    request_cost,
+    trust_forwarded_from_env,
+)
+from loriens_guide.vlm_service import VLMService, local_response
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["Retry-After"])
 
 # Initialize VLM service
 vlm_service = VLMService()
 
+# Hazard/navigation questions are served ahead of descriptive ones
+dispatcher = PriorityDispatcher(workers=int(os.getenv("VLM_DISPATCH_WORKERS", "8")))
+
+# Camera listings, serialized and compressed once per registry version
+listings = ListingCache(max_age_s=int(os.getenv("CAMERA_LIST_MAX_AGE_S", "10")))
+
+# Per-client request budget on the endpoints that call the VLM (None when disabled)
+rate_limiter = limiter_from_env()
+TRUST_PROXY = trust_forwarded_from_env()
+API_KEYS = api_keys_from_env()
+RATE_LIMITED_ENDPOINTS = {"process_query", "process_batch_query"}
+
+# Sampling profiler for live requests (nothing is installed unless PROFILER_ENABLED is true)
+profiler = profiler_from_env()
+if profiler is not None:
+    install_profiler(app, profiler, prefix="/api/v1/debug/profiles")
+
+
+def camera_listing(headers: Mapping) -> Response:
+    """Return the full camera listing, built at most once per registry version."""
+    return listings.respond(
+        "cameras", vlm_service.registry_version(), lambda: {"cameras": vlm_service.cameras}, headers
+    )
+
+
+def create_app() -> Flask:
+    """Return the app with its shared state built, for servers that load it before forking.
+
+    With gunicorn's ``preload_app`` the camera registry and the pre-serialized camera
+    listing are built once in the master and shared copy-on-write by all workers.
+    """
+    vlm_service.warm_up()
+    camera_listing({})
+    vlm_service.close_connections()
+    return app
+
+
+@app.before_request
+def start_background_tasks() -> None:
+    """Start the clip watcher and background pre-analysis on the first request, after the worker has forked."""
+    vlm_service.start_background_tasks()
+
+
+@app.before_request
+def limit_vlm_requests() -> tuple[Response, int] | None:
+    """Identify the client and reject its VLM requests with 429 once it is over its rate.
+
+    A batch costs one token per item and a fan-out one per camera it may ask, so neither
+    can be used to get around the limit.
+    """
+    g.client = client_key(request.headers, request.remote_addr, trust_forwarded=TRUST_PROXY, api_keys=API_KEYS)
+    if rate_limiter is None or request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    cost = 1
+    if request.endpoint in ("process_batch_query", "process_query"):
+        cost = request_cost(request.get_json(silent=True), batch=request.endpoint == "process_batch_query")
+    retry_after = rate_limiter.acquire(g.client, cost)
+    if not retry_after:
+        return None
+    response = jsonify(
+        {"error": True, "message": "Too many requests, please retry later", "retry_after_s": round(retry_after, 3)}
+    )
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response, 429
+
 
 @app.route("/health", methods=["GET"])
 def health_check() -> tuple[Response, int]:
@@ -30,6 +110,20 @@ def health_check() -> tuple[Response, int]:
     return jsonify({"status": "healthy", "service": "Hafnia VLM API"}), 200
 
 
+@app.route("/api/v1/metrics", methods=["GET"])
+def get_metrics() -> tuple[Response, int]:
+    """Expose VLM upstream protection state and per-class queue waits for monitoring."""
+    return jsonify(
+        {
+            **vlm_service.get_metrics(),
+            "dispatcher": dispatcher.snapshot(),
+            "listings": listings.snapshot(),
+            "rate_limit": rate_limiter.snapshot() if rate_limiter else {"enabled": False},
+            "profiler": profiler.snapshot() if profiler else {"enabled": False},
+        }
+    ), 200
+
+
 @app.route("/api/v1/query", methods=["POST"])
 def process_query() -> tuple[Response, int]:
     """Main endpoint for processing user queries.
@@ -38,7 +132,11 @@ def process_query() -> tuple[Response, int]:
     {
         "lat": 55.6761,
         "long": 12.5683,
-        "question_text": "I'm looking for the exit, where is it?"
+        "question_text": "I'm looking for the exit, where is it?",
+        "deadline_ms": 20000  (optional, or the X-Deadline-Ms header),
+        "mode": "first"  (optional: "first" or "merge" asks the nearest cameras in parallel),
+        "max_cameras": 3,  (optional, with mode; at most MAX_FANOUT_CAMERAS)
+        "radius_m": 500  (optional, with mode; at most MAX_FANOUT_RADIUS_M)
     }
 
     Returns JSON response:
@@ -71,21 +169,119 @@ def process_query() -> tuple[Response, int]:
     except (ValueError, TypeError):
         return jsonify({"error": True, "message": "Invalid parameter types"}), 400
 
-    # Process the request
-    response = vlm_service.process_user_request(lat, long, question_text)
+    # Process the request within the client's (or the server default) latency budget
+    deadline = deadline_from_request(data, request.headers)
+
+    # Questions that do not need the camera ("help", "where am I") are answered without queueing for the VLM
+    local_answer = vlm_service.answer_locally(question_text, lat, long)
+    if local_answer is not None:
+        return jsonify(local_response(question_text, local_answer))
+
+    mode = data.get("mode")
+    if mode is not None:
+        if mode not in STRATEGIES:
+            return jsonify({"error": True, "message": f"Unknown mode: {mode}"}), 400
+        try:
+            max_cameras, radius_m = fanout_limits(data)
+        except ValueError as e:
+            return jsonify({"error": True, "message": str(e)}), 400
+        query_class = classify_query(question_text)
+        client = g.client
+        response = vlm_service.process_user_request_fanout(
+            lat,
+            long,
+            question_text,
+            max_cameras=max_cameras,
+            radius_m=radius_m,
+            strategy=mode,
+            deadline=deadline,
+            submit=lambda fn, *args: dispatcher.submit(query_class, fn, *args, client=client),
+        )
+        status_code = 500 if response.get("error", False) else 200
+        return jsonify(response), status_code
+
+    response = dispatcher.run(
+        question_text, vlm_service.process_user_request, lat, long, question_text, deadline=deadline, client=g.client
+    )
 
     # Return response
     status_code = 500 if response.get("error", False) else 200
     return jsonify(response), status_code
 
 
+@app.route("/api/v1/query/batch", methods=["POST"])
+def process_batch_query() -> tuple[Response, int] | Response:
+    """Answer several questions in one request, uploading each camera's clip only once.
+
+    Expected JSON payload:
+    {
+        "items": [
+            {"camera_id": "lib_lobby_01", "question_text": "Where is the exit?"},
+            {"lat": 55.6761, "long": 12.5683, "question_text": "Is the path clear?"}
+        ],
+        "stream": false  (optional: stream one NDJSON line per answer as it completes),
+        "deadline_ms": 20000  (optional, or the X-Deadline-Ms header)
+    }
+
+    Returns JSON response with one result per item, in request order:
+    {
+        "results": [{"index": 0, "camera_id": "lib_lobby_01", "answer": "...", "error": false}, ...]
+    }
+    """
+    if not request.is_json:
+        return jsonify({"error": True, "message": "Request must be JSON"}), 400
+
+    data = request.get_json()
+    raw_items = data.get("items")
+    if not isinstance(raw_items, list) or not raw_items:
+        return jsonify({"error": True, "message": "Missing required field: items"}), 400
+
+    items = []
+    for raw_item in raw_items:
+        if not isinstance(raw_item, dict) or "question_text" not in raw_item:
+            return jsonify({"error": True, "message": "Every item needs a question_text"}), 400
+        item = {"question_text": str(raw_item["question_text"])}
+        if "camera_id" in raw_item:
+            item["camera_id"] = str(raw_item["camera_id"])
+        elif "lat" in raw_item and "long" in raw_item:
+            try:
+                item["lat"] = float(raw_item["lat"])
+                item["long"] = float(raw_item["long"])
+            except (ValueError, TypeError):
+                return jsonify({"error": True, "message": "Invalid parameter types"}), 400
+        else:
+            return jsonify({"error": True, "message": "Every item needs a camera_id or lat and long"}), 400
+        items.append(item)
+
+    # The whole batch runs at the priority of its most urgent question
+    urgent = any(classify_query(item["question_text"]) == URGENT for item in items)
+    query_class = URGENT if urgent else DESCRIPTIVE
+    client = g.client
+    results = vlm_service.process_batch_request(
+        items,
+        deadline=deadline_from_request(data, request.headers),
+        submit=lambda fn, *args: dispatcher.submit(query_class, fn, *args, client=client),
+    )
+
+    if data.get("stream"):
+
+        def ndjson() -> Iterator[str]:
+            for result in results:
+                yield json.dumps(result) + "\n"
+
+        return Response(stream_with_context(ndjson()), mimetype="application/x-ndjson")
+
+    return jsonify({"results": sorted(results, key=lambda result: result["index"])}), 200
+
+
 @app.route("/api/v1/cameras", methods=["GET"])
-def list_cameras() -> tuple[Response, int]:
+def list_cameras() -> Response:
     """List all available cameras.
 
-    Returns JSON response with all cameras and their locations.
+    Returns JSON response with all cameras and their locations, with a strong ETag;
+    a client sending it back in If-None-Match gets 304 while the registry is unchanged.
     """
-    return jsonify({"cameras": vlm_service.cameras}), 200
+    return camera_listing(request.headers)
 
 
 @app.route("/api/v1/cameras/nearest", methods=["POST"])
@@ -0,0 +1,151 @@
+"""Batch Module.
+
+Answers many questions about a few cameras with as few upstream calls as possible:
+1. Grouping batch items by camera
+2. Uploading each camera's clip once and asking its questions concurrently
+3. Deleting each asset once all of its questions are answered
+4. Yielding every answer as soon as it is ready, so results can be streamed
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _default_submit(fn: Callable, *args: object) -> Future:
+    global _executor  # noqa: PLW0603
+    # Created on first use so no threads exist before a fork
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="vlm-batch")
+    return _executor.submit(fn, *args)
+
+
+def group_by_camera(items: list, resolve: Callable[[object], tuple[str, dict] | dict]) -> tuple[dict, dict]:
+    """Group batch items by the camera that answers them.
+
+    Args:
+        items: Batch items, in request order
+        resolve: Function returning an item's (camera id, camera), or an error dictionary
+
+    Returns:
+        Tuple of the groups (camera id to ``{"camera": ..., "indices": [...]}``, in order
+        of first appearance) and the errors of unresolvable items by index
+
+    """
+    groups: dict[str, dict] = {}
+    errors: dict[int, dict] = {}
+    for index, item in enumerate(items):
+        resolved = resolve(item)
+        if isinstance(resolved, dict):
+            errors[index] = resolved
+            continue
+        camera_id, camera = resolved
+        groups.setdefault(camera_id, {"camera": camera, "indices": []})["indices"].append(index)
+    return groups, errors
+
+
+class _Group:
+    """Tracks one uploaded clip until all of its questions are answered."""
+
+    def __init__(self, key: object, indices: list[int]) -> None:
+        self.key = key
+        self.indices = indices
+        self.upload: dict = {}
+        self.pending = len(indices)
+        self.lock = threading.Lock()
+
+
+def run_batch(
+    groups: dict[object, list[int]],
+    *,
+    upload: Callable[[object], dict],
+    ask: Callable[[object, dict, int], dict],
+    cleanup: Callable[[object, dict], None],
+    submit: Callable[..., Future] | None = None,
+    timeout: float | None = None,
+) -> Iterator[tuple[int, dict]]:
+    """Run a batch: one upload per group, then all of the group's questions concurrently.
+
+    Work is chained through future callbacks rather than waited on, so no job ever blocks
+    a worker waiting for another job and a shared worker pool cannot deadlock. Every
+    question gets exactly one result, even if a callback fails or the batch times out.
+
+    Args:
+        groups: Question indices per group key (e.g. per camera)
+        upload: Function uploading a group's clip; the result holds ``asset_id`` or an error
+        ask: Function answering the question at an index using a group's upload result
+        cleanup: Function deleting a group's uploaded asset once its questions are answered
+        submit: Function scheduling ``fn(*args)`` and returning a Future
+        timeout: Optional seconds to wait for all answers; questions still unanswered by then
+            get a ``timed_out`` error result
+
+    Yields:
+        (index, result) pairs, in the order the answers complete
+
+    """
+    submit = submit or _default_submit
+    results: queue.Queue[tuple[int, dict]] = queue.Queue()
+    lost = {"error": True, "message": "The answer was lost"}
+
+    def failed(error: BaseException) -> dict:
+        return {"error": True, "message": str(error)}
+
+    def outcome(future: Future) -> dict:
+        if future.cancelled():
+            return {"error": True, "message": "Cancelled"}
+        error = future.exception()
+        return failed(error) if error else future.result()
+
+    def finish(group: _Group, count: int) -> None:
+        with group.lock:
+            group.pending -= count
+            done = group.pending == 0
+        if done:
+            cleanup(group.key, group.upload)
+
+    def on_answer(group: _Group, index: int, future: Future) -> None:
+        result = lost
+        try:
+            result = outcome(future)
+        finally:
+            results.put((index, result))
+            finish(group, 1)
+
+    def on_upload(group: _Group, future: Future) -> None:
+        unasked = list(group.indices)
+        try:
+            group.upload = outcome(future)
+            if "error" in group.upload:
+                # Every question of the group shares the upload's failure
+                return
+            for index in group.indices:
+                answer = submit(ask, group.key, group.upload, index)
+                unasked.remove(index)
+                answer.add_done_callback(lambda f, index=index: on_answer(group, index, f))
+        finally:
+            for index in unasked:
+                results.put((index, group.upload if "error" in group.upload else lost))
+            if unasked and group.upload and "error" not in group.upload:
+                finish(group, len(unasked))
+
+    for key, indices in groups.items():
+        group = _Group(key, indices)
+        submit(upload, key).add_done_callback(lambda f, group=group: on_upload(group, f))
+
+    expires_at = None if timeout is None else time.monotonic() + timeout
+    missing = {index for indices in groups.values() for index in indices}
+    while missing:
+        try:
+            index, result = results.get(timeout=None if expires_at is None else max(0.0, expires_at - time.monotonic()))
+        except queue.Empty:
+            break
+        missing.discard(index)
+        yield index, result
+    for index in sorted(missing):
+        yield index, {"error": True, "timed_out": True, "message": "No answer before the batch timed out"}
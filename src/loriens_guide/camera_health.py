@@ -0,0 +1,65 @@
+"""Camera Health Module.
+
+Tracks how well each camera has served recent VLM requests (success rate and
+latency, as exponentially weighted moving averages) to inform camera selection.
+"""
+
+import threading
+
+
+class CameraHealthTracker:
+    """Per-camera EWMA of VLM latency and success rate."""
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        """Initialize the tracker.
+
+        Args:
+            alpha: Weight of the newest sample in the moving averages (0-1)
+
+        """
+        self.alpha = alpha
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, camera_id: str, latency: float, success: bool) -> None:
+        """Record the outcome of a VLM request against a camera.
+
+        Args:
+            camera_id: Camera the request used
+            latency: Duration of the request in seconds
+            success: Whether the request produced a usable answer
+
+        """
+        with self._lock:
+            stats = self._stats.get(camera_id)
+            if stats is None:
+                self._stats[camera_id] = {
+                    "requests": 1,
+                    "failures": 0 if success else 1,
+                    "latency_ewma_s": latency,
+                    "success_ewma": 1.0 if success else 0.0,
+                }
+                return
+            stats["requests"] += 1
+            stats["failures"] += 0 if success else 1
+            stats["latency_ewma_s"] += self.alpha * (latency - stats["latency_ewma_s"])
+            stats["success_ewma"] += self.alpha * ((1.0 if success else 0.0) - stats["success_ewma"])
+
+    def get(self, camera_id: str) -> dict | None:
+        """Return a copy of a camera's statistics, or None if it was never used."""
+        with self._lock:
+            stats = self._stats.get(camera_id)
+            return dict(stats) if stats else None
+
+    def snapshot(self) -> dict:
+        """Return all cameras' statistics for monitoring."""
+        with self._lock:
+            return {
+                camera_id: {
+                    "requests": stats["requests"],
+                    "failures": stats["failures"],
+                    "latency_ewma_s": round(stats["latency_ewma_s"], 3),
+                    "success_ewma": round(stats["success_ewma"], 3),
+                }
+                for camera_id, stats in self._stats.items()
+            }
@@ -0,0 +1,267 @@
+"""Camera Scoring Module.
+
+Picks the camera most likely to answer a question usefully and fast, instead
+of simply the nearest one:
+1. Distance between the camera and the user
+2. Whether the camera faces the user (its orientation against the bearing to the user)
+3. Whether its capabilities match the kind of question
+4. How fresh its clip is
+5. Its recent VLM latency and success rate (EWMA, from the camera health tracker)
+
+What depends only on the registry (position, orientation, capabilities, status)
+is precomputed once per camera and registry version, so ranking a request only
+evaluates the live terms.
+"""
+
+import math
+import re
+import threading
+from collections.abc import Callable
+
+from loriens_guide.camera_health import CameraHealthTracker
+from loriens_guide.camera_store import camera_coordinates, camera_id_of
+from loriens_guide.geo import haversine_distance, initial_bearing
+
+# Relative weight of each term in a camera's score
+DEFAULT_WEIGHTS = {
+    "distance": 0.35,
+    "orientation": 0.15,
+    "capability": 0.15,
+    "freshness": 0.1,
+    "health": 0.25,
+}
+
+# Score of a term nothing is known about (no orientation, no clip age, never used)
+NEUTRAL = 0.5
+
+# Closer than this the bearing to the user says nothing about what the camera sees
+_MIN_BEARING_DISTANCE_M = 3.0
+
+_COMPASS = {
+    "north": 0.0,
+    "northeast": 45.0,
+    "east": 90.0,
+    "southeast": 135.0,
+    "south": 180.0,
+    "southwest": 225.0,
+    "west": 270.0,
+    "northwest": 315.0,
+    "n": 0.0,
+    "ne": 45.0,
+    "e": 90.0,
+    "se": 135.0,
+    "s": 180.0,
+    "sw": 225.0,
+    "w": 270.0,
+    "nw": 315.0,
+}
+_COMPASS_PATTERN = re.compile(r"\b(" + "|".join(sorted(_COMPASS, key=len, reverse=True)) + r")\b")
+_DEGREES_PATTERN = re.compile(r"(-?\d+(?:\.\d+)?)\s*(?:°|deg|degrees)?")
+
+# Capabilities a question needs, by the words it contains
+_CAPABILITY_PATTERNS = (
+    ("text_recognition", re.compile(r"\b(read|sign|signs|text|written|say|says|label|number|timetable|menu)\b")),
+    ("person_detection", re.compile(r"\b(people|person|crowd|crowded|busy|queue|line|someone|anyone|staff)\b")),
+    (
+        "object_detection",
+        re.compile(r"\b(obstacle|obstacles|hazard|hazards|blocked|block|object|objects|door|stairs|steps|chair)\b"),
+    ),
+)
+
+
+def parse_orientation(value: object) -> float | None:
+    """Read a camera's facing direction from the registry.
+
+    Args:
+        value: A bearing in degrees, or text such as "facing east", "NE" or "120°"
+
+    Returns:
+        Degrees clockwise from north (0-360), or None if it cannot be read
+
+    """
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value) % 360
+    if not isinstance(value, str):
+        return None
+    # "north east" and "north-east" both mean northeast
+    text = re.sub(r"\b(north|south)[\s-]+(east|west)\b", r"\1\2", value.lower())
+    match = _COMPASS_PATTERN.search(text)
+    if match:
+        return _COMPASS[match.group(1)]
+    match = _DEGREES_PATTERN.search(text)
+    return float(match.group(1)) % 360 if match else None
+
+
+def required_capabilities(question_text: str) -> frozenset[str]:
+    """Return the camera capabilities a question needs, e.g. text recognition to read a sign."""
+    text = (question_text or "").lower()
+    return frozenset(capability for capability, pattern in _CAPABILITY_PATTERNS if pattern.search(text))
+
+
+class _Profile:
+    """Registry-derived part of a camera's score."""
+
+    __slots__ = ("active", "capabilities", "lat", "long", "orientation")
+
+    def __init__(self, camera: dict) -> None:
+        self.lat, self.long = camera_coordinates(camera)
+        self.orientation = parse_orientation(camera.get("orientation"))
+        capabilities = camera.get("capabilities")
+        self.capabilities = frozenset(capabilities) if isinstance(capabilities, list) else None
+        # Cameras without a status are assumed to work
+        self.active = camera.get("status", "active") == "active"
+
+
+class CameraScorer:
+    """Rank candidate cameras for a question by a weighted sum of scores between 0 and 1."""
+
+    def __init__(
+        self,
+        health: CameraHealthTracker,
+        *,
+        clip_age: Callable[[dict], float | None] | None = None,
+        weights: dict[str, float] | None = None,
+        half_distance_m: float = 50.0,
+        freshness_half_life_s: float = 300.0,
+        latency_scale_s: float = 10.0,
+    ) -> None:
+        """Initialize the scorer.
+
+        Args:
+            health: Tracker of each camera's recent VLM latency and success rate
+            clip_age: Function returning the age in seconds of a camera's clip, or None if unknown
+            weights: Relative weight of each term (see DEFAULT_WEIGHTS)
+            half_distance_m: Distance at which the distance score has halved
+            freshness_half_life_s: Clip age at which the freshness score has halved
+            latency_scale_s: Latency EWMA at which the latency part of the health score has halved
+
+        """
+        self.health = health
+        self._clip_age = clip_age
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.half_distance_m = half_distance_m
+        self.freshness_half_life_s = freshness_half_life_s
+        self.latency_scale_s = latency_scale_s
+        self._profiles: dict[str, _Profile] = {}
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        self._rankings = 0
+        self._not_nearest = 0
+        self._inactive_skipped = 0
+
+    def _profile(self, camera: dict, version: str | None) -> _Profile:
+        """Return a camera's precomputed profile, rebuilt when the registry version changes."""
+        camera_id = camera_id_of(camera)
+        with self._lock:
+            if version != self._version:
+                self._profiles.clear()
+                self._version = version
+            profile = self._profiles.get(camera_id)
+        if profile is None:
+            profile = _Profile(camera)
+            with self._lock:
+                self._profiles[camera_id] = profile
+        return profile
+
+    def score(
+        self, camera: dict, lat: float, long: float, needs: frozenset[str], *, version: str | None = None
+    ) -> dict | None:
+        """Score one camera for a user's position and question.
+
+        Args:
+            camera: Camera dictionary (either registry schema)
+            lat: User's latitude
+            long: User's longitude
+            needs: Capabilities the question needs (see required_capabilities)
+            version: Registry version the camera was read from
+
+        Returns:
+            Dictionary with the total ``score``, the ``distance_m`` and each term's score,
+            or None for a camera that is not active
+
+        """
+        profile = self._profile(camera, version)
+        if not profile.active:
+            return None
+        distance_m = haversine_distance(lat, long, profile.lat, profile.long)
+        terms = {
+            "distance": 1 / (1 + distance_m / self.half_distance_m),
+            "orientation": self._orientation_score(profile, lat, long, distance_m),
+            "capability": self._capability_score(profile, needs),
+            "freshness": self._freshness_score(camera),
+            "health": self._health_score(camera_id_of(camera)),
+        }
+        total = sum(self.weights[name] * value for name, value in terms.items()) / sum(self.weights.values())
+        return {"score": total, "distance_m": distance_m, **terms}
+
+    def rank(
+        self, cameras: list[dict], lat: float, long: float, question_text: str, *, version: str | None = None
+    ) -> list[dict]:
+        """Order cameras by their score for a question, best first, leaving out inactive ones.
+
+        Args:
+            cameras: Candidate cameras
+            lat: User's latitude
+            long: User's longitude
+            question_text: The user's question
+            version: Registry version the cameras were read from
+
+        Returns:
+            The active cameras, best first
+
+        """
+        needs = required_capabilities(question_text)
+        scored = []
+        for camera in cameras:
+            result = self.score(camera, lat, long, needs, version=version)
+            if result is not None:
+                scored.append((result["score"], -result["distance_m"], camera))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        with self._lock:
+            self._rankings += 1
+            self._inactive_skipped += len(cameras) - len(scored)
+            if scored and scored[0][1] != max(item[1] for item in scored):
+                self._not_nearest += 1
+        return [camera for _, _, camera in scored]
+
+    def _orientation_score(self, profile: _Profile, lat: float, long: float, distance_m: float) -> float:
+        """Score how directly the camera looks towards the user (1 facing them, 0 facing away)."""
+        if profile.orientation is None or distance_m < _MIN_BEARING_DISTANCE_M:
+            return NEUTRAL
+        bearing = initial_bearing(profile.lat, profile.long, lat, long)
+        return (1 + math.cos(math.radians(bearing - profile.orientation))) / 2
+
+    @staticmethod
+    def _capability_score(profile: _Profile, needs: frozenset[str]) -> float:
+        """Score the share of the needed capabilities the camera has."""
+        if not needs:
+            return 1.0
+        if profile.capabilities is None:
+            return NEUTRAL
+        return len(needs & profile.capabilities) / len(needs)
+
+    def _freshness_score(self, camera: dict) -> float:
+        """Score the clip's age (1 for a clip written just now, halving every half-life)."""
+        age = self._clip_age(camera) if self._clip_age is not None else None
+        if age is None:
+            return NEUTRAL
+        return 0.5 ** (age / self.freshness_half_life_s)
+
+    def _health_score(self, camera_id: str) -> float:
+        """Score the camera's recent success rate, discounted by its latency."""
+        stats = self.health.get(camera_id)
+        if stats is None:
+            return NEUTRAL
+        return stats["success_ewma"] / (1 + stats["latency_ewma_s"] / self.latency_scale_s)
+
+    def snapshot(self) -> dict:
+        """Return the weights and how often scoring chose another camera than the nearest."""
+        with self._lock:
+            return {
+                "enabled": True,
+                "weights": dict(self.weights),
+                "profiles": len(self._profiles),
+                "rankings": self._rankings,
+                "not_nearest": self._not_nearest,
+                "inactive_skipped": self._inactive_skipped,
+            }
@@ -0,0 +1,494 @@
+"""Camera Store Module.
+
+SQLite-backed camera registry:
+1. Cameras stored as JSON documents, keyed by id (B-tree index)
+2. Locations in an R*Tree index for radius and nearest-camera lookups
+3. WAL journal mode, so concurrent readers never block on a writer
+4. An importer for the legacy JSON registry files
+5. Streaming NDJSON import and export, validated and applied as one registry version
+
+Both registry schemas in this repository are accepted: the backend's
+(``id``, ``location.latitude/longitude``) and cameras.json's
+(``camera_id``, ``location.lat/long``). Documents are returned unchanged.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from loriens_guide.geo import bounding_boxes, haversine_distance
+
+logger = logging.getLogger(__name__)
+
+# Radii tried, in order, when looking for the nearest camera
+NEAREST_SEARCH_RADII_M = (100.0, 1_000.0, 10_000.0, 100_000.0, 1_000_000.0)
+
+# Cameras written per statement batch
+WRITE_BATCH_SIZE = 1000
+
+# Invalid lines described in a rejected import; the others are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Valid coordinates, in degrees
+MAX_LATITUDE = 90.0
+MAX_LONGITUDE = 180.0
+
+_UPSERT = (
+    "INSERT INTO cameras (id, latitude, longitude, status, data, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET latitude = excluded.latitude, longitude = excluded.longitude, "
+    "status = excluded.status, data = excluded.data, updated_at = excluded.updated_at"
+)
+
+# Location index updates for a batch of cameras, given as a JSON array of ids; moved
+# cameras are replaced in the index, and cameras that lost their location removed from it
+_UNINDEX = (
+    "DELETE FROM camera_locations WHERE rowid IN (SELECT rowid FROM cameras "
+    "WHERE id IN (SELECT value FROM json_each(?)) AND (latitude IS NULL OR longitude IS NULL))"
+)
+_INDEX = (
+    "INSERT OR REPLACE INTO camera_locations SELECT rowid, latitude, latitude, longitude, longitude FROM cameras "
+    "WHERE id IN (SELECT value FROM json_each(?)) AND latitude IS NOT NULL AND longitude IS NOT NULL"
+)
+
+_LOCATIONS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS camera_locations USING rtree(
+    rowid, min_lat, max_lat, min_long, max_long
+)
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    latitude REAL,
+    longitude REAL,
+    status TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+
+def camera_id_of(camera: dict) -> str | None:
+    """Return a camera's id in either registry schema."""
+    return camera.get("id") or camera.get("camera_id")
+
+
+def camera_coordinates(camera: dict) -> tuple[float, float] | None:
+    """Return a camera's (latitude, longitude) in either registry schema, or None."""
+    location = camera.get("location") or {}
+    lat = location.get("latitude", location.get("lat"))
+    long = location.get("longitude", location.get("long"))
+    if lat is None or long is None:
+        return None
+    return float(lat), float(long)
+
+
+def camera_error(camera: object) -> str | None:
+    """Return why a camera document cannot be imported, or None if it is valid.
+
+    A camera needs a non-empty string id; its location, status and capabilities are
+    optional but must be well-formed when present.
+    """
+    if not isinstance(camera, dict):
+        return "Camera must be a JSON object"
+    camera_id = camera_id_of(camera)
+    if not isinstance(camera_id, str) or not camera_id.strip():
+        return "Camera is missing an id"
+    location = camera.get("location")
+    if location is not None:
+        if not isinstance(location, dict):
+            return f"Camera {camera_id}: location must be an object"
+        try:
+            coordinates = camera_coordinates(camera)
+        except (TypeError, ValueError):
+            return f"Camera {camera_id}: latitude and longitude must be numbers"
+        if coordinates is None:
+            return f"Camera {camera_id}: location needs a latitude and a longitude"
+        lat, long = coordinates
+        if not (math.isfinite(lat) and math.isfinite(long) and abs(lat) <= MAX_LATITUDE and abs(long) <= MAX_LONGITUDE):
+            return f"Camera {camera_id}: location out of range"
+    if "status" in camera and not isinstance(camera["status"], str):
+        return f"Camera {camera_id}: status must be a string"
+    capabilities = camera.get("capabilities")
+    if capabilities is not None and not (
+        isinstance(capabilities, list) and all(isinstance(item, str) for item in capabilities)
+    ):
+        return f"Camera {camera_id}: capabilities must be a list of strings"
+    return None
+
+
+class CameraImportError(ValueError):
+    """An import containing invalid cameras; none of its cameras were written."""
+
+    def __init__(self, errors: list[dict], invalid: int) -> None:
+        """Initialize the error.
+
+        Args:
+            errors: ``{"line": ..., "message": ...}`` of the first invalid lines
+            invalid: Number of invalid lines
+
+        """
+        self.errors = errors
+        self.invalid = invalid
+        super().__init__(f"{invalid} invalid cameras, first on line {errors[0]['line']}: {errors[0]['message']}")
+
+
+def load_json_cameras(path: str | Path) -> list[dict]:
+    """Read cameras from a JSON registry file ({"cameras": [...]} or a bare list)."""
+    with Path(path).open() as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else data.get("cameras", [])
+
+
+class CameraStore:
+    """Camera registry stored in SQLite with an R*Tree location index."""
+
+    def __init__(self, db_path: str | Path) -> None:
+        """Open (and create if needed) the camera database.
+
+        Args:
+            db_path: Path of the SQLite database file
+
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(_LOCATIONS_TABLE)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening a new one after a fork."""
+        if self._pid != os.getpid():
+            # Connections must never be shared with a parent process
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Reads
+
+    def version(self) -> int:
+        """Return the registry version, incremented by every write."""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row["value"]
+
+    def count(self) -> int:
+        """Return the number of cameras."""
+        return self._connection().execute("SELECT COUNT(*) FROM cameras").fetchone()[0]
+
+    def list_cameras(self) -> list[dict]:
+        """Return every camera document, in insertion order."""
+        rows = self._connection().execute("SELECT data FROM cameras ORDER BY rowid")
+        return [json.loads(row["data"]) for row in rows]
+
+    def get_camera(self, camera_id: str) -> dict | None:
+        """Return a camera document by id, or None if it does not exist."""
+        row = self._connection().execute("SELECT data FROM cameras WHERE id = ?", (camera_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def find_within(
+        self, lat: float, long: float, radius_m: float, limit: int | None = None
+    ) -> list[tuple[float, dict]]:
+        """Find the cameras within a radius, nearest first.
+
+        The R*Tree narrows the search to the bounding boxes (two across the antimeridian);
+        exact distances are then computed only for the cameras inside them.
+
+        Args:
+            lat: Latitude of the search center
+            long: Longitude of the search center
+            radius_m: Search radius in meters
+            limit: Optional maximum number of cameras
+
+        Returns:
+            List of (distance in meters, camera document) tuples
+
+        """
+        found = []
+        seen = set()
+        for min_lat, max_lat, min_long, max_long in bounding_boxes(lat, long, radius_m):
+            rows = self._connection().execute(
+                "SELECT c.rowid, c.latitude, c.longitude, c.data FROM camera_locations AS l "
+                "JOIN cameras AS c ON c.rowid = l.rowid "
+                "WHERE l.max_lat >= ? AND l.min_lat <= ? AND l.max_long >= ? AND l.min_long <= ?",
+                (min_lat, max_lat, min_long, max_long),
+            )
+            for row in rows:
+                # A camera on the antimeridian is inside both boxes
+                if row["rowid"] in seen:
+                    continue
+                seen.add(row["rowid"])
+                distance = haversine_distance(lat, long, row["latitude"], row["longitude"])
+                if distance <= radius_m:
+                    found.append((distance, row["data"]))
+        found.sort(key=lambda item: item[0])
+        return [(distance, json.loads(data)) for distance, data in found[:limit]]
+
+    def find_nearest(self, lat: float, long: float) -> dict | None:
+        """Return the camera nearest to a point, searching outwards in growing radii."""
+        for radius_m in NEAREST_SEARCH_RADII_M:
+            found = self.find_within(lat, long, radius_m, limit=1)
+            if found:
+                return found[0][1]
+        # Further away than the largest radius: fall back to a full scan
+        nearest = None
+        min_distance = float("inf")
+        for row in self._connection().execute(
+            "SELECT latitude, longitude, data FROM cameras WHERE latitude IS NOT NULL"
+        ):
+            distance = haversine_distance(lat, long, row["latitude"], row["longitude"])
+            if distance < min_distance:
+                min_distance, nearest = distance, row["data"]
+        return json.loads(nearest) if nearest else None
+
+    # Writes
+
+    @staticmethod
+    def _row(camera: dict, now: float) -> tuple:
+        """Return the cameras table row of a camera document."""
+        camera_id = camera_id_of(camera)
+        if not camera_id:
+            msg = "Camera is missing an id"
+            raise ValueError(msg)
+        lat, long = camera_coordinates(camera) or (None, None)
+        return (camera_id, lat, long, camera.get("status"), json.dumps(camera), now)
+
+    def _write_many(self, conn: sqlite3.Connection, cameras: Iterable[dict]) -> int:
+        """Write cameras in batches, updating the location index of each batch's cameras only.
+
+        Returns:
+            Number of cameras written
+
+        """
+        written = 0
+        now = time.time()
+        cameras = iter(cameras)
+        while batch := list(itertools.islice(cameras, WRITE_BATCH_SIZE)):
+            rows = [self._row(camera, now) for camera in batch]
+            ids = json.dumps([row[0] for row in rows])
+            conn.executemany(_UPSERT, rows)
+            # One statement per batch instead of one per camera
+            conn.execute(_UNINDEX, (ids,))
+            conn.execute(_INDEX, (ids,))
+            written += len(rows)
+        return written
+
+    @staticmethod
+    def _clear(conn: sqlite3.Connection) -> None:
+        """Delete every camera, within the caller's transaction."""
+        conn.execute("DELETE FROM cameras")
+        # Recreating the location index is much faster than deleting its entries one by one
+        conn.execute("DROP TABLE camera_locations")
+        conn.execute(_LOCATIONS_TABLE)
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def upsert_cameras(self, cameras: Iterable[dict]) -> int:
+        """Insert or update cameras in a single transaction.
+
+        Args:
+            cameras: Camera documents in either registry schema
+
+        Returns:
+            Number of cameras written
+
+        """
+        conn = self._connection()
+        with conn:
+            written = self._write_many(conn, cameras)
+            self._bump_version(conn)
+        return written
+
+    def upsert_camera(self, camera: dict) -> None:
+        """Insert or update a single camera."""
+        self.upsert_cameras([camera])
+
+    def replace_all(self, cameras: Iterable[dict]) -> int:
+        """Atomically replace the whole registry.
+
+        Args:
+            cameras: The new set of camera documents
+
+        Returns:
+            Number of cameras written
+
+        """
+        conn = self._connection()
+        with conn:
+            self._clear(conn)
+            written = self._write_many(conn, cameras)
+            self._bump_version(conn)
+        return written
+
+    def import_ndjson(self, lines: Iterable[str | bytes], *, replace: bool = False) -> int:
+        """Import cameras streamed as NDJSON (one camera document per line) as one registry version.
+
+        Lines are validated and written in batches as they arrive, so memory stays
+        constant however many cameras are imported. If any line is invalid nothing is
+        written: the rest is still validated, to report every problem at once.
+        Readers see the previous version until the import commits.
+
+        Args:
+            lines: NDJSON lines, e.g. a request body stream; blank lines are skipped
+            replace: Replace the whole registry instead of inserting or updating cameras
+
+        Returns:
+            Number of cameras imported
+
+        Raises:
+            CameraImportError: If a line is not a valid camera document
+
+        """
+        errors: list[dict] = []
+        invalid = 0
+
+        def valid_cameras() -> Iterator[dict]:
+            nonlocal invalid
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    camera = json.loads(line)
+                except ValueError as e:
+                    message = f"Invalid JSON: {e}"
+                else:
+                    message = camera_error(camera)
+                if message is not None:
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": number, "message": message})
+                elif not invalid:
+                    yield camera
+
+        conn = self._connection()
+        with conn:
+            if replace:
+                self._clear(conn)
+            written = self._write_many(conn, valid_cameras())
+            if invalid:
+                # Raised inside the transaction, so everything written is rolled back
+                raise CameraImportError(errors, invalid)
+            self._bump_version(conn)
+        logger.info(f"Imported {written} cameras from NDJSON into {self.db_path} (replace={replace})")
+        return written
+
+    def export_ndjson(self) -> Iterator[str]:
+        """Yield every camera document as an NDJSON line, in insertion order.
+
+        The documents are stored as JSON, so they are streamed without being decoded,
+        all from one snapshot of the registry.
+        """
+        # A connection of its own, so the export's read does not share a cursor with other reads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            for (data,) in conn.execute("SELECT data FROM cameras ORDER BY rowid"):
+                yield data + "\n"
+        finally:
+            conn.close()
+
+    def set_status(self, camera_id: str, status: str) -> bool:
+        """Update a camera's status without rewriting anything else.
+
+        Args:
+            camera_id: Camera to update
+            status: New status, e.g. "active" or "offline"
+
+        Returns:
+            True if the camera exists
+
+        """
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT data FROM cameras WHERE id = ?", (camera_id,)).fetchone()
+            if row is None:
+                return False
+            camera = json.loads(row["data"])
+            camera["status"] = status
+            conn.execute(
+                "UPDATE cameras SET status = ?, data = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(camera), time.time(), camera_id),
+            )
+            self._bump_version(conn)
+        return True
+
+    def delete_camera(self, camera_id: str) -> bool:
+        """Delete a camera.
+
+        Returns:
+            True if the camera existed
+
+        """
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT rowid FROM cameras WHERE id = ?", (camera_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM camera_locations WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM cameras WHERE rowid = ?", (row[0],))
+            self._bump_version(conn)
+        return True
+
+    def import_json(self, path: str | Path) -> int:
+        """Import (upsert) the cameras of a legacy JSON registry file.
+
+        Args:
+            path: Path of a {"cameras": [...]} file or a bare JSON list
+
+        Returns:
+            Number of cameras imported
+
+        """
+        count = self.upsert_cameras(load_json_cameras(path))
+        logger.info(f"Imported {count} cameras from {path} into {self.db_path}")
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import JSON camera registries into a SQLite camera store")
+    parser.add_argument("files", nargs="*", help="JSON registry files, or NDJSON files (.ndjson, .jsonl), to import")
+    parser.add_argument("--db", default="cameras.db", help="SQLite database path (default: cameras.db)")
+    parser.add_argument("--export", help="Write all cameras to this NDJSON file after importing")
+    args = parser.parse_args()
+
+    store = CameraStore(args.db)
+    for file in args.files:
+        if Path(file).suffix in {".ndjson", ".jsonl"}:
+            with Path(file).open("rb") as f:
+                print(f"Imported {store.import_ndjson(f)} cameras from {file}")
+        else:
+            print(f"Imported {store.import_json(file)} cameras from {file}")
+    if args.export:
+        with Path(args.export).open("w") as f:
+            f.writelines(store.export_ndjson())
+        print(f"Exported cameras to {args.export}")
+    print(f"{store.count()} cameras in {args.db} (version {store.version()})")
@@ -0,0 +1,442 @@
+"""Clips Module.
+
+Helpers for the camera video clips sent to the VLM:
+1. Fingerprinting a clip's current content
+2. Reading an MP4 clip's duration and frame rate from its metadata
+3. A catalog of the clips in a directory, kept current with inotify (or polling)
+4. Rejecting missing, stale, oversized or overlong clips before they are uploaded
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the start of a clip when fingerprinting it
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+
+
+def clip_fingerprint(path: str | Path | None) -> str | None:
+    """Identify a clip's current content without reading the whole file.
+
+    The fingerprint combines the file size, modification time and a hash of the first
+    bytes, so it changes whenever a camera writes a new clip to the same path.
+
+    Args:
+        path: Path of the video clip
+
+    Returns:
+        A hex fingerprint, or None if the clip does not exist
+
+    """
+    if path is None:
+        return None
+    try:
+        path = Path(path)
+        stat = path.stat()
+        with path.open("rb") as f:
+            head = f.read(FINGERPRINT_SAMPLE_BYTES)
+    except OSError:
+        return None
+    digest = hashlib.blake2b(head, digest_size=16)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+# Limits of the VLM API's asset upload
+MAX_CLIP_BYTES = 100 * 1024 * 1024
+MAX_CLIP_DURATION_S = 30.0
+# Largest moov box read when probing a clip's metadata
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+
+# Why a clip cannot be sent to the VLM
+MISSING = "missing"
+EMPTY = "empty"
+UNREADABLE = "unreadable"
+TOO_LARGE = "too_large"
+TOO_LONG = "too_long"
+STALE = "stale"
+
+# inotify event masks (linux/inotify.h)
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_WATCH_MASK = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE | _IN_DELETE_SELF
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _boxes(data: bytes, start: int = 0, end: int | None = None) -> Iterator[tuple[bytes, int, int]]:
+    """Yield the type, payload start and payload end of the MP4 boxes in a byte range."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                msg = "Truncated box header"
+                raise ValueError(msg)
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            msg = f"Truncated {kind!r} box"
+            raise ValueError(msg)
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _child(data: bytes, start: int, end: int, kind: bytes) -> tuple[int, int] | None:
+    """Return the payload range of the first child box of a kind, or None."""
+    return next(((s, e) for k, s, e in _boxes(data, start, end) if k == kind), None)
+
+
+def _timescale_duration(data: bytes, start: int) -> tuple[int, int]:
+    """Read the timescale and duration of an mvhd or mdhd box's payload."""
+    if data[start] == 1:
+        return struct.unpack_from(">IQ", data, start + 20)
+    return struct.unpack_from(">II", data, start + 12)
+
+
+def _read_moov(path: Path) -> bytes:
+    """Read a file's moov box, skipping the media data without reading it."""
+    with path.open("rb") as f:
+        file_size = f.seek(0, 2)
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(16)
+            size, kind = struct.unpack_from(">I4s", header)
+            header_len = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", header, 8)[0]
+                header_len = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_len or offset + size > file_size:
+                msg = f"Truncated {kind!r} box"
+                raise ValueError(msg)
+            if kind == b"moov":
+                if size > MAX_MOOV_BYTES:
+                    msg = "moov box too large"
+                    raise ValueError(msg)
+                f.seek(offset + header_len)
+                return f.read(size - header_len)
+            offset += size
+    # Writers add the moov box last, so a clip still being written has none yet
+    msg = "No moov box"
+    raise ValueError(msg)
+
+
+def probe_mp4(path: str | Path) -> tuple[float, float | None]:
+    """Read an MP4 clip's duration and frame rate from its metadata.
+
+    Args:
+        path: Path of the clip
+
+    Returns:
+        The duration in seconds, and the video track's frames per second (None without one)
+
+    Raises:
+        ValueError: If the file is not a complete MP4 file
+        OSError: If the file cannot be read
+
+    """
+    moov = _read_moov(Path(path))
+    mvhd = _child(moov, 0, len(moov), b"mvhd")
+    if mvhd is None:
+        msg = "No mvhd box"
+        raise ValueError(msg)
+    timescale, duration = _timescale_duration(moov, mvhd[0])
+    if not timescale:
+        msg = "Invalid timescale"
+        raise ValueError(msg)
+    fps = None
+    for kind, start, end in _boxes(moov):
+        mdia = _child(moov, start, end, b"mdia") if kind == b"trak" else None
+        hdlr = mdia and _child(moov, *mdia, b"hdlr")
+        if hdlr is None or moov[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+            continue
+        mdhd = _child(moov, *mdia, b"mdhd")
+        minf = _child(moov, *mdia, b"minf")
+        stbl = minf and _child(moov, *minf, b"stbl")
+        stts = stbl and _child(moov, *stbl, b"stts")
+        if mdhd is None or stts is None:
+            continue
+        track_timescale, track_duration = _timescale_duration(moov, mdhd[0])
+        (entries,) = struct.unpack_from(">I", moov, stts[0] + 4)
+        frames = sum(struct.unpack_from(">I", moov, stts[0] + 8 + 8 * i)[0] for i in range(entries))
+        if track_timescale and track_duration:
+            fps = round(frames * track_timescale / track_duration, 3)
+        break
+    return duration / timescale, fps
+
+
+class ClipInfo:
+    """Metadata of one clip file."""
+
+    __slots__ = ("duration_s", "fingerprint", "fps", "mtime", "path", "problem", "size", "stat_key")
+
+    def __init__(self, path: Path, stat: os.stat_result, max_bytes: int, max_duration_s: float) -> None:
+        """Probe a clip's metadata and check it against the upload limits.
+
+        Args:
+            path: Path of the clip
+            stat: The clip's file status
+            max_bytes: Largest clip the VLM API accepts
+            max_duration_s: Longest clip the VLM API accepts
+
+        """
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.stat_key = (stat.st_size, stat.st_mtime_ns)
+        self.fingerprint = clip_fingerprint(path)
+        self.duration_s: float | None = None
+        self.fps: float | None = None
+        self.problem: str | None = None
+        if self.size == 0:
+            self.problem = EMPTY
+        elif self.size > max_bytes:
+            self.problem = TOO_LARGE
+        elif path.suffix.lower() in {".mp4", ".m4v", ".mov"}:
+            try:
+                self.duration_s, self.fps = probe_mp4(path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Cannot read clip {path}: {e}")
+                self.problem = UNREADABLE
+            else:
+                if self.duration_s > max_duration_s:
+                    self.problem = TOO_LONG
+
+    def to_dict(self) -> dict:
+        """Return the metadata as a JSON-serializable dictionary."""
+        return {
+            "size": self.size,
+            "mtime": self.mtime,
+            "duration_s": None if self.duration_s is None else round(self.duration_s, 3),
+            "fps": self.fps,
+            "fingerprint": self.fingerprint,
+            "problem": self.problem,
+        }
+
+
+class ClipCatalog:
+    """In-memory metadata of the clips in a directory, kept current by watching it.
+
+    Changes are picked up with inotify where available, otherwise by polling the
+    directory. Until the watcher is started, and for clips outside the directory, a
+    clip is probed when asked about, but only re-read once its size or mtime changed.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        *,
+        max_bytes: int = MAX_CLIP_BYTES,
+        max_duration_s: float = MAX_CLIP_DURATION_S,
+        max_age_s: float | None = None,
+        poll_s: float = 2.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize an empty catalog.
+
+        Args:
+            root: Directory the cameras write their clips to
+            max_bytes: Larger clips are rejected before upload
+            max_duration_s: Longer clips are rejected before upload
+            max_age_s: Clips last written longer ago than this are stale; None disables the check
+            poll_s: How often the directory is scanned when inotify is not available
+            clock: Wall-clock time source compared with file mtimes (injectable for tests)
+
+        """
+        self.root = Path(root).absolute()
+        self.max_bytes = max_bytes
+        self.max_duration_s = max_duration_s
+        self.max_age_s = max_age_s
+        self.poll_s = poll_s
+        self._clock = clock
+        self._clips: dict[Path, ClipInfo] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = False
+        # "inotify" or "polling" once started
+        self.watcher: str | None = None
+        self._probes = 0
+        self._events = 0
+
+    def _refresh(self, path: Path) -> ClipInfo | None:
+        """Bring one clip's entry up to date, probing it only if it changed."""
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        with self._lock:
+            info = self._clips.get(path)
+            if stat is None or not path.is_file():
+                self._clips.pop(path, None)
+                return None
+            if info is not None and info.stat_key == (stat.st_size, stat.st_mtime_ns):
+                return info
+        info = ClipInfo(path, stat, self.max_bytes, self.max_duration_s)
+        with self._lock:
+            self._probes += 1
+            self._clips[path] = info
+        return info
+
+    def scan(self) -> None:
+        """Bring every clip in the directory up to date and forget the deleted ones."""
+        try:
+            present = {Path(entry.path) for entry in os.scandir(self.root) if entry.is_file()}
+        except OSError:
+            present = set()
+        with self._lock:
+            for path in [path for path in self._clips if path.parent == self.root and path not in present]:
+                del self._clips[path]
+        for path in present:
+            self._refresh(path)
+
+    def get(self, path: str | Path) -> ClipInfo | None:
+        """Return a clip's metadata, or None if it does not exist."""
+        path = Path(path).absolute()
+        if self.watcher is not None and path.parent == self.root:
+            with self._lock:
+                return self._clips.get(path)
+        return self._refresh(path)
+
+    def age(self, path: str | Path | None) -> float | None:
+        """Return the seconds since a clip was last written, or None if it does not exist."""
+        info = self.get(path) if path is not None else None
+        return None if info is None else max(0.0, self._clock() - info.mtime)
+
+    def fingerprint(self, path: str | Path | None) -> str | None:
+        """Return a clip's content fingerprint (see clip_fingerprint), or None if it does not exist."""
+        info = self.get(path) if path is not None else None
+        return None if info is None else info.fingerprint
+
+    def problem(self, path: str | Path | None) -> str | None:
+        """Return why a clip cannot be sent to the VLM, or None if it can.
+
+        Args:
+            path: Path of the clip
+
+        Returns:
+            MISSING, EMPTY, UNREADABLE, TOO_LARGE, TOO_LONG or STALE, or None
+
+        """
+        info = self.get(path) if path is not None else None
+        if info is None:
+            return MISSING
+        if info.problem is not None:
+            return info.problem
+        if self.max_age_s is not None and self._clock() - info.mtime > self.max_age_s:
+            return STALE
+        return None
+
+    def start(self) -> None:
+        """Scan the directory and start watching it, if not watching yet."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        # Watch before scanning, so no change between the two is missed
+        fd = self._inotify()
+        self.scan()
+        self.watcher = "polling" if fd is None else "inotify"
+        threading.Thread(target=self._run, args=(fd,), name="clip-catalog", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop watching the directory."""
+        self._stop.set()
+
+    def _inotify(self) -> int | None:
+        """Return an inotify descriptor watching the directory, or None if unavailable."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(self.root), _IN_WATCH_MASK) < 0:
+            logger.warning(f"Cannot watch {self.root} with inotify, polling it instead")
+            os.close(fd)
+            return None
+        return fd
+
+    def _run(self, fd: int | None) -> None:
+        try:
+            if fd is not None:
+                self._watch_inotify(fd)
+            if not self._stop.is_set():
+                self.watcher = "polling"
+                while not self._stop.wait(self.poll_s):
+                    self.scan()
+        except Exception:
+            logger.exception(f"Watching {self.root} failed")
+            self.watcher = None
+
+    def _watch_inotify(self, fd: int) -> None:
+        """Apply inotify events until stopped or the directory goes away."""
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    continue
+                data = os.read(fd, 64 * 1024)
+                changed = set()
+                offset = 0
+                while offset + _INOTIFY_EVENT.size <= len(data):
+                    _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                    name = data[offset + _INOTIFY_EVENT.size : offset + _INOTIFY_EVENT.size + length].rstrip(b"\0")
+                    offset += _INOTIFY_EVENT.size + length
+                    self._events += 1
+                    if mask & _IN_Q_OVERFLOW:
+                        # Events were lost: fall back to a full scan
+                        changed = None
+                        break
+                    if mask & (_IN_DELETE_SELF | _IN_IGNORED):
+                        logger.warning(f"{self.root} is no longer watched, polling it instead")
+                        return
+                    if name:
+                        changed.add(self.root / os.fsdecode(name))
+                if changed is None:
+                    self.scan()
+                else:
+                    for path in changed:
+                        self._refresh(path)
+        finally:
+            os.close(fd)
+
+    def snapshot(self) -> dict:
+        """Return the watcher in use and the clips that cannot be sent to the VLM."""
+        with self._lock:
+            clips = list(self._clips.values())
+            probes, events = self._probes, self._events
+        problems = {str(info.path): self.problem(info.path) for info in clips}
+        return {
+            "root": str(self.root),
+            "watcher": self.watcher,
+            "clips": len(clips),
+            "probes": probes,
+            "events": events,
+            "unusable": {path: problem for path, problem in problems.items() if problem is not None},
+        }
@@ -0,0 +1,107 @@
+"""Deadline Module.
+
+Carries an overall latency budget through a request so that every stage
+(camera lookup, upload, inference) only waits for the time that is left.
+"""
+
+import os
+import time
+from collections.abc import Callable, Mapping
+
+# Header a client can use instead of the ``deadline_ms`` JSON field
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+
+class Deadline:
+    """A point in time by which a request must be answered."""
+
+    def __init__(self, budget_s: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """Start a deadline budget_s seconds from now.
+
+        Args:
+            budget_s: Total latency budget in seconds
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.budget_s = budget_s
+        self._clock = clock
+        self._started_at = clock()
+        self._expires_at = self._started_at + budget_s
+        self._parent: Deadline | None = None
+        self._cancelled = False
+
+    def child(self) -> "Deadline":
+        """Create a deadline sharing this budget that can be cancelled on its own.
+
+        Used to give each branch of a parallel operation its own cancellation handle.
+        """
+        child = Deadline(self.remaining(), clock=self._clock)
+        child._parent = self
+        return child
+
+    def cancel(self) -> None:
+        """Give up on the work: no further stage will be attempted."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        """Return True if this deadline or one of its parents was cancelled."""
+        return self._cancelled or (self._parent is not None and self._parent.cancelled)
+
+    def remaining(self) -> float:
+        """Return the seconds left in the budget (never negative, zero once cancelled)."""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self._expires_at - self._clock())
+
+    def elapsed(self) -> float:
+        """Return the seconds spent since the deadline was created."""
+        return self._clock() - self._started_at
+
+    def expired(self) -> bool:
+        """Return True once the budget is used up."""
+        return self.remaining() <= 0
+
+    def timeout_for(self, cap: float, reserve: float = 0.0) -> float:
+        """Compute the timeout for a stage.
+
+        Args:
+            cap: The stage's own maximum timeout
+            reserve: Seconds to keep back for the stages that follow
+
+        Returns:
+            The smaller of ``cap`` and the remaining budget minus ``reserve``
+
+        """
+        return max(0.0, min(cap, self.remaining() - reserve))
+
+
+def default_deadline_s() -> float:
+    """Return the server default request budget in seconds."""
+    return float(os.getenv("VLM_REQUEST_DEADLINE_S", "90"))
+
+
+def deadline_from_request(payload: Mapping | None, headers: Mapping) -> Deadline:
+    """Build the deadline for an incoming request.
+
+    The client may ask for a budget through the ``deadline_ms`` JSON field or the
+    ``X-Deadline-Ms`` header. The budget is capped by the server default, which is
+    also used when the client does not specify one or sends an invalid value.
+
+    Args:
+        payload: Parsed JSON body, if any
+        headers: Request headers
+
+    Returns:
+        A Deadline started now
+
+    """
+    server_default = default_deadline_s()
+    requested = (payload or {}).get("deadline_ms", headers.get(DEADLINE_HEADER))
+    try:
+        budget_s = float(requested) / 1000 if requested is not None else server_default
+    except (TypeError, ValueError):
+        budget_s = server_default
+    if budget_s <= 0:
+        budget_s = server_default
+    return Deadline(min(budget_s, server_default))
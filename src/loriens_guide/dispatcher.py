@@ -0,0 +1,251 @@
+"""Dispatcher Module.
+
+Schedules VLM work by urgency so that safety-critical questions ("Is it safe to
+cross?") do not wait behind descriptive ones ("Describe the room"):
+1. Classifying queries as hazard/navigation (urgent) or descriptive
+2. Serving per-class queues by weighted round-robin
+3. Protecting low-priority work from starvation by ageing
+4. Sharing each class fairly between clients, so one busy client cannot crowd out the rest
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import TypeVar
+
+from loriens_guide.hedging import LatencyTracker
+from loriens_guide.profile_context import propagate
+
+T = TypeVar("T")
+
+URGENT = "urgent"
+DESCRIPTIVE = "descriptive"
+
+# Words that signal a hazard or a navigation need; "where" and "front" alone do not, as
+# "Where am I?" and "What's in front of me?" ask for a description
+_URGENT_PATTERN = re.compile(
+    r"\b(safe|safely|danger\w*|hazard\w*|cross\w*|traffic|cars?|bikes?|obstacles?|block\w*|"
+    r"steps?|stairs?|curbs?|kerbs?|edge|fall\w*|emergency|fire|exit|door\w*|way|path|"
+    r"route|navigate|direction\w*|turn|go|walk\w*|get to|ahead|careful|watch out)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_query(question_text: str) -> str:
+    """Classify a question as urgent (hazard/navigation) or descriptive.
+
+    Args:
+        question_text: The user's question
+
+    Returns:
+        URGENT or DESCRIPTIVE
+
+    """
+    return URGENT if _URGENT_PATTERN.search(question_text or "") else DESCRIPTIVE
+
+
+class _Job:
+    __slots__ = ("args", "client", "enqueued_at", "finish", "fn", "future", "kwargs", "query_class", "start")
+
+    def __init__(self, query_class: str, client: str, fn: Callable, args: tuple, kwargs: dict) -> None:
+        self.query_class = query_class
+        self.client = client
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        # Virtual start and finish times for fair queuing between clients
+        self.start = 0.0
+        self.finish = 0.0
+
+
+class PriorityDispatcher:
+    """Run VLM work on a fixed pool of workers, most urgent first.
+
+    Queues are served by smooth weighted round-robin (with the default weights, three
+    urgent jobs per descriptive job while both are waiting). A job that has waited longer
+    than ``max_wait_s`` is served next regardless of its class, so descriptive questions
+    are delayed under load but never starved.
+
+    Within a class, clients are served by weighted fair queuing: every job gets a virtual
+    finish time of ``max(class virtual time, client's previous finish) + 1 / weight``, and
+    the job with the earliest one runs first. A client queueing many jobs therefore gets
+    its share of the workers, and a client with a single question does not wait behind them.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        weights: dict[str, int] | None = None,
+        max_wait_s: float = 10.0,
+        client_weights: dict[str, float] | None = None,
+    ) -> None:
+        """Initialize the dispatcher.
+
+        Args:
+            workers: Number of worker threads running VLM work
+            weights: Relative share of dispatches per query class
+            max_wait_s: Queue wait after which a job is served regardless of its class
+            client_weights: Relative share of a class per client (default 1 for every client)
+
+        """
+        self.workers = workers
+        self.weights = weights or {URGENT: 3, DESCRIPTIVE: 1}
+        self.max_wait_s = max_wait_s
+        self.client_weights = client_weights or {}
+        # Per class, a FIFO queue per client with jobs waiting
+        self._queues: dict[str, dict[str, deque[_Job]]] = {query_class: {} for query_class in self.weights}
+        self._queued: dict[str, int] = dict.fromkeys(self.weights, 0)
+        self._virtual_time: dict[str, float] = dict.fromkeys(self.weights, 0.0)
+        self._last_finish: dict[str, dict[str, float]] = {query_class: {} for query_class in self.weights}
+        self._credits: dict[str, int] = dict.fromkeys(self.weights, 0)
+        self._waits: dict[str, LatencyTracker] = {query_class: LatencyTracker() for query_class in self.weights}
+        self._completed: dict[str, int] = dict.fromkeys(self.weights, 0)
+        self._aged: dict[str, int] = dict.fromkeys(self.weights, 0)
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        # Workers start on first use so no threads exist before a fork
+        if len(self._threads) < self.workers:
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f"vlm-dispatch-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(
+        self, query_class: str, fn: Callable[..., T], *args: object, client: str = "", **kwargs: object
+    ) -> Future[T]:
+        """Queue work under a query class.
+
+        Args:
+            query_class: URGENT or DESCRIPTIVE (unknown classes are treated as descriptive)
+            fn: Function to run on a worker
+            *args: Positional arguments for fn
+            client: The client the work is for, sharing the class fairly with other clients
+                (not passed to fn)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future resolving to fn's result
+
+        """
+        if query_class not in self._queues:
+            query_class = DESCRIPTIVE
+        # A profiled request's work is sampled on the worker too
+        job = _Job(query_class, client, propagate(fn), args, kwargs)
+        with self._condition:
+            self._ensure_workers()
+            last_finish = self._last_finish[query_class]
+            job.start = max(self._virtual_time[query_class], last_finish.get(client, 0.0))
+            job.finish = job.start + 1.0 / self.client_weights.get(client, 1.0)
+            last_finish[client] = job.finish
+            self._queues[query_class].setdefault(client, deque()).append(job)
+            self._queued[query_class] += 1
+            self._condition.notify()
+        return job.future
+
+    def run(self, question_text: str, fn: Callable[..., T], *args: object, client: str = "", **kwargs: object) -> T:
+        """Classify a question, queue its work and wait for the result.
+
+        Args:
+            question_text: The user's question, used to pick the priority
+            fn: Function to run on a worker
+            *args: Positional arguments for fn
+            client: The client the work is for (not passed to fn)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            fn's result
+
+        """
+        return self.submit(classify_query(question_text), fn, *args, client=client, **kwargs).result()
+
+    def _pop(self, query_class: str, client: str) -> _Job:
+        """Take a client's oldest job of a class; must be called with the condition held."""
+        queue = self._queues[query_class][client]
+        job = queue.popleft()
+        self._queued[query_class] -= 1
+        self._virtual_time[query_class] = max(self._virtual_time[query_class], job.start)
+        if not queue:
+            del self._queues[query_class][client]
+            # An idle client starts again from the class's virtual time
+            del self._last_finish[query_class][client]
+        return job
+
+    def _next_job(self) -> _Job | None:
+        """Pick the next job; must be called with the condition held."""
+        waiting = [query_class for query_class in self._queues if self._queued[query_class]]
+        if not waiting:
+            return None
+
+        # Starvation protection: the oldest job past max_wait_s goes first
+        now = time.monotonic()
+        oldest = min(
+            (queue[0] for query_class in waiting for queue in self._queues[query_class].values()),
+            key=lambda job: job.enqueued_at,
+        )
+        if now - oldest.enqueued_at >= self.max_wait_s:
+            self._aged[oldest.query_class] += 1
+            return self._pop(oldest.query_class, oldest.client)
+
+        # Smooth weighted round-robin over the non-empty queues
+        total = 0
+        for query_class in waiting:
+            self._credits[query_class] += self.weights[query_class]
+            total += self.weights[query_class]
+        chosen = max(waiting, key=lambda query_class: self._credits[query_class])
+        self._credits[chosen] -= total
+        # Fair queuing between the class's clients: earliest virtual finish first
+        client = min(self._queues[chosen].items(), key=lambda item: item[1][0].finish)[0]
+        return self._pop(chosen, client)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+            self._waits[job.query_class].record(time.monotonic() - job.enqueued_at)
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as error:  # noqa: BLE001 - handed to the waiting caller
+                self._finish(job)
+                job.future.set_exception(error)
+            else:
+                self._finish(job)
+                job.future.set_result(result)
+
+    def _finish(self, job: _Job) -> None:
+        # Counted before the caller is woken so its metrics already include the job
+        with self._condition:
+            self._completed[job.query_class] += 1
+
+    def snapshot(self) -> dict:
+        """Return queue depth and queue-wait statistics per query class."""
+        with self._condition:
+            queued = dict(self._queued)
+            clients = {query_class: len(queues) for query_class, queues in self._queues.items()}
+            completed = dict(self._completed)
+            aged = dict(self._aged)
+        classes = {}
+        for query_class, waits in self._waits.items():
+            p50 = waits.percentile(50)
+            p95 = waits.percentile(95)
+            classes[query_class] = {
+                "weight": self.weights[query_class],
+                "queued": queued[query_class],
+                "queued_clients": clients[query_class],
+                "completed": completed[query_class],
+                "served_by_ageing": aged[query_class],
+                "queue_wait_p50_s": None if p50 is None else round(p50, 3),
+                "queue_wait_p95_s": None if p95 is None else round(p95, 3),
+            }
+        return {"workers": self.workers, "max_wait_s": self.max_wait_s, "classes": classes}
@@ -0,0 +1,164 @@
+"""Fan-out Module.
+
+Asks several nearby cameras the same question in parallel, so one stale clip or
+slow VLM call does not leave the user without an answer. Two strategies:
+1. FIRST: return the first acceptable answer and cancel the remaining branches
+2. MERGE: combine all acceptable answers that arrive before the deadline
+"""
+
+import threading
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from loriens_guide.deadline import Deadline
+
+FIRST = "first"
+MERGE = "merge"
+STRATEGIES = (FIRST, MERGE)
+
+# Cameras asked, and the radius they are searched in, when the client does not say
+DEFAULT_FANOUT_CAMERAS = 3
+DEFAULT_FANOUT_RADIUS_M = 500.0
+
+# Largest fan-out a client may ask for: every camera asked costs an upload and a VLM call
+MAX_FANOUT_CAMERAS = 5
+MAX_FANOUT_RADIUS_M = 1000.0
+
+# Budget used when the caller does not pass a deadline
+DEFAULT_FANOUT_BUDGET_S = 60.0
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def fanout_limits(data: Mapping) -> tuple[int, float]:
+    """Read how many cameras a client asks a fan-out for, and within which radius.
+
+    Args:
+        data: The request's JSON payload, with optional ``max_cameras`` and ``radius_m``
+
+    Returns:
+        The number of cameras and the radius in meters
+
+    Raises:
+        ValueError: If either is not a number or exceeds MAX_FANOUT_CAMERAS or MAX_FANOUT_RADIUS_M
+
+    """
+    try:
+        max_cameras = int(data.get("max_cameras", DEFAULT_FANOUT_CAMERAS))
+        radius_m = float(data.get("radius_m", DEFAULT_FANOUT_RADIUS_M))
+    except (TypeError, ValueError):
+        msg = "Invalid parameter types"
+        raise ValueError(msg) from None
+    if not 1 <= max_cameras <= MAX_FANOUT_CAMERAS:
+        msg = f"max_cameras must be between 1 and {MAX_FANOUT_CAMERAS}"
+        raise ValueError(msg)
+    if not 0 < radius_m <= MAX_FANOUT_RADIUS_M:
+        msg = f"radius_m must be above 0 and at most {MAX_FANOUT_RADIUS_M:.0f}"
+        raise ValueError(msg)
+    return max_cameras, radius_m
+
+
+def _default_submit(fn: Callable, *args: object) -> Future:
+    global _executor  # noqa: PLW0603
+    # Created on first use so no threads exist before a fork
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="camera-fanout")
+    return _executor.submit(fn, *args)
+
+
+def is_acceptable_answer(result: dict) -> bool:
+    """Return True for a fresh, non-empty answer.
+
+    Stale and degraded answers are only used when no camera produced a fresh one.
+    """
+    return (
+        not result.get("error") and not result.get("stale") and not result.get("degraded") and bool(result.get("text"))
+    )
+
+
+def fan_out(
+    cameras: list[dict],
+    analyze: Callable[[dict, Deadline], dict],
+    *,
+    camera_id: Callable[[dict], str],
+    strategy: str = FIRST,
+    deadline: Deadline | None = None,
+    is_acceptable: Callable[[dict], bool] = is_acceptable_answer,
+    submit: Callable[..., Future] | None = None,
+) -> dict:
+    """Analyze the same question against several cameras in parallel.
+
+    Every branch gets its own child deadline; cancelling it makes the branch skip any
+    upstream stage it has not started yet.
+
+    Args:
+        cameras: Candidate cameras, nearest first
+        analyze: Function answering the question for one camera within a deadline
+        camera_id: Function returning a camera's id
+        strategy: FIRST or MERGE
+        deadline: Overall deadline; branches still running when it expires are cancelled
+        is_acceptable: Predicate deciding whether an answer is good enough
+        submit: Function scheduling ``fn(*args)`` and returning a Future
+
+    Returns:
+        Dictionary with the ``answers`` used (camera and result pairs, best first),
+        a ``fallback`` result if no answer was acceptable, and per-camera ``outcomes``
+
+    """
+    deadline = deadline or Deadline(DEFAULT_FANOUT_BUDGET_S)
+    submit = submit or _default_submit
+    started_at = time.monotonic()
+    outcomes = {camera_id(camera): {"camera_id": camera_id(camera), "status": "pending"} for camera in cameras}
+    branches: dict[Future, tuple[dict, Deadline]] = {}
+    for camera in cameras:
+        branch_deadline = deadline.child()
+        branches[submit(analyze, camera, branch_deadline)] = (camera, branch_deadline)
+
+    answers: list[tuple[dict, dict]] = []
+    fallback: tuple[dict, dict] | None = None
+    pending = set(branches)
+    while pending and not (strategy == FIRST and answers):
+        done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            camera, _ = branches[future]
+            outcome = outcomes[camera_id(camera)]
+            outcome["latency_s"] = round(time.monotonic() - started_at, 3)
+            error = future.exception()
+            result = {"error": True, "message": str(error)} if error else future.result()
+            if is_acceptable(result):
+                outcome["status"] = "answered"
+                answers.append((camera, result))
+            else:
+                outcome["status"] = "failed"
+                if fallback is None and not result.get("error"):
+                    fallback = (camera, result)
+
+    # Stop whatever is still running: queued branches never start, running ones skip their next stage
+    for future in pending:
+        future.cancel()
+        camera, branch_deadline = branches[future]
+        branch_deadline.cancel()
+        outcomes[camera_id(camera)]["status"] = "cancelled"
+
+    return {"answers": answers, "fallback": fallback, "outcomes": list(outcomes.values())}
+
+
+def merge_answers(answers: list[tuple[dict, dict]], camera_name: Callable[[dict], str]) -> str:
+    """Combine answers from several cameras into one spoken response.
+
+    Args:
+        answers: Camera and result pairs, in the order they arrived
+        camera_name: Function returning a camera's human-readable name
+
+    Returns:
+        The merged answer text
+
+    """
+    if len(answers) == 1:
+        return answers[0][1].get("text", "")
+    return " ".join(f"From {camera_name(camera)}: {result.get('text', '')}" for camera, result in answers)
@@ -0,0 +1,93 @@
+"""Geo Module.
+
+Distance, bearing and bounding-box helpers for camera lookups.
+"""
+
+import math
+
+# Earth's radius in meters
+EARTH_RADIUS_M = 6371000
+# Largest absolute latitude and longitude in degrees
+MAX_LAT = 90.0
+MAX_LONG = 180.0
+
+
+def haversine_distance(lat1: float, long1: float, lat2: float, long2: float) -> float:
+    """Calculate the distance between two coordinates using Haversine formula.
+
+    Args:
+        lat1: Latitude of first point
+        long1: Longitude of first point
+        lat2: Latitude of second point
+        long2: Longitude of second point
+
+    Returns:
+        Distance in meters
+
+    """
+    # Convert to radians
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_long = math.radians(long2 - long1)
+
+    # Haversine formula
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_long / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_M * c
+
+
+def initial_bearing(lat1: float, long1: float, lat2: float, long2: float) -> float:
+    """Calculate the compass bearing from the first coordinate towards the second.
+
+    Args:
+        lat1: Latitude of the starting point
+        long1: Longitude of the starting point
+        lat2: Latitude of the destination
+        long2: Longitude of the destination
+
+    Returns:
+        Bearing in degrees clockwise from north (0-360)
+
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_long = math.radians(long2 - long1)
+    x = math.sin(delta_long) * math.cos(lat2_rad)
+    y = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(delta_long)
+    return math.degrees(math.atan2(x, y)) % 360
+
+
+def bounding_boxes(lat: float, long: float, radius_m: float) -> list[tuple[float, float, float, float]]:
+    """Return latitude/longitude boxes that together contain every point within radius_m.
+
+    Latitudes are clamped to [-90, 90] and longitudes kept within [-180, 180]: a circle
+    crossing the antimeridian is split into one box on each side of it, and a circle
+    reaching a pole spans every longitude.
+
+    Args:
+        lat: Center latitude
+        long: Center longitude
+        radius_m: Radius in meters
+
+    Returns:
+        One or two tuples of (min_lat, max_lat, min_long, max_long)
+
+    """
+    angle = radius_m / EARTH_RADIUS_M
+    delta_lat = math.degrees(angle)
+    min_lat = max(-MAX_LAT, lat - delta_lat)
+    max_lat = min(MAX_LAT, lat + delta_lat)
+    cos_lat = math.cos(math.radians(lat))
+    if min_lat <= -MAX_LAT or max_lat >= MAX_LAT or math.sin(angle) >= cos_lat:
+        return [(min_lat, max_lat, -MAX_LONG, MAX_LONG)]
+    # Widest longitude difference of any point on the circle
+    delta_long = math.degrees(math.asin(math.sin(angle) / cos_lat))
+    long = (long + MAX_LONG) % 360.0 - MAX_LONG
+    min_long, max_long = long - delta_long, long + delta_long
+    if min_long < -MAX_LONG:
+        return [(min_lat, max_lat, min_long + 360.0, MAX_LONG), (min_lat, max_lat, -MAX_LONG, max_long)]
+    if max_long > MAX_LONG:
+        return [(min_lat, max_lat, min_long, MAX_LONG), (min_lat, max_lat, -MAX_LONG, max_long - 360.0)]
+    return [(min_lat, max_lat, min_long, max_long)]
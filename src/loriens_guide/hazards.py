@@ -0,0 +1,267 @@
+"""Hazards Module.
+
+Pushes hazard warnings to users walking a route without them having to ask:
+1. Registering subscribers with their position and the cameras near it
+2. Running one periodic hazard analysis per watched camera, shared by all its subscribers
+3. Fanning each changed result out to every subscriber near the camera
+4. Stopping a camera's analysis once nobody near it is subscribed
+
+Upstream cost therefore grows with the number of watched cameras, not with users.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+from loriens_guide.camera_store import camera_id_of
+
+logger = logging.getLogger(__name__)
+
+HAZARD_PROMPT = (
+    "Are there any obstacles or hazards in the way, such as steps, wet floors, crowds, vehicles "
+    "or objects blocking the path? If there are none, answer only 'NONE'. Otherwise warn about "
+    "each hazard in one short sentence, saying where it is (e.g. 'on your left', '5 steps ahead')."
+)
+
+
+def is_hazard(text: str) -> bool:
+    """Return whether an answer to HAZARD_PROMPT reports a hazard."""
+    return not (text or "").strip().strip(".'\"").upper().startswith("NONE")
+
+
+def format_sse(event: str, data: str) -> str:
+    """Format one server-sent event.
+
+    Args:
+        event: Event name
+        data: Event payload (a JSON string)
+
+    Returns:
+        The event in text/event-stream framing
+
+    """
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+class Subscription:
+    """A subscriber's position, the cameras near it and its queue of events."""
+
+    def __init__(self, lat: float, long: float, radius_m: float, queue_size: int, client: str = "") -> None:
+        """Initialize a subscription without cameras.
+
+        Args:
+            lat: Subscriber's latitude
+            long: Subscriber's longitude
+            radius_m: Radius within which cameras are watched for the subscriber
+            queue_size: Events kept for a slow subscriber before the oldest are dropped
+            client: Key of the subscribing client
+
+        """
+        self.id = uuid.uuid4().hex
+        self.client = client
+        self.lat = lat
+        self.long = long
+        self.radius_m = radius_m
+        self.camera_ids: frozenset[str] = frozenset()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def deliver(self, event: dict) -> None:
+        """Queue an event, dropping the oldest one if the subscriber is not keeping up."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class HazardMonitor:
+    """Shared periodic hazard analysis per camera, fanned out to nearby subscribers.
+
+    All methods must be called from the event loop; the blocking camera lookups and
+    analyses run in worker threads.
+    """
+
+    def __init__(
+        self,
+        find_cameras: Callable[[float, float, float], list[dict]],
+        analyze: Callable[[dict], dict],
+        *,
+        interval_s: float = 30.0,
+        radius_m: float = 100.0,
+        queue_size: int = 16,
+        max_subscriptions: int = 1000,
+        max_subscriptions_per_client: int = 4,
+    ) -> None:
+        """Initialize the monitor.
+
+        Args:
+            find_cameras: Function returning the cameras within a radius of a position, nearest first
+            analyze: Blocking function running the hazard analysis of a camera's clip; returns
+                a dictionary with the answer ``text`` or an ``error``. Stale or degraded results
+                (answers not from the current clip) are not published.
+            interval_s: Time between two analyses of the same camera
+            radius_m: Default radius within which cameras are watched for a subscriber
+            queue_size: Events kept per subscriber before the oldest are dropped
+            max_subscriptions: Subscriptions open at once, over all clients
+            max_subscriptions_per_client: Subscriptions a single client may hold open at once
+
+        """
+        self._find_cameras = find_cameras
+        self._analyze = analyze
+        self.interval_s = interval_s
+        self.radius_m = radius_m
+        self.queue_size = queue_size
+        self.max_subscriptions = max_subscriptions
+        self.max_subscriptions_per_client = max_subscriptions_per_client
+        self._clients: dict[str, int] = {}
+        self._rejected = 0
+        self._subscriptions: dict[str, Subscription] = {}
+        self._subscribers: dict[str, set[str]] = {}
+        self._watchers: dict[str, asyncio.Task] = {}
+        self._latest: dict[str, dict] = {}
+        self._analyses = 0
+        self._events = 0
+
+    def has_room(self, client: str = "") -> bool:
+        """Return whether a client may subscribe without exceeding the subscription limits."""
+        return (
+            len(self._subscriptions) < self.max_subscriptions
+            and self._clients.get(client, 0) < self.max_subscriptions_per_client
+        )
+
+    async def subscribe(
+        self, lat: float, long: float, radius_m: float | None = None, *, client: str = ""
+    ) -> Subscription | None:
+        """Register a subscriber and start watching the cameras near it.
+
+        The latest result of every camera that is already watched is delivered right away.
+        The cameras are looked up in a worker thread.
+
+        Args:
+            lat: Subscriber's latitude
+            long: Subscriber's longitude
+            radius_m: Radius within which cameras are watched; defaults to the monitor's
+            client: Key of the subscribing client, whose subscriptions are limited
+
+        Returns:
+            The new subscription, or None if the client or the monitor has the most
+            subscriptions allowed
+
+        """
+        if not self.has_room(client):
+            self._rejected += 1
+            return None
+        subscription = Subscription(lat, long, radius_m or self.radius_m, self.queue_size, client)
+        # Registered before the lookup, so concurrent subscriptions count against the limits
+        self._subscriptions[subscription.id] = subscription
+        self._clients[client] = self._clients.get(client, 0) + 1
+        await self._relocate(subscription)
+        return subscription
+
+    async def move(self, subscription_id: str, lat: float, long: float) -> Subscription | None:
+        """Update a subscriber's position and the cameras watched for it.
+
+        Args:
+            subscription_id: The subscription's id
+            lat: New latitude
+            long: New longitude
+
+        Returns:
+            The updated subscription, or None if it does not exist
+
+        """
+        subscription = self._subscriptions.get(subscription_id)
+        if subscription is None:
+            return None
+        subscription.lat, subscription.long = lat, long
+        await self._relocate(subscription)
+        return subscription
+
+    async def _relocate(self, subscription: Subscription) -> None:
+        """Watch the cameras near the subscriber's position, looked up in a worker thread."""
+        lat, long = subscription.lat, subscription.long
+        cameras = await asyncio.to_thread(self._find_cameras, lat, long, subscription.radius_m)
+        # The subscriber may have left during the lookup, or moved on and be looked up again
+        if self._subscriptions.get(subscription.id) is not subscription:
+            return
+        if (subscription.lat, subscription.long) == (lat, long):
+            self._watch(subscription, cameras)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber and stop watching cameras nobody else is near."""
+        if self._subscriptions.pop(subscription.id, None) is None:
+            return
+        remaining = self._clients.pop(subscription.client, 0) - 1
+        if remaining > 0:
+            self._clients[subscription.client] = remaining
+        self._watch(subscription, [])
+
+    def _watch(self, subscription: Subscription, cameras: list[dict]) -> None:
+        camera_ids = frozenset(camera_id_of(camera) for camera in cameras)
+        for camera_id in subscription.camera_ids - camera_ids:
+            subscribers = self._subscribers.get(camera_id, set())
+            subscribers.discard(subscription.id)
+            if not subscribers:
+                self._subscribers.pop(camera_id, None)
+                self._latest.pop(camera_id, None)
+                watcher = self._watchers.pop(camera_id, None)
+                if watcher is not None:
+                    watcher.cancel()
+        for camera in cameras:
+            camera_id = camera_id_of(camera)
+            if camera_id in subscription.camera_ids:
+                continue
+            self._subscribers.setdefault(camera_id, set()).add(subscription.id)
+            if camera_id not in self._watchers:
+                self._watchers[camera_id] = asyncio.create_task(self._run(camera))
+            elif camera_id in self._latest:
+                subscription.deliver(self._latest[camera_id])
+        subscription.camera_ids = camera_ids
+
+    async def _run(self, camera: dict) -> None:
+        """Analyze a camera periodically and publish results that changed."""
+        camera_id = camera_id_of(camera)
+        while True:
+            try:
+                result = await asyncio.to_thread(self._analyze, camera)
+            except Exception:
+                logger.exception(f"Hazard analysis of camera {camera_id} failed")
+                result = {"error": True}
+            self._analyses += 1
+            # Only an analysis of the current clip can tell whether the way is clear now
+            if not (result.get("error") or result.get("stale") or result.get("degraded")):
+                self._publish(camera, result)
+            await asyncio.sleep(self.interval_s)
+
+    def _publish(self, camera: dict, result: dict) -> None:
+        camera_id = camera_id_of(camera)
+        text = result.get("text", "")
+        previous = self._latest.get(camera_id)
+        if previous is not None and previous["text"] == text:
+            return
+        event = {
+            "camera_id": camera_id,
+            "camera_name": camera.get("name"),
+            "hazard": is_hazard(text),
+            "text": text,
+            "timestamp": datetime.now(tz=UTC).isoformat(),
+        }
+        self._latest[camera_id] = event
+        for subscription_id in self._subscribers.get(camera_id, ()):
+            self._subscriptions[subscription_id].deliver(event)
+            self._events += 1
+
+    def snapshot(self) -> dict:
+        """Return subscriber and watched camera counts and the upstream work done."""
+        return {
+            "subscribers": len(self._subscriptions),
+            "clients": len(self._clients),
+            "rejected_subscriptions": self._rejected,
+            "watched_cameras": len(self._watchers),
+            "analyses": self._analyses,
+            "events_delivered": self._events,
+            "dropped_events": sum(subscription.dropped for subscription in self._subscriptions.values()),
+        }
@@ -0,0 +1,237 @@
+"""Hedging Module.
+
+Cuts the tail latency of upstream calls by sending a duplicate ("hedge") request
+when the first one is slower than a percentile of recently observed latencies.
+The first attempt to succeed wins; a budget caps the extra upstream load.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies with percentile lookup."""
+
+    def __init__(self, window: int = 200) -> None:
+        """Initialize the tracker.
+
+        Args:
+            window: Number of most recent samples to keep
+
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        """Add a latency sample in seconds."""
+        with self._lock:
+            self._samples.append(latency)
+
+    def count(self) -> int:
+        """Return the number of samples in the window."""
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percentile: float) -> float | None:
+        """Return the given percentile (0-100) of the window, or None without samples."""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        # Nearest-rank percentile
+        index = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+
+def _start(fn: Callable[..., object], *args: object) -> Future:
+    """Run a function on a thread of its own, returning a future of its result."""
+    future: Future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run() -> None:
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:  # noqa: BLE001 - handed to the waiting caller
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="vlm-hedge", daemon=True).start()
+    return future
+
+
+class RequestHedger:
+    """Run a call with an optional hedge after an adaptive delay.
+
+    The hedge delay is the ``percentile`` of recent latencies, so only the slowest calls
+    get hedged. Every call earns ``budget_ratio`` hedge tokens (capped at ``max_tokens``)
+    and every hedge spends one, which bounds the extra load to roughly ``budget_ratio``.
+    A call that cannot be hedged runs on the caller's thread. Otherwise each attempt gets
+    a thread of its own rather than one of a shared pool, so hedging never caps how many
+    calls run at once. Python threads cannot be interrupted, so the losing attempt is
+    abandoned rather than aborted: its result is discarded when it finishes.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        budget_ratio: float = 0.1,
+        max_tokens: float = 10.0,
+        min_samples: int = 20,
+        min_delay_s: float = 0.5,
+    ) -> None:
+        """Initialize the hedger.
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent
+            budget_ratio: Hedges allowed per call, e.g. 0.1 for at most ~10% extra requests
+            max_tokens: Maximum number of hedges that can be saved up
+            min_samples: Samples needed before hedging starts
+            min_delay_s: Lower bound for the hedge delay
+
+        """
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self.min_samples = min_samples
+        self.min_delay_s = min_delay_s
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._calls = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    def hedge_delay(self) -> float | None:
+        """Return the current hedge delay, or None while there are too few samples."""
+        if self.latencies.count() < self.min_samples:
+            return None
+        delay = self.latencies.percentile(self.percentile)
+        return None if delay is None else max(self.min_delay_s, delay)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._hedges += 1
+            return True
+
+    def _timed(self, attempt: Callable[[float], T], timeout: float) -> T:
+        start = time.monotonic()
+        try:
+            return attempt(timeout)
+        finally:
+            self.latencies.record(time.monotonic() - start)
+
+    def _hedged(self, attempt: Callable[[float], T], timeout: float, release: Callable[[], None] | None) -> T:
+        try:
+            return self._timed(attempt, timeout)
+        finally:
+            if release is not None:
+                release()
+
+    def run(
+        self,
+        attempt: Callable[[float], T],
+        timeout: float,
+        *,
+        acquire_hedge: Callable[[], bool] | None = None,
+        release_hedge: Callable[[], None] | None = None,
+        is_success: Callable[[T], bool] | None = None,
+    ) -> T:
+        """Run ``attempt``, hedging it if it is slower than the adaptive delay.
+
+        Args:
+            attempt: Function performing one upstream call, given its timeout in seconds
+            timeout: Overall timeout for the call
+            acquire_hedge: Optional function taking upstream capacity for the hedge (e.g. a
+                concurrency limiter slot); returns False to skip hedging
+            release_hedge: Optional function returning that capacity once the hedge finished
+            is_success: Optional check of an attempt's result; only a successful result wins,
+                a failed one (e.g. a 5xx response) waits for the other attempt
+
+        Returns:
+            The result of the first successful attempt, or the primary's if none succeeded
+
+        Raises:
+            Exception: Whatever the attempts raised, if none of them returned a result
+
+        """
+        with self._lock:
+            self._calls += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+            can_hedge = self._tokens >= 1
+
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout or not can_hedge:
+            return self._timed(attempt, timeout)
+
+        start = time.monotonic()
+        primary = _start(self._timed, attempt, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done or (acquire_hedge is not None and not acquire_hedge()):
+            return primary.result()
+        if not self._take_token():
+            if release_hedge is not None:
+                release_hedge()
+            return primary.result()
+
+        remaining = max(0.0, timeout - (time.monotonic() - start))
+        logger.info(f"Hedging upstream call after {delay:.2f}s")
+        hedge = _start(self._hedged, attempt, remaining, release_hedge)
+        return self._first_success(primary, hedge, remaining, is_success)
+
+    def _first_success(
+        self, primary: Future[T], hedge: Future[T], timeout: float, is_success: Callable[[T], bool] | None
+    ) -> T:
+        pending = {primary, hedge}
+        first_error: BaseException | None = None
+        deadline = time.monotonic() + timeout
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                error = future.exception()
+                if error is None and (is_success is None or is_success(future.result())):
+                    if future is hedge:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return future.result()
+                first_error = first_error or error
+        if primary.done() and primary.exception() is None:
+            # Neither attempt succeeded; answer with the primary's own failure
+            return primary.result()
+        if first_error is not None:
+            raise first_error
+        # Neither attempt finished in time; surface the primary's own timeout
+        return primary.result()
+
+    def snapshot(self) -> dict:
+        """Return hedging statistics for monitoring."""
+        with self._lock:
+            calls, hedges, wins = self._calls, self._hedges, self._hedge_wins
+        delay = self.hedge_delay()
+        p50 = self.latencies.percentile(50)
+        p99 = self.latencies.percentile(99)
+        return {
+            "enabled": True,
+            "calls": calls,
+            "hedges": hedges,
+            "hedge_wins": wins,
+            "hedge_rate": round(hedges / calls, 4) if calls else 0.0,
+            "win_rate": round(wins / hedges, 4) if hedges else 0.0,
+            "hedge_delay_s": None if delay is None else round(delay, 3),
+            "latency_p50_s": None if p50 is None else round(p50, 3),
+            "latency_p99_s": None if p99 is None else round(p99, 3),
+        }
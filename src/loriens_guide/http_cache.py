@@ -0,0 +1,228 @@
+"""HTTP Cache Module.
+
+Conditional, compressed responses for the camera listings clients poll:
+1. Strong ETags derived from the camera registry's version
+2. Answering If-None-Match with 304 Not Modified before anything is serialized
+3. Serializing a listing once per registry version, and compressing it (gzip, and brotli if
+   installed) once per content coding clients actually ask for
+4. Cache-Control and Vary headers so clients revalidate instead of downloading again
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always offered
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 512
+
+# Content codings in order of preference, with the ETag suffix of each
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# mtime=0 keeps the gzip bytes, and so the strong ETag, identical across workers
+_COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = brotli.compress
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Return the content codings an Accept-Encoding header allows.
+
+    Args:
+        accept_encoding: The header's value, if any
+
+    Returns:
+        The lower-cased codings not refused with ``q=0``
+
+    """
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def matching_etag(if_none_match: str | None, etags: set[str]) -> str | None:
+    """Return the ETag of an If-None-Match header that matches one of the given ETags.
+
+    If-None-Match uses the weak comparison, so ``W/`` prefixes are ignored.
+
+    Args:
+        if_none_match: The header's value, if any
+        etags: The current ETags of the resource
+
+    Returns:
+        The matching ETag ("*" matches any), or None
+
+    """
+    if not if_none_match:
+        return None
+    for item in if_none_match.split(","):
+        tag = item.strip().removeprefix("W/")
+        if tag == "*" or tag in etags:
+            return tag
+    return None
+
+
+class _Representation:
+    __slots__ = ("bodies", "etag", "lock")
+
+    def __init__(self, etag: str, body: bytes) -> None:
+        self.etag = etag
+        # Body per content coding, compressed when first asked for; "identity" is always present
+        self.bodies = {"identity": body}
+        self.lock = threading.Lock()
+
+    def body(self, coding: str) -> bytes:
+        """Return the body in a content coding, compressing it on first use."""
+        with self.lock:
+            if coding not in self.bodies:
+                self.bodies[coding] = _COMPRESSORS[coding](self.bodies["identity"])
+            return self.bodies[coding]
+
+
+class ListingCache:
+    """Pre-serialized JSON listings, rebuilt only when the registry changes.
+
+    Each listing is identified by a key (e.g. the listing's query parameters) and the
+    registry version it was built from. Its ETag is derived from both, so it is the same
+    in every worker process sharing the registry and can be checked without building
+    the listing.
+    """
+
+    def __init__(self, max_entries: int = 256, *, max_age_s: int = 10) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Listings kept before the least recently used are dropped
+            max_age_s: How long clients may use a listing before revalidating it
+
+        """
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self._entries: OrderedDict[str, tuple[str, _Representation]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._builds = 0
+        self._not_modified = 0
+
+    @staticmethod
+    def etag(key: str, version: str | int) -> str:
+        """Return the strong ETag of a listing's uncompressed representation."""
+        digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+        return f'"{digest}.{version}"'
+
+    @staticmethod
+    def _encoding(accepted: set[str], size: int) -> tuple[str, str]:
+        """Return the preferred accepted coding for a body of the given size, and its ETag suffix."""
+        if size >= MIN_COMPRESS_BYTES:
+            for coding, suffix in _ENCODINGS:
+                if (coding in accepted or "*" in accepted) and coding in _COMPRESSORS:
+                    return coding, suffix
+        return "identity", ""
+
+    def _representation(self, key: str, version: str, build: Callable[[], object], *, store: bool) -> _Representation:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+        body = json.dumps(build(), separators=(",", ":")).encode()
+        representation = _Representation(self.etag(key, version), body)
+        with self._lock:
+            self._builds += 1
+            if not store:
+                return representation
+            self._entries[key] = (version, representation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return representation
+
+    def respond(
+        self,
+        key: str,
+        version: str | int,
+        build: Callable[[], object],
+        headers: Mapping,
+        *,
+        conditional: bool = True,
+        store: bool = True,
+    ) -> Response:
+        """Return a listing as a compressed, cacheable JSON response.
+
+        Args:
+            key: Identifies the listing, e.g. by its endpoint and query parameters
+            version: The registry version the listing would be built from
+            build: Function returning the listing's JSON payload; only called when the
+                listing is not cached for this version
+            headers: Request headers (Accept-Encoding, If-None-Match)
+            conditional: Whether If-None-Match may be answered with 304 (only for GET)
+            store: Whether to keep the built listing for later requests; off for listings
+                whose keys rarely repeat (e.g. per exact location), which would only evict
+                the listings that are shared
+
+        Returns:
+            A 200 response with the listing, or a 304 response without a body
+
+        """
+        version = str(version)
+        base = self.etag(key, version)
+        cache_headers = {
+            "Cache-Control": f"public, max-age={self.max_age_s}, must-revalidate",
+            "Vary": "Accept-Encoding",
+        }
+        etags = {_variant(base, suffix) for _, suffix in (("identity", ""), *_ENCODINGS)}
+        matched = matching_etag(headers.get("If-None-Match"), etags) if conditional else None
+        if matched is not None:
+            # The client has this version: answer without serializing anything
+            with self._lock:
+                self._not_modified += 1
+            return Response(status=304, headers={**cache_headers, "ETag": base if matched == "*" else matched})
+
+        representation = self._representation(key, version, build, store=store)
+        accepted = accepted_encodings(headers.get("Accept-Encoding"))
+        coding, suffix = self._encoding(accepted, len(representation.bodies["identity"]))
+        response = Response(representation.body(coding), mimetype="application/json", headers=cache_headers)
+        # Each content coding is a different representation with its own strong ETag
+        response.headers["ETag"] = _variant(representation.etag, suffix)
+        if coding != "identity":
+            response.headers["Content-Encoding"] = coding
+        return response
+
+    def snapshot(self) -> dict:
+        """Return how often listings were rebuilt, reused or not sent at all."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "builds": self._builds,
+                "hits": self._hits,
+                "not_modified": self._not_modified,
+                "brotli": brotli is not None,
+            }
+
+
+def _variant(etag: str, suffix: str) -> str:
+    """Return the ETag of a content coding of a representation."""
+    return f'{etag[:-1]}{suffix}"'
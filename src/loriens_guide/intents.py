@@ -0,0 +1,147 @@
+"""Intents Module.
+
+Answers questions that do not need the camera ("help", "where am I", "thanks") locally,
+from registry and location data, so only visual questions reach the VLM:
+1. Classifying a question's intent with anchored patterns
+2. Building the local answer for non-visual intents
+3. Counting how much traffic is deflected from the VLM
+"""
+
+import re
+import threading
+from collections.abc import Callable
+
+HELP = "help"
+GREETING = "greeting"
+THANKS = "thanks"
+LOCATION = "location"
+VISUAL = "visual"
+
+# Patterns must match the whole question, so "where is the exit" stays visual
+_INTENT_PATTERNS = (
+    (
+        HELP,
+        re.compile(
+            r"help( me)?|what can (you|i) do( here)?|what do you do|how (does|do) (this|you|it) work|"
+            r"how do i use (this|you|it|the app)|what are you|who are you"
+        ),
+    ),
+    (
+        LOCATION,
+        re.compile(
+            r"where am i( now| right now)?|where are we|what is my (current )?location|whats my (current )?location|"
+            r"what place is this|what building is this"
+        ),
+    ),
+    (
+        GREETING,
+        re.compile(r"hi|hello|hey( there)?|good (morning|afternoon|evening)"),
+    ),
+    (
+        THANKS,
+        re.compile(r"(many )?thanks( a lot| very much)?|thank you( (very|so) much)?|cheers"),
+    ),
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_POLITE_PREFIX = re.compile(r"^(please |hey |hi |ok |okay )+")
+_POLITE_SUFFIX = re.compile(r"( please| thanks)+$")
+
+HELP_TEXT = (
+    "I describe what the camera nearest to you can see. Ask me things like "
+    "'What is in front of me?', 'Where is the exit?' or 'Is it safe to cross?'"
+)
+GREETING_TEXT = "Hello! Ask me about your surroundings, for example 'What is in front of me?'"
+THANKS_TEXT = "You're welcome! Ask me again whenever you need to."
+
+
+def classify_intent(question_text: str) -> str:
+    """Classify a question as one of the local intents or as visual.
+
+    Args:
+        question_text: The user's question
+
+    Returns:
+        HELP, GREETING, THANKS, LOCATION or VISUAL
+
+    """
+    text = _PUNCTUATION.sub("", (question_text or "").lower())
+    text = " ".join(text.split())
+    stripped = _POLITE_SUFFIX.sub("", _POLITE_PREFIX.sub("", text))
+    for intent, pattern in _INTENT_PATTERNS:
+        if pattern.fullmatch(stripped) or pattern.fullmatch(text):
+            return intent
+    return VISUAL
+
+
+def describe_location(camera: dict | None, distance_m: float | None = None) -> str:
+    """Describe where the user is from the nearest camera's registry entry.
+
+    Args:
+        camera: The camera nearest to the user, in either registry schema, or None
+        distance_m: Distance from the user to the camera, if known
+
+    Returns:
+        A spoken description of the user's location
+
+    """
+    if camera is None:
+        return "I can't place you near any place I know right now."
+    text = f"You are near {camera.get('name', 'a camera')}"
+    address = (camera.get("location") or {}).get("address")
+    if address:
+        text += f", {address}"
+    text += "."
+    if distance_m is not None:
+        text += f" The nearest camera is about {round(distance_m)} meters away."
+    return text
+
+
+class IntentRouter:
+    """Answer non-visual questions locally and count the deflected traffic."""
+
+    def __init__(self) -> None:
+        """Initialize the router's counters."""
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._deflected: dict[str, int] = dict.fromkeys((HELP, GREETING, THANKS, LOCATION), 0)
+
+    def answer(self, question_text: str, locate: Callable[[], tuple[dict | None, float | None]]) -> dict | None:
+        """Answer a question locally if it does not need the camera.
+
+        Args:
+            question_text: The user's question
+            locate: Function returning the nearest camera and its distance in meters;
+                only called for location questions
+
+        Returns:
+            Dictionary with the answer ``text`` and its ``intent``, or None for visual questions
+
+        """
+        intent = classify_intent(question_text)
+        with self._lock:
+            self._requests += 1
+            if intent != VISUAL:
+                self._deflected[intent] += 1
+        if intent == HELP:
+            text = HELP_TEXT
+        elif intent == GREETING:
+            text = GREETING_TEXT
+        elif intent == THANKS:
+            text = THANKS_TEXT
+        elif intent == LOCATION:
+            text = describe_location(*locate())
+        else:
+            return None
+        return {"text": text, "intent": intent}
+
+    def snapshot(self) -> dict:
+        """Return the share of questions answered without the VLM."""
+        with self._lock:
+            deflected = sum(self._deflected.values())
+            return {
+                "requests": self._requests,
+                "deflected": deflected,
+                "deflection_rate": round(deflected / self._requests, 3) if self._requests else None,
+                "by_intent": dict(self._deflected),
+            }
@@ -0,0 +1,309 @@
+"""Pre-analysis Module.
+
+Keeps answers to the standard questions about busy cameras warm, so users asking
+them are answered from the cache instead of waiting for the VLM:
+1. Selecting active cameras whose clip is fresh and can be uploaded (per the clip catalog)
+2. Running a fixed set of standard prompts against each selected camera in the background
+3. Refreshing popular and fast-changing cameras more often than quiet, static ones
+4. Keeping all background calls within a global upstream call budget
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loriens_guide.camera_store import camera_id_of
+from loriens_guide.clips import ClipCatalog
+from loriens_guide.resilience import TokenBucket
+from loriens_guide.similarity_cache import jaccard, normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Descriptive questions only: hazard and navigation questions are always answered from the clip
+DEFAULT_PROMPTS = (
+    "What do you see?",
+    "Is it crowded?",
+    "What signs are visible?",
+)
+
+# Answers less similar than this to the previous run's count as a scene change
+_SCENE_CHANGE_SIMILARITY = 0.5
+# Weight of the newest run in a camera's scene-change rate
+_CHANGE_ALPHA = 0.3
+
+
+class _CameraState:
+    __slots__ = (
+        "analyzed_at",
+        "answers",
+        "change_rate",
+        "checked_at",
+        "fingerprint",
+        "in_flight",
+        "popularity",
+        "popularity_at",
+    )
+
+    def __init__(self) -> None:
+        self.answers: dict[str, str] = {}
+        # Assume a moderately changing scene until runs show otherwise
+        self.change_rate = 0.5
+        self.fingerprint: str | None = None
+        self.in_flight = False
+        # When the camera was last found due, and when its clip was last analyzed
+        self.checked_at: float | None = None
+        self.analyzed_at: float | None = None
+        self.popularity = 0.0
+        self.popularity_at = 0.0
+
+
+class PreAnalysisScheduler:
+    """Background refresh of the standard prompts for active cameras with fresh footage.
+
+    A camera's refresh interval is ``base_interval_s / ((1 + popularity) * (0.5 + change_rate))``,
+    clamped to ``[min_interval_s, max_interval_s]``: popularity is the camera's recent
+    question count (decaying with ``popularity_half_life_s``) and change_rate how often a run's
+    answers differed from the previous run's. A clip that has not changed since the last run
+    is only re-analyzed once ``max_interval_s`` has passed.
+    """
+
+    def __init__(
+        self,
+        list_cameras: Callable[[], list[dict]],
+        clip_path: Callable[[dict], Path | None],
+        analyze: Callable[[dict, str, list[str]], dict[str, str]],
+        budget: TokenBucket,
+        *,
+        catalog: ClipCatalog,
+        prompts: tuple[str, ...] | list[str] = DEFAULT_PROMPTS,
+        base_interval_s: float = 60.0,
+        min_interval_s: float = 15.0,
+        max_interval_s: float = 240.0,
+        max_clip_age_s: float = 300.0,
+        popularity_half_life_s: float = 300.0,
+        tick_s: float = 5.0,
+        max_workers: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            list_cameras: Function returning all registry cameras
+            clip_path: Function returning the path of a camera's clip, or None
+            analyze: Function answering the prompts about a clip; returns the answer per
+                prompt, leaving out prompts that could not be answered
+            budget: Token bucket paying for the upstream calls (one upload plus one call per prompt)
+            catalog: Clip catalog; cameras whose clip it finds missing, too large, too long or
+                unreadable are skipped before anything is uploaded
+            prompts: The standard prompts run against every selected camera
+            base_interval_s: Refresh interval of a camera with average popularity and scene change
+            min_interval_s: Shortest refresh interval of any camera
+            max_interval_s: Longest refresh interval of any camera
+            max_clip_age_s: Clips last written longer ago than this are not analyzed
+            popularity_half_life_s: Time after which a question counts half towards popularity
+            tick_s: How often the scheduler looks for cameras that are due
+            max_workers: Number of cameras analyzed at the same time
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self._list_cameras = list_cameras
+        self._clip_path = clip_path
+        self._analyze = analyze
+        self.budget = budget
+        self._catalog = catalog
+        self.prompts = list(prompts)
+        self.base_interval_s = base_interval_s
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.max_clip_age_s = max_clip_age_s
+        self.popularity_half_life_s = popularity_half_life_s
+        self.tick_s = tick_s
+        self.max_workers = max_workers
+        self._clock = clock
+        self._states: dict[str, _CameraState] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._runs = 0
+        self._answers = 0
+        self._skipped_budget = 0
+        self._skipped_unchanged = 0
+        self._skipped_unusable = 0
+
+    @property
+    def cost(self) -> int:
+        """Upstream calls spent on one camera: one upload plus one call per prompt."""
+        return 1 + len(self.prompts)
+
+    def _state(self, camera_id: str) -> _CameraState:
+        """Return a camera's state, creating it; must be called with the lock held."""
+        state = self._states.get(camera_id)
+        if state is None:
+            state = self._states[camera_id] = _CameraState()
+        return state
+
+    def _decayed_popularity(self, state: _CameraState, now: float) -> float:
+        return state.popularity * 0.5 ** ((now - state.popularity_at) / self.popularity_half_life_s)
+
+    def record_query(self, camera_id: str) -> None:
+        """Count a user question about a camera towards its popularity.
+
+        Args:
+            camera_id: Camera the question was about
+
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._state(camera_id)
+            state.popularity = self._decayed_popularity(state, now) + 1.0
+            state.popularity_at = now
+
+    def interval_for(self, camera_id: str) -> float:
+        """Return a camera's current refresh interval in seconds."""
+        now = self._clock()
+        with self._lock:
+            return self._interval(self._state(camera_id), now)
+
+    def _interval(self, state: _CameraState, now: float) -> float:
+        demand = (1.0 + self._decayed_popularity(state, now)) * (0.5 + state.change_rate)
+        return min(self.max_interval_s, max(self.min_interval_s, self.base_interval_s / demand))
+
+    def _fresh_clip(self, camera: dict) -> Path | None:
+        """Return the path of a camera's clip if it can be uploaded and was written recently enough."""
+        path = self._clip_path(camera)
+        if path is None:
+            return None
+        if self._catalog.problem(path) is not None:
+            with self._lock:
+                self._skipped_unusable += 1
+            return None
+        age = self._catalog.age(path)
+        return path if age is not None and age <= self.max_clip_age_s else None
+
+    def run_due(self) -> int:
+        """Start the analysis of every camera that is due, most popular first.
+
+        Returns:
+            Number of cameras whose analysis was started
+
+        """
+        now = self._clock()
+        due = []
+        for camera in self._list_cameras():
+            if camera.get("status") != "active":
+                continue
+            camera_id = camera_id_of(camera)
+            with self._lock:
+                state = self._state(camera_id)
+                if state.in_flight:
+                    continue
+                if state.checked_at is not None and now - state.checked_at < self._interval(state, now):
+                    continue
+                popularity = self._decayed_popularity(state, now)
+            path = self._fresh_clip(camera)
+            if path is not None:
+                due.append((popularity, camera_id, camera, path))
+
+        started = 0
+        for _, camera_id, camera, path in sorted(due, key=lambda entry: entry[0], reverse=True):
+            fingerprint = self._catalog.fingerprint(path)
+            with self._lock:
+                state = self._states[camera_id]
+                unchanged = fingerprint is not None and fingerprint == state.fingerprint
+                if unchanged and now - state.analyzed_at < self.max_interval_s:
+                    # The answers cached for this clip are still valid
+                    self._skipped_unchanged += 1
+                    state.checked_at = now
+                    continue
+            if not self.budget.try_acquire(self.cost):
+                with self._lock:
+                    self._skipped_budget += 1
+                # Less popular cameras wait for the budget to refill
+                break
+            with self._lock:
+                state.in_flight = True
+            self._submit(self._run, camera_id, camera, path, fingerprint)
+            started += 1
+        return started
+
+    def _submit(self, fn: Callable, *args: object) -> None:
+        # Created on first use so no threads exist before a fork
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="preanalysis")
+        self._executor.submit(fn, *args)
+
+    def _run(self, camera_id: str, camera: dict, path: Path, fingerprint: str | None) -> None:
+        try:
+            answers = self._analyze(camera, str(path), self.prompts)
+        except Exception:
+            logger.exception(f"Pre-analysis of camera {camera_id} failed")
+            answers = {}
+        with self._lock:
+            state = self._states[camera_id]
+            state.in_flight = False
+            state.checked_at = self._clock()
+            self._runs += 1
+            self._answers += len(answers)
+            if not answers:
+                return
+            compared = [prompt for prompt in answers if prompt in state.answers]
+            if compared:
+                changed = sum(
+                    jaccard(normalize_question(answers[prompt]), normalize_question(state.answers[prompt]))
+                    < _SCENE_CHANGE_SIMILARITY
+                    for prompt in compared
+                ) / len(compared)
+                state.change_rate += _CHANGE_ALPHA * (changed - state.change_rate)
+            state.answers = answers
+            state.fingerprint = fingerprint
+            state.analyzed_at = state.checked_at
+        logger.info(f"Pre-analyzed camera {camera_id}: {len(answers)}/{len(self.prompts)} prompts answered")
+
+    def start(self) -> None:
+        """Start the background scheduling loop, if it is not running yet."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="preanalysis-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background scheduling loop."""
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception:
+                logger.exception("Pre-analysis scheduling failed")
+            self._stop.wait(self.tick_s)
+
+    def snapshot(self) -> dict:
+        """Return run counts, budget state and each camera's refresh interval."""
+        now = self._clock()
+        with self._lock:
+            return {
+                "enabled": True,
+                "running": self._thread is not None and not self._stop.is_set(),
+                "prompts": list(self.prompts),
+                "runs": self._runs,
+                "answers": self._answers,
+                "skipped_budget": self._skipped_budget,
+                "skipped_unchanged": self._skipped_unchanged,
+                "skipped_unusable": self._skipped_unusable,
+                "budget": self.budget.snapshot(),
+                "cameras": {
+                    camera_id: {
+                        "interval_s": round(self._interval(state, now), 1),
+                        "popularity": round(self._decayed_popularity(state, now), 2),
+                        "change_rate": round(state.change_rate, 3),
+                        "analyzed_age_s": None if state.analyzed_at is None else round(now - state.analyzed_at, 1),
+                    }
+                    for camera_id, state in self._states.items()
+                },
+            }
@@ -0,0 +1,253 @@
+"""Prefetch Module.
+
+Speculatively uploads the clip of the camera nearest to a user while they are
+still asking their question, so only the chat completion remains when it arrives:
+1. Scheduling background uploads from client location heartbeats
+2. Capping speculative uploads with a token bucket
+3. Handing a ready asset to the question that needs it
+4. Deleting assets nobody asked about once they expire
+5. Publishing prepared assets to a shared cache so other workers can claim them
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from loriens_guide.clips import ClipCatalog
+from loriens_guide.resilience import TokenBucket
+from loriens_guide.shared_cache import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of a heartbeat
+SCHEDULED = "scheduled"
+READY = "ready"
+BUDGET_EXHAUSTED = "budget_exhausted"
+NO_CLIP = "no_clip"
+
+
+class _Prefetch:
+    __slots__ = ("claims", "expires_at", "fingerprint", "future")
+
+    def __init__(self, fingerprint: str, future: Future, expires_at: float) -> None:
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = expires_at
+        self.claims = 0
+
+    def asset_id(self) -> str | None:
+        if not self.future.done() or self.future.exception() is not None:
+            return None
+        return self.future.result().get("asset_id")
+
+
+class ClipPrefetcher:
+    """Background uploads of the clips users are likely to ask about next."""
+
+    def __init__(
+        self,
+        upload: Callable[[str], dict],
+        delete: Callable[[str], object],
+        budget: TokenBucket,
+        *,
+        catalog: ClipCatalog,
+        ttl_s: float = 60.0,
+        hold_s: float = 180.0,
+        max_workers: int = 4,
+        shared: CacheBackend | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the prefetcher.
+
+        Args:
+            upload: Function uploading a clip; its result holds ``asset_id`` or an error
+            delete: Function deleting an uploaded asset
+            budget: Token bucket paying for each speculative upload
+            catalog: Clip catalog telling whether a camera's clip changed, without reading the file
+            ttl_s: How long an unused prefetched asset is kept before it is deleted
+            hold_s: How long a claimed asset is kept after its last claim (at least the chat timeout)
+            max_workers: Number of background upload threads
+            shared: Optional cache shared with other workers; prepared assets are published
+                there for ``ttl_s`` and deleted only ``hold_s`` later, so a worker that
+                claimed one can finish its question
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self._upload = upload
+        self._delete = delete
+        self.budget = budget
+        self._catalog = catalog
+        self.ttl_s = ttl_s
+        self.hold_s = hold_s
+        self.max_workers = max_workers
+        self.shared = shared
+        self._clock = clock
+        self._prefetches: dict[str, _Prefetch] = {}
+        # Prefetches of clips that have since been replaced, kept until they can be deleted
+        self._superseded: list[_Prefetch] = []
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._scheduled = 0
+        self._hits = 0
+        self._misses = 0
+        self._wasted = 0
+        self._shared_hits = 0
+
+    def _submit(self, fn: Callable, *args: object) -> Future:
+        # Created on first use so no threads exist before a fork
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="clip-prefetch")
+        return self._executor.submit(fn, *args)
+
+    def _sweep(self) -> None:
+        """Delete expired prefetches; must be called with the lock held."""
+        now = self._clock()
+        for camera_id, prefetch in list(self._prefetches.items()):
+            if now >= prefetch.expires_at and prefetch.future.done():
+                del self._prefetches[camera_id]
+                self._retire(prefetch)
+        for prefetch in list(self._superseded):
+            if now >= prefetch.expires_at and prefetch.future.done():
+                self._superseded.remove(prefetch)
+                self._retire(prefetch)
+
+    def _retire(self, prefetch: _Prefetch) -> None:
+        asset_id = prefetch.asset_id()
+        if not asset_id:
+            return
+        if prefetch.claims == 0:
+            self._wasted += 1
+        self._submit(self._delete, asset_id)
+
+    def prefetch(self, camera_id: str, video_path: str) -> str:
+        """Prepare a camera's current clip for a question that is likely to follow.
+
+        Args:
+            camera_id: Camera nearest to the user
+            video_path: Path of the camera's clip
+
+        Returns:
+            SCHEDULED, READY (already prepared), BUDGET_EXHAUSTED or NO_CLIP
+
+        """
+        fingerprint = self._catalog.fingerprint(video_path)
+        if fingerprint is None:
+            return NO_CLIP
+        with self._lock:
+            self._sweep()
+            current = self._prefetches.get(camera_id)
+            if current is not None and current.fingerprint == fingerprint:
+                failed = current.future.done() and current.asset_id() is None
+                if not failed:
+                    return READY if current.future.done() else SCHEDULED
+            if not self.budget.try_acquire():
+                return BUDGET_EXHAUSTED
+            if current is not None:
+                if self.shared is not None:
+                    # Other workers may still be asking about the published asset
+                    self.shared.delete(_shared_key(camera_id))
+                    current.expires_at = min(current.expires_at, self._clock() + self.hold_s)
+                elif current.claims == 0:
+                    # Superseded by a newer clip: unclaimed, the old asset is no longer worth anything
+                    current.expires_at = self._clock()
+                self._superseded.append(current)
+            self._scheduled += 1
+            future = self._submit(self._upload, video_path)
+            prefetch = _Prefetch(fingerprint, future, self._clock() + self.ttl_s)
+            if self.shared is not None:
+                prefetch.expires_at += self.hold_s
+            self._prefetches[camera_id] = prefetch
+            self._sweep()
+        if self.shared is not None:
+            # Registered outside the lock: the callback runs at once if the upload already finished
+            future.add_done_callback(lambda _: self._publish(camera_id, prefetch))
+        return SCHEDULED
+
+    def _publish(self, camera_id: str, prefetch: _Prefetch) -> None:
+        """Offer a prepared asset to other workers until it stops being safe to start using it."""
+        asset_id = prefetch.asset_id()
+        with self._lock:
+            current = self._prefetches.get(camera_id) is prefetch
+            ttl_s = prefetch.expires_at - self.hold_s - self._clock()
+        if asset_id and current and ttl_s > 0:
+            self.shared.set(_shared_key(camera_id), {"fingerprint": prefetch.fingerprint, "asset_id": asset_id}, ttl_s)
+
+    def claim(self, camera_id: str, video_path: str, timeout: float) -> str | None:
+        """Take the prefetched asset of a camera's current clip, if there is one.
+
+        The asset stays owned by the prefetcher, which deletes it once it expires, so
+        the caller must not delete it.
+
+        Args:
+            camera_id: Camera the question is about
+            video_path: Path of the camera's clip
+            timeout: Longest time to wait for an upload that is still running
+
+        Returns:
+            The asset_id, or None if nothing usable was prefetched
+
+        """
+        fingerprint = self._catalog.fingerprint(video_path)
+        with self._lock:
+            self._sweep()
+            prefetch = self._prefetches.get(camera_id)
+            local = prefetch is not None and prefetch.fingerprint == fingerprint
+        if not local:
+            asset_id = self._claim_shared(camera_id, fingerprint)
+            with self._lock:
+                if asset_id is None:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+                    self._shared_hits += 1
+            return asset_id
+        try:
+            result = prefetch.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            result = {}
+        except Exception:
+            logger.exception(f"Prefetch of camera {camera_id} failed")
+            result = {}
+        asset_id = result.get("asset_id")
+        with self._lock:
+            # The asset may have expired (and been deleted) while the upload was awaited
+            retired = self._prefetches.get(camera_id) is not prefetch and prefetch not in self._superseded
+            if not asset_id or retired:
+                self._misses += 1
+                return None
+            self._hits += 1
+            prefetch.claims += 1
+            prefetch.expires_at = max(prefetch.expires_at, self._clock() + self.hold_s)
+        return asset_id
+
+    def _claim_shared(self, camera_id: str, fingerprint: str | None) -> str | None:
+        """Return an asset another worker prepared for the camera's current clip, if any."""
+        if self.shared is None or fingerprint is None:
+            return None
+        entry = self.shared.get(_shared_key(camera_id))
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return None
+        return entry.get("asset_id")
+
+    def snapshot(self) -> dict:
+        """Return prefetch hit rate, wasted uploads and budget state."""
+        with self._lock:
+            claims = self._hits + self._misses
+            return {
+                "enabled": True,
+                "scheduled": self._scheduled,
+                "prepared": len(self._prefetches),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / claims, 3) if claims else None,
+                "shared_hits": self._shared_hits,
+                "wasted_uploads": self._wasted,
+                "budget": self.budget.snapshot(),
+            }
+
+
+def _shared_key(camera_id: str) -> str:
+    return f"prefetch:{camera_id}"
@@ -0,0 +1,62 @@
+"""Profile Context Module.
+
+Tracks which threads work for a profiled request. It has no web framework
+dependency, so modules handing work to other threads (e.g. the dispatcher) can
+carry a request's profile along without importing Flask:
+1. Attaching the current thread to a profile and detaching it again
+2. Listing the attached threads for the sampler
+3. Wrapping work handed to another thread so it joins the current thread's profile
+"""
+
+import threading
+from collections.abc import Callable
+from functools import wraps
+
+# Threads attached to a profile, by thread id; shared by all profilers of the process
+_attached: dict[int, object] = {}
+_attached_lock = threading.Lock()
+
+
+def attach(profile: object) -> None:
+    """Attach the current thread to a profile, so the sampler records its stacks."""
+    with _attached_lock:
+        _attached[threading.get_ident()] = profile
+
+
+def detach() -> None:
+    """Detach the current thread from its profile, if any."""
+    with _attached_lock:
+        _attached.pop(threading.get_ident(), None)
+
+
+def attached() -> list[tuple[int, object]]:
+    """Return the (thread id, profile) pairs of all attached threads."""
+    with _attached_lock:
+        return list(_attached.items())
+
+
+def propagate(fn: Callable) -> Callable:
+    """Let work handed to another thread join the profile of the current thread, if any.
+
+    Returns fn unchanged when the current thread is not being profiled.
+    """
+    profile = _attached.get(threading.get_ident())
+    if profile is None:
+        return fn
+
+    @wraps(fn)
+    def profiled(*args: object, **kwargs: object) -> object:
+        thread_id = threading.get_ident()
+        with _attached_lock:
+            previous = _attached.get(thread_id)
+            _attached[thread_id] = profile
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with _attached_lock:
+                if previous is None:
+                    _attached.pop(thread_id, None)
+                else:
+                    _attached[thread_id] = previous
+
+    return profiled
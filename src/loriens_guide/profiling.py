@@ -0,0 +1,425 @@
+"""Profiling Module.
+
+Opt-in sampling profiler for live requests, to see where a slow endpoint spends
+its time (handlers, JSON serialization, distance math, clip handling):
+1. Profiling a request when asked to (X-Profile header) or a sampled share of requests
+2. One background thread sampling the stacks of the threads serving profiled requests
+3. Following a request's work onto the dispatcher's worker threads (see profile_context)
+4. Wall-clock and on-CPU samples as folded stacks, the input format of flame graph tools
+5. Recent profiles kept by request id and listed by a debug endpoint
+
+Nothing is installed while profiling is disabled, so it then costs nothing.
+"""
+
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from types import CodeType, FrameType
+
+from flask import Flask, Response, g, jsonify, request
+
+from loriens_guide.profile_context import attach, attached, detach
+
+logger = logging.getLogger(__name__)
+
+WALL = "wall"
+CPU = "cpu"
+
+# Request ids accepted from the X-Request-Id header; others are replaced by a generated one
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# A sample counts as on-CPU when the thread ran for at least this share of the time since the last one
+_ON_CPU_SHARE = 0.5
+
+
+def request_id_from(headers: Mapping) -> str:
+    """Return the request id of an X-Request-Id header, or a new one if it has none or an unsafe one."""
+    value = headers.get("X-Request-Id")
+    return value if value and _REQUEST_ID_PATTERN.match(value) else uuid.uuid4().hex
+
+
+def _frame_label(code: CodeType, labels: dict[CodeType, str]) -> str:
+    """Return a frame's name in folded stacks: function (package/file:line)."""
+    label = labels.get(code)
+    if label is None:
+        path = Path(code.co_filename)
+        label = f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})".replace(";", ":")
+        labels[code] = label
+    return label
+
+
+class Profile:
+    """Stack samples of one request."""
+
+    def __init__(self, request_id: str, method: str, path: str, interval_s: float) -> None:
+        """Initialize the profile.
+
+        Args:
+            request_id: Id of the profiled request
+            method: HTTP method of the request
+            path: Path of the request
+            interval_s: Time between two samples
+
+        """
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.interval_s = interval_s
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: float | None = None
+        self.status: int | None = None
+        self.samples = {WALL: Counter(), CPU: Counter()}
+        self._lock = threading.Lock()
+
+    def add(self, stack: str, *, on_cpu: bool) -> None:
+        """Count a sampled stack, also as on-CPU if the thread was running."""
+        with self._lock:
+            self.samples[WALL][stack] += 1
+            if on_cpu:
+                self.samples[CPU][stack] += 1
+
+    def finish(self) -> None:
+        """Record how long the request took."""
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def folded(self, kind: str = WALL) -> str:
+        """Return the samples as folded stacks ("root;...;leaf count" lines) for flame graph tools."""
+        with self._lock:
+            counts = self.samples[kind].most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in counts)
+
+    def summary(self, top: int = 5) -> dict:
+        """Return the request, its sample counts and the functions it spent most samples in."""
+        with self._lock:
+            kind = CPU if self.samples[CPU] else WALL
+            leaves = Counter()
+            for stack, count in self.samples[kind].items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            return {
+                "request_id": self.request_id,
+                "method": self.method,
+                "path": self.path,
+                "status": self.status,
+                "started_at": datetime.fromtimestamp(self.started_at, tz=UTC).isoformat(),
+                "duration_ms": self.duration_ms,
+                "interval_ms": round(self.interval_s * 1000, 3),
+                "samples": sum(self.samples[WALL].values()),
+                "cpu_samples": sum(self.samples[CPU].values()),
+                # Innermost frames with the most samples, on-CPU ones if there are any
+                "hottest_kind": kind,
+                "hottest": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(top)],
+            }
+
+
+class Profiler:
+    """Sampling profiler for requests, keeping the most recent profiles.
+
+    A single background thread samples, every ``interval_s``, the stack of each thread
+    attached to a profile. Wall-clock samples show where a request waited as well as
+    where it ran; on-CPU samples only count threads whose CPU time advanced since the
+    previous sample (where the platform can tell, otherwise all samples are wall-clock).
+    """
+
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.005,
+        sample_rate: float = 0.0,
+        token: str = "",
+        keep: int = 50,
+        max_active: int = 4,
+        max_depth: int = 64,
+        directory: str | Path | None = None,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize the profiler.
+
+        Args:
+            interval_s: Time between two samples of a thread
+            sample_rate: Share of requests profiled without being asked to (0 for none)
+            token: Value of the X-Profile header that profiles a request, and bearer token of
+                the debug endpoint (empty disables both)
+            keep: Profiles kept in memory, the oldest are dropped
+            max_active: Requests profiled at the same time; others are served unprofiled
+            max_depth: Innermost frames kept of each sampled stack
+            directory: Where to also write each profile's folded stacks, e.g. for profiles
+                of every worker process (default: only kept in memory)
+            rng: Random number source deciding which requests are sampled (injectable for tests)
+
+        """
+        self.interval_s = interval_s
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_active = max_active
+        self.max_depth = max_depth
+        self.directory = Path(directory) if directory else None
+        self._random = rng
+        self._profiles: deque[Profile] = deque(maxlen=keep)
+        self._active: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._sampler_pid: int | None = None
+        self._labels: dict[CodeType, str] = {}
+        self._cpu_clocks: dict[int, tuple[float, float]] = {}
+        self._profiled = 0
+        self._skipped_busy = 0
+
+    def is_authorized(self, value: str | None) -> bool:
+        """Return whether a header value (or bearer token) carries the profiler's token."""
+        if not self.token or not value:
+            return False
+        return hmac.compare_digest(value.removeprefix("Bearer ").strip(), self.token)
+
+    def should_profile(self, profile_header: str | None) -> bool:
+        """Return whether to profile a request: asked to with the token, or sampled."""
+        if profile_header is not None and self.is_authorized(profile_header):
+            return True
+        return self.sample_rate > 0 and self._random() < self.sample_rate
+
+    def _ensure_sampler(self) -> None:
+        # Created on first use so no threads exist before a fork
+        if self._sampler is None or self._sampler_pid != os.getpid():
+            self._sampler = threading.Thread(target=self._sample_forever, name="profiler", daemon=True)
+            self._sampler_pid = os.getpid()
+            self._sampler.start()
+
+    def start(self, request_id: str, method: str, path: str) -> Profile | None:
+        """Start profiling a request on the current thread.
+
+        Returns:
+            The request's profile, or None if max_active requests are already profiled
+
+        """
+        with self._lock:
+            if len(self._active) >= self.max_active:
+                self._skipped_busy += 1
+                return None
+            profile = Profile(request_id, method, path, self.interval_s)
+            self._active.add(profile)
+            self._profiled += 1
+            self._ensure_sampler()
+        self._attach(profile)
+        return profile
+
+    def finish(self, profile: Profile, status: int | None = None) -> None:
+        """Stop profiling a request and keep its profile."""
+        self._detach()
+        profile.finish()
+        if status is not None:
+            profile.status = status
+        with self._lock:
+            self._active.discard(profile)
+            self._profiles.append(profile)
+        if self.directory is not None:
+            self._write(profile)
+
+    def _attach(self, profile: Profile) -> None:
+        attach(profile)
+        self._wake.set()
+
+    @staticmethod
+    def _detach() -> None:
+        detach()
+
+    def _write(self, profile: Profile) -> None:
+        """Write a profile's folded stacks to <request id>.folded and <request id>.cpu.folded."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{profile.request_id}.folded").write_text(profile.folded(WALL))
+            (self.directory / f"{profile.request_id}.cpu.folded").write_text(profile.folded(CPU))
+        except OSError as e:
+            logger.warning(f"Could not write profile {profile.request_id}: {e}")
+
+    def get(self, request_id: str) -> Profile | None:
+        """Return the most recent kept profile of a request id, or None."""
+        with self._lock:
+            for profile in reversed(self._profiles):
+                if profile.request_id == request_id:
+                    return profile
+        return None
+
+    def recent(self) -> list[dict]:
+        """Return summaries of the kept profiles, newest first."""
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        return [profile.summary() for profile in profiles]
+
+    def _stack(self, frame: FrameType) -> str:
+        """Return a frame's stack as a folded stack, outermost frame first."""
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            frames.append(_frame_label(frame.f_code, self._labels))
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def _on_cpu(self, thread_id: int) -> bool:
+        """Return whether a thread mostly ran since its previous sample."""
+        try:
+            cpu = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+        except (AttributeError, OSError, ValueError):
+            # Per-thread CPU clocks are not available here: all samples are wall-clock
+            return False
+        now = time.perf_counter()
+        previous = self._cpu_clocks.get(thread_id)
+        self._cpu_clocks[thread_id] = (now, cpu)
+        if previous is None:
+            return False
+        return cpu - previous[1] >= _ON_CPU_SHARE * (now - previous[0])
+
+    def sample(self) -> int:
+        """Take one sample of every thread attached to a profile of this profiler.
+
+        Returns:
+            Number of threads sampled
+
+        """
+        with self._lock:
+            active = set(self._active)
+        targets = [(thread_id, profile) for thread_id, profile in attached() if profile in active]
+        if not targets:
+            return 0
+        frames = sys._current_frames()  # noqa: SLF001 - the only way to see another thread's stack
+        try:
+            for thread_id, profile in targets:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    profile.add(self._stack(frame), on_cpu=self._on_cpu(thread_id))
+        finally:
+            del frames
+        live = {thread_id for thread_id, _ in targets}
+        for thread_id in list(self._cpu_clocks):
+            if thread_id not in live:
+                del self._cpu_clocks[thread_id]
+        return len(targets)
+
+    def _sample_forever(self) -> None:
+        while True:
+            self._wake.wait()
+            if not self.sample():
+                with self._lock:
+                    if not self._active:
+                        # Sleep until the next profiled request
+                        self._wake.clear()
+                        continue
+            time.sleep(self.interval_s)
+
+    def snapshot(self) -> dict:
+        """Return the profiler's settings and how many requests it profiled."""
+        with self._lock:
+            return {
+                "enabled": True,
+                "sample_rate": self.sample_rate,
+                "interval_ms": round(self.interval_s * 1000, 3),
+                "on_demand": bool(self.token),
+                "active": len(self._active),
+                "kept": len(self._profiles),
+                "profiled": self._profiled,
+                "skipped_busy": self._skipped_busy,
+            }
+
+    @contextmanager
+    def profiling(self, name: str) -> Iterator[Profile | None]:
+        """Profile a block of code outside a request, e.g. a capture loop.
+
+        Args:
+            name: Name the profile is kept under, used as its request id and path
+
+        Yields:
+            The block's profile, or None if max_active profiles are already running
+
+        """
+        profile = self.start(name, "-", name)
+        try:
+            yield profile
+        finally:
+            if profile is not None:
+                self.finish(profile)
+
+
+def install_profiler(app: Flask, profiler: Profiler, *, prefix: str) -> None:
+    """Profile an app's requests and serve its profiles under a debug endpoint.
+
+    A request is profiled when its X-Profile header carries the profiler's token, or
+    when it is sampled. Its response then carries its X-Request-Id and, in X-Profile,
+    where to fetch the profile. ``GET <prefix>`` lists the recent profiles and
+    ``GET <prefix>/<request id>?kind=wall|cpu`` returns one as folded stacks; both
+    need ``Authorization: Bearer <token>``.
+
+    Args:
+        app: The Flask app
+        profiler: The profiler to use
+        prefix: Path of the debug endpoint, e.g. "/api/debug/profiles"
+
+    """
+
+    @app.before_request
+    def start_profile() -> None:
+        if request.path.startswith(prefix) or not profiler.should_profile(request.headers.get("X-Profile")):
+            return
+        profile = profiler.start(request_id_from(request.headers), request.method, request.path)
+        if profile is not None:
+            g.profile = profile
+
+    @app.after_request
+    def profile_headers(response: Response) -> Response:
+        profile = g.get("profile")
+        if profile is not None:
+            profile.status = response.status_code
+            response.headers["X-Request-Id"] = profile.request_id
+            response.headers["X-Profile"] = f"{prefix}/{profile.request_id}"
+        return response
+
+    @app.teardown_request
+    def finish_profile(_error: BaseException | None) -> None:
+        # Runs after a streamed response has been sent, so the profile covers all of it
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.finish(profile)
+
+    def list_profiles() -> tuple[Response, int]:
+        """List the recent profiles of this process, newest first."""
+        if not profiler.is_authorized(request.headers.get("Authorization")):
+            return jsonify({"error": True, "message": "Profiler token required"}), 403
+        return jsonify({"profiler": profiler.snapshot(), "profiles": profiler.recent()}), 200
+
+    def get_profile(request_id: str) -> Response | tuple[Response, int]:
+        """Return a profile as folded stacks, ready for flamegraph.pl or speedscope."""
+        if not profiler.is_authorized(request.headers.get("Authorization")):
+            return jsonify({"error": True, "message": "Profiler token required"}), 403
+        kind = request.args.get("kind", WALL)
+        if kind not in {WALL, CPU}:
+            return jsonify({"error": True, "message": "kind must be 'wall' or 'cpu'"}), 400
+        profile = profiler.get(request_id)
+        if profile is None:
+            return jsonify({"error": True, "message": "Profile not found"}), 404
+        return Response(profile.folded(kind), mimetype="text/plain")
+
+    app.add_url_rule(prefix, endpoint="list_profiles", view_func=list_profiles, methods=["GET"])
+    app.add_url_rule(f"{prefix}/<request_id>", endpoint="get_profile", view_func=get_profile, methods=["GET"])
+
+
+def profiler_from_env() -> Profiler | None:
+    """Create the profiler configured by PROFILER_* if PROFILER_ENABLED is true, else None."""
+    if os.getenv("PROFILER_ENABLED", "false").lower() != "true":
+        return None
+    return Profiler(
+        interval_s=float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000,
+        sample_rate=float(os.getenv("PROFILER_SAMPLE_RATE", "0")),
+        token=os.getenv("PROFILER_TOKEN", ""),
+        keep=int(os.getenv("PROFILER_KEEP", "50")),
+        max_active=int(os.getenv("PROFILER_MAX_ACTIVE", "4")),
+        directory=os.getenv("PROFILER_DIR") or None,
+    )
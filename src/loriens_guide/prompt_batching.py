@@ -0,0 +1,184 @@
+"""Prompt Batching Module.
+
+Merges questions about the same clip that arrive within a short window into a
+single VLM call:
+1. Collecting the prompts queued for one key (e.g. a clip) during the batching window
+2. Asking for one JSON answer per question in a single structured prompt
+3. Splitting the response back to each waiting caller
+4. Falling back to individual calls when the response cannot be parsed
+"""
+
+import json
+import logging
+import re
+import threading
+from collections.abc import Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_batch_prompt(prompts: list[str]) -> str:
+    """Combine several prompts about the same clip into one structured prompt.
+
+    Args:
+        prompts: The individual user prompts, in order
+
+    Returns:
+        A prompt asking for a JSON object with one answer per prompt
+
+    """
+    numbered = "\n\n".join(f"Question {number}:\n{prompt}" for number, prompt in enumerate(prompts, start=1))
+    return (
+        f"Answer each of the following {len(prompts)} questions about the attached video separately.\n\n"
+        f"{numbered}\n\n"
+        'Respond with only a JSON object of the form {"answers": ["answer to question 1", ...]}, '
+        f"with exactly {len(prompts)} answers in the order of the questions."
+    )
+
+
+def parse_batch_answers(text: str, count: int) -> list[str] | None:
+    """Split a batched VLM response into the individual answers.
+
+    Args:
+        text: The VLM's response to a prompt from build_batch_prompt
+        count: Number of questions in the batch
+
+    Returns:
+        The answers in question order, or None if the response is not as requested
+
+    """
+    cleaned = _FENCE_PATTERN.sub("", (text or "").strip())
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        answers = json.loads(cleaned[start : end + 1]).get("answers")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    if not isinstance(answers, list) or len(answers) != count or not all(isinstance(a, str) for a in answers):
+        return None
+    return answers
+
+
+class _PendingBatch:
+    """Prompts collected for one key during a batching window."""
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+        self.results: list[dict] = []
+        self.fallback = False
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class PromptBatcher:
+    """Micro-batch prompts that share a key (e.g. clip, camera and system prompt).
+
+    The first caller for a key waits up to ``window_s`` for more prompts (or until
+    ``max_batch`` have arrived) and then makes one call for all of them; the other
+    callers wait for their share of the answer.
+    """
+
+    def __init__(self, window_s: float = 0.2, max_batch: int = 8) -> None:
+        """Initialize the batcher.
+
+        Args:
+            window_s: How long the first prompt waits for others to join its batch
+            max_batch: Largest number of prompts merged into one call
+
+        """
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._pending: dict[Hashable, _PendingBatch] = {}
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._batched_prompts = 0
+        self._largest_batch = 0
+        self._parse_fallbacks = 0
+
+    def submit(
+        self,
+        key: Hashable,
+        prompt: str,
+        run_batch: Callable[[list[str]], list[dict] | None],
+        run_single: Callable[[str], dict],
+    ) -> dict:
+        """Answer a prompt, batched with other prompts for the same key.
+
+        Args:
+            key: Prompts with the same key can share a call
+            prompt: The caller's prompt
+            run_batch: Function answering several prompts in one call; returns one
+                result per prompt, or None if the response could not be split
+            run_single: Function answering one prompt on its own, used for batches
+                of one and as the fallback
+
+        Returns:
+            The result for the caller's prompt
+
+        """
+        with self._lock:
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._pending[key] = _PendingBatch()
+            position = len(batch.prompts)
+            batch.prompts.append(prompt)
+            if len(batch.prompts) >= self.max_batch:
+                # Closed: the next prompt for this key starts a new batch
+                del self._pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_s)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            self._execute(batch, run_batch)
+        else:
+            batch.done.wait()
+
+        if batch.fallback:
+            return run_single(prompt)
+        return batch.results[position]
+
+    def _execute(self, batch: _PendingBatch, run_batch: Callable[[list[str]], list[dict] | None]) -> None:
+        try:
+            if len(batch.prompts) == 1:
+                batch.fallback = True
+                return
+            try:
+                results = run_batch(batch.prompts)
+            except Exception:
+                logger.exception("Batched VLM call failed, answering the prompts individually")
+                results = None
+            with self._lock:
+                if results is None:
+                    self._parse_fallbacks += 1
+                else:
+                    self._batches += 1
+                    self._batched_prompts += len(batch.prompts)
+                    self._largest_batch = max(self._largest_batch, len(batch.prompts))
+            if results is None:
+                batch.fallback = True
+            else:
+                batch.results = results
+        finally:
+            batch.done.set()
+
+    def snapshot(self) -> dict:
+        """Return batch sizes and the upstream calls saved by batching."""
+        with self._lock:
+            return {
+                "enabled": True,
+                "window_ms": round(self.window_s * 1000),
+                "max_batch": self.max_batch,
+                "batches": self._batches,
+                "batched_prompts": self._batched_prompts,
+                "mean_batch_size": round(self._batched_prompts / self._batches, 2) if self._batches else None,
+                "largest_batch": self._largest_batch,
+                "calls_saved": self._batched_prompts - self._batches,
+                "parse_fallbacks": self._parse_fallbacks,
+            }
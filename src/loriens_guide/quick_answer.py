@@ -0,0 +1,142 @@
+"""Quick Answer Module.
+
+Two-phase answers, so users hear what matters most before a full description
+has been generated:
+1. A tightly bounded first answer: the most important hazard and where it is
+2. A JSON schema and token limit keeping that answer short and structured
+3. Parsing the structured answer, falling back to the raw text if the VLM ignores the schema
+4. Turning it into one short spoken sentence
+5. A prompt for the detailed answer, fetched only if the user asks for it
+"""
+
+import json
+import re
+
+# Phases of a two-phase answer
+QUICK = "quick"
+DETAIL = "detail"
+
+# Where a hazard is, relative to the camera's view of the user
+DIRECTIONS = ("ahead", "left", "right", "behind", "none")
+
+# Longest summary kept from a quick answer, in characters
+MAX_SUMMARY_CHARS = 160
+
+QUICK_SYSTEM_PROMPT = (
+    "You are an accessibility assistant for vision-impaired users navigating public spaces. "
+    "Reply with only a JSON object and nothing else. Name the single most important hazard "
+    "in the user's way (null if there is none), its direction, and answer the question in "
+    "at most 15 words. Use directions like 'left' or 'ahead' instead of colors."
+)
+
+QUICK_ANSWER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hazard": {"type": ["string", "null"], "maxLength": 60},
+        "direction": {"type": "string", "enum": list(DIRECTIONS)},
+        "summary": {"type": "string", "maxLength": MAX_SUMMARY_CHARS},
+    },
+    "required": ["hazard", "direction", "summary"],
+    "additionalProperties": False,
+}
+
+# OpenAI-style structured output request for the quick answer
+QUICK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "quick_answer", "strict": True, "schema": QUICK_ANSWER_SCHEMA},
+}
+
+_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+_SPOKEN_DIRECTIONS = {
+    "ahead": "ahead of you",
+    "left": "on your left",
+    "right": "on your right",
+    "behind": "behind you",
+}
+
+
+def build_quick_prompt(question: str) -> str:
+    """Ask for the quick, structured answer to a question.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        The prompt for the first phase
+
+    """
+    return (
+        f"Question: {question}\n\n"
+        'Respond with only {"hazard": <most important hazard or null>, '
+        f'"direction": <one of {", ".join(DIRECTIONS)}>, "summary": <answer in at most 15 words>}}.'
+    )
+
+
+def build_detail_prompt(question: str) -> str:
+    """Ask for the full answer after the quick one.
+
+    Args:
+        question: The user's original question
+
+    Returns:
+        The prompt for the second phase
+
+    """
+    return f"Now answer my question in full detail, including everything your short answer left out: {question}"
+
+
+def parse_quick_answer(text: str) -> dict:
+    """Read a quick answer, tolerating VLMs that do not honour the JSON schema.
+
+    Args:
+        text: The VLM's response to a prompt from build_quick_prompt
+
+    Returns:
+        Dictionary with ``hazard`` (or None), ``direction``, ``summary`` and whether the
+        answer was ``structured``; unstructured text is kept, shortened, as the summary
+
+    """
+    cleaned = _FENCE_PATTERN.sub("", (text or "").strip())
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    answer = None
+    if start != -1 and end > start:
+        try:
+            answer = json.loads(cleaned[start : end + 1])
+        except json.JSONDecodeError:
+            answer = None
+    if not isinstance(answer, dict) or not isinstance(answer.get("summary"), str):
+        return {"hazard": None, "direction": "none", "summary": _shorten(cleaned), "structured": False}
+
+    hazard = answer.get("hazard")
+    hazard = hazard.strip() if isinstance(hazard, str) and hazard.strip().lower() not in {"", "none", "null"} else None
+    direction = str(answer.get("direction", "none")).strip().lower()
+    return {
+        "hazard": hazard,
+        "direction": direction if direction in DIRECTIONS else "none",
+        "summary": _shorten(answer["summary"].strip()),
+        "structured": True,
+    }
+
+
+def spoken_quick_answer(answer: dict) -> str:
+    """Turn a quick answer into one short sentence to speak.
+
+    Args:
+        answer: A quick answer from parse_quick_answer
+
+    Returns:
+        The hazard and its direction first, followed by the summary
+
+    """
+    summary = answer["summary"]
+    if not answer["hazard"]:
+        return summary
+    where = _SPOKEN_DIRECTIONS.get(answer["direction"])
+    warning = f"Caution: {answer['hazard']}" + (f" {where}." if where else ".")
+    return f"{warning} {summary}".strip()
+
+
+def _shorten(text: str) -> str:
+    """Cut a text down to MAX_SUMMARY_CHARS, marking the cut with an ellipsis."""
+    return text if len(text) <= MAX_SUMMARY_CHARS else text[: MAX_SUMMARY_CHARS - 1].rstrip() + "…"
@@ -0,0 +1,194 @@
+"""Rate Limit Module.
+
+Keeps one client (e.g. a kiosk stuck in a retry loop) from using up the VLM
+capacity shared by everyone:
+1. Identifying clients by a known API key, falling back to their IP address
+2. A token bucket per client, allowing short bursts but capping the long-run rate
+3. Telling rejected clients when to retry
+4. Per-client usage for monitoring
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+
+from loriens_guide.fanout import DEFAULT_FANOUT_CAMERAS, MAX_FANOUT_CAMERAS, STRATEGIES
+from loriens_guide.resilience import TokenBucket
+
+
+def _hash_key(key: str) -> str:
+    """Return the hash a client's API key is known and reported by, so it is never exposed."""
+    return hashlib.sha256(key.strip().encode()).hexdigest()
+
+
+def client_key(
+    headers: Mapping, remote_addr: str | None, *, trust_forwarded: bool = False, api_keys: frozenset[str] = frozenset()
+) -> str:
+    """Identify the client of a request.
+
+    Args:
+        headers: Request headers
+        remote_addr: Address of the connecting peer
+        trust_forwarded: Whether to use the X-Forwarded-For address added by the proxy (its
+            last entry; only behind a proxy that sets it, as clients can forge the others)
+        api_keys: Hashes of the known API keys (see api_keys_from_env); other keys are
+            ignored, as a client could otherwise get a new bucket with every made-up key
+
+    Returns:
+        ``token:<hash>`` for clients sending a known API key, otherwise ``ip:<address>``
+
+    """
+    authorization = headers.get("Authorization", "")
+    key = headers.get("X-API-Key") or (authorization[7:] if authorization.lower().startswith("bearer ") else "")
+    if key and api_keys:
+        hashed = _hash_key(key)
+        if hashed in api_keys:
+            return f"token:{hashed[:16]}"
+    forwarded = headers.get("X-Forwarded-For", "") if trust_forwarded else ""
+    address = forwarded.split(",")[-1].strip() or remote_addr or "unknown"
+    return f"ip:{address}"
+
+
+def request_cost(data: object, *, batch: bool = False) -> int:
+    """Return the tokens a VLM request costs: one per batch item, or per camera a fan-out may ask.
+
+    Args:
+        data: The request's JSON payload
+        batch: Whether the request is a batch of ``items``
+
+    """
+    if not isinstance(data, dict):
+        return 1
+    if batch:
+        items = data.get("items")
+        return max(1, len(items)) if isinstance(items, list) else 1
+    if data.get("mode") in STRATEGIES:
+        try:
+            return min(max(1, int(data.get("max_cameras", DEFAULT_FANOUT_CAMERAS))), MAX_FANOUT_CAMERAS)
+        except (TypeError, ValueError):
+            return 1
+    return 1
+
+
+class _Client:
+    __slots__ = ("allowed", "bucket", "limited", "seen_at")
+
+    def __init__(self, bucket: TokenBucket, seen_at: float) -> None:
+        self.bucket = bucket
+        self.seen_at = seen_at
+        self.allowed = 0
+        self.limited = 0
+
+
+class ClientRateLimiter:
+    """A token bucket per client, created on the client's first request.
+
+    Clients are kept least recently seen first; beyond ``max_clients`` the least recently
+    seen are forgotten (their next request starts with a full bucket).
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: float,
+        *,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate_per_s: Long-run requests per second allowed per client
+            burst: Requests a client may send at once after being idle
+            max_clients: Clients tracked before the least recently seen are forgotten
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._clients: OrderedDict[str, _Client] = OrderedDict()
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._limited = 0
+
+    def acquire(self, client: str, cost: float = 1.0) -> float:
+        """Spend a client's tokens for a request.
+
+        Args:
+            client: The client's key (see client_key)
+            cost: Tokens the request costs (e.g. its number of questions)
+
+        Returns:
+            0 if the request may proceed, otherwise the seconds after which it may be retried
+
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._clients.get(client)
+            if state is None:
+                state = self._clients[client] = _Client(TokenBucket(self.rate_per_s, self.burst, self._clock), now)
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            state.seen_at = now
+            self._clients.move_to_end(client)
+        # A request larger than the burst is charged the whole burst
+        cost = min(cost, self.burst)
+        allowed = state.bucket.try_acquire(cost)
+        with self._lock:
+            if allowed:
+                state.allowed += 1
+                self._allowed += 1
+            else:
+                state.limited += 1
+                self._limited += 1
+        return 0.0 if allowed else max(state.bucket.retry_after(cost), 0.001)
+
+    def snapshot(self, top: int = 20) -> dict:
+        """Return overall counts and the usage of the busiest clients.
+
+        Args:
+            top: Number of clients listed, those with the most requests first
+
+        """
+        now = self._clock()
+        with self._lock:
+            clients = sorted(self._clients.items(), key=lambda item: item[1].allowed + item[1].limited, reverse=True)
+            return {
+                "enabled": True,
+                "rate_per_min": round(self.rate_per_s * 60, 3),
+                "burst": self.burst,
+                "clients": len(self._clients),
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "top_clients": {
+                    client: {
+                        "allowed": state.allowed,
+                        "limited": state.limited,
+                        "idle_s": round(now - state.seen_at, 1),
+                    }
+                    for client, state in clients[:top]
+                },
+            }
+
+
+def limiter_from_env() -> ClientRateLimiter | None:
+    """Create the limiter configured by RATE_LIMIT_PER_MIN and RATE_LIMIT_BURST (None if the rate is 0)."""
+    rate_per_min = float(os.getenv("RATE_LIMIT_PER_MIN", "60"))
+    if rate_per_min <= 0:
+        return None
+    return ClientRateLimiter(rate_per_min / 60, float(os.getenv("RATE_LIMIT_BURST", "20")))
+
+
+def api_keys_from_env() -> frozenset[str]:
+    """Return the hashes of the API keys listed in RATE_LIMIT_API_KEYS (comma-separated)."""
+    return frozenset(_hash_key(key) for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip())
+
+
+def trust_forwarded_from_env() -> bool:
+    """Return whether RATE_LIMIT_TRUST_PROXY allows identifying clients by X-Forwarded-For."""
+    return os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
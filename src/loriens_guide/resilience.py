@@ -0,0 +1,304 @@
+"""Resilience Module.
+
+Protects the service from a slow or failing upstream VLM API:
+1. A circuit breaker that fails fast after repeated upstream failures
+2. An AIMD concurrency limiter that adapts to the observed upstream latency
+3. A token bucket capping the rate of optional (e.g. speculative) upstream calls
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Classic three-state circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and every call is
+    rejected until ``reset_timeout`` seconds have passed. It then lets a single probe through
+    (half-open): a success closes the breaker again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures needed to open the breaker
+            reset_timeout: Seconds to stay open before allowing a probe request
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state, moving from open to half-open once the timeout elapsed."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go upstream.
+
+        Returns:
+            True if the call is allowed, False if it should fail fast
+
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful upstream call."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._state = CLOSED
+            self._probe_in_flight = False
+
+    def record_ignored(self) -> None:
+        """Record a call whose outcome says nothing about the upstream, freeing the probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed upstream call, opening the breaker if needed."""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._times_opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        """Return the breaker state for monitoring."""
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+                "retry_in_s": round(retry_in, 3),
+            }
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter driven by upstream latency.
+
+    The limit grows additively (by ``1 / limit`` per good sample, so roughly +1 per window)
+    while calls succeed and latency stays within ``latency_tolerance`` times the baseline.
+    A failure or a latency spike is treated as congestion and shrinks the limit
+    multiplicatively. Calls beyond the current limit are rejected immediately instead of
+    queueing behind a slow upstream. Each kind of call (e.g. an upload and a chat completion)
+    is compared with its own baseline, so fast calls of one kind never make normal calls of
+    another look congested.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            initial_limit: Starting number of concurrent upstream calls
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            backoff_ratio: Factor applied to the limit on congestion
+            latency_tolerance: Latency above ``baseline * tolerance`` counts as congestion
+
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._baseline_latency: dict[str, float] = {}
+        self._last_latency: float | None = None
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Return the current concurrency limit."""
+        with self._lock:
+            return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently holding a slot."""
+        with self._lock:
+            return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """Take a concurrency slot without waiting.
+
+        Returns:
+            True if a slot was acquired, False if the limit is reached
+
+        """
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: float, success: bool, operation: str = "call") -> None:
+        """Return a slot and feed the observed outcome into the limit.
+
+        Args:
+            latency: Duration of the upstream call in seconds
+            success: Whether the upstream call succeeded
+            operation: Kind of call, whose own baseline the latency is compared with
+
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._last_latency = latency
+            congested = not success
+            if success:
+                baseline = self._baseline_latency.get(operation)
+                if baseline is None or latency < baseline:
+                    baseline = latency
+                else:
+                    # Let the baseline drift up slowly so a permanently slower upstream is re-learned
+                    baseline += (latency - baseline) * 0.05
+                self._baseline_latency[operation] = baseline
+                congested = latency > baseline * self.latency_tolerance
+
+            if congested:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    def cancel(self) -> None:
+        """Return a slot without feeding the call's outcome into the limit."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def snapshot(self) -> dict:
+        """Return the limiter state for monitoring."""
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "rejected": self._rejected,
+                "baseline_latency_s": {
+                    operation: round(baseline, 3) for operation, baseline in self._baseline_latency.items()
+                },
+                "last_latency_s": None if self._last_latency is None else round(self._last_latency, 3),
+            }
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``; each call spends
+    tokens, so bursts of up to ``capacity`` calls are allowed while the long-run rate stays
+    at ``rate``.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (the allowed burst)
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._granted = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Spend tokens without waiting.
+
+        Args:
+            tokens: Number of tokens the call costs
+
+        Returns:
+            True if the tokens were spent, False if the bucket does not hold enough
+
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                self._rejected += 1
+                return False
+            self._tokens -= tokens
+            self._granted += 1
+            return True
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """Return the seconds until the bucket holds enough tokens for a call (0 if it does now)."""
+        with self._lock:
+            self._refill()
+            missing = min(tokens, self.capacity) - self._tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float("inf")
+
+    def snapshot(self) -> dict:
+        """Return the bucket state for monitoring."""
+        with self._lock:
+            self._refill()
+            return {
+                "rate_per_s": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+                "granted": self._granted,
+                "rejected": self._rejected,
+            }
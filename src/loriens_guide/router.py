@@ -0,0 +1,386 @@
+"""Shard Router Module.
+
+Lightweight front for several backend shards (local processes or nodes), so the
+per-camera state of a shard is only built once instead of once per process:
+1. Routing every camera-bound request to the shard owning the camera on a consistent-hash ring
+2. Resolving location-only requests to the camera nearest the user, as the shards would
+3. Failing over to the next shard on the ring when the owner cannot be reached
+4. Shards joining and leaving at runtime, moving only the cameras of the changed shard
+
+Run it in front of the shards, e.g. ``SHARDS=http://127.0.0.1:5001,http://127.0.0.1:5002``;
+``scripts/run_shards.py`` starts a local setup.
+"""
+
+import hmac
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+import requests
+from flask import Flask, jsonify, request
+from flask.wrappers import Response
+from flask_cors import CORS
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from loriens_guide.camera_store import CameraStore, camera_coordinates, camera_id_of, load_json_cameras
+from loriens_guide.geo import haversine_distance
+from loriens_guide.sharding import HashRing, ring_from_env
+from loriens_guide.vlm_service import DEFAULT_CAMERAS_FILE
+
+logger = logging.getLogger(__name__)
+
+# Endpoints whose work depends on a camera's state, forwarded to the camera's shard; a
+# location heartbeat goes to the shard its location's questions go to, which claims the prefetch
+ROUTED_PATHS = (
+    "/api/vlm/analyze",
+    "/api/vlm/analyze/detail",
+    "/api/assistance/request",
+    "/api/location/heartbeat",
+    "/api/v1/query",
+)
+
+# Headers that belong to one connection and are never forwarded
+_HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+}
+
+# requests decodes compressed bodies, so the shard's encoding no longer applies
+_DROPPED_RESPONSE_HEADERS = _HOP_BY_HOP | {"content-encoding"}
+
+# Location-only requests with no camera to resolve are grouped by a grid cell of about 100 m
+_CELL_DECIMALS = 3
+
+
+def _never_sent(error: requests.ConnectionError) -> bool:
+    """Return whether a connection error happened before the request reached the shard.
+
+    Only failures to connect (refused, unresolvable, timed out) qualify; a connection
+    dropped after the request was sent may have left the shard running it.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    # urllib3 raises NewConnectionError (a ConnectTimeoutError) when it cannot connect
+    return isinstance(reason, ConnectTimeoutError)
+
+
+def request_location(payload: Mapping) -> tuple[float | None, float | None]:
+    """Return the user's latitude and longitude from a request payload of either API.
+
+    Accepts ``latitude``/``longitude`` or ``lat``/``long``, at the top level or in a
+    ``location`` object.
+    """
+    location = payload.get("location")
+    source = location if isinstance(location, Mapping) else payload
+    try:
+        return (
+            float(source.get("latitude", source.get("lat"))),
+            float(source.get("longitude", source.get("long"))),
+        )
+    except (TypeError, ValueError):
+        return None, None
+
+
+def routing_key(payload: object, resolve_camera: Callable[[float, float], str | None] | None = None) -> str | None:
+    """Return the key a request is routed by: the camera it is about.
+
+    Args:
+        payload: The request's JSON payload
+        resolve_camera: Function returning the id of the camera nearest to a location
+
+    Returns:
+        The ``camera_id`` of the payload, else the camera resolved from its location,
+        else a grid cell of its location, or None for a payload without either
+
+    """
+    if not isinstance(payload, Mapping):
+        return None
+    if payload.get("camera_id"):
+        return str(payload["camera_id"])
+    lat, long = request_location(payload)
+    if lat is None or long is None:
+        return None
+    camera_id = resolve_camera(lat, long) if resolve_camera is not None else None
+    return camera_id or f"cell:{round(lat, _CELL_DECIMALS)}:{round(long, _CELL_DECIMALS)}"
+
+
+class NearestCamera:
+    """Resolve a location to the id of the nearest camera in the shards' registry.
+
+    The shards may pick a better scoring camera close by, so this only keeps
+    location-only requests on the shard that most likely holds the camera's state.
+    """
+
+    def __init__(self, *, camera_store: CameraStore | None = None, cameras_file: str | Path | None = None) -> None:
+        """Initialize the resolver.
+
+        Args:
+            camera_store: SQLite registry shared with the shards
+            cameras_file: JSON registry, used without a camera_store and re-read when it changes
+
+        """
+        self.camera_store = camera_store
+        self.cameras_file = Path(cameras_file) if cameras_file else None
+        self._cameras: list[tuple[str, float, float]] = []
+        self._mtime: float | None = None
+        self._lock = threading.Lock()
+
+    def _json_cameras(self) -> list[tuple[str, float, float]]:
+        """Return (id, latitude, longitude) of the JSON registry's cameras, re-read when the file changes."""
+        try:
+            mtime = self.cameras_file.stat().st_mtime
+        except OSError:
+            return []
+        with self._lock:
+            if mtime != self._mtime:
+                cameras = []
+                for camera in load_json_cameras(self.cameras_file):
+                    coordinates = camera_coordinates(camera)
+                    if coordinates is not None and camera_id_of(camera):
+                        cameras.append((camera_id_of(camera), *coordinates))
+                self._cameras, self._mtime = cameras, mtime
+            return self._cameras
+
+    def __call__(self, lat: float, long: float) -> str | None:
+        """Return the id of the camera nearest to a location, or None if there is none."""
+        if self.camera_store is not None:
+            camera = self.camera_store.find_nearest(lat, long)
+            return camera_id_of(camera) if camera else None
+        if self.cameras_file is None:
+            return None
+        cameras = self._json_cameras()
+        if not cameras:
+            return None
+        return min(cameras, key=lambda camera: haversine_distance(lat, long, camera[1], camera[2]))[0]
+
+
+class ShardRouter:
+    """Forward requests to the shard owning their camera, failing over along the ring."""
+
+    def __init__(
+        self,
+        ring: HashRing,
+        *,
+        resolve_camera: Callable[[float, float], str | None] | None = None,
+        timeout_s: float = 300.0,
+        max_attempts: int = 2,
+        admin_token: str = "",
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            ring: Consistent-hash ring of the shards' base URLs
+            resolve_camera: Function returning the id of the camera nearest to a location
+            timeout_s: How long to wait for a shard's response
+            max_attempts: Shards tried per request, the owner and then the next ones on the ring
+            admin_token: Bearer token allowing shards to join and leave (empty disables it)
+
+        """
+        self.ring = ring
+        self.resolve_camera = resolve_camera
+        self.timeout_s = timeout_s
+        self.max_attempts = max_attempts
+        self.admin_token = admin_token
+        self._session: requests.Session | None = None
+        self._session_pid: int | None = None
+        self._lock = threading.Lock()
+        self._forwarded: dict[str, int] = {}
+        self._failed: dict[str, int] = {}
+        self._failovers = 0
+        self._unroutable = 0
+
+    def _http(self) -> requests.Session:
+        """Return this process's pooled HTTP session, creating it after a fork."""
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                # Sockets must never be shared with a parent process
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+                self._session_pid = os.getpid()
+            return self._session
+
+    def shards_for(self, payload: object, client: str) -> list[str]:
+        """Return the shards to try for a request, the owner of its camera first.
+
+        Requests without a camera or location (which the shards reject anyway) are
+        spread by the client's address.
+        """
+        key = routing_key(payload, self.resolve_camera)
+        if key is None:
+            with self._lock:
+                self._unroutable += 1
+            key = f"client:{client}"
+        return self.ring.preference_list(key, self.max_attempts)
+
+    def forward(
+        self, shards: list[str], path: str, body: bytes, headers: Mapping[str, str]
+    ) -> tuple[str | None, requests.Response | None]:
+        """Send a request to the first shard that can be reached.
+
+        Only failures to connect fail over: the request never reached the shard, so
+        sending it to the next one cannot run it twice. Any other connection error is
+        raised, as is a timeout.
+
+        Args:
+            shards: Shards to try, in order
+            path: Path of the endpoint
+            body: The request's body
+            headers: Headers to forward
+
+        Returns:
+            The shard that answered and its response, or (None, None) if none could be reached
+
+        """
+        for attempt, shard in enumerate(shards):
+            try:
+                response = self._http().post(f"{shard}{path}", data=body, headers=headers, timeout=self.timeout_s)
+            except requests.ConnectionError as e:
+                with self._lock:
+                    self._failed[shard] = self._failed.get(shard, 0) + 1
+                if not _never_sent(e):
+                    raise
+                logger.warning(f"Shard {shard} unreachable: {e}")
+                continue
+            with self._lock:
+                self._forwarded[shard] = self._forwarded.get(shard, 0) + 1
+                if attempt:
+                    self._failovers += 1
+            return shard, response
+        return None, None
+
+    def is_admin(self, authorization: str | None) -> bool:
+        """Return whether an Authorization header carries the admin token."""
+        if not self.admin_token or not authorization:
+            return False
+        return hmac.compare_digest(authorization.removeprefix("Bearer ").strip(), self.admin_token)
+
+    def snapshot(self) -> dict:
+        """Return the ring and how many requests each shard served or failed."""
+        with self._lock:
+            counters = {
+                "forwarded": dict(self._forwarded),
+                "failed": dict(self._failed),
+                "failovers": self._failovers,
+                "unroutable": self._unroutable,
+            }
+        return {**self.ring.snapshot(), **counters}
+
+
+def router_from_env() -> ShardRouter:
+    """Create the router configured by SHARDS and ROUTER_*.
+
+    Locations are resolved with the registry the shards use: CAMERA_DB_PATH if set,
+    otherwise CAMERAS_FILE or the repository's cameras.json.
+    """
+    if os.getenv("CAMERA_DB_PATH"):
+        resolve_camera = NearestCamera(camera_store=CameraStore(os.environ["CAMERA_DB_PATH"]))
+    else:
+        resolve_camera = NearestCamera(cameras_file=os.getenv("CAMERAS_FILE") or DEFAULT_CAMERAS_FILE)
+    return ShardRouter(
+        ring_from_env(),
+        resolve_camera=resolve_camera,
+        timeout_s=float(os.getenv("ROUTER_TIMEOUT_S", "300")),
+        max_attempts=int(os.getenv("ROUTER_MAX_ATTEMPTS", "2")),
+        admin_token=os.getenv("ROUTER_ADMIN_TOKEN", ""),
+    )
+
+
+def create_app(router: ShardRouter | None = None) -> Flask:
+    """Create the router's Flask app.
+
+    Args:
+        router: The router to serve (default: configured from the environment)
+
+    Returns:
+        The app forwarding ROUTED_PATHS and serving the /router endpoints
+
+    """
+    router = router or router_from_env()
+    app = Flask(__name__)
+    CORS(app, expose_headers=["Retry-After", "X-Shard"])
+
+    def forward() -> Response | tuple[Response, int]:
+        """Forward a request to the shard owning its camera."""
+        body = request.get_data()
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        shards = router.shards_for(payload, request.remote_addr or "")
+        if not shards:
+            return jsonify({"error": True, "message": "No shards available"}), 503
+
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _HOP_BY_HOP}
+        # Replaced, not appended to: shards trusting it must not see addresses a client made up
+        headers["X-Forwarded-For"] = request.remote_addr or ""
+        try:
+            shard, response = router.forward(shards, request.path, body, headers)
+        except requests.Timeout:
+            return jsonify({"error": True, "message": "Shard did not answer in time"}), 504
+        except requests.ConnectionError:
+            # The shard may have received the request, so it is not sent to another one
+            return jsonify({"error": True, "message": "Connection to the shard was lost"}), 502
+        if response is None:
+            return jsonify({"error": True, "message": "No shard reachable", "shards": shards}), 502
+
+        result = Response(response.content, status=response.status_code)
+        for name, value in response.headers.items():
+            if name.lower() not in _DROPPED_RESPONSE_HEADERS:
+                result.headers[name] = value
+        result.headers["X-Shard"] = shard
+        return result
+
+    for path in ROUTED_PATHS:
+        app.add_url_rule(path, endpoint=path, view_func=forward, methods=["POST"])
+
+    @app.route("/router/health", methods=["GET"])
+    def health_check() -> tuple[Response, int]:
+        """Report whether the router has shards to forward to."""
+        shards = router.ring.shards
+        return jsonify({"status": "healthy" if shards else "no shards", "shards": len(shards)}), 200
+
+    @app.route("/router/shards", methods=["GET"])
+    def list_shards() -> tuple[Response, int]:
+        """Return the ring and per-shard request counts."""
+        return jsonify(router.snapshot()), 200
+
+    @app.route("/router/shards", methods=["POST", "DELETE"])
+    def change_shards() -> tuple[Response, int]:
+        """Add (POST) or remove (DELETE) the shard given as ``{"shard": "<base URL>"}``."""
+        if not router.is_admin(request.headers.get("Authorization")):
+            return jsonify({"error": True, "message": "Admin token required"}), 403
+        data = request.get_json(silent=True)
+        shard = data.get("shard") if isinstance(data, dict) else None
+        if not isinstance(shard, str) or not shard.startswith(("http://", "https://")):
+            return jsonify({"error": True, "message": "shard must be an http(s) base URL"}), 400
+        shard = shard.rstrip("/")
+        if request.method == "POST":
+            changed = router.ring.add(shard)
+            logger.info(f"Shard {shard} joined" if changed else f"Shard {shard} already on the ring")
+        else:
+            changed = router.ring.remove(shard)
+            logger.info(f"Shard {shard} left" if changed else f"Shard {shard} not on the ring")
+        return jsonify({"changed": changed, "shards": router.ring.shards}), 200
+
+    return app
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("ROUTER_PORT", "8000"))
+    create_app().run(host="0.0.0.0", port=port, threaded=True)  # noqa: S104
@@ -1,8 +1,62 @@
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-app = FastAPI(title="Lórien's Guide API")
+from loriens_guide.camera_store import camera_id_of
+from loriens_guide.hazards import HAZARD_PROMPT, HazardMonitor, format_sse
+from loriens_guide.ratelimit import api_keys_from_env, client_key, trust_forwarded_from_env
+from loriens_guide.vlm_service import ACCESSIBILITY_SYSTEM_PROMPT, VLMService
+
+vlm_service = VLMService()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Start the clip watcher and background pre-analysis once the server process runs."""
+    vlm_service.start_background_tasks()
+    yield
+
+
+app = FastAPI(title="Lórien's Guide API", lifespan=lifespan)
+
+# Comment lines sent while no event is due, so proxies keep the stream open
+HAZARD_KEEPALIVE_S = 15.0
+
+TRUST_PROXY = trust_forwarded_from_env()
+API_KEYS = api_keys_from_env()
+
+
+def analyze_hazards(camera: dict) -> dict:
+    """Run the hazard analysis of a camera's clip (blocking).
+
+    Run without the camera id, so it neither replaces the last analysis users' questions
+    fall back to while the VLM is shedding load, nor is answered with it.
+    """
+    problem = vlm_service.clip_problem(camera)
+    if problem is not None:
+        message = f"No usable video for camera {camera_id_of(camera)} ({problem})"
+        return {"error": True, "stage": "video", "message": message}
+    return vlm_service.analyze_clip(str(vlm_service.clip_path(camera)), HAZARD_PROMPT, ACCESSIBILITY_SYSTEM_PROMPT)
+
+
+hazard_monitor = HazardMonitor(
+    lambda lat, long, radius_m: vlm_service.find_nearby_cameras(
+        lat, long, radius_m, int(os.getenv("HAZARD_MAX_CAMERAS", "3")), with_clip=True
+    ),
+    analyze_hazards,
+    interval_s=float(os.getenv("HAZARD_INTERVAL_S", "30")),
+    radius_m=float(os.getenv("HAZARD_RADIUS_M", "100")),
+    max_subscriptions=int(os.getenv("HAZARD_MAX_SUBSCRIPTIONS", "1000")),
+    max_subscriptions_per_client=int(os.getenv("HAZARD_MAX_SUBSCRIPTIONS_PER_CLIENT", "4")),
+)
 
 
 class GuidanceRequest(BaseModel):
@@ -19,6 +73,13 @@ class GuidanceResponse(BaseModel):
     answer_text: str
 
 
+class HazardPosition(BaseModel):
+    """Request model for updating a hazard subscriber's position."""
+
+    latitude: float = Field(..., ge=-90, le=90, description="Latitude coordinate (-90 to 90)")
+    longitude: float = Field(..., ge=-180, le=180, description="Longitude coordinate (-180 to 180)")
+
+
 @app.post("/api/get-guidance")
 async def get_guidance(request: GuidanceRequest) -> GuidanceResponse:
     """Provide guidance based on location and user question.
@@ -47,6 +108,85 @@ async def get_guidance(request: GuidanceRequest) -> GuidanceResponse:
     return GuidanceResponse(answer_text=answer)
 
 
+@app.get("/api/hazards/subscribe")
+async def subscribe_hazards(
+    request: Request,
+    latitude: Annotated[float, Query(ge=-90, le=90)],
+    longitude: Annotated[float, Query(ge=-180, le=180)],
+    radius_m: Annotated[float | None, Query(gt=0, le=1000)] = None,
+) -> StreamingResponse:
+    """Stream hazard warnings for the cameras near a position as server-sent events.
+
+    The first event (``subscribed``) carries the subscription id used to report new
+    positions; every ``hazard`` event carries a changed analysis of a nearby camera.
+    The subscription is only made once the stream starts, so it ends with the stream.
+
+    Args:
+        request: The incoming request, identifying the client
+        latitude: Subscriber's latitude
+        longitude: Subscriber's longitude
+        radius_m: Radius within which cameras are watched
+
+    Returns:
+        A text/event-stream response that stays open until the client disconnects
+
+    Raises:
+        HTTPException: 429 if the client or the server has the most subscriptions allowed
+
+    """
+    client = client_key(
+        request.headers, request.client.host if request.client else None, trust_forwarded=TRUST_PROXY, api_keys=API_KEYS
+    )
+    if not hazard_monitor.has_room(client):
+        raise HTTPException(status_code=429, detail="Too many hazard subscriptions")
+
+    async def events() -> AsyncIterator[str]:
+        subscription = await hazard_monitor.subscribe(latitude, longitude, radius_m, client=client)
+        if subscription is None:
+            yield format_sse("error", json.dumps({"message": "Too many hazard subscriptions"}))
+            return
+        try:
+            subscribed = {"subscription_id": subscription.id, "cameras": sorted(subscription.camera_ids)}
+            yield format_sse("subscribed", json.dumps(subscribed))
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=HAZARD_KEEPALIVE_S)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse("hazard", json.dumps(event))
+        finally:
+            hazard_monitor.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/hazards/subscriptions/{subscription_id}/position")
+async def update_hazard_position(subscription_id: str, position: HazardPosition) -> dict:
+    """Move a hazard subscriber, switching to the cameras near its new position.
+
+    Args:
+        subscription_id: Id from the subscription's ``subscribed`` event
+        position: The subscriber's new position
+
+    Returns:
+        The subscription id and the cameras now watched for it
+
+    """
+    subscription = await hazard_monitor.move(subscription_id, position.latitude, position.longitude)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    return {"subscription_id": subscription.id, "cameras": sorted(subscription.camera_ids)}
+
+
+@app.get("/api/hazards/metrics")
+async def hazard_metrics() -> dict:
+    """Expose hazard subscribers, watched cameras and upstream analyses for monitoring."""
+    return hazard_monitor.snapshot()
+
+
 @app.get("/")
 async def root() -> dict[str, str]:
     """Health check endpoint."""
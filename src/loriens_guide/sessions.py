@@ -0,0 +1,239 @@
+"""Sessions Module.
+
+Keeps a short conversation per client session so follow-up questions about the
+same camera ("and what about on my left?") reuse the uploaded clip and the
+earlier answers:
+1. Remembering the uploaded asset and the question/answer history of a session
+2. Bounding each history by an approximate token count, oldest turns first
+3. Expiring idle sessions and evicting the least recently used under pressure
+4. Deleting a session's asset once the session is gone
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+# Rough size of a token in characters, good enough to bound prompt growth
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return max(1, len(text or "") // _CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to roughly max_tokens, marking the cut with an ellipsis."""
+    limit = max_tokens * _CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+class Session:
+    """A client's conversation about one camera's clip."""
+
+    __slots__ = ("asset_id", "camera_id", "clip", "history", "owned", "session_id", "tokens", "updated_at")
+
+    def __init__(
+        self, session_id: str, camera_id: str, clip: str | None, asset_id: str, *, owned: bool, updated_at: float
+    ) -> None:
+        """Initialize a session without history.
+
+        Args:
+            session_id: The client's session id
+            camera_id: Camera the conversation is about
+            clip: Fingerprint of the clip the asset was uploaded from
+            asset_id: The uploaded asset the follow-ups are asked about
+            owned: Whether the session deletes the asset when it ends
+            updated_at: Time of the session's last question
+
+        """
+        self.session_id = session_id
+        self.camera_id = camera_id
+        self.clip = clip
+        self.asset_id = asset_id
+        self.owned = owned
+        self.updated_at = updated_at
+        self.history: list[dict] = []
+        self.tokens = 0
+
+
+class SessionStore:
+    """Client sessions with a time-to-live, bounded in count and history size."""
+
+    def __init__(
+        self,
+        delete_asset: Callable[[str], object],
+        *,
+        ttl_s: float = 120.0,
+        max_sessions: int = 1000,
+        max_history_tokens: int = 1024,
+        max_total_tokens: int = 256_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            delete_asset: Function deleting an uploaded asset
+            ttl_s: How long a session lasts after its last question
+            max_sessions: Sessions kept before the least recently used are evicted
+            max_history_tokens: Largest history kept per session
+            max_total_tokens: Largest history kept over all sessions before the least
+                recently used are evicted
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self._delete_asset = delete_asset
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_history_tokens = max_history_tokens
+        self.max_total_tokens = max_total_tokens
+        self._clock = clock
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._total_tokens = 0
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._follow_ups = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def _remove(self, session_id: str) -> str | None:
+        """Remove a session; returns its asset if it must be deleted. Call with the lock held."""
+        session = self._sessions.pop(session_id)
+        self._total_tokens -= session.tokens
+        return session.asset_id if session.owned else None
+
+    def _delete(self, asset_ids: list[str]) -> None:
+        """Delete the assets of ended sessions in the background."""
+        for asset_id in asset_ids:
+            # Created on first use so no threads exist before a fork
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-cleanup")
+            self._executor.submit(self._delete_asset, asset_id)
+
+    def _expire(self, now: float) -> list[str]:
+        """Remove idle sessions, least recently used first. Call with the lock held."""
+        released = []
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.updated_at <= self.ttl_s:
+                break
+            released.append(self._remove(session.session_id))
+            self._expired += 1
+        return [asset_id for asset_id in released if asset_id]
+
+    def get(self, session_id: str, camera_id: str, clip: str | None) -> Session | None:
+        """Return a session that can answer a follow-up about a camera's current clip.
+
+        A session about another camera, or about a clip that has since been replaced, is
+        ended so the question starts a new conversation.
+
+        Args:
+            session_id: The client's session id
+            camera_id: Camera the question is about
+            clip: Fingerprint of the camera's current clip
+
+        Returns:
+            The live session, or None if the question starts a new one
+
+        """
+        now = self._clock()
+        with self._lock:
+            released = self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None and (session.camera_id != camera_id or session.clip != clip):
+                released.append(self._remove(session_id))
+                session = None
+            if session is not None:
+                self._follow_ups += 1
+                session.updated_at = now
+                self._sessions.move_to_end(session_id)
+        self._delete([asset_id for asset_id in released if asset_id])
+        return session
+
+    def start(self, session_id: str, camera_id: str, clip: str | None, asset_id: str, owned: bool = True) -> None:
+        """Start a session about a camera's clip, replacing the client's previous one.
+
+        Args:
+            session_id: The client's session id
+            camera_id: Camera the conversation is about
+            clip: Fingerprint of the clip the asset was uploaded from
+            asset_id: The uploaded asset follow-ups are asked about
+            owned: Whether the session deletes the asset when it ends (False for assets
+                owned elsewhere, e.g. by the prefetcher)
+
+        """
+        now = self._clock()
+        with self._lock:
+            released = self._expire(now)
+            if session_id in self._sessions:
+                released.append(self._remove(session_id))
+            self._sessions[session_id] = Session(session_id, camera_id, clip, asset_id, owned=owned, updated_at=now)
+            while len(self._sessions) > self.max_sessions:
+                released.append(self._remove(next(iter(self._sessions))))
+                self._evicted += 1
+        self._delete([asset_id for asset_id in released if asset_id])
+
+    def record(self, session_id: str, question: str, answer: str) -> None:
+        """Add a question and its answer to a session's history.
+
+        The oldest turns are dropped once the history exceeds its token bound, and the
+        least recently used sessions are evicted once all histories together exceed theirs.
+
+        Args:
+            session_id: The client's session id
+            question: The user's question
+            answer: The VLM's answer
+
+        """
+        # A single turn may use at most half of the history
+        turn_tokens = max(1, self.max_history_tokens // 4)
+        turn = [
+            {"role": "user", "text": truncate_to_tokens(question, turn_tokens)},
+            {"role": "assistant", "text": truncate_to_tokens(answer, turn_tokens)},
+        ]
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session.history.extend(turn)
+            tokens = sum(estimate_tokens(message["text"]) for message in session.history)
+            while tokens > self.max_history_tokens and len(session.history) > len(turn):
+                dropped = session.history[:2]
+                del session.history[:2]
+                tokens -= sum(estimate_tokens(message["text"]) for message in dropped)
+            self._total_tokens += tokens - session.tokens
+            session.tokens = tokens
+            released = []
+            while self._total_tokens > self.max_total_tokens and len(self._sessions) > 1:
+                oldest = next(iter(self._sessions))
+                if oldest == session_id:
+                    break
+                released.append(self._remove(oldest))
+                self._evicted += 1
+        self._delete([asset_id for asset_id in released if asset_id])
+
+    def history(self, session_id: str) -> list[dict]:
+        """Return a copy of a session's history, oldest turn first."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return [dict(message) for message in session.history] if session else []
+
+    def end(self, session_id: str) -> None:
+        """End a session, deleting its asset if it owns it."""
+        with self._lock:
+            released = [self._remove(session_id)] if session_id in self._sessions else []
+        self._delete([asset_id for asset_id in released if asset_id])
+
+    def snapshot(self) -> dict:
+        """Return session counts and the uploads saved by follow-ups."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "history_tokens": self._total_tokens,
+                "follow_ups": self._follow_ups,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
@@ -0,0 +1,129 @@
+"""Sharding Module.
+
+Assigns cameras to backend shards (processes or nodes), so all requests about a
+camera reach the process holding its state (uploaded assets, answer caches,
+single-flight tables, pre-analysis schedules):
+1. A consistent-hash ring with virtual nodes per shard, for an even spread
+2. Minimal movement when shards join or leave: only the keys of the changed shard move
+3. A preference list per key, so a request can fail over to the next shard
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+from collections.abc import Iterable
+
+
+def _hash(value: str) -> int:
+    """Map a string to a 64-bit position on the ring."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of keys (camera ids) onto shards.
+
+    Every shard is placed on the ring ``replicas`` times; a key belongs to the first
+    shard position clockwise from its hash. Adding a shard therefore only takes keys
+    from its neighbours, and removing one only hands its own keys to theirs.
+    """
+
+    def __init__(self, shards: Iterable[str] = (), *, replicas: int = 100) -> None:
+        """Initialize the ring.
+
+        Args:
+            shards: Initial shards, e.g. base URLs of backend processes
+            replicas: Virtual nodes per shard; more give a more even spread
+
+        """
+        self.replicas = replicas
+        self._tokens: dict[int, str] = {}
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self._shards: set[str] = set()
+        self._lock = threading.Lock()
+        for shard in shards:
+            self.add(shard)
+
+    @property
+    def shards(self) -> list[str]:
+        """Return the shards on the ring, sorted."""
+        with self._lock:
+            return sorted(self._shards)
+
+    def _rebuild(self) -> None:
+        """Recompute the sorted ring positions; call with the lock held."""
+        ring = sorted(self._tokens.items())
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def add(self, shard: str) -> bool:
+        """Add a shard; returns False if it was already on the ring."""
+        with self._lock:
+            if shard in self._shards:
+                return False
+            self._shards.add(shard)
+            for replica in range(self.replicas):
+                # On the (unlikely) collision of two positions the earlier shard keeps it
+                self._tokens.setdefault(_hash(f"{shard}#{replica}"), shard)
+            self._rebuild()
+            return True
+
+    def remove(self, shard: str) -> bool:
+        """Remove a shard; returns False if it was not on the ring."""
+        with self._lock:
+            if shard not in self._shards:
+                return False
+            self._shards.discard(shard)
+            self._tokens = {point: owner for point, owner in self._tokens.items() if owner != shard}
+            self._rebuild()
+            return True
+
+    def preference_list(self, key: str, count: int | None = None) -> list[str]:
+        """Return the shards responsible for a key, owner first, then its fail-over shards.
+
+        Args:
+            key: The routing key, e.g. a camera id
+            count: Number of distinct shards wanted (default all)
+
+        Returns:
+            Distinct shards in ring order starting at the key's owner
+
+        """
+        with self._lock:
+            if not self._points:
+                return []
+            wanted = min(count or len(self._shards), len(self._shards))
+            start = bisect.bisect(self._points, _hash(key))
+            shards: list[str] = []
+            for offset in range(len(self._points)):
+                shard = self._owners[(start + offset) % len(self._points)]
+                if shard not in shards:
+                    shards.append(shard)
+                    if len(shards) == wanted:
+                        break
+            return shards
+
+    def shard_for(self, key: str) -> str | None:
+        """Return the shard owning a key, or None if the ring is empty."""
+        owners = self.preference_list(key, 1)
+        return owners[0] if owners else None
+
+    def snapshot(self) -> dict:
+        """Return the shards and the share of the ring each one owns."""
+        with self._lock:
+            owned = dict.fromkeys(self._shards, 0)
+            for index, point in enumerate(self._points):
+                previous = self._points[index - 1] if index else self._points[-1] - 2**64
+                owned[self._owners[index]] += point - previous
+            return {
+                "shards": sorted(self._shards),
+                "replicas": self.replicas,
+                "share": {shard: round(span / 2**64, 3) for shard, span in sorted(owned.items())},
+            }
+
+
+def ring_from_env() -> HashRing:
+    """Create the ring of the shards listed in SHARDS (comma-separated base URLs)."""
+    shards = [shard.strip().rstrip("/") for shard in os.getenv("SHARDS", "").split(",") if shard.strip()]
+    return HashRing(shards, replicas=int(os.getenv("SHARD_REPLICAS", "100")))
@@ -0,0 +1,351 @@
+"""Shared Cache Module.
+
+Cache tier shared by the worker processes of one host, so answers and assets
+computed by one gunicorn worker are reused by the others:
+1. A CacheBackend interface that other stores (e.g. a networked one) can implement
+2. An in-process backend for single-process deployments and tests
+3. A SQLite backend shared by all processes opening the same file
+4. Atomic get-or-set, so only one process computes a missing value at a time
+5. Time-to-live per entry and size-bounded, least recently used eviction
+
+Values must be JSON-serializable.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+# Cached values round-trip through JSON
+Value = dict | list | str | int | float | bool
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    lease_owner TEXT
+);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+"""
+
+
+class CacheBackend(Protocol):
+    """Interface of a cache shared between worker processes."""
+
+    def get(self, key: str) -> Value | None:
+        """Return the value of a live entry, or None."""
+
+    def set(self, key: str, value: Value, ttl_s: float) -> None:
+        """Store a value for ttl_s seconds."""
+
+    def delete(self, key: str) -> None:
+        """Remove an entry."""
+
+    def get_or_set(self, key: str, factory: Callable[[], Value | None], ttl_s: float) -> Value | None:
+        """Return a live entry's value, or compute, store and return it.
+
+        Only one caller (across all processes sharing the cache) runs the factory for a
+        key at a time; the others wait for its value. A factory returning None stores
+        nothing.
+        """
+
+    def snapshot(self) -> dict:
+        """Return the cache state for monitoring."""
+
+    def close(self) -> None:
+        """Close this process's connections to the cache, if it has any."""
+
+
+class InProcessCache:
+    """CacheBackend kept in this process's memory."""
+
+    def __init__(self, max_entries: int = 4096, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used are evicted
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[Value, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-key lock and the number of callers holding or waiting for it
+        self._key_locks: dict[str, list] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _lookup(self, key: str) -> Value | None:
+        """Return a live entry's value and mark it used; call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self._clock():
+            self._entries.pop(key, None)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry[0]
+
+    def get(self, key: str) -> Value | None:
+        """Return the value of a live entry, or None."""
+        with self._lock:
+            return self._lookup(key)
+
+    def set(self, key: str, value: Value, ttl_s: float) -> None:
+        """Store a value for ttl_s seconds, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl_s)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove an entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_set(self, key: str, factory: Callable[[], Value | None], ttl_s: float) -> Value | None:
+        """Return a live entry's value, or compute, store and return it (once per key at a time)."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                with self._lock:
+                    # Computed by the caller this one waited for
+                    value = self._lookup(key)
+                if value is None:
+                    value = factory()
+                    if value is not None:
+                        self.set(key, value, ttl_s)
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[key]
+        return value
+
+    def close(self) -> None:
+        """Nothing to close: the entries live in this process."""
+
+    def snapshot(self) -> dict:
+        """Return the cache size and hit rate for monitoring."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+            }
+
+
+class SQLiteCache:
+    """CacheBackend stored in a SQLite file shared by every process that opens it.
+
+    get_or_set takes a lease on a missing key in a write transaction, so exactly one
+    process runs the factory while the others poll for its value. A lease left behind
+    by a crashed process expires after ``lease_s``.
+    """
+
+    def __init__(
+        self, db_path: str | Path, *, max_entries: int = 10_000, lease_s: float = 60.0, poll_s: float = 0.05
+    ) -> None:
+        """Open (and create if needed) the cache database.
+
+        Args:
+            db_path: Path of the SQLite database file
+            max_entries: Entries kept before the least recently used are evicted
+            lease_s: How long other processes wait for a value being computed
+            poll_s: How often waiting processes check for the value
+
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._waits = 0
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening a new one after a fork."""
+        if self._pid != os.getpid():
+            # Connections must never be shared with a parent process
+            self._local = threading.local()
+            self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a transaction holding the database's write lock."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, key: str) -> Value | None:
+        """Return the value of a live entry, or None."""
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value FROM cache WHERE key = ? AND value IS NOT NULL AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is not None:
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(row is not None)
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: Value, ttl_s: float) -> None:
+        """Store a value for ttl_s seconds, evicting the least recently used entries."""
+        now = time.time()
+        with self._write() as conn:
+            self._store(conn, key, json.dumps(value), now + ttl_s, now)
+
+    def _store(self, conn: sqlite3.Connection, key: str, value: str, expires_at: float, now: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at, lease_owner) VALUES (?, ?, ?, ?, NULL)",
+            (key, value, expires_at, now),
+        )
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            with self._stats_lock:
+                self._evictions += count - self.max_entries
+
+    def delete(self, key: str) -> None:
+        """Remove an entry."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def get_or_set(self, key: str, factory: Callable[[], Value | None], ttl_s: float) -> Value | None:
+        """Return a live entry's value, or compute, store and return it (once per key at a time)."""
+        owner = uuid.uuid4().hex
+        waited = False
+        while True:
+            now = time.time()
+            with self._write() as conn:
+                row = conn.execute("SELECT value, expires_at, lease_owner FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[0] is not None and row[1] > now:
+                    conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._count(hit=True)
+                    return json.loads(row[0])
+                leased = row is not None and row[0] is None and row[2] is not None and row[1] > now
+                if not leased:
+                    # A lease is an entry without a value that expires after lease_s
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at, lease_owner) "
+                        "VALUES (?, NULL, ?, ?, ?)",
+                        (key, now + self.lease_s, now, owner),
+                    )
+            if not leased:
+                break
+            if not waited:
+                waited = True
+                with self._stats_lock:
+                    self._waits += 1
+            time.sleep(self.poll_s)
+
+        self._count(hit=False)
+        try:
+            value = factory()
+        except BaseException:
+            self._release(key, owner)
+            raise
+        if value is None:
+            self._release(key, owner)
+            return None
+        now = time.time()
+        with self._write() as conn:
+            self._store(conn, key, json.dumps(value), now + ttl_s, now)
+        return value
+
+    def _release(self, key: str, owner: str) -> None:
+        """Drop a lease that will not be filled, so a waiting process can take over."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ? AND value IS NULL AND lease_owner = ?", (key, owner))
+
+    def close(self) -> None:
+        """Close this thread's connection; it is reopened when next needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def snapshot(self) -> dict:
+        """Return the cache size and this process's hit rate for monitoring."""
+        (entries,) = self._connection().execute("SELECT COUNT(*) FROM cache WHERE value IS NOT NULL").fetchone()
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "sqlite",
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "lease_waits": self._waits,
+            }
+
+
+def cache_from_env() -> CacheBackend | None:
+    """Create the shared cache configured by VLM_SHARED_CACHE ("sqlite" or "memory"), if any."""
+    kind = os.getenv("VLM_SHARED_CACHE", "").lower()
+    max_entries = int(os.getenv("VLM_SHARED_CACHE_SIZE", "10000"))
+    if kind == "sqlite":
+        path = os.getenv("VLM_SHARED_CACHE_PATH", str(Path(tempfile.gettempdir()) / "loriens-guide-cache.db"))
+        return SQLiteCache(path, max_entries=max_entries)
+    if kind == "memory":
+        return InProcessCache(max_entries=max_entries)
+    if kind:
+        logger.warning(f"Unknown VLM_SHARED_CACHE backend '{kind}', shared cache disabled")
+    return None
@@ -0,0 +1,234 @@
+"""Similarity Cache Module.
+
+Serves answers to questions that mean the same as one already answered for the
+same clip ("describe the scene" and "what do you see"), without calling the VLM:
+1. Normalizing questions to content tokens, folding common synonyms together
+2. Finding candidate questions with MinHash signatures and LSH banding
+3. Serving the best candidate above a similarity threshold
+4. Bounding the index by size (least recently used first) and age
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_STOP_WORDS = frozenset((
+    "a", "an", "and", "any", "are", "at", "be", "can", "could", "do", "does", "for", "from", "have", "i", "in",
+    "is", "it", "its", "me", "my", "of", "on", "or", "please", "s", "some", "tell", "that", "the", "there",
+    "this", "to", "what", "whats", "which", "will", "with", "would", "you", "your",
+))  # fmt: skip
+
+# Words that ask for the same thing are folded into one token. Only true synonyms:
+# words with different meanings ("safe" and "dangerous") must stay distinct tokens.
+_SYNONYMS = {
+    **dict.fromkeys(("see", "describe", "view", "scene", "look", "surrounding", "surroundings"), "surroundings"),
+    **dict.fromkeys(("crowd", "crowded", "busy"), "crowded"),
+    **dict.fromkeys(("people", "person"), "people"),
+    **dict.fromkeys(("stair", "stairs", "staircase"), "stairs"),
+}
+
+# Words shorter than this keep a trailing "s" ("bus", "gas")
+_MIN_PLURAL_LENGTH = 4
+
+# Prime modulus of the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def normalize_question(question: str) -> frozenset[str]:
+    """Reduce a question to its set of content tokens.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        Lower-cased tokens without stop words, with synonyms folded and plurals stripped
+
+    """
+    tokens = set()
+    for word in _TOKEN_PATTERN.findall((question or "").lower().replace("'", "")):
+        if word in _STOP_WORDS:
+            continue
+        token = word
+        if word not in _SYNONYMS and len(word) >= _MIN_PLURAL_LENGTH and word.endswith("s") and not word.endswith("ss"):
+            token = word[:-1]
+        tokens.add(_SYNONYMS.get(token, token))
+    return frozenset(tokens)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    """Return the Jaccard similarity of two token sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ("answer", "clip", "created_at", "question", "signature", "tokens")
+
+    def __init__(
+        self, *, clip: str, question: str, tokens: frozenset[str], signature: tuple, answer: str, created_at: float
+    ) -> None:
+        self.clip = clip
+        self.question = question
+        self.tokens = tokens
+        self.signature = signature
+        self.answer = answer
+        self.created_at = created_at
+
+
+class SimilarityCache:
+    """Answers to previous questions per clip, looked up by question similarity."""
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.8,
+        max_entries: int = 1024,
+        ttl_s: float = 300.0,
+        num_perm: int = 64,
+        bands: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum Jaccard similarity of the questions for a cached answer to be served
+            max_entries: Entries kept before the least recently used are evicted
+            ttl_s: Age after which an entry is no longer served
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (num_perm must be divisible by it)
+            clock: Monotonic time source (injectable for tests)
+
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.bands = bands
+        self._rows = num_perm // bands
+        rng = random.Random(0)  # noqa: S311 - hash permutations, not security
+        self._permutations = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._clock = clock
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._buckets: dict[tuple, set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _signature(self, tokens: frozenset[str]) -> tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big") for token in tokens]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._permutations)
+
+    def _band_keys(self, clip: str, signature: tuple[int, ...]) -> list[tuple]:
+        return [(clip, band, signature[band * self._rows : (band + 1) * self._rows]) for band in range(self.bands)]
+
+    def _candidates(self, clip: str, signature: tuple[int, ...]) -> set[int]:
+        candidates: set[int] = set()
+        for key in self._band_keys(clip, signature):
+            candidates |= self._buckets.get(key, set())
+        return candidates
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.clip, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def get(self, clip: str, question: str) -> dict | None:
+        """Look up the answer to a similar question about the same clip.
+
+        Args:
+            clip: Fingerprint of the clip the question is about
+            question: The user's question
+
+        Returns:
+            Dictionary with the cached ``text``, the ``similar_question`` it answered and
+            the ``similarity``, or None if no question was similar enough
+
+        """
+        tokens = normalize_question(question)
+        if not tokens:
+            return None
+        signature = self._signature(tokens)
+        now = self._clock()
+        with self._lock:
+            best_id, best_similarity = None, 0.0
+            for entry_id in self._candidates(clip, signature):
+                entry = self._entries[entry_id]
+                if now - entry.created_at > self.ttl_s:
+                    self._remove(entry_id)
+                    continue
+                similarity = jaccard(tokens, entry.tokens)
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None or best_similarity < self.threshold:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            return {
+                "text": entry.answer,
+                "similar_question": entry.question,
+                "similarity": round(best_similarity, 3),
+                "age_seconds": round(now - entry.created_at, 1),
+            }
+
+    def put(self, clip: str, question: str, answer: str) -> None:
+        """Remember the answer to a question about a clip.
+
+        Args:
+            clip: Fingerprint of the clip the question was about
+            question: The user's question
+            answer: The VLM's answer
+
+        """
+        tokens = normalize_question(question)
+        if not tokens or not answer:
+            return
+        signature = self._signature(tokens)
+        with self._lock:
+            # A question with the same tokens is replaced by the newer answer
+            for entry_id in self._candidates(clip, signature):
+                if self._entries[entry_id].tokens == tokens:
+                    self._remove(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(
+                clip=clip,
+                question=question,
+                tokens=tokens,
+                signature=signature,
+                answer=answer,
+                created_at=self._clock(),
+            )
+            for key in self._band_keys(clip, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def snapshot(self) -> dict:
+        """Return the cache size and hit rate for monitoring."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+            }
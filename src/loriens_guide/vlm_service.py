@@ -4,39 +4,307 @@ Handles the core logic for:
 1. Finding the nearest camera based on user location
 2. Constructing prompts for the VLM API
 3. Calling the Hafnia VLM API
+4. Shedding load when the VLM API is slow or failing
+5. Fitting every upstream call into the request's latency budget
+6. Fanning a question out to several nearby cameras
+7. Answering batches of questions with one upload per camera
+8. Merging concurrent questions about the same clip into one VLM call
+9. Answering near-duplicate questions about a clip from earlier answers
+10. Answering non-visual questions ("help", "where am I") without the VLM
+11. Speculatively uploading the clip nearest to a user before they ask
+12. Keeping answers to standard questions about busy cameras warm in the background
+13. Answering follow-up questions in a session with the same clip and earlier answers
+14. Sharing answers and prefetched clips between worker processes
+15. Skipping cameras whose clip is missing, stale or too large or long to upload
+16. Answering in two phases: a short structured answer first, the details on request
+17. Choosing the camera most likely to answer usefully and fast, not just the nearest
 """
 
+import hashlib
 import json
 import logging
-import math
 import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from loriens_guide.batch import group_by_camera, run_batch
+from loriens_guide.camera_health import CameraHealthTracker
+from loriens_guide.camera_scoring import CameraScorer
+from loriens_guide.camera_store import NEAREST_SEARCH_RADII_M, CameraStore, camera_coordinates, camera_id_of
+from loriens_guide.clips import ClipCatalog
+from loriens_guide.deadline import Deadline
+from loriens_guide.dispatcher import URGENT, classify_query
+from loriens_guide.fanout import (
+    DEFAULT_FANOUT_CAMERAS,
+    DEFAULT_FANOUT_RADIUS_M,
+    FIRST,
+    MAX_FANOUT_CAMERAS,
+    MAX_FANOUT_RADIUS_M,
+    MERGE,
+    fan_out,
+    merge_answers,
+)
+from loriens_guide.geo import haversine_distance
+from loriens_guide.hedging import LatencyTracker, RequestHedger
+from loriens_guide.intents import IntentRouter
+from loriens_guide.preanalysis import DEFAULT_PROMPTS, PreAnalysisScheduler
+from loriens_guide.prefetch import ClipPrefetcher
+from loriens_guide.prompt_batching import PromptBatcher, build_batch_prompt, parse_batch_answers
+from loriens_guide.quick_answer import (
+    DETAIL,
+    QUICK,
+    QUICK_RESPONSE_FORMAT,
+    QUICK_SYSTEM_PROMPT,
+    build_detail_prompt,
+    build_quick_prompt,
+    parse_quick_answer,
+    spoken_quick_answer,
+)
+from loriens_guide.resilience import AdaptiveConcurrencyLimiter, CircuitBreaker, TokenBucket
+from loriens_guide.sessions import Session, SessionStore
+from loriens_guide.shared_cache import cache_from_env
+from loriens_guide.similarity_cache import SimilarityCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound per stage; with a deadline each stage gets at most the remaining budget
+UPLOAD_TIMEOUT_S = 120.0
+CHAT_TIMEOUT_S = 180.0
+DELETE_TIMEOUT_S = 60.0
+# Below these budgets a stage cannot realistically finish, so it is not attempted
+MIN_UPLOAD_S = 2.0
+MIN_CHAT_S = 5.0
+MIN_DELETE_S = 5.0
+
+# Cameras ranked when choosing one for a question: the nearest few within the selection radius
+SELECTION_RADIUS_M = 200.0
+SELECTION_CANDIDATES = 10
+
+# The repository's camera file, found independently of the working directory
+DEFAULT_CAMERAS_FILE = Path(__file__).resolve().parents[2] / "cameras.json"
+
+ACCESSIBILITY_SYSTEM_PROMPT = (
+    "You are an accessibility assistant for vision-impaired users navigating public spaces. "
+    "Provide clear, concise guidance using landmarks and directional cues. "
+    "Describe obstacles, safe paths, and important features. "
+    "Use specific directions like 'on your left' or 'straight ahead' instead of colors."
+)
+
 
 class VLMService:
     """Service for handling VLM API interactions and camera management."""
 
-    def __init__(self, cameras_file: str = "cameras.json") -> None:
+    def __init__(
+        self,
+        cameras_file: str | Path | None = None,
+        camera_store: CameraStore | None = None,
+        clip_root: str | Path | None = None,
+    ) -> None:
         """Initialize the VLM service.
 
+        Cameras come from the SQLite camera store when one is given (or configured with
+        the CAMERA_DB_PATH environment variable), otherwise from the cameras.json file.
+
         Args:
-            cameras_file: Path to the cameras.json configuration file
+            cameras_file: Path to the cameras.json configuration file; defaults to the
+                CAMERAS_FILE environment variable, then to the repository's cameras.json
+            camera_store: Optional SQLite camera store
+            clip_root: Directory the cameras' video_clip_url paths are relative to;
+                defaults to the directory of the cameras file
 
         """
-        self.cameras_file = Path(cameras_file)
-        self.cameras = self._load_cameras()
+        self.cameras_file = Path(cameras_file or os.getenv("CAMERAS_FILE") or DEFAULT_CAMERAS_FILE)
+        self.clip_root = Path(clip_root) if clip_root is not None else self.cameras_file.parent
+        if camera_store is None and os.getenv("CAMERA_DB_PATH"):
+            camera_store = CameraStore(os.environ["CAMERA_DB_PATH"])
+        self.camera_store = camera_store
+        self._cameras = [] if camera_store else self._load_cameras()
+        # The cameras file is read once, so its content identifies the registry version
+        self._cameras_version = hashlib.sha256(json.dumps(self._cameras, sort_keys=True).encode()).hexdigest()[:16]
+        # Clip metadata kept in memory, so unusable clips are skipped before any upload
+        max_age_s = float(os.getenv("CLIP_MAX_AGE_S", "0"))
+        self.clip_catalog = ClipCatalog(
+            os.getenv("CLIP_DIR") or self.clip_root / "videos",
+            max_age_s=max_age_s or None,
+            poll_s=float(os.getenv("CLIP_POLL_S", "2")),
+        )
         # Milestone Hackathon API Configuration
         base_url = os.getenv("VLM_API_URL", "https://api.mdi.milestonesys.com")
         # Normalize base URL by removing trailing /api/v1 or trailing slash
         self.vlm_api_base = base_url.removesuffix("/api/v1").removesuffix("/")
-        self.api_key = os.getenv("HACKATHON_API_KEY", "")
-        self.api_secret = os.getenv("HACKATHON_API_SECRET", "")
+        # Keep-alive connections to the VLM API, opened per process after a fork
+        self._session: requests.Session | None = None
+        self._session_pid: int | None = None
+        self._session_lock = threading.Lock()
+        # Fail fast instead of stalling on a slow or broken upstream
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("VLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("VLM_BREAKER_RESET_S", "30")),
+        )
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=int(os.getenv("VLM_CONCURRENCY_INITIAL", "10")),
+            max_limit=int(os.getenv("VLM_CONCURRENCY_MAX", "64")),
+        )
+        # Last successful analysis per camera, served (flagged stale) while shedding load
+        self._last_analysis: dict[str, dict] = {}
+        self._deadline_exceeded = 0
+        self._batch_uploads_saved = 0
+        self.camera_health = CameraHealthTracker()
+        # Camera choice by distance, orientation, capabilities, clip freshness and health
+        self.camera_scorer = None
+        if os.getenv("VLM_CAMERA_SCORING", "true").lower() == "true":
+            self.camera_scorer = CameraScorer(
+                self.camera_health, clip_age=lambda camera: self.clip_catalog.age(self.clip_path(camera))
+            )
+        # Bounded generation: a cap for every answer (0 for none) and the much tighter one of quick answers
+        self.max_tokens = int(os.getenv("VLM_MAX_TOKENS", "0")) or None
+        self.quick_max_tokens = int(os.getenv("VLM_QUICK_MAX_TOKENS", "80"))
+        self.phase_latency = {QUICK: LatencyTracker(), DETAIL: LatencyTracker()}
+        # Optional hedging of slow chat completions to cut tail latency
+        self.hedger = None
+        if os.getenv("VLM_HEDGING", "false").lower() == "true":
+            self.hedger = RequestHedger(
+                percentile=float(os.getenv("VLM_HEDGE_PERCENTILE", "95")),
+                budget_ratio=float(os.getenv("VLM_HEDGE_BUDGET", "0.1")),
+            )
+        # Optional micro-batching of concurrent questions about the same clip or prefetched asset
+        self.batcher = None
+        if os.getenv("VLM_PROMPT_BATCHING", "false").lower() == "true":
+            self.batcher = PromptBatcher(
+                window_s=float(os.getenv("VLM_PROMPT_BATCH_WINDOW_MS", "200")) / 1000,
+                max_batch=int(os.getenv("VLM_PROMPT_BATCH_MAX", "8")),
+            )
+        # Optional cache shared by the worker processes of this host
+        self.shared_cache = cache_from_env()
+        self.shared_cache_ttl_s = float(os.getenv("VLM_SHARED_CACHE_TTL_S", "300"))
+        # Optional speculative uploads driven by client location heartbeats
+        self.prefetcher = None
+        if os.getenv("VLM_PREFETCH", "false").lower() == "true":
+            self.prefetcher = ClipPrefetcher(
+                self.upload_video_asset,
+                self.delete_asset,
+                TokenBucket(
+                    rate=float(os.getenv("VLM_PREFETCH_RATE_PER_MIN", "30")) / 60,
+                    capacity=float(os.getenv("VLM_PREFETCH_BURST", "5")),
+                ),
+                catalog=self.clip_catalog,
+                ttl_s=float(os.getenv("VLM_PREFETCH_TTL_S", "60")),
+                hold_s=CHAT_TIMEOUT_S,
+                shared=self.shared_cache,
+            )
+        # Non-visual questions are answered locally from registry and location data
+        self.intent_router = IntentRouter()
+        # Answers to earlier questions per clip, served for differently phrased repeats
+        self.similarity_cache = None
+        if os.getenv("VLM_SIMILARITY_CACHE", "true").lower() == "true":
+            self.similarity_cache = SimilarityCache(
+                threshold=float(os.getenv("VLM_SIMILARITY_THRESHOLD", "0.8")),
+                max_entries=int(os.getenv("VLM_SIMILARITY_CACHE_SIZE", "1024")),
+                ttl_s=float(os.getenv("VLM_SIMILARITY_CACHE_TTL_S", "300")),
+            )
+        # Follow-up questions in a client session reuse the uploaded clip and earlier answers
+        self.sessions = SessionStore(
+            self.delete_asset,
+            ttl_s=float(os.getenv("VLM_SESSION_TTL_S", "120")),
+            max_sessions=int(os.getenv("VLM_SESSION_MAX", "1000")),
+            max_history_tokens=int(os.getenv("VLM_SESSION_HISTORY_TOKENS", "1024")),
+        )
+        # Optional background refresh of the standard prompts, served from the similarity cache
+        self.preanalysis = None
+        if os.getenv("VLM_PREANALYSIS", "false").lower() == "true":
+            if self.similarity_cache is None:
+                logger.warning("VLM_PREANALYSIS needs VLM_SIMILARITY_CACHE to serve its answers; disabled")
+            else:
+                prompts = [p.strip() for p in os.getenv("VLM_PREANALYSIS_PROMPTS", "").split("|") if p.strip()]
+                # Answers to urgent prompts never go into the similarity cache, so running them is wasted budget
+                urgent = [prompt for prompt in prompts if classify_query(prompt) == URGENT]
+                if urgent:
+                    logger.warning(f"VLM_PREANALYSIS_PROMPTS: skipping hazard and navigation prompts {urgent}")
+                prompts = [prompt for prompt in prompts if prompt not in urgent] or list(DEFAULT_PROMPTS)
+                self.preanalysis = PreAnalysisScheduler(
+                    lambda: self.cameras,
+                    self.clip_path,
+                    self.preanalyze,
+                    TokenBucket(
+                        rate=float(os.getenv("VLM_PREANALYSIS_CALLS_PER_MIN", "30")) / 60,
+                        # A burst must hold at least one camera's upload and prompts
+                        capacity=max(float(os.getenv("VLM_PREANALYSIS_BURST", "10")), 1 + len(prompts)),
+                    ),
+                    catalog=self.clip_catalog,
+                    prompts=prompts,
+                    base_interval_s=float(os.getenv("VLM_PREANALYSIS_INTERVAL_S", "60")),
+                    max_clip_age_s=float(os.getenv("VLM_PREANALYSIS_MAX_CLIP_AGE_S", "300")),
+                )
+
+    @property
+    def cameras(self) -> list[dict]:
+        """Return all cameras."""
+        if self.camera_store is not None:
+            return self.camera_store.list_cameras()
+        return self._cameras
+
+    @property
+    def api_key(self) -> str:
+        """Return the VLM API key, read when first needed so it can be set after startup."""
+        return os.getenv("HACKATHON_API_KEY", "")
+
+    @property
+    def api_secret(self) -> str:
+        """Return the VLM API secret, read when first needed so it can be set after startup."""
+        return os.getenv("HACKATHON_API_SECRET", "")
+
+    def _http(self) -> requests.Session:
+        """Return this process's pooled HTTP session, creating it after a fork."""
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                # Sockets must never be shared with a parent process
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.limiter.max_limit)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+                self._session_pid = os.getpid()
+            return self._session
+
+    def close_connections(self) -> None:
+        """Close this process's connections; they are reopened when next needed.
+
+        Called in a preloading server's master before it forks, so workers never inherit
+        open sockets or database handles.
+        """
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        if self.camera_store is not None:
+            self.camera_store.close()
+        if self.shared_cache is not None:
+            self.shared_cache.close()
+
+    def warm_up(self) -> None:
+        """Build the state shared copy-on-write with forked workers.
+
+        Loads the camera registry once, so a preloading server's workers start with it in
+        memory instead of each reading it on their first request.
+        """
+        cameras = self.cameras
+        self.registry_version()
+        logger.info(f"Camera registry loaded: {len(cameras)} cameras")
+
+    def registry_version(self) -> str:
+        """Return an identifier of the current camera registry, changing whenever a camera does."""
+        if self.camera_store is not None:
+            return str(self.camera_store.version())
+        return self._cameras_version
 
     def _load_cameras(self) -> list:
         """Load camera data from JSON file.
@@ -69,41 +337,38 @@ class VLMService:
             Distance in meters
 
         """
-        # Earth's radius in meters
-        R = 6371000  # noqa: N806
-
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_long = math.radians(long2 - long1)
-
-        # Haversine formula
-        a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_long / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return haversine_distance(lat1, long1, lat2, long2)
 
-        return R * c
-
-    def find_nearest_camera(self, lat: float, long: float) -> dict | None:
+    def find_nearest_camera(self, lat: float, long: float, *, with_clip: bool = False) -> dict | None:
         """Find the camera nearest to the given coordinates.
 
         Args:
             lat: User's latitude
             long: User's longitude
+            with_clip: Only consider cameras whose clip can be uploaded right now
 
         Returns:
             Dictionary containing the nearest camera's data, or None if no cameras available
 
         """
-        if not self.cameras:
+        if self.camera_store is not None and not with_clip:
+            return self.camera_store.find_nearest(lat, long)
+        if self.camera_store is not None:
+            for radius_m in NEAREST_SEARCH_RADII_M:
+                found = self.camera_store.find_within(lat, long, radius_m)
+                usable = next((camera for _, camera in found if self.clip_problem(camera) is None), None)
+                if usable is not None:
+                    return usable
+
+        cameras = [camera for camera in self.cameras if not with_clip or self.clip_problem(camera) is None]
+        if not cameras:
             return None
 
         nearest_camera = None
         min_distance = float("inf")
 
-        for camera in self.cameras:
-            camera_lat = camera["location"]["lat"]
-            camera_long = camera["location"]["long"]
+        for camera in cameras:
+            camera_lat, camera_long = camera_coordinates(camera)
 
             distance = self._calculate_distance(lat, long, camera_lat, camera_long)
 
@@ -113,6 +378,161 @@ class VLMService:
 
         return nearest_camera
 
+    def find_nearby_cameras(
+        self, lat: float, long: float, radius_m: float, limit: int, *, with_clip: bool = False
+    ) -> list[dict]:
+        """Find the cameras within a radius, nearest first.
+
+        Args:
+            lat: User's latitude
+            long: User's longitude
+            radius_m: Search radius in meters
+            limit: Maximum number of cameras to return
+            with_clip: Only return cameras whose clip can be uploaded right now
+
+        Returns:
+            List of camera dictionaries sorted by distance
+
+        """
+        if self.camera_store is not None:
+            found = self.camera_store.find_within(lat, long, radius_m, None if with_clip else limit)
+            return [camera for _, camera in found if not with_clip or self.clip_problem(camera) is None][:limit]
+
+        in_range = []
+        for camera in self.cameras:
+            if with_clip and self.clip_problem(camera) is not None:
+                continue
+            distance = self._calculate_distance(lat, long, *camera_coordinates(camera))
+            if distance <= radius_m:
+                in_range.append((distance, camera))
+        in_range.sort(key=lambda item: item[0])
+        return [camera for _, camera in in_range[:limit]]
+
+    def rank_cameras(self, cameras: list[dict], lat: float, long: float, question_text: str) -> list[dict]:
+        """Order cameras by how likely they are to answer a question usefully and fast.
+
+        Only the first SELECTION_CANDIDATES cameras (nearest first) are ranked, and inactive
+        cameras are left out. Without camera scoring the cameras are returned as they are.
+
+        Args:
+            cameras: Candidate cameras, nearest first
+            lat: User's latitude
+            long: User's longitude
+            question_text: The user's question
+
+        Returns:
+            The cameras to use, best first
+
+        """
+        if self.camera_scorer is None:
+            return cameras
+        return self.camera_scorer.rank(
+            cameras[:SELECTION_CANDIDATES], lat, long, question_text, version=self.registry_version()
+        )
+
+    def select_camera(self, lat: float, long: float, question_text: str, *, with_clip: bool = False) -> dict | None:
+        """Choose the camera to answer a question from the user's position.
+
+        The cameras within SELECTION_RADIUS_M are ranked (see rank_cameras); if there are
+        none, or camera scoring is disabled, the nearest camera is used.
+
+        Args:
+            lat: User's latitude
+            long: User's longitude
+            question_text: The user's question
+            with_clip: Only consider cameras whose clip can be uploaded right now
+
+        Returns:
+            The chosen camera, or None if no camera is available
+
+        """
+        if self.camera_scorer is not None:
+            candidates = self.find_nearby_cameras(
+                lat, long, SELECTION_RADIUS_M, SELECTION_CANDIDATES, with_clip=with_clip
+            )
+            if candidates:
+                ranked = self.rank_cameras(candidates, lat, long, question_text)
+                return ranked[0] if ranked else None
+        return self.find_nearest_camera(lat, long, with_clip=with_clip)
+
+    def get_camera(self, camera_id: str) -> dict | None:
+        """Return a camera by id, or None if it does not exist."""
+        if self.camera_store is not None:
+            return self.camera_store.get_camera(camera_id)
+        return next((camera for camera in self.cameras if camera_id_of(camera) == camera_id), None)
+
+    def clip_path(self, camera: dict) -> Path | None:
+        """Return the path of a camera's video clip, relative to the clip root, or None."""
+        video_file = camera.get("video_clip_url", "")
+        return self.clip_root / video_file.lstrip("/") if video_file else None
+
+    def clip_problem(self, camera: dict) -> str | None:
+        """Return why a camera's clip cannot be uploaded (e.g. "missing", "stale"), or None if it can."""
+        return self.clip_catalog.problem(self.clip_path(camera))
+
+    def _clip_key(self, camera: dict) -> str:
+        """Identify the clip a camera's questions are about, for the similarity cache."""
+        return (
+            self.clip_catalog.fingerprint(self.clip_path(camera))
+            or f"asset:{camera.get('video_clip_url', camera_id_of(camera))}"
+        )
+
+    def _record_query(self, camera_id: str | None) -> None:
+        """Count a question about a camera towards how often it is pre-analyzed."""
+        if self.preanalysis is not None and camera_id:
+            self.preanalysis.record_query(camera_id)
+
+    def _similarity_cached(self, clip: str | None, question: str) -> bool:
+        """Return whether a question is answered from (and its answer kept in) the similarity cache.
+
+        Hazard and navigation questions are always answered from the clip: a similar-looking
+        question ("is it safe to cross?", "is it dangerous to cross?") can need the opposite answer.
+        """
+        return self.similarity_cache is not None and clip is not None and classify_query(question) != URGENT
+
+    def _remember_similar(self, clip: str | None, question: str, answer: str) -> None:
+        """Keep the answer to a question about a clip for similar questions, unless it is urgent."""
+        if self._similarity_cached(clip, question):
+            self.similarity_cache.put(clip, question, answer)
+
+    def _cached_answer(self, clip: str | None, question: str) -> dict | None:
+        """Return an earlier answer to a similar question about the same clip, if any."""
+        if not self._similarity_cached(clip, question):
+            return None
+        cached = self.similarity_cache.get(clip, question)
+        if cached is None:
+            return None
+        logger.info(f"Answering '{question}' from the answer to '{cached['similar_question']}'")
+        return {**cached, "cached": True}
+
+    def answer_locally(
+        self, question_text: str, lat: float | None = None, long: float | None = None, camera: dict | None = None
+    ) -> dict | None:
+        """Answer a question that does not need the camera, without calling the VLM.
+
+        Args:
+            question_text: The user's question
+            lat: User's latitude, if known
+            long: User's longitude, if known
+            camera: The camera the user asked about; defaults to the one nearest to them
+
+        Returns:
+            Dictionary with the local answer ``text`` and its ``intent``, or None if the
+            question is visual and needs the VLM
+
+        """
+
+        def locate() -> tuple[dict | None, float | None]:
+            nearest = camera
+            if nearest is None and lat is not None and long is not None:
+                nearest = self.find_nearest_camera(lat, long)
+            coordinates = camera_coordinates(nearest) if nearest else None
+            if coordinates is None or lat is None or long is None:
+                return nearest, None
+            return nearest, self._calculate_distance(lat, long, *coordinates)
+
+        return self.intent_router.answer(question_text, locate)
+
     def _construct_vlm_prompt(self, question_text: str, context_description: str) -> str:
         """Construct the prompt to send to the VLM API.
 
@@ -135,11 +555,97 @@ class VLMService:
             f"Use landmarks and steps (e.g., 'on your left,' 'walk 10 steps'), not colors."
         )
 
-    def upload_video_asset(self, video_path: str) -> dict:
+    def _guarded_call(self, operation: str, call: Callable[[], dict], *, client_budget: bool = False) -> dict:
+        """Run an upstream call through the circuit breaker and concurrency limiter.
+
+        Args:
+            operation: Name of the operation, used in log messages and as the kind of call
+                whose latency baseline the limiter compares it with
+            call: Function performing the actual HTTP request
+            client_budget: Whether the call's timeout was cut below the stage's cap by the
+                client's deadline; its timeout then does not count against the upstream
+
+        Returns:
+            The call's result, or an error dictionary with ``rejected`` set when shedding load
+
+        """
+        if not self.breaker.allow_request():
+            logger.warning(f"VLM circuit open, rejecting {operation}")
+            return {
+                "error": True,
+                "rejected": "circuit_open",
+                "message": "VLM API circuit breaker is open",
+                "text": "I'm sorry, the vision service is unavailable right now. Please try again shortly.",
+            }
+        if not self.limiter.try_acquire():
+            logger.warning(f"VLM concurrency limit reached, rejecting {operation}")
+            return {
+                "error": True,
+                "rejected": "concurrency_limit",
+                "message": "VLM API concurrency limit reached",
+                "text": "I'm sorry, the vision service is busy right now. Please try again shortly.",
+            }
+
+        start = time.monotonic()
+        result = None
+        try:
+            result = call()
+        finally:
+            if client_budget and result is not None and result.get("timed_out"):
+                # Only the client's own short budget expired, which says nothing about the upstream
+                self.limiter.cancel()
+                self.breaker.record_ignored()
+            else:
+                success = result is not None and not _is_upstream_failure(result)
+                self.limiter.release(time.monotonic() - start, success, operation)
+                if success:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+        return result
+
+    def _deadline_rejection(self, operation: str, deadline: Deadline) -> dict:
+        """Build the error returned when a stage no longer fits in the request's budget."""
+        if deadline.cancelled:
+            return {"error": True, "rejected": "cancelled", "message": f"Skipped {operation}: request was cancelled"}
+        self._deadline_exceeded += 1
+        logger.warning(f"Skipping {operation}: only {deadline.remaining():.1f}s left of the request budget")
+        return {
+            "error": True,
+            "rejected": "deadline_exceeded",
+            "message": f"Not enough time left for {operation}",
+            "text": "I'm sorry, I couldn't look at the scene in time. Please try again.",
+        }
+
+    def upload_video_asset(self, video_path: str, deadline: Deadline | None = None) -> dict:
         """Upload a video asset to the Milestone Hackathon API.
 
+        The call is guarded by the circuit breaker and concurrency limiter. With a deadline,
+        the upload keeps enough of the budget back for the chat completion that follows.
+
         Args:
             video_path: Path to the video file (.mp4 or .mkv, <100MB, <30s)
+            deadline: Optional request deadline bounding the upload timeout
+
+        Returns:
+            Dictionary with asset_id or error information
+
+        """
+        timeout = _stage_timeout(deadline, UPLOAD_TIMEOUT_S, MIN_UPLOAD_S, reserve=MIN_CHAT_S)
+        if timeout is None:
+            return self._deadline_rejection("upload", deadline)
+        return self._guarded_call(
+            "upload",
+            lambda: self._upload_video_asset(video_path, timeout),
+            client_budget=timeout < UPLOAD_TIMEOUT_S,
+        )
+
+    def _upload_video_asset(self, video_path: str, timeout: float = UPLOAD_TIMEOUT_S) -> dict:
+        """Upload a video asset to the Milestone Hackathon API.
+
+        Args:
+            video_path: Path to the video file (.mp4 or .mkv, <100MB, <30s)
+            timeout: Request timeout in seconds
 
         Returns:
             Dictionary with asset_id or error information
@@ -152,7 +658,7 @@ class VLMService:
         try:
             with open(video_path, "rb") as video_file:
                 files = {"file": video_file}
-                response = requests.post(upload_url, headers=headers, files=files, timeout=120)
+                response = self._http().post(upload_url, headers=headers, files=files, timeout=timeout)
 
             # Accept both 200 OK and 201 Created as success
             if response.status_code in (requests.codes.ok, requests.codes.created):
@@ -163,6 +669,14 @@ class VLMService:
                 return data
             logger.error(f"Asset upload failed: {response.status_code} - {response.text}")
 
+        except requests.exceptions.RequestException as e:
+            logger.exception("Failed to upload video asset")
+            return {
+                "error": True,
+                "transport_error": True,
+                "timed_out": isinstance(e, requests.exceptions.Timeout),
+                "message": f"Upload exception: {e!s}",
+            }
         except Exception as e:
             logger.exception("Failed to upload video asset")
             return {"error": True, "message": f"Upload exception: {e!s}"}
@@ -173,13 +687,129 @@ class VLMService:
                 "message": f"Asset upload failed: {response.status_code}",
             }
 
-    def call_vlm_api(self, asset_id: str, user_prompt: str, system_prompt: str | None = None) -> dict:
+    def call_vlm_api(
+        self,
+        asset_id: str,
+        user_prompt: str,
+        system_prompt: str | None = None,
+        deadline: Deadline | None = None,
+        *,
+        batch: bool = True,
+        history: list[dict] | None = None,
+        max_tokens: int | None = None,
+        response_format: dict | None = None,
+    ) -> dict:
+        """Call the Milestone Hackathon VLM API with asset and prompts.
+
+        The call is guarded by the circuit breaker and concurrency limiter. With a deadline,
+        the chat completion may only use the remaining budget. With prompt batching enabled,
+        questions about the same asset arriving within the batching window share one call.
+        Prompts with a conversation history or a response format are never batched.
+
+        Args:
+            asset_id: The asset_id returned from upload_video_asset()
+            user_prompt: The user's question/request text
+            system_prompt: Optional system prompt for output format/safety
+            deadline: Optional request deadline bounding the chat timeout
+            batch: Whether the prompt may be batched with others for the same asset
+            history: Earlier ``{"role", "text"}`` messages of the conversation, oldest first
+            max_tokens: Longest answer to generate (defaults to VLM_MAX_TOKENS, if set)
+            response_format: Optional structured output format, e.g. a JSON schema
+
+        Returns:
+            Dictionary containing the VLM response
+
+        """
+        max_tokens = max_tokens or self.max_tokens
+
+        def single(prompt: str) -> dict:
+            timeout = _stage_timeout(deadline, CHAT_TIMEOUT_S, MIN_CHAT_S)
+            if timeout is None:
+                return self._deadline_rejection("analysis", deadline)
+            # Short structured answers are much faster than free-form ones
+            return self._guarded_call(
+                "structured chat" if response_format else "chat",
+                lambda: self._call_vlm_api(
+                    asset_id,
+                    prompt,
+                    system_prompt,
+                    timeout,
+                    history=history,
+                    max_tokens=max_tokens,
+                    response_format=response_format,
+                ),
+                client_budget=timeout < CHAT_TIMEOUT_S,
+            )
+
+        if self.batcher is None or not batch or history or response_format:
+            return single(user_prompt)
+        return self.batcher.submit(
+            (asset_id, system_prompt),
+            user_prompt,
+            lambda prompts: self._call_vlm_batch(asset_id, prompts, system_prompt, deadline),
+            single,
+        )
+
+    def _call_vlm_batch(
+        self, asset_id: str, prompts: list[str], system_prompt: str | None, deadline: Deadline | None
+    ) -> list[dict] | None:
+        """Answer several prompts about one asset with a single chat completion.
+
+        Args:
+            asset_id: The asset the prompts are about
+            prompts: The user prompts, in order
+            system_prompt: Optional system prompt shared by the prompts
+            deadline: Optional deadline of the request that opened the batch
+
+        Returns:
+            One result per prompt (the shared error if the call failed), or None if the
+            response could not be split into the individual answers
+
+        """
+        timeout = _stage_timeout(deadline, CHAT_TIMEOUT_S, MIN_CHAT_S)
+        if timeout is None:
+            result = self._deadline_rejection("analysis", deadline)
+        else:
+            result = self._guarded_call(
+                "batched chat",
+                lambda: self._call_vlm_api(
+                    asset_id,
+                    build_batch_prompt(prompts),
+                    system_prompt,
+                    timeout,
+                    max_tokens=self.max_tokens * len(prompts) if self.max_tokens else None,
+                ),
+                client_budget=timeout < CHAT_TIMEOUT_S,
+            )
+        if "error" in result:
+            return [dict(result) for _ in prompts]
+        answers = parse_batch_answers(result.get("text", ""), len(prompts))
+        if answers is None:
+            logger.warning(f"Could not split batched VLM answer for {len(prompts)} prompts, asking individually")
+            return None
+        return [{"text": answer, "batch_size": len(prompts)} for answer in answers]
+
+    def _call_vlm_api(
+        self,
+        asset_id: str,
+        user_prompt: str,
+        system_prompt: str | None = None,
+        timeout: float = CHAT_TIMEOUT_S,
+        *,
+        history: list[dict] | None = None,
+        max_tokens: int | None = None,
+        response_format: dict | None = None,
+    ) -> dict:
         """Call the Milestone Hackathon VLM API with asset and prompts.
 
         Args:
             asset_id: The asset_id returned from upload_video_asset()
             user_prompt: The user's question/request text
             system_prompt: Optional system prompt for output format/safety
+            timeout: Request timeout in seconds
+            history: Earlier ``{"role", "text"}`` messages of the conversation, oldest first
+            max_tokens: Longest answer to generate, if limited
+            response_format: Optional structured output format, e.g. a JSON schema
 
         Returns:
             Dictionary containing the VLM response
@@ -196,6 +826,12 @@ class VLMService:
         if system_prompt:
             messages.append({"role": "system", "content": [{"type": "text", "text": system_prompt}]})
 
+        # Replay the earlier turns of the conversation, the clip is attached to the new question
+        messages.extend(
+            {"role": message["role"], "content": [{"type": "text", "text": message["text"]}]}
+            for message in history or ()
+        )
+
         # Add user message with text and asset reference
         messages.append(
             {
@@ -205,9 +841,25 @@ class VLMService:
         )
 
         payload = {"messages": messages}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        if response_format:
+            payload["response_format"] = response_format
 
         try:
-            response = requests.post(chat_url, json=payload, headers=headers, timeout=180)
+            if self.hedger is None:
+                response = self._http().post(chat_url, json=payload, headers=headers, timeout=timeout)
+            else:
+                # The hedge takes a concurrency limiter slot of its own; only a 200 wins
+                response = self.hedger.run(
+                    lambda attempt_timeout: self._http().post(
+                        chat_url, json=payload, headers=headers, timeout=attempt_timeout
+                    ),
+                    timeout,
+                    acquire_hedge=self.limiter.try_acquire,
+                    release_hedge=self.limiter.cancel,
+                    is_success=lambda attempt_response: attempt_response.status_code == requests.codes.ok,
+                )
 
             if response.status_code == requests.codes.ok:
                 result = response.json()
@@ -222,13 +874,16 @@ class VLMService:
             logger.exception("VLM API request timed out")
             return {
                 "error": True,
-                "message": "VLM API request timed out after 180 seconds",
+                "transport_error": True,
+                "timed_out": True,
+                "message": f"VLM API request timed out after {timeout:.0f} seconds",
                 "text": "I'm sorry, the video analysis took too long. Please try again with a shorter clip.",
             }
         except requests.exceptions.RequestException:
             logger.exception("Failed to connect to VLM API")
             return {
                 "error": True,
+                "transport_error": True,
                 "message": "Failed to connect to VLM API",
                 "text": "I'm sorry, I'm having trouble connecting to the vision service. Please try again.",
             }
@@ -240,48 +895,644 @@ class VLMService:
                 "text": "I'm sorry, I couldn't analyze the video at this time. Please try again.",
             }
 
-    def delete_asset(self, asset_id: str) -> bool:
+    def delete_asset(self, asset_id: str, deadline: Deadline | None = None) -> bool:
         """Delete a video asset from the Milestone API.
 
+        Cleanup is always attempted, but with a deadline it only waits for the remaining
+        budget (at least MIN_DELETE_S) so the user's answer is not held back.
+
         Args:
             asset_id: The asset_id to delete
+            deadline: Optional request deadline bounding the delete timeout
 
         Returns:
             True if successful, False otherwise
 
         """
+        timeout = DELETE_TIMEOUT_S if deadline is None else max(MIN_DELETE_S, deadline.timeout_for(DELETE_TIMEOUT_S))
         delete_url = f"{self.vlm_api_base}/api/v1/assets/{asset_id}"
         auth_header = f"ApiKey {self.api_key}:{self.api_secret}"
         headers = {"Authorization": auth_header}
 
         try:
-            response = requests.delete(delete_url, headers=headers, timeout=60)
+            response = self._http().delete(delete_url, headers=headers, timeout=timeout)
 
         except Exception:
             logger.exception(f"Failed to delete asset {asset_id}")
             return False
         return response.status_code in (requests.codes.ok, requests.codes.no_content)
 
-    def process_user_request(self, lat: float, long: float, question_text: str) -> dict:
+    def prefetch_clip(self, camera_id: str, video_path: str) -> str:
+        """Start uploading a camera's clip before the user asks about it.
+
+        Args:
+            camera_id: Camera nearest to the user
+            video_path: Path of the camera's clip
+
+        Returns:
+            The prefetch outcome ("scheduled", "ready", "budget_exhausted", "no_clip"),
+            or "disabled" when prefetching is off
+
+        """
+        if self.prefetcher is None:
+            return "disabled"
+        return self.prefetcher.prefetch(camera_id, video_path)
+
+    def _claim_prefetched(self, camera_id: str | None, video_path: str, deadline: Deadline | None) -> str | None:
+        """Return the asset_id of a prefetched upload of the clip, if one is ready in time."""
+        if self.prefetcher is None or camera_id is None:
+            return None
+        timeout = UPLOAD_TIMEOUT_S if deadline is None else deadline.timeout_for(UPLOAD_TIMEOUT_S, MIN_CHAT_S)
+        return self.prefetcher.claim(camera_id, video_path, timeout)
+
+    def remember_analysis(self, camera_id: str, text: str) -> None:
+        """Store the latest successful analysis for a camera.
+
+        Args:
+            camera_id: Camera the analysis belongs to
+            text: The VLM answer
+
+        """
+        self._last_analysis[camera_id] = {"text": text, "cached_at": datetime.now(tz=UTC)}
+
+    def stale_analysis(self, camera_id: str | None, rejection: dict) -> dict:
+        """Build a fail-fast response from the last known analysis of a camera.
+
+        Args:
+            camera_id: Camera to look up, may be None
+            rejection: The error dictionary returned by the rejected call
+
+        Returns:
+            The cached answer flagged as stale, or the rejection itself if nothing is cached
+
+        """
+        cached = self._last_analysis.get(camera_id) if camera_id else None
+        if cached is None:
+            return rejection
+        age = datetime.now(tz=UTC) - cached["cached_at"]
+        return {
+            "text": cached["text"],
+            "stale": True,
+            "stale_reason": rejection.get("rejected"),
+            "cached_at": cached["cached_at"].isoformat(),
+            "age_seconds": round(age.total_seconds(), 1),
+        }
+
+    def degraded_answer(self, camera_id: str | None, rejection: dict) -> dict:
+        """Answer a request that ran out of time without calling the VLM.
+
+        Args:
+            camera_id: Camera to look up a stale analysis for, may be None
+            rejection: The deadline rejection returned by the skipped stage
+
+        Returns:
+            The last known analysis flagged as stale, or an apology flagged as degraded
+
+        """
+        stale = self.stale_analysis(camera_id, rejection)
+        if stale is not rejection:
+            return stale
+        return {"text": rejection["text"], "degraded": True, "degraded_reason": rejection.get("rejected")}
+
+    def _shed_load(self, camera_id: str | None, rejection: dict) -> dict:
+        """Pick the fail-fast response for a rejected upstream call."""
+        if rejection.get("rejected") == "deadline_exceeded":
+            return self.degraded_answer(camera_id, rejection)
+        return self.stale_analysis(camera_id, rejection)
+
+    def analyze_clip(
+        self,
+        video_path: str,
+        query: str,
+        system_prompt: str | None = None,
+        camera_id: str | None = None,
+        deadline: Deadline | None = None,
+        *,
+        session_id: str | None = None,
+    ) -> dict:
+        """Upload a clip, analyze it with the VLM and delete the asset again.
+
+        While the upstream is shedding load, the last known analysis for the camera is
+        returned instead, flagged as stale. If the deadline leaves too little time for a
+        stage, no further upstream calls are made and a degraded answer is returned. A question
+        similar to one already answered for the same clip is answered from the similarity cache,
+        and a clip already prefetched for the camera is not uploaded again. With a session id,
+        the asset is kept for the session and follow-up questions about the same camera's clip
+        are asked about it together with the session's earlier questions and answers.
+
+        Args:
+            video_path: Path to the video file to analyze
+            query: The user's question
+            system_prompt: Optional system prompt for output format/safety
+            camera_id: Camera the clip belongs to, used for the stale-analysis cache
+            deadline: Optional request deadline split across upload and inference
+            session_id: Optional client session id for follow-up questions
+
+        Returns:
+            Dictionary with the VLM ``text`` (and ``follow_up`` when a session's clip and
+            history were reused), or error information with a ``stage`` key
+
+        """
+        self._record_query(camera_id)
+        track_session = session_id is not None and camera_id is not None
+        needs_clip = self.similarity_cache or self.shared_cache or self.batcher or track_session
+        clip = self.clip_catalog.fingerprint(video_path) if needs_clip else None
+        session = self.sessions.get(session_id, camera_id, clip) if track_session else None
+        asset_id = self._session_asset(session, video_path, deadline)
+        history = self.sessions.history(session_id) if asset_id else []
+
+        def answer() -> dict:
+            return self._answer_clip(
+                video_path,
+                query,
+                system_prompt,
+                camera_id,
+                deadline,
+                clip=clip,
+                session_id=session_id if track_session else None,
+                asset_id=asset_id,
+                history=history,
+            )
+
+        # Follow-ups depend on the conversation, so only fresh questions use the caches
+        if history:
+            return answer()
+        cached = self._cached_answer(clip, query)
+        if cached is not None:
+            return cached
+        return self._shared_answer(clip, query, answer)
+
+    def _answer_clip(
+        self,
+        video_path: str,
+        query: str,
+        system_prompt: str | None,
+        camera_id: str | None,
+        deadline: Deadline | None,
+        *,
+        clip: str | None,
+        session_id: str | None,
+        asset_id: str | None,
+        history: list[dict],
+    ) -> dict:
+        """Answer a question about a clip with the VLM; see analyze_clip.
+
+        Args:
+            video_path: Path to the video file to analyze
+            query: The user's question
+            system_prompt: Optional system prompt for output format/safety
+            camera_id: Camera the clip belongs to
+            deadline: Optional request deadline split across upload and inference
+            clip: Fingerprint of the clip, if computed
+            session_id: Session to keep the asset and history for, if any
+            asset_id: The session's asset for a follow-up, or None to upload the clip
+            history: The session's earlier questions and answers
+
+        Returns:
+            Dictionary with the VLM ``text``, or error information with a ``stage`` key
+
+        """
+        track_session = session_id is not None
+        start = time.monotonic()
+        follow_up = asset_id is not None
+        prefetched = False
+        if not follow_up:
+            # A clip prefetched from the user's location heartbeat skips the upload
+            asset_id = self._claim_prefetched(camera_id, video_path, deadline)
+            prefetched = asset_id is not None
+        if asset_id is None and not track_session and self.batcher is not None and clip is not None:
+            # Questions about the same clip arriving together share one upload and one call
+            vlm_result = self.batcher.submit(
+                (clip, camera_id, system_prompt),
+                query,
+                lambda prompts: self._ask_clip_batch(video_path, prompts, system_prompt, deadline),
+                lambda prompt: self._ask_clip(video_path, prompt, system_prompt, deadline),
+            )
+        elif asset_id is None and not track_session:
+            vlm_result = self._ask_clip(video_path, query, system_prompt, deadline)
+        else:
+            if asset_id is None:
+                upload_result = self.upload_video_asset(video_path, deadline=deadline)
+                if "error" in upload_result:
+                    return self._upload_failed(camera_id, upload_result)
+                asset_id = upload_result.get("asset_id")
+
+            kept = follow_up
+            try:
+                # A session's own asset has nothing to batch with; a prefetched one is shared
+                vlm_result = self.call_vlm_api(
+                    asset_id, query, system_prompt, deadline=deadline, batch=prefetched, history=history
+                )
+                if track_session and not follow_up and "error" not in vlm_result:
+                    # Kept for follow-ups; prefetched assets stay owned by the prefetcher
+                    self.sessions.start(session_id, camera_id, clip, asset_id, owned=not prefetched)
+                    kept = True
+            finally:
+                # Prefetched assets are deleted by the prefetcher once they expire
+                if not prefetched and not kept:
+                    self.delete_asset(asset_id, deadline=deadline)
+
+        if vlm_result.get("stage") == "upload":
+            return self._upload_failed(camera_id, vlm_result)
+        if vlm_result.get("rejected"):
+            return self._shed_load(camera_id, vlm_result)
+        if camera_id:
+            self.camera_health.record(camera_id, time.monotonic() - start, success="error" not in vlm_result)
+        if "error" in vlm_result:
+            if follow_up:
+                # The session's asset may be gone upstream; the next question starts afresh
+                self.sessions.end(session_id)
+            return {"error": True, "stage": "analysis", "message": vlm_result.get("message")}
+
+        if camera_id:
+            self.remember_analysis(camera_id, vlm_result.get("text", ""))
+        if track_session:
+            self.sessions.record(session_id, query, vlm_result.get("text", ""))
+        if follow_up:
+            return {**vlm_result, "follow_up": True}
+        self._remember_similar(clip, query, vlm_result.get("text", ""))
+        return vlm_result
+
+    def _upload_failed(self, camera_id: str | None, upload_result: dict) -> dict:
+        """Return the response to a question whose clip could not be uploaded."""
+        if upload_result.get("rejected"):
+            return self._shed_load(camera_id, upload_result)
+        return {"error": True, "stage": "upload", "message": upload_result.get("message")}
+
+    def _ask_clip(self, video_path: str, query: str, system_prompt: str | None, deadline: Deadline | None) -> dict:
+        """Upload a clip, ask one question about it and delete the asset again.
+
+        Returns:
+            The VLM result, or the upload's error flagged with ``"stage": "upload"``
+
+        """
+        upload_result = self.upload_video_asset(video_path, deadline=deadline)
+        if "error" in upload_result:
+            return {**upload_result, "stage": "upload"}
+        asset_id = upload_result.get("asset_id")
+        try:
+            return self.call_vlm_api(asset_id, query, system_prompt, deadline=deadline, batch=False)
+        finally:
+            self.delete_asset(asset_id, deadline=deadline)
+
+    def _ask_clip_batch(
+        self, video_path: str, prompts: list[str], system_prompt: str | None, deadline: Deadline | None
+    ) -> list[dict] | None:
+        """Upload a clip once for several questions about it and answer them in one call.
+
+        Returns:
+            One result per prompt (the upload's error, flagged with ``"stage": "upload"``,
+            if it failed), or None if the answer could not be split (see _call_vlm_batch)
+
+        """
+        upload_result = self.upload_video_asset(video_path, deadline=deadline)
+        if "error" in upload_result:
+            return [{**upload_result, "stage": "upload"} for _ in prompts]
+        asset_id = upload_result.get("asset_id")
+        try:
+            return self._call_vlm_batch(asset_id, prompts, system_prompt, deadline)
+        finally:
+            self.delete_asset(asset_id, deadline=deadline)
+
+    def _shared_answer(self, clip: str | None, question: str, answer: Callable[[], dict]) -> dict:
+        """Answer a question through the cache shared by all worker processes.
+
+        Identical questions (ignoring case and whitespace) about the same clip are answered
+        once across all workers: the others wait for and reuse that answer. Hazard and
+        navigation questions are always answered from the clip by the worker asked.
+
+        Args:
+            clip: Fingerprint of the clip the question is about
+            question: The user's question
+            answer: Function answering the question with the VLM
+
+        Returns:
+            The shared answer flagged as cached, or this call's own result
+
+        """
+        if self.shared_cache is None or clip is None or classify_query(question) == URGENT:
+            return answer()
+        exact = " ".join((question or "").lower().split())
+        key = f"answer:{clip}:{hashlib.sha256(exact.encode()).hexdigest()}"
+        fresh = {}
+
+        def compute() -> dict | None:
+            result = fresh["result"] = answer()
+            if result.get("error") or result.get("stale") or result.get("degraded") or result.get("cached"):
+                return None
+            return {"text": result.get("text", "")}
+
+        shared = self.shared_cache.get_or_set(key, compute, self.shared_cache_ttl_s)
+        if "result" in fresh:
+            return fresh["result"]
+        if shared is None:
+            return answer()
+        logger.info(f"Answering '{question}' from another worker's answer")
+        return {"text": shared["text"], "cached": True, "shared": True}
+
+    def _session_asset(self, session: Session | None, video_path: str, deadline: Deadline | None) -> str | None:
+        """Return the asset a session's follow-up can be asked about, if it is still available."""
+        if session is None:
+            return None
+        if session.owned:
+            return session.asset_id
+        # Borrowed from the prefetcher: claiming it again keeps it alive for the follow-up
+        asset_id = self._claim_prefetched(session.camera_id, video_path, deadline)
+        if asset_id != session.asset_id:
+            self.sessions.end(session.session_id)
+            return None
+        return asset_id
+
+    def quick_answer(
+        self,
+        video_path: str,
+        query: str,
+        camera_id: str,
+        deadline: Deadline | None = None,
+        *,
+        session_id: str | None = None,
+    ) -> dict:
+        """Answer with only the most important hazard, its direction and a few words.
+
+        The first phase of a two-phase answer: the VLM is asked for a small JSON object
+        under a tight token limit, so generation stops after a few dozen tokens. The
+        uploaded asset is kept in a session, so the detailed answer (see detailed_answer)
+        can be fetched later without uploading the clip again.
+
+        Args:
+            video_path: Path to the video file to analyze
+            query: The user's question
+            camera_id: Camera the clip belongs to
+            deadline: Optional request deadline split across upload and inference
+            session_id: Session to keep the asset in; a new one is started if not given
+
+        Returns:
+            Dictionary with the spoken ``text``, the structured ``quick`` answer, the
+            ``session_id`` to fetch the detailed answer with and the ``timings_ms`` of
+            each stage, or error information with a ``stage`` key
+
+        """
+        start = time.monotonic()
+        session_id = session_id or uuid.uuid4().hex
+        clip = self.clip_catalog.fingerprint(video_path)
+        asset_id = self._claim_prefetched(camera_id, video_path, deadline)
+        prefetched = asset_id is not None
+        if asset_id is None:
+            upload_result = self.upload_video_asset(video_path, deadline=deadline)
+            if upload_result.get("rejected"):
+                return self._shed_load(camera_id, upload_result)
+            if "error" in upload_result:
+                return {"error": True, "stage": "upload", "message": upload_result.get("message")}
+            asset_id = upload_result.get("asset_id")
+        uploaded = time.monotonic()
+
+        kept = False
+        try:
+            vlm_result = self.call_vlm_api(
+                asset_id,
+                build_quick_prompt(query),
+                QUICK_SYSTEM_PROMPT,
+                deadline=deadline,
+                max_tokens=self.quick_max_tokens,
+                response_format=QUICK_RESPONSE_FORMAT,
+            )
+            if "error" not in vlm_result:
+                # Kept for the detailed answer; prefetched assets stay owned by the prefetcher
+                self.sessions.start(session_id, camera_id, clip, asset_id, owned=not prefetched)
+                kept = True
+        finally:
+            # Prefetched assets are deleted by the prefetcher once they expire
+            if not prefetched and not kept:
+                self.delete_asset(asset_id, deadline=deadline)
+        answered = time.monotonic()
+        if vlm_result.get("rejected"):
+            return self._shed_load(camera_id, vlm_result)
+        self.camera_health.record(camera_id, answered - start, success="error" not in vlm_result)
+        if "error" in vlm_result:
+            return {"error": True, "stage": "analysis", "message": vlm_result.get("message")}
+
+        quick = parse_quick_answer(vlm_result.get("text", ""))
+        text = spoken_quick_answer(quick)
+        self.sessions.record(session_id, query, text)
+        self.phase_latency[QUICK].record(answered - start)
+        return {
+            "text": text,
+            "quick": quick,
+            "phase": QUICK,
+            "session_id": session_id,
+            "timings_ms": {
+                "upload": round((uploaded - start) * 1000),
+                "answer": round((answered - uploaded) * 1000),
+                "total": round((answered - start) * 1000),
+            },
+        }
+
+    def detailed_answer(
+        self,
+        video_path: str,
+        query: str,
+        camera_id: str,
+        deadline: Deadline | None = None,
+        *,
+        session_id: str,
+    ) -> dict:
+        """Answer a question in full after its quick answer.
+
+        The second phase of a two-phase answer, asked about the session's asset with the
+        quick answer in its history. If the session has expired (or the request reaches
+        another worker), the clip is uploaded again and the question answered afresh.
+
+        Args:
+            video_path: Path to the video file to analyze
+            query: The user's original question
+            camera_id: Camera the clip belongs to
+            deadline: Optional request deadline split across upload and inference
+            session_id: The session returned with the quick answer
+
+        Returns:
+            Dictionary with the VLM ``text`` and the phase's ``timings_ms``, or error
+            information with a ``stage`` key
+
+        """
+        start = time.monotonic()
+        result = self.analyze_clip(
+            video_path,
+            build_detail_prompt(query),
+            ACCESSIBILITY_SYSTEM_PROMPT,
+            camera_id,
+            deadline,
+            session_id=session_id,
+        )
+        elapsed = time.monotonic() - start
+        if "error" not in result:
+            self.phase_latency[DETAIL].record(elapsed)
+        return {**result, "phase": DETAIL, "session_id": session_id, "timings_ms": {"total": round(elapsed * 1000)}}
+
+    def analyze_batch(
+        self,
+        clips: dict[str, dict],
+        system_prompt: str | None = None,
+        deadline: Deadline | None = None,
+        submit: Callable | None = None,
+        *,
+        remember: bool = True,
+    ) -> Iterator[tuple[int, dict]]:
+        """Answer several questions per clip, uploading and deleting each clip only once.
+
+        Each answer is handled like in analyze_clip: rejected calls fall back to the
+        camera's last known analysis and successful answers update the camera's health.
+        Answers still running when the deadline expires are answered like rejected calls.
+
+        Args:
+            clips: Camera id to ``{"video_path": ..., "queries": {index: query}}``
+            system_prompt: Optional system prompt for output format/safety
+            deadline: Optional request deadline shared by all uploads and inferences
+            submit: Optional scheduler for the uploads and inferences (e.g. the priority dispatcher)
+            remember: Whether answers become the camera's last known analysis (off for background work,
+                whose answers to standard prompts must not stand in for a user's question)
+
+        Yields:
+            (index, result) pairs as the answers complete; results are shaped like analyze_clip's
+
+        """
+        camera_of = {index: camera_id for camera_id, clip in clips.items() for index in clip["queries"]}
+        self._batch_uploads_saved += len(camera_of) - len(clips)
+
+        def upload(camera_id: str) -> dict:
+            return self.upload_video_asset(clips[camera_id]["video_path"], deadline=deadline)
+
+        def ask(camera_id: str, upload_result: dict, index: int) -> dict:
+            start = time.monotonic()
+            query = clips[camera_id]["queries"][index]
+            vlm_result = self.call_vlm_api(upload_result.get("asset_id"), query, system_prompt, deadline=deadline)
+            if vlm_result.get("rejected"):
+                return self._shed_load(camera_id, vlm_result)
+            self.camera_health.record(camera_id, time.monotonic() - start, success="error" not in vlm_result)
+            if "error" in vlm_result:
+                return {"error": True, "stage": "analysis", "message": vlm_result.get("message")}
+            if remember:
+                self.remember_analysis(camera_id, vlm_result.get("text", ""))
+            return vlm_result
+
+        def cleanup(_camera_id: str, upload_result: dict) -> None:
+            self.delete_asset(upload_result.get("asset_id"), deadline=deadline)
+
+        groups = {camera_id: list(clip["queries"]) for camera_id, clip in clips.items()}
+        timeout = None if deadline is None else deadline.remaining()
+        for index, result in run_batch(groups, upload=upload, ask=ask, cleanup=cleanup, submit=submit, timeout=timeout):
+            if result.get("timed_out"):
+                # Still running when the request's budget ran out
+                yield index, self._shed_load(camera_of[index], self._deadline_rejection("analysis", deadline))
+            elif result.get("rejected"):
+                # The clip's upload was rejected while shedding load
+                yield index, self._shed_load(camera_of[index], result)
+            elif result.get("error") and "stage" not in result:
+                yield index, {"error": True, "stage": "upload", "message": result.get("message")}
+            else:
+                yield index, result
+
+    def preanalyze(self, camera: dict, video_path: str, prompts: list[str]) -> dict[str, str]:
+        """Answer the standard prompts about a camera's clip and keep the answers warm.
+
+        The clip is uploaded once for all prompts. Fresh answers go into the similarity
+        cache, so users asking one of the prompts (or a rephrasing) are answered from it;
+        they do not replace the camera's last analysis served while shedding load.
+
+        Args:
+            camera: Camera dictionary (either registry schema)
+            video_path: Path of the camera's clip
+            prompts: The standard prompts
+
+        Returns:
+            The answer per prompt; prompts whose call failed or was shed are left out
+
+        """
+        camera_id = camera_id_of(camera)
+        clip = self.clip_catalog.fingerprint(video_path)
+        clips = {camera_id: {"video_path": video_path, "queries": dict(enumerate(prompts))}}
+        answers = {}
+        for index, result in self.analyze_batch(clips, ACCESSIBILITY_SYSTEM_PROMPT, remember=False):
+            if result.get("error") or result.get("stale") or result.get("degraded"):
+                continue
+            answers[prompts[index]] = result.get("text", "")
+            self._remember_similar(clip, prompts[index], answers[prompts[index]])
+        return answers
+
+    def start_background_tasks(self) -> None:
+        """Start the clip watcher and the pre-analysis loop; call after the server process has forked."""
+        self.clip_catalog.start()
+        if self.preanalysis is not None:
+            self.preanalysis.start()
+
+    def _answer_phases_snapshot(self) -> dict:
+        """Return the token limit and latency of each phase of two-phase answers."""
+        phases = {}
+        for phase, tracker in self.phase_latency.items():
+            p50, p95 = tracker.percentile(50), tracker.percentile(95)
+            phases[phase] = {
+                "max_tokens": self.quick_max_tokens if phase == QUICK else self.max_tokens,
+                "answers": tracker.count(),
+                "latency_p50_s": None if p50 is None else round(p50, 3),
+                "latency_p95_s": None if p95 is None else round(p95, 3),
+            }
+        return phases
+
+    def get_metrics(self) -> dict:
+        """Return the upstream protection state for monitoring.
+
+        Returns:
+            Dictionary with circuit breaker and concurrency limiter snapshots
+
+        """
+        return {
+            "circuit_breaker": self.breaker.snapshot(),
+            "concurrency": self.limiter.snapshot(),
+            "stale_cache_cameras": len(self._last_analysis),
+            "deadline_exceeded": self._deadline_exceeded,
+            "hedging": self.hedger.snapshot() if self.hedger else {"enabled": False},
+            "prompt_batching": self.batcher.snapshot() if self.batcher else {"enabled": False},
+            "similarity_cache": self.similarity_cache.snapshot() if self.similarity_cache else {"enabled": False},
+            "intents": self.intent_router.snapshot(),
+            "prefetch": self.prefetcher.snapshot() if self.prefetcher else {"enabled": False},
+            "preanalysis": self.preanalysis.snapshot() if self.preanalysis else {"enabled": False},
+            "sessions": self.sessions.snapshot(),
+            "shared_cache": self.shared_cache.snapshot() if self.shared_cache else {"enabled": False},
+            "camera_health": self.camera_health.snapshot(),
+            "camera_scoring": self.camera_scorer.snapshot() if self.camera_scorer else {"enabled": False},
+            "clips": self.clip_catalog.snapshot(),
+            "answer_phases": self._answer_phases_snapshot(),
+            "batch_uploads_saved": self._batch_uploads_saved,
+        }
+
+    def process_user_request(
+        self, lat: float, long: float, question_text: str, deadline: Deadline | None = None
+    ) -> dict:
         """Process a complete user request end-to-end.
 
         This is the main method that orchestrates the entire flow:
-        1. Find nearest camera
-        2. Get video & context
-        3. Call Hafnia VLM
-        4. Return response
+        1. Answer non-visual questions locally
+        2. Find nearest camera
+        3. Get video & context
+        4. Call Hafnia VLM
+        5. Return response
 
         Args:
             lat: User's latitude
             long: User's longitude
             question_text: The user's question
+            deadline: Optional request deadline shared by camera lookup and inference
 
         Returns:
             Dictionary with the response to send back to the user
 
         """
-        # Step 1: Find nearest camera
-        nearest_camera = self.find_nearest_camera(lat, long)
+        # Step 1: Answer questions that do not need the camera without the VLM
+        local_answer = self.answer_locally(question_text, lat, long)
+        if local_answer is not None:
+            return local_response(question_text, local_answer)
+
+        # Step 2: Choose the camera most likely to answer well (by default the nearest)
+        nearest_camera = self.select_camera(lat, long, question_text)
 
         if not nearest_camera:
             return {
@@ -290,22 +1541,247 @@ class VLMService:
                 "text": "I'm sorry, there are no cameras available in your area.",
             }
 
-        # Step 2: Get video & context
-        video_clip_url = nearest_camera["video_clip_url"]
-        context_description = nearest_camera["context_description"]
-        camera_id = nearest_camera["camera_id"]
-
-        # Step 3: Construct prompt
-        prompt = self._construct_vlm_prompt(question_text, context_description)
-
-        # Step 4: Call Hafnia VLM
-        vlm_response = self.call_vlm_api(video_clip_url, prompt)
+        # Steps 3-4: Get video & context, construct the prompt and call Hafnia VLM
+        vlm_response = self._answer_from_camera(nearest_camera, question_text, deadline)
 
         # Step 5: Format response for mobile app
         return {
-            "camera_id": camera_id,
+            "camera_id": camera_id_of(nearest_camera),
             "camera_name": nearest_camera["name"],
             "question": question_text,
             "answer": vlm_response.get("text", ""),
             "error": vlm_response.get("error", False),
+            "stale": vlm_response.get("stale", False),
+            "degraded": vlm_response.get("degraded", False),
         }
+
+    def _answer_from_camera(self, camera: dict, question_text: str, deadline: Deadline | None) -> dict:
+        """Ask the VLM a question about one camera's clip.
+
+        Reuses the answer to a similar earlier question about the same clip (or another
+        worker's answer to the same question), falls back to the last known answer while the
+        upstream is shedding load and records the camera's latency and success for later selection.
+
+        Args:
+            camera: Camera dictionary (either registry schema)
+            question_text: The user's question
+            deadline: Optional request deadline
+
+        Returns:
+            Dictionary containing the VLM response
+
+        """
+        camera_id = camera_id_of(camera)
+        self._record_query(camera_id)
+        clip = self._clip_key(camera) if self.similarity_cache or self.shared_cache else None
+        cached = self._cached_answer(clip, question_text)
+        if cached is not None:
+            return cached
+
+        context_description = camera.get("context_description") or camera.get("description") or camera["name"]
+        prompt = self._construct_vlm_prompt(question_text, context_description)
+
+        def answer() -> dict:
+            start = time.monotonic()
+            vlm_response = self.call_vlm_api(camera["video_clip_url"], prompt, deadline=deadline)
+            if vlm_response.get("rejected"):
+                return self._shed_load(camera_id, vlm_response)
+
+            self.camera_health.record(camera_id, time.monotonic() - start, success=not vlm_response.get("error"))
+            if not vlm_response.get("error"):
+                self.remember_analysis(camera_id, vlm_response.get("text", ""))
+                self._remember_similar(clip, question_text, vlm_response.get("text", ""))
+            return vlm_response
+
+        return self._shared_answer(clip, question_text, answer)
+
+    def process_user_request_fanout(
+        self,
+        lat: float,
+        long: float,
+        question_text: str,
+        *,
+        max_cameras: int = DEFAULT_FANOUT_CAMERAS,
+        radius_m: float = DEFAULT_FANOUT_RADIUS_M,
+        strategy: str = FIRST,
+        deadline: Deadline | None = None,
+        submit: Callable | None = None,
+    ) -> dict:
+        """Process a user request against several nearby cameras in parallel.
+
+        With the FIRST strategy the first acceptable answer wins and the other cameras are
+        cancelled; with MERGE all acceptable answers received before the deadline are combined.
+
+        Args:
+            lat: User's latitude
+            long: User's longitude
+            question_text: The user's question
+            max_cameras: Number of nearest cameras to ask (at most MAX_FANOUT_CAMERAS)
+            radius_m: Only cameras within this distance are asked (at most MAX_FANOUT_RADIUS_M)
+            strategy: FIRST or MERGE
+            deadline: Optional request deadline; unfinished cameras are cancelled when it expires
+            submit: Optional scheduler for the per-camera work (e.g. the priority dispatcher)
+
+        Returns:
+            Dictionary with the response to send back to the user
+
+        """
+        local_answer = self.answer_locally(question_text, lat, long)
+        if local_answer is not None:
+            return local_response(question_text, local_answer)
+
+        max_cameras = min(max_cameras, MAX_FANOUT_CAMERAS)
+        radius_m = min(radius_m, MAX_FANOUT_RADIUS_M)
+        nearby = self.find_nearby_cameras(lat, long, radius_m, max(max_cameras, SELECTION_CANDIDATES))
+        cameras = self.rank_cameras(nearby, lat, long, question_text)[:max_cameras]
+        if not cameras:
+            return {
+                "error": True,
+                "message": "No cameras available in your area",
+                "text": "I'm sorry, there are no cameras available in your area.",
+            }
+
+        result = fan_out(
+            cameras,
+            lambda camera, branch_deadline: self._answer_from_camera(camera, question_text, branch_deadline),
+            camera_id=camera_id_of,
+            strategy=strategy,
+            deadline=deadline,
+            submit=submit,
+        )
+        answers = result["answers"] or ([result["fallback"]] if result["fallback"] else [])
+        if not answers:
+            return {
+                "error": True,
+                "question": question_text,
+                "message": "None of the nearby cameras could answer",
+                "answer": "I'm sorry, I couldn't analyze your surroundings right now. Please try again.",
+                "cameras": result["outcomes"],
+            }
+
+        first_camera, first_answer = answers[0]
+        return {
+            "camera_id": camera_id_of(first_camera),
+            "camera_name": first_camera["name"],
+            "camera_ids": [camera_id_of(camera) for camera, _ in answers],
+            "question": question_text,
+            "answer": merge_answers(answers, lambda camera: camera["name"])
+            if strategy == MERGE
+            else first_answer.get("text", ""),
+            "error": False,
+            "stale": first_answer.get("stale", False),
+            "degraded": first_answer.get("degraded", False),
+            "strategy": strategy,
+            "cameras": result["outcomes"],
+        }
+
+    def process_batch_request(
+        self, items: list[dict], deadline: Deadline | None = None, submit: Callable | None = None
+    ) -> Iterator[dict]:
+        """Answer a batch of questions, uploading each camera's clip only once.
+
+        Args:
+            items: Dictionaries with a ``question_text`` and either a ``camera_id`` or a
+                ``lat``/``long`` location (answered by the nearest camera)
+            deadline: Optional request deadline shared by the whole batch
+            submit: Optional scheduler for the uploads and inferences
+
+        Yields:
+            One response per item, with its ``index`` in the batch, as the answers complete
+
+        """
+
+        def resolve(item: dict) -> tuple[str, dict] | dict:
+            if item.get("camera_id") is not None:
+                camera = self.get_camera(item["camera_id"])
+            else:
+                camera = self.select_camera(item["lat"], item["long"], item["question_text"], with_clip=True)
+            if camera is None:
+                return {"error": True, "message": "No camera found for this question"}
+            problem = self.clip_problem(camera)
+            if problem is not None:
+                return {"error": True, "message": f"No usable video for camera {camera_id_of(camera)} ({problem})"}
+            return camera_id_of(camera), camera
+
+        def respond(index: int, camera: dict | None, result: dict) -> dict:
+            response = {
+                "index": index,
+                "camera_id": camera_id_of(camera) if camera else None,
+                "camera_name": camera["name"] if camera else None,
+                "question": items[index]["question_text"],
+                "answer": result.get("text", ""),
+                "error": result.get("error", False),
+                "stale": result.get("stale", False),
+                "degraded": result.get("degraded", False),
+            }
+            if result.get("error"):
+                response["message"] = result.get("message")
+            return response
+
+        groups, errors = group_by_camera(items, resolve)
+        for index, error in errors.items():
+            yield respond(index, None, error)
+
+        clips = {}
+        camera_at = {}
+        for camera_id, group in groups.items():
+            camera = group["camera"]
+            context_description = camera.get("context_description") or camera.get("description") or camera["name"]
+            queries = {}
+            for index in group["indices"]:
+                queries[index] = self._construct_vlm_prompt(items[index]["question_text"], context_description)
+                camera_at[index] = camera
+            clips[camera_id] = {"video_path": str(self.clip_path(camera)), "queries": queries}
+
+        for index, result in self.analyze_batch(clips, deadline=deadline, submit=submit):
+            yield respond(index, camera_at[index], result)
+
+
+def local_response(question_text: str, local_answer: dict) -> dict:
+    """Format a locally answered question like a VLM response for the mobile app."""
+    return {
+        "camera_id": None,
+        "camera_name": None,
+        "question": question_text,
+        "answer": local_answer["text"],
+        "error": False,
+        "stale": False,
+        "degraded": False,
+        "intent": local_answer["intent"],
+    }
+
+
+def _stage_timeout(deadline: Deadline | None, cap: float, minimum: float, reserve: float = 0.0) -> float | None:
+    """Compute a stage's timeout from the request deadline.
+
+    Args:
+        deadline: The request deadline, or None for the fixed stage timeout
+        cap: The stage's own maximum timeout
+        minimum: Smallest timeout worth attempting the stage with
+        reserve: Seconds to keep back for later stages
+
+    Returns:
+        The timeout in seconds, or None if the stage no longer fits in the budget
+
+    """
+    if deadline is None:
+        return cap
+    timeout = deadline.timeout_for(cap, reserve)
+    return timeout if timeout >= minimum else None
+
+
+def _is_upstream_failure(result: dict) -> bool:
+    """Decide whether an API result should count against the upstream's health.
+
+    Timeouts, connection errors, 5xx and 429 responses indicate an unhealthy upstream.
+    Other 4xx responses are caused by the request itself and do not, nor do local errors
+    such as a clip that cannot be read.
+    """
+    if not result.get("error"):
+        return False
+    if result.get("transport_error"):
+        return True
+    status_code = result.get("status_code")
+    return status_code is not None and (
+        status_code >= requests.codes.server_error or status_code == requests.codes.too_many
+    )
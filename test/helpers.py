@@ -0,0 +1,34 @@
+"""Shared helpers for the unit tests."""
+
+import struct
+
+
+class FakeClock:
+    """Manually advanced clock, injectable wherever the code takes a ``clock`` callable."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        """Start the clock at the given time."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    """Return an MP4 box."""
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4(duration_s: float, fps: int = 25, *, moov_last: bool = True) -> bytes:
+    """Return a minimal MP4 file with one video track of the given duration and frame rate."""
+    timescale = 1000
+    mvhd = box(b"mvhd", struct.pack(">4xIIII", 0, 0, timescale, int(duration_s * timescale)) + bytes(80))
+    mdhd = box(b"mdhd", struct.pack(">4xIIII", 0, 0, fps * 100, int(duration_s * fps * 100)) + bytes(4))
+    hdlr = box(b"hdlr", bytes(8) + b"vide" + bytes(13))
+    stts = box(b"stts", struct.pack(">4xIII", 1, int(duration_s * fps), 100))
+    trak = box(b"trak", box(b"mdia", mdhd + hdlr + box(b"minf", box(b"stbl", stts))))
+    moov = box(b"moov", mvhd + trak)
+    mdat = box(b"mdat", bytes(1024))
+    ftyp = box(b"ftyp", b"isom" + bytes(4))
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
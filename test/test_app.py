@@ -2,8 +2,10 @@
 
 import json
 import unittest
+from unittest.mock import patch
 
-from loriens_guide.app import app
+from loriens_guide.app import app, create_app, listings
+from loriens_guide.ratelimit import ClientRateLimiter, _hash_key
 
 
 class TestAPI(unittest.TestCase):
@@ -23,6 +25,15 @@ class TestAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data["status"], "healthy")
 
+    def test_metrics(self) -> None:
+        """Test metrics endpoint exposes the VLM circuit breaker and concurrency limit."""
+        response = self.client.get("/api/v1/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn("circuit_breaker", data)
+        self.assertIn("concurrency", data)
+
     def test_list_cameras(self) -> None:
         """Test listing all cameras."""
         response = self.client.get("/api/v1/cameras")
@@ -33,6 +44,37 @@ class TestAPI(unittest.TestCase):
         self.assertIsInstance(data["cameras"], list)
         self.assertGreater(len(data["cameras"]), 0)
 
+    def test_create_app_prebuilds_camera_listing(self) -> None:
+        """Test the factory builds the camera listing before the first request."""
+        self.assertIs(create_app(), self.app)
+        builds = listings.snapshot()["builds"]
+
+        response = self.client.get("/api/v1/cameras")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(listings.snapshot()["builds"], builds)
+
+    def test_first_request_starts_background_tasks(self) -> None:
+        """Test background pre-analysis is started by requests, not by the factory run before forking."""
+        with patch("loriens_guide.app.vlm_service.start_background_tasks") as start:
+            create_app()
+            start.assert_not_called()
+
+            self.client.get("/health")
+
+        start.assert_called_once_with()
+
+    def test_list_cameras_revalidation(self) -> None:
+        """Test the camera list is compressed and revalidated with its ETag."""
+        response = self.client.get("/api/v1/cameras", headers={"Accept-Encoding": "gzip"})
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Cache-Control", response.headers)
+
+        response = self.client.get("/api/v1/cameras", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
     def test_find_nearest_camera_success(self) -> None:
         """Test finding nearest camera with valid coordinates."""
         payload = {"lat": 55.6761, "long": 12.5683}
@@ -102,6 +144,83 @@ class TestAPI(unittest.TestCase):
         self.assertTrue(data["error"])
         self.assertIn("JSON", data["message"])
 
+    def test_query_fanout_limits(self) -> None:
+        """Test fan-out queries asking for too many cameras or too wide a radius are rejected."""
+        for extra in ({"max_cameras": 100}, {"radius_m": 100_000}):
+            payload = {"lat": 55.6761, "long": 12.5683, "question_text": "What is ahead?", "mode": "merge", **extra}
+            response = self.client.post("/api/v1/query", data=json.dumps(payload), content_type="application/json")
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("must be", json.loads(response.data)["message"])
+
+    def test_query_answered_locally_without_dispatch(self) -> None:
+        """Test a question that does not need the camera is answered without queueing for the VLM."""
+        payload = {"lat": 55.6761, "long": 12.5683, "question_text": "help"}
+
+        with patch("loriens_guide.app.dispatcher.run") as run:
+            response = self.client.post("/api/v1/query", data=json.dumps(payload), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)["intent"], "help")
+        run.assert_not_called()
+
+    def test_query_rate_limited_per_client(self) -> None:
+        """Test a client over its rate gets 429 with Retry-After while other clients are served."""
+        payload = json.dumps({"lat": 55.6761, "long": 12.5683})
+        limiter = ClientRateLimiter(rate_per_s=0.1, burst=2)
+
+        api_keys = frozenset({_hash_key("kiosk"), _hash_key("phone")})
+        with patch("loriens_guide.app.rate_limiter", limiter), patch("loriens_guide.app.API_KEYS", api_keys):
+            statuses = [
+                self.client.post(
+                    "/api/v1/query", data=payload, content_type="application/json", headers={"X-API-Key": "kiosk"}
+                ).status_code
+                for _ in range(3)
+            ]
+            limited = self.client.post(
+                "/api/v1/query", data=payload, content_type="application/json", headers={"X-API-Key": "kiosk"}
+            )
+            other = self.client.post(
+                "/api/v1/query", data=payload, content_type="application/json", headers={"X-API-Key": "phone"}
+            )
+            metrics = json.loads(self.client.get("/api/v1/metrics").data)["rate_limit"]
+
+        self.assertEqual(statuses, [400, 400, 429])
+        self.assertEqual(limited.status_code, 429)
+        self.assertGreaterEqual(int(limited.headers["Retry-After"]), 1)
+        self.assertGreater(json.loads(limited.data)["retry_after_s"], 0)
+        self.assertEqual(other.status_code, 400)
+        self.assertEqual(metrics["limited"], 2)
+        self.assertEqual(metrics["clients"], 2)
+
+    def test_batch_query_requires_items(self) -> None:
+        """Test batch endpoint rejects items without a question or a camera."""
+        for payload in (
+            {},
+            {"items": []},
+            {"items": [{"camera_id": "lib_lobby_01"}]},
+            {"items": [{"question_text": "Hi"}]},
+        ):
+            response = self.client.post(
+                "/api/v1/query/batch", data=json.dumps(payload), content_type="application/json"
+            )
+
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(json.loads(response.data)["error"])
+
+    def test_batch_query_streams_ndjson(self) -> None:
+        """Test batch endpoint streams one NDJSON line per item."""
+        payload = {"items": [{"camera_id": "unknown", "question_text": "Where is the exit?"}], "stream": True}
+
+        response = self.client.post("/api/v1/query/batch", data=json.dumps(payload), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["index"], 0)
+        self.assertTrue(lines[0]["error"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,265 @@
+"""Integration tests for the backend Flask app."""
+
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from werkzeug.test import TestResponse
+
+from loriens_guide.camera_store import CameraStore
+from loriens_guide.ratelimit import ClientRateLimiter
+
+BACKEND_APP = Path(__file__).parent.parent / "backend" / "app.py"
+
+# The backend opens its camera store on import; keep the checked-in database untouched
+_db_directory = tempfile.TemporaryDirectory()
+
+
+def load_backend() -> object:
+    """Import backend/app.py with its camera store in a temporary directory."""
+    with patch.dict(os.environ, {"CAMERA_DB_PATH": str(Path(_db_directory.name) / "cameras.db")}):
+        spec = importlib.util.spec_from_file_location("backend_app", BACKEND_APP)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+backend = load_backend()
+
+CAMERAS = [{"id": f"cam-{index}", "name": f"Camera {index}"} for index in range(3)]
+
+ADMIN_TOKEN = "test-admin-token"  # noqa: S105
+
+
+def registry_camera(camera_id: str, lat: float = 55.0) -> dict:
+    """Build a camera document in the backend registry schema."""
+    return {"id": camera_id, "name": camera_id, "location": {"latitude": lat, "longitude": 12.0}}
+
+
+def ndjson(*documents: object) -> str:
+    """Return documents as NDJSON lines."""
+    return "".join(f"{json.dumps(document)}\n" for document in documents)
+
+
+class TestBackendAPI(unittest.TestCase):
+    """Test cases for the backend endpoints."""
+
+    def setUp(self) -> None:
+        """Set up a test client with background tasks left off."""
+        self.client = backend.app.test_client()
+        backend.app.config["TESTING"] = True
+        patcher = patch.object(backend.vlm_service, "start_background_tasks")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_heartbeat_prefetches_the_best_ranked_cameras(self) -> None:
+        """Test a heartbeat prepares the clips of the first PREFETCH_CAMERAS ranked cameras."""
+        with (
+            patch.object(backend, "find_cameras_within", return_value=CAMERAS),
+            patch.object(backend, "clip_path_for", return_value=Path("clip.mp4")),
+            patch.object(backend.vlm_service, "rank_cameras", side_effect=lambda cameras, *_: cameras),
+            patch.object(backend.vlm_service, "prefetch_clip", return_value="scheduled") as prefetch,
+            patch.object(backend, "PREFETCH_CAMERAS", 2),
+        ):
+            response = self.client.post("/api/location/heartbeat", json={"latitude": 55.0, "longitude": 12.0})
+
+        self.assertEqual(response.status_code, 202)
+        data = response.get_json()
+        self.assertEqual((data["camera_id"], data["prefetch"]), ("cam-0", "scheduled"))
+        self.assertEqual([camera["camera_id"] for camera in data["cameras"]], ["cam-0", "cam-1"])
+        self.assertEqual([call.args[0] for call in prefetch.call_args_list], ["cam-0", "cam-1"])
+
+    def test_heartbeat_without_cameras(self) -> None:
+        """Test a heartbeat with no camera nearby prefetches nothing."""
+        with (
+            patch.object(backend, "find_cameras_within", return_value=[]),
+            patch.object(backend.vlm_service, "prefetch_clip") as prefetch,
+        ):
+            response = self.client.post("/api/location/heartbeat", json={"latitude": 55.0, "longitude": 12.0})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["prefetch"], "no_camera")
+        prefetch.assert_not_called()
+
+    def test_heartbeats_are_rate_limited(self) -> None:
+        """Test a client cannot trigger speculative uploads faster than its rate."""
+        limiter = ClientRateLimiter(rate_per_s=0.001, burst=1)
+        with (
+            patch.object(backend, "rate_limiter", limiter),
+            patch.object(backend, "find_cameras_within", return_value=[]),
+        ):
+            first = self.client.post("/api/location/heartbeat", json={"latitude": 55.0, "longitude": 12.0})
+            second = self.client.post("/api/location/heartbeat", json={"latitude": 55.0, "longitude": 12.0})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn("Retry-After", second.headers)
+
+
+class TestCameraImportExport(unittest.TestCase):
+    """Test cases for the NDJSON camera import and export endpoints."""
+
+    def setUp(self) -> None:
+        """Point the backend at a registry of its own with two cameras."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = CameraStore(Path(directory.name) / "cameras.db")
+        self.store.replace_all([registry_camera("north", 55.01), registry_camera("south", 54.99)])
+        for patcher in (
+            patch.object(backend, "camera_store", self.store),
+            patch.object(backend, "CAMERA_ADMIN_TOKEN", ADMIN_TOKEN),
+            patch.object(backend.vlm_service, "start_background_tasks"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = backend.app.test_client()
+
+    def post_import(self, body: str, query: str = "", token: str | None = ADMIN_TOKEN) -> TestResponse:
+        """POST an NDJSON body to the import endpoint."""
+        headers = {"Content-Type": "application/x-ndjson"}
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.client.post(f"/api/cameras/import{query}", data=body, headers=headers)
+
+    def camera_ids(self) -> list[str]:
+        """Return the ids of the cameras in the registry."""
+        return sorted(camera["id"] for camera in self.store.list_cameras())
+
+    def test_import_requires_the_admin_token(self) -> None:
+        """Test imports without the right bearer token are refused and change nothing."""
+        for token in (None, "wrong"):
+            response = self.post_import(ndjson(registry_camera("east")), token=token)
+
+            self.assertEqual(response.status_code, 403)
+        with patch.object(backend, "CAMERA_ADMIN_TOKEN", ""):
+            self.assertEqual(self.post_import(ndjson(registry_camera("east")), token="").status_code, 403)
+        self.assertEqual(self.camera_ids(), ["north", "south"])
+
+    def test_import_rejects_unknown_mode(self) -> None:
+        """Test only the upsert and replace modes are accepted."""
+        response = self.post_import(ndjson(registry_camera("east")), "?mode=merge")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.camera_ids(), ["north", "south"])
+
+    def test_upsert_and_replace(self) -> None:
+        """Test upserts add to the registry and replacements swap it as a new version."""
+        version = self.store.version()
+
+        upsert = self.post_import(ndjson(registry_camera("east")))
+        replace = self.post_import(ndjson(registry_camera("west")), "?mode=replace")
+
+        self.assertEqual(upsert.get_json()["imported"], 1)
+        self.assertEqual(replace.status_code, 200)
+        self.assertEqual(replace.get_json()["mode"], "replace")
+        self.assertNotEqual(replace.get_json()["version"], version)
+        self.assertEqual(self.camera_ids(), ["west"])
+
+    def test_invalid_line_rolls_back_the_whole_import(self) -> None:
+        """Test an import with an invalid line is reported with 422 and writes nothing."""
+        version = self.store.version()
+        body = ndjson(registry_camera("east"), {"name": "no id"}) + "not json\n"
+
+        response = self.post_import(body, "?mode=replace")
+
+        self.assertEqual(response.status_code, 422)
+        data = response.get_json()
+        self.assertEqual(data["invalid"], 2)
+        self.assertEqual([error["line"] for error in data["errors"]], [2, 3])
+        self.assertEqual(self.camera_ids(), ["north", "south"])
+        self.assertEqual(self.store.version(), version)
+
+    def test_export_streams_ndjson_that_imports_again(self) -> None:
+        """Test the export is one camera document per line and round-trips through the import."""
+        response = self.client.get("/api/cameras/export")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        body = response.get_data(as_text=True)
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], ["north", "south"])
+
+        self.store.replace_all([])
+        self.assertEqual(self.post_import(body, "?mode=replace").get_json()["imported"], 2)
+        self.assertEqual(self.camera_ids(), ["north", "south"])
+
+
+class TestAssistanceRequest(unittest.TestCase):
+    """Test cases for the single round trip assistance endpoint."""
+
+    def setUp(self) -> None:
+        """Set up a test client whose camera analysis is stubbed out."""
+        self.analyze = MagicMock(return_value={"text": "A door ahead."})
+        self.cameras = CAMERAS[:2]
+        for patcher in (
+            patch.object(backend, "analyze_camera", self.analyze),
+            patch.object(backend, "find_cameras_within", side_effect=lambda *_args, **_kwargs: self.cameras),
+            patch.object(backend.vlm_service, "rank_cameras", side_effect=lambda cameras, *_: cameras),
+            patch.object(backend.vlm_service, "answer_locally", return_value=None),
+            patch.object(backend.vlm_service, "start_background_tasks"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = backend.app.test_client()
+
+    def ask(self, headers: dict | None = None, **payload: object) -> TestResponse:
+        """POST a question from a fixed location."""
+        body = {"location": {"latitude": 55.0, "longitude": 12.0}, "query": "What is ahead?", **payload}
+        return self.client.post("/api/assistance/request", json=body, headers=headers or {})
+
+    def test_best_camera_is_analyzed(self) -> None:
+        """Test the first ranked camera answers the question in one round trip."""
+        response = self.ask()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["camera"]["id"], "cam-0")
+        self.assertEqual((data["analysis"], data["voice_response"]), ("A door ahead.", "A door ahead."))
+        self.assertFalse(data["stale"])
+        self.assertEqual(self.analyze.call_args.args[:2], (self.cameras[0], "What is ahead?"))
+
+    def test_no_camera_nearby(self) -> None:
+        """Test the user is told to move when no camera with usable footage is nearby."""
+        self.cameras = []
+
+        response = self.ask()
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["cameras"], [])
+        self.assertIn("no cameras available", data["voice_response"])
+        self.analyze.assert_not_called()
+
+    def test_errors_are_mapped_to_statuses(self) -> None:
+        """Test shed load answers 503, a missing clip 404 and other failures 500."""
+        for result, status in (
+            ({"error": True, "rejected": True, "message": "Busy"}, 503),
+            ({"error": True, "stage": "video", "message": "No usable video"}, 404),
+            ({"error": True, "stage": "analysis", "message": "Upstream failed"}, 500),
+        ):
+            self.analyze.return_value = result
+
+            response = self.ask()
+
+            self.assertEqual(response.status_code, status)
+            self.assertEqual(response.get_json()["message"], result["message"])
+
+    def test_session_is_passed_through(self) -> None:
+        """Test the session id from the payload, or else the header, reaches the analysis."""
+        self.analyze.return_value = {"text": "On your left.", "follow_up": True}
+
+        from_payload = self.ask(session_id="session-1")
+        from_header = self.ask(headers={"X-Session-Id": "session-2"})
+        without = self.ask()
+
+        self.assertTrue(from_payload.get_json()["follow_up"])
+        self.assertEqual((from_header.status_code, without.status_code), (200, 200))
+        self.assertEqual([call.args[3] for call in self.analyze.call_args_list], ["session-1", "session-2", None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Unit tests for batch upload amortization."""
+
+import threading
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from loriens_guide.batch import group_by_camera, run_batch
+
+
+class TestGroupByCamera(unittest.TestCase):
+    """Test cases for group_by_camera."""
+
+    def test_groups_items_in_order_of_first_appearance(self) -> None:
+        """Test items for the same camera share a group and unresolvable items are errors."""
+        items = ["a", "b", "a", "missing"]
+
+        def resolve(item: str) -> tuple[str, dict] | dict:
+            if item == "missing":
+                return {"error": True, "message": "Camera not found"}
+            return item, {"id": item}
+
+        groups, errors = group_by_camera(items, resolve)
+
+        self.assertEqual(list(groups), ["a", "b"])
+        self.assertEqual(groups["a"]["indices"], [0, 2])
+        self.assertEqual(groups["b"]["camera"], {"id": "b"})
+        self.assertEqual(list(errors), [3])
+
+
+class TestRunBatch(unittest.TestCase):
+    """Test cases for run_batch."""
+
+    def test_uploads_once_per_group_and_cleans_up_after_all_answers(self) -> None:
+        """Test each group is uploaded and cleaned up exactly once."""
+        lock = threading.Lock()
+        uploads = []
+        cleanups = []
+
+        def upload(key: str) -> dict:
+            with lock:
+                uploads.append(key)
+            return {"asset_id": f"asset-{key}"}
+
+        def ask(_key: str, upload_result: dict, index: int) -> dict:
+            return {"text": f"{upload_result['asset_id']}:{index}"}
+
+        def cleanup(key: str, upload_result: dict) -> None:
+            with lock:
+                cleanups.append((key, upload_result["asset_id"]))
+
+        results = dict(run_batch({"a": [0, 2], "b": [1]}, upload=upload, ask=ask, cleanup=cleanup))
+
+        self.assertEqual(results, {0: {"text": "asset-a:0"}, 1: {"text": "asset-b:1"}, 2: {"text": "asset-a:2"}})
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        self.assertEqual(sorted(cleanups), [("a", "asset-a"), ("b", "asset-b")])
+
+    def test_failed_upload_answers_every_question_of_its_group(self) -> None:
+        """Test an upload failure is returned for each of its questions without cleanup."""
+        cleanups = []
+
+        results = dict(
+            run_batch(
+                {"a": [0, 1]},
+                upload=lambda _key: {"error": True, "message": "Upload failed"},
+                ask=lambda *_args: self.fail("No question should be asked"),
+                cleanup=lambda key, _upload_result: cleanups.append(key),
+            )
+        )
+
+        self.assertEqual(set(results), {0, 1})
+        self.assertTrue(all(result["error"] for result in results.values()))
+        self.assertEqual(cleanups, [])
+
+    def test_question_exception_becomes_error_result(self) -> None:
+        """Test an exception while answering only fails that question."""
+
+        def ask(_key: str, _upload_result: dict, index: int) -> dict:
+            if index == 1:
+                msg = "boom"
+                raise RuntimeError(msg)
+            return {"text": "ok"}
+
+        results = dict(
+            run_batch(
+                {"a": [0, 1]},
+                upload=lambda _key: {"asset_id": "asset"},
+                ask=ask,
+                cleanup=lambda _key, _upload_result: None,
+            )
+        )
+
+        self.assertEqual(results[0], {"text": "ok"})
+        self.assertEqual(results[1], {"error": True, "message": "boom"})
+
+    def test_unfinished_questions_time_out(self) -> None:
+        """Test questions still unanswered after the timeout get an error result instead of blocking."""
+        release = threading.Event()
+
+        def ask(_key: str, _upload_result: dict, index: int) -> dict:
+            if index == 1:
+                release.wait(5)
+            return {"text": "ok"}
+
+        try:
+            results = dict(
+                run_batch(
+                    {"a": [0, 1]},
+                    upload=lambda _key: {"asset_id": "asset"},
+                    ask=ask,
+                    cleanup=lambda _key, _upload_result: None,
+                    timeout=0.2,
+                )
+            )
+        finally:
+            release.set()
+
+        self.assertEqual(results[0], {"text": "ok"})
+        self.assertTrue(results[1]["timed_out"])
+
+    def test_failing_scheduler_still_answers_every_question(self) -> None:
+        """Test a question that could not be scheduled gets an error result and the asset is cleaned up."""
+        cleanups = []
+        pool = ThreadPoolExecutor(max_workers=2)
+
+        def submit(fn: object, *args: object) -> Future:
+            if fn is not upload:
+                msg = "queue full"
+                raise RuntimeError(msg)
+            return pool.submit(fn, *args)
+
+        def upload(_key: str) -> dict:
+            return {"asset_id": "asset"}
+
+        with pool:
+            results = dict(
+                run_batch(
+                    {"a": [0, 1]},
+                    upload=upload,
+                    ask=lambda *_args: {"text": "ok"},
+                    cleanup=lambda key, _upload_result: cleanups.append(key),
+                    submit=submit,
+                    timeout=5,
+                )
+            )
+
+        self.assertEqual(set(results), {0, 1})
+        self.assertTrue(all(result["error"] and not result.get("timed_out") for result in results.values()))
+        self.assertEqual(cleanups, ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
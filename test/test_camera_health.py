@@ -0,0 +1,37 @@
+"""Unit tests for camera health tracking."""
+
+import unittest
+
+from loriens_guide.camera_health import CameraHealthTracker
+
+
+class TestCameraHealthTracker(unittest.TestCase):
+    """Test cases for CameraHealthTracker."""
+
+    def test_first_sample_initializes_averages(self) -> None:
+        """Test the first sample becomes the average."""
+        tracker = CameraHealthTracker()
+        tracker.record("cam", 2.0, success=True)
+
+        stats = tracker.get("cam")
+        self.assertEqual(stats["latency_ewma_s"], 2.0)
+        self.assertEqual(stats["success_ewma"], 1.0)
+
+    def test_moving_averages(self) -> None:
+        """Test later samples move the averages by alpha."""
+        tracker = CameraHealthTracker(alpha=0.5)
+        tracker.record("cam", 2.0, success=True)
+        tracker.record("cam", 4.0, success=False)
+
+        stats = tracker.get("cam")
+        self.assertEqual(stats["latency_ewma_s"], 3.0)
+        self.assertEqual(stats["success_ewma"], 0.5)
+        self.assertEqual(stats["failures"], 1)
+
+    def test_unknown_camera(self) -> None:
+        """Test unknown cameras have no statistics."""
+        self.assertIsNone(CameraHealthTracker().get("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
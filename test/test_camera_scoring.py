@@ -0,0 +1,107 @@
+"""Unit tests for camera selection scoring."""
+
+import unittest
+
+from loriens_guide.camera_health import CameraHealthTracker
+from loriens_guide.camera_scoring import CameraScorer, parse_orientation, required_capabilities
+from loriens_guide.geo import initial_bearing
+
+# User position; the cameras below are about 30 m north or south of it
+USER = (55.6761, 12.5683)
+NORTH = 55.67637
+SOUTH = 55.67583
+
+
+def camera(camera_id: str, lat: float, **fields: object) -> dict:
+    """Build a camera in the backend registry schema."""
+    return {"id": camera_id, "name": camera_id, "location": {"latitude": lat, "longitude": USER[1]}, **fields}
+
+
+class TestParsing(unittest.TestCase):
+    """Test cases for reading orientations and question needs."""
+
+    def test_parse_orientation(self) -> None:
+        """Test compass words, abbreviations and degrees are understood."""
+        self.assertEqual(parse_orientation("facing east"), 90)
+        self.assertEqual(parse_orientation("North-East"), 45)
+        self.assertEqual(parse_orientation("SW"), 225)
+        self.assertEqual(parse_orientation("120°"), 120)
+        self.assertEqual(parse_orientation(-90), 270)
+        self.assertIsNone(parse_orientation("overhead"))
+        self.assertIsNone(parse_orientation(None))
+
+    def test_required_capabilities(self) -> None:
+        """Test questions are mapped to the capabilities they need."""
+        self.assertEqual(required_capabilities("What does the sign say?"), {"text_recognition"})
+        self.assertEqual(required_capabilities("Is it crowded?"), {"person_detection"})
+        self.assertEqual(required_capabilities("Describe the room"), frozenset())
+
+    def test_initial_bearing(self) -> None:
+        """Test bearings point clockwise from north."""
+        self.assertAlmostEqual(initial_bearing(*USER, NORTH, USER[1]), 0, places=3)
+        self.assertAlmostEqual(initial_bearing(NORTH, USER[1], *USER), 180, places=3)
+
+
+class TestCameraScorer(unittest.TestCase):
+    """Test cases for CameraScorer."""
+
+    def setUp(self) -> None:
+        """Set up a scorer with an empty health tracker."""
+        self.health = CameraHealthTracker()
+        self.scorer = CameraScorer(self.health)
+
+    def test_camera_facing_the_user_wins(self) -> None:
+        """Test a slightly farther camera facing the user beats a nearer one facing away."""
+        away = camera("away", 55.67630, orientation="facing north")
+        facing = camera("facing", SOUTH, orientation="facing north")
+
+        ranked = self.scorer.rank([away, facing], *USER, "Describe the room")
+
+        self.assertEqual([c["id"] for c in ranked], ["facing", "away"])
+        self.assertEqual(self.scorer.snapshot()["not_nearest"], 1)
+
+    def test_capabilities_match_the_question(self) -> None:
+        """Test a camera able to read text is chosen for a reading question."""
+        plain = camera("plain", NORTH, capabilities=["person_detection"])
+        reader = camera("reader", SOUTH, capabilities=["text_recognition"])
+
+        self.assertEqual(self.scorer.rank([plain, reader], *USER, "Read the sign")[0]["id"], "reader")
+        self.assertEqual(self.scorer.rank([plain, reader], *USER, "Is it busy?")[0]["id"], "plain")
+
+    def test_unhealthy_and_inactive_cameras_are_avoided(self) -> None:
+        """Test failing or slow cameras rank last and inactive ones are left out."""
+        for _ in range(5):
+            self.health.record("flaky", 30.0, success=False)
+            self.health.record("steady", 2.0, success=True)
+        cameras = [
+            camera("offline", 55.67611, status="offline"),
+            camera("flaky", NORTH, status="active"),
+            camera("steady", SOUTH, status="active"),
+        ]
+
+        ranked = self.scorer.rank(cameras, *USER, "What is ahead?")
+
+        self.assertEqual([c["id"] for c in ranked], ["steady", "flaky"])
+        self.assertEqual(self.scorer.snapshot()["inactive_skipped"], 1)
+
+    def test_fresh_clip_preferred(self) -> None:
+        """Test a camera with a fresh clip beats one with old footage."""
+        ages = {"old": 3600.0, "new": 5.0}
+        scorer = CameraScorer(self.health, clip_age=lambda c: ages[c["id"]])
+
+        ranked = scorer.rank([camera("old", NORTH), camera("new", SOUTH)], *USER, "What is ahead?")
+
+        self.assertEqual(ranked[0]["id"], "new")
+
+    def test_profiles_rebuilt_per_registry_version(self) -> None:
+        """Test registry changes are picked up when the version changes."""
+        first = camera("cam", NORTH, status="active")
+        self.assertEqual(len(self.scorer.rank([first], *USER, "", version="1")), 1)
+
+        changed = camera("cam", NORTH, status="offline")
+        self.assertEqual(len(self.scorer.rank([changed], *USER, "", version="1")), 1)
+        self.assertEqual(self.scorer.rank([changed], *USER, "", version="2"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+"""Unit tests for the SQLite camera store."""
+
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from loriens_guide.camera_store import (
+    CameraImportError,
+    CameraStore,
+    camera_coordinates,
+    camera_error,
+    camera_id_of,
+)
+from loriens_guide.vlm_service import VLMService
+
+BACKEND_CAMERA = {
+    "id": "laptop_camera",
+    "name": "Laptop Camera - Live Feed",
+    "location": {"latitude": 55.6761, "longitude": 12.5683},
+    "status": "active",
+}
+LEGACY_CAMERA = {
+    "camera_id": "lib_exit_01",
+    "name": "Library Exit - West Door",
+    "location": {"lat": 55.6759, "long": 12.5681},
+    "video_clip_url": "videos/library_exit.mp4",
+    "context_description": "Library Exit - West Door, facing west",
+}
+
+
+class TestCameraStore(unittest.TestCase):
+    """Test cases for CameraStore."""
+
+    def setUp(self) -> None:
+        """Create a store in a temporary directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CameraStore(Path(self.tmp.name) / "cameras.db")
+
+    def tearDown(self) -> None:
+        """Close the store and remove the temporary directory."""
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_schema_helpers(self) -> None:
+        """Test ids and coordinates are read from both registry schemas."""
+        self.assertEqual(camera_id_of(BACKEND_CAMERA), "laptop_camera")
+        self.assertEqual(camera_id_of(LEGACY_CAMERA), "lib_exit_01")
+        self.assertEqual(camera_coordinates(LEGACY_CAMERA), (55.6759, 12.5681))
+        self.assertIsNone(camera_coordinates({"id": "nowhere"}))
+
+    def test_upsert_and_get(self) -> None:
+        """Test cameras are stored unchanged and updated in place."""
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA])
+        self.store.upsert_camera({**BACKEND_CAMERA, "name": "Renamed"})
+
+        self.assertEqual(self.store.count(), 2)
+        self.assertEqual(self.store.get_camera("lib_exit_01"), LEGACY_CAMERA)
+        self.assertEqual(self.store.get_camera("laptop_camera")["name"], "Renamed")
+        self.assertIsNone(self.store.get_camera("missing"))
+
+    def test_version_bumped_on_write(self) -> None:
+        """Test every write increments the registry version."""
+        start = self.store.version()
+        self.store.upsert_camera(BACKEND_CAMERA)
+        self.store.set_status("laptop_camera", "offline")
+
+        self.assertEqual(self.store.version(), start + 2)
+        self.assertEqual(self.store.get_camera("laptop_camera")["status"], "offline")
+
+    def test_find_within_radius(self) -> None:
+        """Test radius lookups return nearby cameras, nearest first."""
+        far = {"id": "far", "location": {"latitude": 56.0, "longitude": 12.0}}
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA, far])
+
+        found = self.store.find_within(55.6759, 12.5681, radius_m=100)
+
+        self.assertEqual([camera_id_of(camera) for _, camera in found], ["lib_exit_01", "laptop_camera"])
+        self.assertLess(found[0][0], found[1][0])
+
+    def test_find_within_across_antimeridian_and_pole(self) -> None:
+        """Test lookups find cameras on the other side of the antimeridian and of a pole."""
+        east = {"id": "east", "location": {"latitude": -17.0, "longitude": 179.999}}
+        west = {"id": "west", "location": {"latitude": -17.0, "longitude": -179.999}}
+        across_pole = {"id": "across_pole", "location": {"latitude": 89.999, "longitude": 90.0}}
+        self.store.upsert_cameras([east, west, across_pole])
+
+        near_antimeridian = self.store.find_within(-17.0, 179.9995, radius_m=1000)
+        near_pole = self.store.find_within(89.999, -90.0, radius_m=1000)
+
+        self.assertEqual(sorted(camera_id_of(camera) for _, camera in near_antimeridian), ["east", "west"])
+        self.assertEqual([camera_id_of(camera) for _, camera in near_pole], ["across_pole"])
+
+    def test_find_nearest(self) -> None:
+        """Test the nearest camera is found even far outside the first search radius."""
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA])
+
+        self.assertEqual(camera_id_of(self.store.find_nearest(55.6759, 12.5681)), "lib_exit_01")
+        self.assertEqual(camera_id_of(self.store.find_nearest(0.0, 12.5681)), "lib_exit_01")
+
+    def test_delete_and_replace(self) -> None:
+        """Test deleted cameras disappear from lookups and replace_all swaps the registry."""
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA])
+        self.assertTrue(self.store.delete_camera("lib_exit_01"))
+        self.assertEqual(self.store.find_within(55.6759, 12.5681, radius_m=10), [])
+
+        self.store.replace_all([LEGACY_CAMERA])
+        self.assertEqual(self.store.list_cameras(), [LEGACY_CAMERA])
+
+    def test_import_json(self) -> None:
+        """Test both JSON registry layouts are imported."""
+        registry = Path(self.tmp.name) / "registry.json"
+        registry.write_text(json.dumps({"cameras": [BACKEND_CAMERA]}))
+        legacy = Path(self.tmp.name) / "legacy.json"
+        legacy.write_text(json.dumps([LEGACY_CAMERA]))
+
+        self.assertEqual(self.store.import_json(registry), 1)
+        self.assertEqual(self.store.import_json(legacy), 1)
+        self.assertEqual(self.store.count(), 2)
+
+    def test_import_ndjson_as_one_version(self) -> None:
+        """Test an NDJSON import upserts its cameras in one version, and replace swaps the registry."""
+        self.store.upsert_camera(BACKEND_CAMERA)
+        start = self.store.version()
+        lines = [json.dumps(LEGACY_CAMERA).encode() + b"\n", b"\n", json.dumps({**BACKEND_CAMERA, "name": "New"})]
+
+        self.assertEqual(self.store.import_ndjson(lines), 2)
+        self.assertEqual(self.store.version(), start + 1)
+        self.assertEqual(self.store.get_camera("laptop_camera")["name"], "New")
+
+        self.assertEqual(self.store.import_ndjson([json.dumps(LEGACY_CAMERA)], replace=True), 1)
+        self.assertEqual(self.store.list_cameras(), [LEGACY_CAMERA])
+        self.assertEqual(camera_id_of(self.store.find_nearest(55.6761, 12.5683)), "lib_exit_01")
+
+    def test_invalid_import_writes_nothing(self) -> None:
+        """Test one invalid line rejects the whole import, with every invalid line reported."""
+        self.store.upsert_camera(BACKEND_CAMERA)
+        start = self.store.version()
+        lines = [json.dumps(LEGACY_CAMERA), "{not json", json.dumps({"id": "x", "location": {"lat": 95, "long": 0}})]
+
+        with pytest.raises(CameraImportError) as raised:
+            self.store.import_ndjson(lines, replace=True)
+
+        self.assertEqual(raised.value.invalid, 2)
+        self.assertEqual([error["line"] for error in raised.value.errors], [2, 3])
+        self.assertEqual(self.store.list_cameras(), [BACKEND_CAMERA])
+        self.assertEqual(self.store.version(), start)
+
+    def test_batched_writes_update_the_location_index(self) -> None:
+        """Test cameras written across several batches are found where they are now, and only there."""
+        cameras = [
+            {"id": f"cam_{index}", "location": {"latitude": 55.0 + index / 1000, "longitude": 12.0}}
+            for index in range(10)
+        ]
+        with mock.patch("loriens_guide.camera_store.WRITE_BATCH_SIZE", 3):
+            self.store.upsert_cameras(cameras)
+            moved = {"id": "cam_0", "location": {"latitude": 56.0, "longitude": 12.0}}
+            self.store.import_ndjson([json.dumps(moved), json.dumps({"id": "cam_1"})])
+
+        self.assertEqual(self.store.count(), 10)
+        nearby = [camera_id_of(camera) for _, camera in self.store.find_within(55.0, 12.0, radius_m=100_000)]
+        self.assertEqual(sorted(nearby), [f"cam_{index}" for index in range(2, 10)])
+        self.assertEqual(camera_id_of(self.store.find_nearest(56.0, 12.0)), "cam_0")
+
+    def test_export_ndjson_round_trip(self) -> None:
+        """Test an export streams every camera as one line and imports back unchanged."""
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA])
+
+        lines = list(self.store.export_ndjson())
+        other = CameraStore(Path(self.tmp.name) / "other.db")
+        other.import_ndjson(lines)
+
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(all(line.endswith("\n") and line.count("\n") == 1 for line in lines))
+        self.assertEqual(other.list_cameras(), [BACKEND_CAMERA, LEGACY_CAMERA])
+        other.close()
+
+    def test_camera_error(self) -> None:
+        """Test camera documents are validated before they are imported."""
+        self.assertIsNone(camera_error(BACKEND_CAMERA))
+        self.assertIsNone(camera_error(LEGACY_CAMERA))
+        self.assertIsNone(camera_error({"id": "no_location"}))
+        self.assertIsNotNone(camera_error([BACKEND_CAMERA]))
+        self.assertIsNotNone(camera_error({"name": "no id"}))
+        self.assertIsNotNone(camera_error({"id": "x", "location": {"latitude": "north", "longitude": 1}}))
+        self.assertIsNotNone(camera_error({"id": "x", "location": {"latitude": 1}}))
+        self.assertIsNotNone(camera_error({"id": "x", "status": 1}))
+        self.assertIsNotNone(camera_error({"id": "x", "capabilities": "text_recognition"}))
+
+    def test_readers_on_other_threads(self) -> None:
+        """Test each thread reads through its own connection."""
+        self.store.upsert_camera(BACKEND_CAMERA)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.store.get_camera("laptop_camera")))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(results, [BACKEND_CAMERA])
+
+    def test_vlm_service_uses_store(self) -> None:
+        """Test VLMService reads its cameras from the store."""
+        self.store.upsert_cameras([BACKEND_CAMERA, LEGACY_CAMERA])
+        service = VLMService(camera_store=self.store)
+
+        self.assertEqual(len(service.cameras), 2)
+        self.assertEqual(camera_id_of(service.find_nearest_camera(55.6761, 12.5683)), "laptop_camera")
+
+
+if __name__ == "__main__":
+    unittest.main()
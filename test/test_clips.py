@@ -0,0 +1,182 @@
+"""Unit tests for clip helpers."""
+
+import os
+import tempfile
+import time
+import unittest
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from helpers import FakeClock, mp4
+
+from loriens_guide.clips import (
+    EMPTY,
+    MISSING,
+    STALE,
+    TOO_LARGE,
+    TOO_LONG,
+    UNREADABLE,
+    ClipCatalog,
+    clip_fingerprint,
+    probe_mp4,
+)
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestClipFingerprint(unittest.TestCase):
+    """Test cases for clip_fingerprint."""
+
+    def test_fingerprint_changes_with_content(self) -> None:
+        """Test a rewritten clip gets a new fingerprint and an unchanged one keeps it."""
+        with tempfile.TemporaryDirectory() as directory:
+            clip = Path(directory) / "clip.mp4"
+            clip.write_bytes(b"first clip")
+            first = clip_fingerprint(clip)
+
+            self.assertEqual(clip_fingerprint(str(clip)), first)
+
+            clip.write_bytes(b"second clip")
+            os.utime(clip, ns=(1, 1))
+
+            self.assertNotEqual(clip_fingerprint(clip), first)
+
+    def test_missing_clip_has_no_fingerprint(self) -> None:
+        """Test missing files and None have no fingerprint."""
+        self.assertIsNone(clip_fingerprint("/nonexistent/clip.mp4"))
+        self.assertIsNone(clip_fingerprint(None))
+
+
+class TestProbeMp4(unittest.TestCase):
+    """Test cases for probe_mp4."""
+
+    def test_duration_and_frame_rate(self) -> None:
+        """Test the duration and frame rate are read from the moov box, wherever it is."""
+        with tempfile.TemporaryDirectory() as directory:
+            for moov_last in (True, False):
+                clip = Path(directory) / "clip.mp4"
+                clip.write_bytes(mp4(12.5, fps=30, moov_last=moov_last))
+                duration_s, fps = probe_mp4(clip)
+                self.assertAlmostEqual(duration_s, 12.5)
+                self.assertAlmostEqual(fps, 30)
+
+    def test_clip_being_written_is_rejected(self) -> None:
+        """Test a clip without its moov box yet cannot be probed."""
+        with tempfile.TemporaryDirectory() as directory:
+            clip = Path(directory) / "clip.mp4"
+            clip.write_bytes(mp4(5)[:-200])
+            with pytest.raises(ValueError, match="moov"):
+                probe_mp4(clip)
+
+
+class TestClipCatalog(unittest.TestCase):
+    """Test cases for ClipCatalog."""
+
+    def setUp(self) -> None:
+        """Create a clip directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self) -> None:
+        """Remove the clip directory."""
+        self.directory.cleanup()
+
+    def test_problems(self) -> None:
+        """Test missing, empty, unreadable, oversized and overlong clips are rejected."""
+        (self.root / "ok.mp4").write_bytes(mp4(10))
+        (self.root / "long.mp4").write_bytes(mp4(45))
+        (self.root / "empty.mp4").write_bytes(b"")
+        (self.root / "broken.mp4").write_bytes(b"not an mp4 file")
+        (self.root / "large.mkv").write_bytes(bytes(4096))
+        catalog = ClipCatalog(self.root, max_bytes=2048)
+
+        self.assertIsNone(catalog.problem(self.root / "ok.mp4"))
+        self.assertEqual(catalog.problem(self.root / "long.mp4"), TOO_LONG)
+        self.assertEqual(catalog.problem(self.root / "empty.mp4"), EMPTY)
+        self.assertEqual(catalog.problem(self.root / "broken.mp4"), UNREADABLE)
+        self.assertEqual(catalog.problem(self.root / "large.mkv"), TOO_LARGE)
+        self.assertEqual(catalog.problem(self.root / "absent.mp4"), MISSING)
+        self.assertEqual(catalog.problem(None), MISSING)
+
+        info = catalog.get(self.root / "ok.mp4")
+        self.assertAlmostEqual(info.duration_s, 10)
+        self.assertEqual(info.fps, 25)
+        self.assertEqual(info.fingerprint, clip_fingerprint(self.root / "ok.mp4"))
+
+    def test_stale(self) -> None:
+        """Test clips last written longer ago than max_age_s are stale."""
+        clip = self.root / "clip.mp4"
+        clip.write_bytes(mp4(5))
+        clock = FakeClock(clip.stat().st_mtime + 10)
+        catalog = ClipCatalog(self.root, max_age_s=60, clock=clock)
+
+        self.assertIsNone(catalog.problem(clip))
+        clock.now += 60
+        self.assertEqual(catalog.problem(clip), STALE)
+        self.assertAlmostEqual(catalog.age(clip), 70)
+        self.assertIsNone(catalog.age(self.root / "missing.mp4"))
+
+    def test_unchanged_clips_are_probed_once(self) -> None:
+        """Test a clip is only read again after it changed."""
+        clip = self.root / "clip.mp4"
+        clip.write_bytes(mp4(5))
+        catalog = ClipCatalog(self.root)
+
+        catalog.get(clip)
+        catalog.get(clip)
+        self.assertEqual(catalog.snapshot()["probes"], 1)
+
+        clip.write_bytes(mp4(6))
+        os.utime(clip, ns=(1, 1))
+        self.assertAlmostEqual(catalog.get(clip).duration_s, 6)
+        self.assertEqual(catalog.snapshot()["probes"], 2)
+
+    def test_polling_watcher(self) -> None:
+        """Test the polling watcher picks up new, changed and deleted clips."""
+        catalog = ClipCatalog(self.root, poll_s=0.05)
+        catalog._inotify = lambda: None  # noqa: SLF001
+        catalog.start()
+        self.addCleanup(catalog.stop)
+        clip = self.root / "clip.mp4"
+
+        self.assertEqual(catalog.watcher, "polling")
+        self.assertEqual(catalog.problem(clip), MISSING)
+        clip.write_bytes(mp4(5))
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) is None))
+        clip.write_bytes(mp4(40))
+        os.utime(clip, ns=(1, 1))
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) == TOO_LONG))
+        clip.unlink()
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) == MISSING))
+
+    def test_inotify_watcher(self) -> None:
+        """Test the inotify watcher picks up clips written and renamed into the directory."""
+        catalog = ClipCatalog(self.root)
+        catalog.start()
+        self.addCleanup(catalog.stop)
+        if catalog.watcher != "inotify":
+            self.skipTest("inotify is not available")
+        clip = self.root / "clip.mp4"
+
+        clip.write_bytes(mp4(5))
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) is None))
+        staging = self.root / "clip.tmp"
+        staging.write_bytes(mp4(40))
+        staging.replace(clip)
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) == TOO_LONG))
+        clip.unlink()
+        self.assertTrue(wait_for(lambda: catalog.problem(clip) == MISSING))
+        self.assertGreater(catalog.snapshot()["events"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Unit tests for request deadlines."""
+
+import unittest
+from unittest.mock import patch
+
+from helpers import FakeClock
+
+from loriens_guide.deadline import Deadline, deadline_from_request
+
+
+class TestDeadline(unittest.TestCase):
+    """Test cases for Deadline."""
+
+    def test_remaining_budget(self) -> None:
+        """Test the remaining budget shrinks as time passes."""
+        clock = FakeClock()
+        deadline = Deadline(10, clock=clock)
+        clock.now = 4
+
+        self.assertEqual(deadline.remaining(), 6)
+        self.assertEqual(deadline.elapsed(), 4)
+        self.assertFalse(deadline.expired())
+
+        clock.now = 12
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired())
+
+    def test_timeout_for_stage(self) -> None:
+        """Test stage timeouts are capped and keep a reserve for later stages."""
+        deadline = Deadline(30, clock=FakeClock())
+
+        self.assertEqual(deadline.timeout_for(120), 30)
+        self.assertEqual(deadline.timeout_for(10), 10)
+        self.assertEqual(deadline.timeout_for(120, reserve=5), 25)
+
+    def test_cancel_child(self) -> None:
+        """Test cancelling a child leaves no budget while the parent keeps its own."""
+        parent = Deadline(30, clock=FakeClock())
+        child = parent.child()
+        child.cancel()
+
+        self.assertTrue(child.cancelled)
+        self.assertEqual(child.remaining(), 0)
+        self.assertEqual(parent.remaining(), 30)
+
+    def test_cancel_parent_cancels_children(self) -> None:
+        """Test cancelling the parent cancels every child."""
+        parent = Deadline(30, clock=FakeClock())
+        child = parent.child()
+        parent.cancel()
+
+        self.assertTrue(child.cancelled)
+
+
+class TestDeadlineFromRequest(unittest.TestCase):
+    """Test cases for deadline_from_request."""
+
+    @patch.dict("os.environ", {"VLM_REQUEST_DEADLINE_S": "60"})
+    def test_client_budget_from_payload(self) -> None:
+        """Test the client's deadline_ms is used when below the server default."""
+        deadline = deadline_from_request({"deadline_ms": 5000}, {})
+
+        self.assertEqual(deadline.budget_s, 5)
+
+    @patch.dict("os.environ", {"VLM_REQUEST_DEADLINE_S": "60"})
+    def test_client_budget_from_header(self) -> None:
+        """Test the X-Deadline-Ms header is honoured."""
+        deadline = deadline_from_request({}, {"X-Deadline-Ms": "2500"})
+
+        self.assertEqual(deadline.budget_s, 2.5)
+
+    @patch.dict("os.environ", {"VLM_REQUEST_DEADLINE_S": "60"})
+    def test_client_budget_capped_by_server(self) -> None:
+        """Test clients cannot ask for more than the server default."""
+        deadline = deadline_from_request({"deadline_ms": 600000}, {})
+
+        self.assertEqual(deadline.budget_s, 60)
+
+    @patch.dict("os.environ", {"VLM_REQUEST_DEADLINE_S": "60"})
+    def test_invalid_budget_uses_default(self) -> None:
+        """Test invalid budgets fall back to the server default."""
+        self.assertEqual(deadline_from_request({"deadline_ms": "soon"}, {}).budget_s, 60)
+        self.assertEqual(deadline_from_request(None, {}).budget_s, 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
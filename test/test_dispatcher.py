@@ -0,0 +1,122 @@
+"""Unit tests for the priority dispatcher."""
+
+import threading
+import unittest
+
+import pytest
+
+from loriens_guide.dispatcher import DESCRIPTIVE, URGENT, PriorityDispatcher, classify_query
+
+
+class TestClassifyQuery(unittest.TestCase):
+    """Test cases for classify_query."""
+
+    def test_hazard_and_navigation_are_urgent(self) -> None:
+        """Test safety and navigation questions are urgent."""
+        self.assertEqual(classify_query("Is it safe to cross?"), URGENT)
+        self.assertEqual(classify_query("Where is the exit?"), URGENT)
+        self.assertEqual(classify_query("Are there any obstacles ahead?"), URGENT)
+        self.assertEqual(classify_query("Is there a step in front of me?"), URGENT)
+        self.assertEqual(classify_query("How do I get to the lifts?"), URGENT)
+
+    def test_descriptive_questions(self) -> None:
+        """Test descriptive questions are not urgent."""
+        self.assertEqual(classify_query("Describe the room"), DESCRIPTIVE)
+        self.assertEqual(classify_query("What do you see?"), DESCRIPTIVE)
+        self.assertEqual(classify_query("What's in front of me?"), DESCRIPTIVE)
+        self.assertEqual(classify_query("Where am I?"), DESCRIPTIVE)
+
+
+class TestPriorityDispatcher(unittest.TestCase):
+    """Test cases for PriorityDispatcher."""
+
+    def _run_blocked(self, dispatcher: PriorityDispatcher, jobs: list[tuple[str, ...]]) -> list[str]:
+        """Queue jobs behind a blocked worker, release it and return the execution order.
+
+        A job is (query_class, name) or (query_class, name, client).
+        """
+        gate = threading.Event()
+        started = threading.Event()
+        order: list[str] = []
+
+        def block() -> None:
+            started.set()
+            gate.wait()
+
+        blocker = dispatcher.submit(URGENT, block)
+        started.wait()
+        futures = [
+            dispatcher.submit(query_class, order.append, name, client=client[0] if client else "")
+            for query_class, name, *client in jobs
+        ]
+        gate.set()
+        blocker.result()
+        for future in futures:
+            future.result()
+        return order
+
+    def test_urgent_served_first(self) -> None:
+        """Test urgent jobs overtake queued descriptive jobs by weight."""
+        dispatcher = PriorityDispatcher(workers=1, weights={URGENT: 3, DESCRIPTIVE: 1})
+        jobs = [(DESCRIPTIVE, "d1"), (DESCRIPTIVE, "d2"), (URGENT, "u1"), (URGENT, "u2"), (URGENT, "u3")]
+
+        order = self._run_blocked(dispatcher, jobs)
+
+        self.assertEqual(order[:3], ["u1", "u2", "d1"])
+
+    def test_aged_jobs_are_not_starved(self) -> None:
+        """Test a job past max_wait_s is served before newer urgent work."""
+        dispatcher = PriorityDispatcher(workers=1, max_wait_s=0)
+        jobs = [(DESCRIPTIVE, "d1"), (URGENT, "u1")]
+
+        order = self._run_blocked(dispatcher, jobs)
+
+        self.assertEqual(order, ["d1", "u1"])
+        self.assertEqual(dispatcher.snapshot()["classes"][DESCRIPTIVE]["served_by_ageing"], 1)
+
+    def test_clients_share_a_class_fairly(self) -> None:
+        """Test a client with one question is not queued behind another client's burst."""
+        dispatcher = PriorityDispatcher(workers=1)
+        jobs = [(URGENT, f"k{index}", "kiosk") for index in range(5)] + [(URGENT, "p1", "phone")]
+
+        order = self._run_blocked(dispatcher, jobs)
+
+        self.assertLessEqual(order.index("p1"), 1)
+        self.assertEqual([name for name in order if name != "p1"], [f"k{index}" for index in range(5)])
+
+    def test_client_weights(self) -> None:
+        """Test a client with twice the weight gets twice the share while both are waiting."""
+        dispatcher = PriorityDispatcher(workers=1, client_weights={"gold": 2})
+        jobs = [(URGENT, f"g{index}", "gold") for index in range(4)]
+        jobs += [(URGENT, f"b{index}", "basic") for index in range(4)]
+
+        order = self._run_blocked(dispatcher, jobs)
+
+        self.assertEqual(sum(name.startswith("g") for name in order[:6]), 4)
+        self.assertEqual(dispatcher.snapshot()["classes"][URGENT]["queued_clients"], 0)
+
+    def test_run_returns_result_and_records_wait(self) -> None:
+        """Test run classifies, executes and reports queue wait per class."""
+        dispatcher = PriorityDispatcher(workers=2)
+
+        result = dispatcher.run("Is it safe to cross?", lambda a, b: a + b, 2, 3)
+        stats = dispatcher.snapshot()["classes"][URGENT]
+
+        self.assertEqual(result, 5)
+        self.assertEqual(stats["completed"], 1)
+        self.assertIsNotNone(stats["queue_wait_p50_s"])
+
+    def test_exceptions_propagate(self) -> None:
+        """Test errors raised by the work reach the caller."""
+        dispatcher = PriorityDispatcher(workers=1)
+
+        def fail() -> None:
+            msg = "boom"
+            raise ValueError(msg)
+
+        with pytest.raises(ValueError, match="boom"):
+            dispatcher.run("Describe the room", fail)
+
+
+if __name__ == "__main__":
+    unittest.main()
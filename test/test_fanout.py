@@ -0,0 +1,119 @@
+"""Unit tests for multi-camera fan-out."""
+
+import threading
+import time
+import unittest
+
+import pytest
+
+from loriens_guide.deadline import Deadline
+from loriens_guide.fanout import FIRST, MAX_FANOUT_CAMERAS, MERGE, fan_out, fanout_limits, merge_answers
+
+CAMERAS = [{"id": "near"}, {"id": "middle"}, {"id": "far"}]
+
+
+def camera_id(camera: dict) -> str:
+    """Return the test camera's id."""
+    return camera["id"]
+
+
+class TestFanOut(unittest.TestCase):
+    """Test cases for fan_out."""
+
+    def test_first_acceptable_answer_wins(self) -> None:
+        """Test the fastest acceptable answer is returned and the rest cancelled."""
+        release = threading.Event()
+        cancelled = []
+
+        def analyze(camera: dict, deadline: Deadline) -> dict:
+            if camera["id"] == "middle":
+                return {"text": "Clear path ahead."}
+            release.wait(1)
+            cancelled.append(deadline.cancelled)
+            return {"text": "Too late."}
+
+        result = fan_out(CAMERAS, analyze, camera_id=camera_id, strategy=FIRST, deadline=Deadline(5))
+        release.set()
+
+        self.assertEqual([camera["id"] for camera, _ in result["answers"]], ["middle"])
+        statuses = {outcome["camera_id"]: outcome["status"] for outcome in result["outcomes"]}
+        self.assertEqual(statuses, {"near": "cancelled", "middle": "answered", "far": "cancelled"})
+        time.sleep(0.05)
+        self.assertTrue(all(cancelled))
+
+    def test_unacceptable_answers_are_skipped(self) -> None:
+        """Test errors and stale answers do not win over a fresh answer."""
+
+        def analyze(camera: dict, _deadline: Deadline) -> dict:
+            if camera["id"] == "near":
+                return {"error": True, "message": "Upload failed"}
+            if camera["id"] == "middle":
+                return {"text": "Old answer.", "stale": True}
+            time.sleep(0.05)
+            return {"text": "Fresh answer."}
+
+        result = fan_out(CAMERAS, analyze, camera_id=camera_id, strategy=FIRST, deadline=Deadline(5))
+
+        self.assertEqual(result["answers"][0][1]["text"], "Fresh answer.")
+        self.assertEqual(result["fallback"][1]["text"], "Old answer.")
+
+    def test_merge_waits_for_all_answers(self) -> None:
+        """Test the merge strategy collects every acceptable answer."""
+
+        def analyze(camera: dict, _deadline: Deadline) -> dict:
+            return {"text": f"View from {camera['id']}."}
+
+        result = fan_out(CAMERAS, analyze, camera_id=camera_id, strategy=MERGE, deadline=Deadline(5))
+
+        self.assertEqual(len(result["answers"]), 3)
+
+    def test_deadline_cancels_slow_branches(self) -> None:
+        """Test branches still running at the deadline are cancelled."""
+
+        def analyze(_camera: dict, _deadline: Deadline) -> dict:
+            time.sleep(0.3)
+            return {"text": "Too late."}
+
+        result = fan_out(CAMERAS[:1], analyze, camera_id=camera_id, strategy=MERGE, deadline=Deadline(0.05))
+
+        self.assertEqual(result["answers"], [])
+        self.assertEqual(result["outcomes"][0]["status"], "cancelled")
+
+
+class TestFanoutLimits(unittest.TestCase):
+    """Test cases for fanout_limits."""
+
+    def test_defaults_and_valid_values(self) -> None:
+        """Test the defaults apply and values within the limits are accepted."""
+        self.assertEqual(fanout_limits({}), (3, 500.0))
+        self.assertEqual(fanout_limits({"max_cameras": "2", "radius_m": 250}), (2, 250.0))
+
+    def test_values_beyond_the_limits_are_rejected(self) -> None:
+        """Test a client cannot fan out to every camera in range."""
+        for data in (
+            {"max_cameras": MAX_FANOUT_CAMERAS + 1},
+            {"max_cameras": 0},
+            {"radius_m": 50_000},
+            {"radius_m": -1},
+            {"max_cameras": "all"},
+        ):
+            with pytest.raises(ValueError, match=r"must be|Invalid"):
+                fanout_limits(data)
+
+
+class TestMergeAnswers(unittest.TestCase):
+    """Test cases for merge_answers."""
+
+    def test_single_answer_is_unchanged(self) -> None:
+        """Test one answer is returned as-is."""
+        self.assertEqual(merge_answers([({"id": "a"}, {"text": "Hello."})], camera_id), "Hello.")
+
+    def test_answers_are_attributed(self) -> None:
+        """Test merged answers name their camera."""
+        merged = merge_answers([({"id": "a"}, {"text": "Door left."}), ({"id": "b"}, {"text": "Stairs."})], camera_id)
+
+        self.assertEqual(merged, "From a: Door left. From b: Stairs.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Unit tests for the shared hazard analysis and its subscribers."""
+
+import asyncio
+import threading
+import unittest
+
+from loriens_guide.hazards import HazardMonitor, format_sse, is_hazard
+
+CAMERAS = {
+    "lobby": {"camera_id": "lobby", "name": "Lobby"},
+    "exit": {"camera_id": "exit", "name": "Exit"},
+}
+
+
+class TestHazardHelpers(unittest.TestCase):
+    """Test cases for the hazard answer and event helpers."""
+
+    def test_is_hazard(self) -> None:
+        """Test 'NONE' answers are not reported as hazards."""
+        self.assertFalse(is_hazard("NONE"))
+        self.assertFalse(is_hazard(" 'None.' "))
+        self.assertTrue(is_hazard("Wet floor 3 steps ahead."))
+
+    def test_format_sse(self) -> None:
+        """Test events are framed with one data line per payload line."""
+        self.assertEqual(format_sse("hazard", '{"a": 1}'), 'event: hazard\ndata: {"a": 1}\n\n')
+        self.assertEqual(format_sse("x", "a\nb"), "event: x\ndata: a\ndata: b\n\n")
+
+
+class TestHazardMonitor(unittest.IsolatedAsyncioTestCase):
+    """Test cases for HazardMonitor."""
+
+    async def asyncSetUp(self) -> None:
+        """Create a monitor whose cameras depend only on the latitude."""
+        self.analyzed: list[str] = []
+        self.lock = threading.Lock()
+        self.answer = "Wet floor 3 steps ahead."
+        self.flags: dict = {}
+
+        self.lookup_threads: list[threading.Thread] = []
+
+        def find_cameras(lat: float, _long: float, _radius_m: float) -> list[dict]:
+            self.lookup_threads.append(threading.current_thread())
+            return [CAMERAS["lobby"]] if lat < 1 else [CAMERAS["exit"]]
+
+        def analyze(camera: dict) -> dict:
+            with self.lock:
+                self.analyzed.append(camera["camera_id"])
+            return {"text": self.answer, **self.flags}
+
+        self.monitor = HazardMonitor(
+            find_cameras, analyze, interval_s=0.05, max_subscriptions=3, max_subscriptions_per_client=2
+        )
+
+    async def test_one_analysis_fanned_out_to_all_subscribers(self) -> None:
+        """Test subscribers near the same camera share its analysis."""
+        first = await self.monitor.subscribe(0, 0)
+        second = await self.monitor.subscribe(0, 0)
+
+        events = [await asyncio.wait_for(subscription.queue.get(), 1) for subscription in (first, second)]
+
+        self.assertEqual(events[0], events[1])
+        self.assertTrue(events[0]["hazard"])
+        self.assertEqual(self.monitor.snapshot()["watched_cameras"], 1)
+        await asyncio.sleep(0.12)
+        # Unchanged answers are not pushed again
+        self.assertTrue(first.queue.empty())
+        self.assertGreater(len(self.analyzed), 1)
+        self.assertEqual(set(self.analyzed), {"lobby"})
+
+    async def test_late_subscriber_gets_latest_result(self) -> None:
+        """Test a subscriber joining a watched camera hears its current state at once."""
+        first = await self.monitor.subscribe(0, 0)
+        await asyncio.wait_for(first.queue.get(), 1)
+
+        second = await self.monitor.subscribe(0, 0)
+
+        self.assertEqual(second.queue.get_nowait()["camera_id"], "lobby")
+
+    async def test_moving_and_leaving_stop_unwatched_cameras(self) -> None:
+        """Test a camera is no longer analyzed once nobody near it is subscribed."""
+        subscription = await self.monitor.subscribe(0, 0)
+        await asyncio.wait_for(subscription.queue.get(), 1)
+
+        await self.monitor.move(subscription.id, 5, 0)
+        event = await asyncio.wait_for(subscription.queue.get(), 1)
+        self.assertEqual(event["camera_id"], "exit")
+        self.assertEqual(subscription.camera_ids, {"exit"})
+
+        self.monitor.unsubscribe(subscription)
+        await asyncio.sleep(0)
+        snapshot = self.monitor.snapshot()
+        self.assertEqual((snapshot["subscribers"], snapshot["watched_cameras"]), (0, 0))
+        self.assertIsNone(await self.monitor.move(subscription.id, 0, 0))
+
+    async def test_changed_answer_is_pushed(self) -> None:
+        """Test a camera's changed analysis reaches its subscribers."""
+        subscription = await self.monitor.subscribe(0, 0)
+        await asyncio.wait_for(subscription.queue.get(), 1)
+
+        self.answer = "NONE"
+        event = await asyncio.wait_for(subscription.queue.get(), 1)
+
+        self.assertFalse(event["hazard"])
+
+    async def test_stale_or_degraded_results_are_not_published(self) -> None:
+        """Test answers not from the current clip never reach subscribers as hazard events."""
+        for flags in ({"stale": True}, {"degraded": True}):
+            self.flags = flags
+            subscription = await self.monitor.subscribe(0, 0)
+            await asyncio.sleep(0.12)
+
+            self.assertTrue(subscription.queue.empty())
+            self.monitor.unsubscribe(subscription)
+        self.assertGreater(self.monitor.snapshot()["analyses"], 1)
+
+    async def test_cameras_are_looked_up_off_the_event_loop(self) -> None:
+        """Test the blocking camera lookups of subscribing and moving run in worker threads."""
+        subscription = await self.monitor.subscribe(0, 0)
+        await self.monitor.move(subscription.id, 5, 0)
+
+        self.assertEqual(len(self.lookup_threads), 2)
+        self.assertNotIn(threading.main_thread(), self.lookup_threads)
+        self.monitor.unsubscribe(subscription)
+
+    async def test_leaving_during_the_lookup_watches_nothing(self) -> None:
+        """Test a subscriber gone before its new cameras are found does not start their analysis."""
+        subscription = await self.monitor.subscribe(0, 0)
+        moving = asyncio.create_task(self.monitor.move(subscription.id, 5, 0))
+        await asyncio.sleep(0)
+        self.monitor.unsubscribe(subscription)
+
+        self.assertIs(await moving, subscription)
+        self.assertEqual(self.monitor.snapshot()["watched_cameras"], 0)
+
+    async def test_subscriptions_are_limited_per_client_and_in_total(self) -> None:
+        """Test a client cannot hold more subscriptions than allowed, nor all clients together."""
+        first = await self.monitor.subscribe(0, 0, client="a")
+        await self.monitor.subscribe(0, 0, client="a")
+
+        self.assertFalse(self.monitor.has_room("a"))
+        self.assertIsNone(await self.monitor.subscribe(0, 0, client="a"))
+        await self.monitor.subscribe(0, 0, client="b")
+        self.assertIsNone(await self.monitor.subscribe(0, 0, client="c"))
+
+        self.monitor.unsubscribe(first)
+        self.monitor.unsubscribe(first)
+        self.assertIsNotNone(await self.monitor.subscribe(0, 0, client="a"))
+        snapshot = self.monitor.snapshot()
+        self.assertEqual((snapshot["subscribers"], snapshot["clients"], snapshot["rejected_subscriptions"]), (3, 2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
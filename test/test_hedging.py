@@ -0,0 +1,162 @@
+"""Unit tests for request hedging."""
+
+import threading
+import time
+import unittest
+from http import HTTPStatus
+
+from loriens_guide.hedging import LatencyTracker, RequestHedger
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test cases for LatencyTracker."""
+
+    def test_percentile(self) -> None:
+        """Test percentiles over the sliding window."""
+        tracker = LatencyTracker(window=100)
+        for value in range(1, 101):
+            tracker.record(float(value))
+
+        self.assertEqual(tracker.percentile(50), 50.0)
+        self.assertEqual(tracker.percentile(99), 99.0)
+
+    def test_percentile_without_samples(self) -> None:
+        """Test an empty tracker has no percentile."""
+        self.assertIsNone(LatencyTracker().percentile(95))
+
+
+class TestRequestHedger(unittest.TestCase):
+    """Test cases for RequestHedger."""
+
+    def _warm_up(self, hedger: RequestHedger, latency: float) -> None:
+        for _ in range(hedger.min_samples):
+            hedger.latencies.record(latency)
+
+    def test_no_hedge_without_samples(self) -> None:
+        """Test calls run directly until enough latency samples exist."""
+        hedger = RequestHedger(min_samples=5)
+
+        result = hedger.run(lambda _timeout: "done", timeout=1.0)
+
+        self.assertEqual(result, "done")
+        self.assertEqual(hedger.snapshot()["hedges"], 0)
+
+    def test_slow_primary_is_hedged(self) -> None:
+        """Test a slow call is hedged and the faster hedge wins."""
+        hedger = RequestHedger(min_samples=5, min_delay_s=0.01, budget_ratio=1.0)
+        self._warm_up(hedger, 0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def attempt(_timeout: float) -> str:
+            with lock:
+                calls.append(len(calls))
+                number = len(calls)
+            if number == 1:
+                time.sleep(0.5)
+                return "primary"
+            return "hedge"
+
+        result = hedger.run(attempt, timeout=2.0)
+        stats = hedger.snapshot()
+
+        self.assertEqual(result, "hedge")
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
+        self.assertEqual(stats["win_rate"], 1.0)
+
+    def test_budget_caps_hedges(self) -> None:
+        """Test no hedge is sent once the budget is spent."""
+        hedger = RequestHedger(min_samples=5, min_delay_s=0.01, budget_ratio=0.0)
+        self._warm_up(hedger, 0.01)
+
+        def attempt(_timeout: float) -> str:
+            time.sleep(0.05)
+            return "primary"
+
+        result = hedger.run(attempt, timeout=1.0)
+
+        self.assertEqual(result, "primary")
+        self.assertEqual(hedger.snapshot()["hedges"], 0)
+
+    def test_failed_attempt_waits_for_other(self) -> None:
+        """Test an attempt that fails first does not beat a successful one."""
+        hedger = RequestHedger(min_samples=5, min_delay_s=0.01, budget_ratio=1.0)
+        self._warm_up(hedger, 0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def attempt(_timeout: float) -> str:
+            with lock:
+                calls.append(len(calls))
+                number = len(calls)
+            if number == 1:
+                time.sleep(0.1)
+                return "primary"
+            msg = "hedge failed"
+            raise ConnectionError(msg)
+
+        self.assertEqual(hedger.run(attempt, timeout=1.0), "primary")
+
+    def test_failed_result_does_not_win(self) -> None:
+        """Test a hedge returning a failed result does not beat a successful primary."""
+        hedger = RequestHedger(min_samples=5, min_delay_s=0.01, budget_ratio=1.0)
+        self._warm_up(hedger, 0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def attempt(_timeout: float) -> HTTPStatus:
+            with lock:
+                calls.append(len(calls))
+                number = len(calls)
+            if number == 1:
+                time.sleep(0.1)
+                return HTTPStatus.OK
+            return HTTPStatus.SERVICE_UNAVAILABLE
+
+        result = hedger.run(attempt, timeout=1.0, is_success=lambda status: status == HTTPStatus.OK)
+
+        self.assertEqual(result, HTTPStatus.OK)
+        self.assertEqual(hedger.snapshot()["hedge_wins"], 0)
+
+    def test_hedge_takes_and_returns_a_slot(self) -> None:
+        """Test the hedge is only sent with a slot, which is returned once it finished."""
+        hedger = RequestHedger(min_samples=50, min_delay_s=0.01, budget_ratio=1.0)
+        self._warm_up(hedger, 0.01)
+        slots = {"free": 0, "released": 0}
+
+        def acquire() -> bool:
+            if slots["free"] < 1:
+                return False
+            slots["free"] -= 1
+            return True
+
+        def release() -> None:
+            slots["released"] += 1
+
+        def attempt(_timeout: float) -> str:
+            time.sleep(0.2)
+            return "done"
+
+        hedger.run(attempt, timeout=1.0, acquire_hedge=acquire, release_hedge=release)
+        self.assertEqual(hedger.snapshot()["hedges"], 0)
+
+        slots["free"] = 1
+        hedger.run(attempt, timeout=1.0, acquire_hedge=acquire, release_hedge=release)
+        deadline = time.monotonic() + 1.0
+        while slots["released"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(hedger.snapshot()["hedges"], 1)
+        self.assertEqual(slots["released"], 1)
+
+    def test_unhedged_call_runs_on_calling_thread(self) -> None:
+        """Test a call that cannot be hedged does not leave the caller's thread."""
+        hedger = RequestHedger(min_samples=5)
+        caller = threading.current_thread()
+
+        self.assertIs(hedger.run(lambda _timeout: threading.current_thread(), timeout=1.0), caller)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Tests for the pre-compressed, conditional camera listings."""
+
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+from loriens_guide.http_cache import ListingCache, accepted_encodings, matching_etag
+
+CAMERAS = {"cameras": [{"id": f"cam_{i:03d}", "name": f"Camera {i}", "status": "active"} for i in range(50)]}
+
+
+class TestHeaderParsing(unittest.TestCase):
+    """Test cases for Accept-Encoding and If-None-Match parsing."""
+
+    def test_accepted_encodings(self) -> None:
+        """Codings refused with q=0 are left out."""
+        self.assertEqual(accepted_encodings("gzip, deflate;q=0.5, br;q=0"), {"gzip", "deflate"})
+        self.assertEqual(accepted_encodings(None), set())
+
+    def test_matching_etag(self) -> None:
+        """Weak prefixes are ignored and * matches anything."""
+        self.assertEqual(matching_etag('W/"a.1", "b.1"', {'"a.1"'}), '"a.1"')
+        self.assertEqual(matching_etag("*", {'"a.1"'}), "*")
+        self.assertIsNone(matching_etag('"a.0"', {'"a.1"'}))
+        self.assertIsNone(matching_etag(None, {'"a.1"'}))
+
+
+class TestListingCache(unittest.TestCase):
+    """Test cases for ListingCache."""
+
+    def setUp(self) -> None:
+        """Create a cache counting how often the listing is built."""
+        self.cache = ListingCache(max_entries=2, max_age_s=10)
+        self.builds = 0
+
+    def build(self) -> dict:
+        """Return the listing, counting the call."""
+        self.builds += 1
+        return CAMERAS
+
+    def test_serializes_once_per_version(self) -> None:
+        """The listing is rebuilt only when the registry version changes."""
+        first = self.cache.respond("cameras", 1, self.build, {})
+        self.cache.respond("cameras", 1, self.build, {})
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(json.loads(first.get_data()), CAMERAS)
+        self.assertIn("max-age=10", first.headers["Cache-Control"])
+        self.assertEqual(first.headers["Vary"], "Accept-Encoding")
+
+        second = self.cache.respond("cameras", 2, self.build, {})
+        self.assertEqual(self.builds, 2)
+        self.assertNotEqual(first.headers["ETag"], second.headers["ETag"])
+
+    def test_not_modified_without_building(self) -> None:
+        """A matching If-None-Match is answered with 304 before the listing is built."""
+        etag = ListingCache.etag("cameras", 7)
+        response = self.cache.respond("cameras", 7, self.build, {"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.builds, 0)
+        self.assertEqual(self.cache.snapshot()["not_modified"], 1)
+
+    def test_stale_etag_gets_full_response(self) -> None:
+        """An ETag of an earlier version gets the current listing."""
+        old = ListingCache.etag("cameras", 6)
+        response = self.cache.respond("cameras", 7, self.build, {"If-None-Match": old})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], ListingCache.etag("cameras", 7))
+
+    def test_gzip(self) -> None:
+        """Clients accepting gzip get the pre-compressed body with its own ETag."""
+        response = self.cache.respond("cameras", 1, self.build, {"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.get_data())), CAMERAS)
+        self.assertTrue(response.headers["ETag"].endswith('.gz"'))
+        self.assertLess(len(response.get_data()), len(json.dumps(CAMERAS)))
+
+        revalidated = self.cache.respond(
+            "cameras", 1, self.build, {"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["ETag"], response.headers["ETag"])
+
+    def test_compresses_only_the_requested_coding(self) -> None:
+        """A listing is compressed once, and only for codings a client asked for."""
+        with patch("loriens_guide.http_cache.gzip.compress", wraps=gzip.compress) as compress:
+            self.cache.respond("cameras", 1, self.build, {})
+            compress.assert_not_called()
+
+            first = self.cache.respond("cameras", 1, self.build, {"Accept-Encoding": "gzip"})
+            second = self.cache.respond("cameras", 1, self.build, {"Accept-Encoding": "gzip"})
+
+        compress.assert_called_once()
+        self.assertEqual(first.get_data(), second.get_data())
+
+    def test_unstored_listing_is_not_kept(self) -> None:
+        """Listings built with store=False are served and revalidated but not cached."""
+        response = self.cache.respond("nearby:1:2:3", 1, self.build, {}, store=False)
+        self.cache.respond("nearby:1:2:3", 1, self.build, {}, store=False)
+        revalidated = self.cache.respond("nearby:1:2:3", 1, self.build, {"If-None-Match": response.headers["ETag"]})
+
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(self.cache.snapshot()["entries"], 0)
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_small_bodies_are_not_compressed(self) -> None:
+        """Listings too small to benefit are sent as they are."""
+        response = self.cache.respond("empty", 1, lambda: {"cameras": []}, {"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_unconditional(self) -> None:
+        """Requests that must not be answered with 304 always get the listing."""
+        etag = ListingCache.etag("cameras", 1)
+        response = self.cache.respond("cameras", 1, self.build, {"If-None-Match": etag}, conditional=False)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bounded(self) -> None:
+        """The least recently used listings are dropped."""
+        for key in ("a", "b", "c"):
+            self.cache.respond(key, 1, self.build, {})
+        self.assertEqual(self.cache.snapshot()["entries"], 2)
+        self.cache.respond("a", 1, self.build, {})
+        self.assertEqual(self.builds, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the local intent router."""
+
+import unittest
+
+from loriens_guide.intents import (
+    GREETING,
+    HELP,
+    LOCATION,
+    THANKS,
+    THANKS_TEXT,
+    VISUAL,
+    IntentRouter,
+    classify_intent,
+    describe_location,
+)
+
+
+class TestClassifyIntent(unittest.TestCase):
+    """Test cases for classify_intent."""
+
+    def test_non_visual_questions(self) -> None:
+        """Test help, greeting, thanks and location questions are recognized."""
+        self.assertEqual(classify_intent("Help!"), HELP)
+        self.assertEqual(classify_intent("What can you do?"), HELP)
+        self.assertEqual(classify_intent("Please, how does this work?"), HELP)
+        self.assertEqual(classify_intent("Where am I?"), LOCATION)
+        self.assertEqual(classify_intent("what's my current location please"), LOCATION)
+        self.assertEqual(classify_intent("Hello"), GREETING)
+        self.assertEqual(classify_intent("Thank you very much."), THANKS)
+        self.assertEqual(classify_intent("Ok, thanks!"), THANKS)
+
+    def test_visual_questions(self) -> None:
+        """Test questions about the scene go to the VLM, even when they share words."""
+        for question in ("Where is the exit?", "Help me find the stairs", "Hi, what do you see?", "Is it safe?", ""):
+            self.assertEqual(classify_intent(question), VISUAL, question)
+
+
+class TestDescribeLocation(unittest.TestCase):
+    """Test cases for describe_location."""
+
+    def test_describes_camera_and_distance(self) -> None:
+        """Test the location answer names the camera, address and distance."""
+        camera = {"name": "Library Lobby", "location": {"address": "Main Street 1"}}
+
+        self.assertEqual(
+            describe_location(camera, 12.4),
+            "You are near Library Lobby, Main Street 1. The nearest camera is about 12 meters away.",
+        )
+
+    def test_without_camera(self) -> None:
+        """Test an honest answer when no camera is known."""
+        self.assertIn("can't place you", describe_location(None))
+
+
+class TestIntentRouter(unittest.TestCase):
+    """Test cases for IntentRouter."""
+
+    def test_deflects_non_visual_questions(self) -> None:
+        """Test local answers and the deflection rate."""
+        router = IntentRouter()
+        located = []
+
+        def locate() -> tuple[dict, float]:
+            located.append(True)
+            return {"name": "Library Lobby"}, 5.0
+
+        self.assertEqual(router.answer("help", locate)["intent"], HELP)
+        self.assertIsNone(router.answer("What is in front of me?", locate))
+        self.assertEqual(located, [])
+        self.assertIn("Library Lobby", router.answer("Where am I?", locate)["text"])
+        self.assertIsNone(router.answer("Is the door open?", locate))
+        self.assertEqual(router.answer("Thanks!", locate)["text"], THANKS_TEXT)
+
+        snapshot = router.snapshot()
+        self.assertEqual(snapshot["requests"], 5)
+        self.assertEqual(snapshot["deflected"], 3)
+        self.assertEqual(snapshot["deflection_rate"], 0.6)
+        self.assertEqual((snapshot["by_intent"][LOCATION], snapshot["by_intent"][THANKS]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
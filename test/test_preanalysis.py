@@ -0,0 +1,124 @@
+"""Unit tests for background pre-analysis of active cameras."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from helpers import FakeClock, mp4
+
+from loriens_guide.clips import ClipCatalog
+from loriens_guide.preanalysis import PreAnalysisScheduler
+from loriens_guide.resilience import TokenBucket
+
+
+class TestPreAnalysisScheduler(unittest.TestCase):
+    """Test cases for PreAnalysisScheduler."""
+
+    def setUp(self) -> None:
+        """Create clips for two active cameras and a scheduler recording its analyses."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.cameras = [
+            {"id": "busy", "status": "active", "video_clip_url": "busy.mp4"},
+            {"id": "quiet", "status": "active", "video_clip_url": "quiet.mp4"},
+            {"id": "offline", "status": "offline", "video_clip_url": "busy.mp4"},
+        ]
+        for name in ("busy.mp4", "quiet.mp4"):
+            (self.root / name).write_bytes(mp4(5))
+        self.clock = FakeClock()
+        self.analyzed: list[str] = []
+        self.answer = "A clear corridor."
+        self.done = threading.Semaphore(0)
+
+        def analyze(camera: dict, _video_path: str, prompts: list[str]) -> dict[str, str]:
+            self.analyzed.append(camera["id"])
+            self.done.release()
+            return dict.fromkeys(prompts, self.answer)
+
+        self.scheduler = PreAnalysisScheduler(
+            lambda: self.cameras,
+            lambda camera: self.root / camera["video_clip_url"],
+            analyze,
+            TokenBucket(rate=0, capacity=100, clock=self.clock),
+            catalog=ClipCatalog(self.root),
+            prompts=("What is ahead?",),
+            clock=self.clock,
+        )
+
+    def tearDown(self) -> None:
+        """Remove the clips."""
+        self.directory.cleanup()
+
+    def run_and_wait(self) -> int:
+        """Run one scheduling pass and wait for the analyses it started."""
+        started = self.scheduler.run_due()
+        for _ in range(started):
+            self.assertTrue(self.done.acquire(timeout=1))
+        deadline = time.monotonic() + 1
+        while self.scheduler.snapshot()["runs"] < len(self.analyzed) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return started
+
+    def test_analyzes_active_cameras_with_fresh_clips_only(self) -> None:
+        """Test offline cameras and stale clips are skipped."""
+        old = time.time() - 3600
+        os.utime(self.root / "quiet.mp4", (old, old))
+
+        self.assertEqual(self.run_and_wait(), 1)
+        self.assertEqual(self.analyzed, ["busy"])
+
+    def test_clips_that_cannot_be_uploaded_are_skipped(self) -> None:
+        """Test clips the catalog rejects (too long, unreadable) are never analyzed."""
+        (self.root / "busy.mp4").write_bytes(mp4(60))
+        (self.root / "quiet.mp4").write_bytes(b"not a video")
+
+        self.assertEqual(self.run_and_wait(), 0)
+        self.assertEqual(self.analyzed, [])
+        self.assertEqual(self.scheduler.snapshot()["skipped_unusable"], 2)
+
+    def test_popular_cameras_refresh_more_often(self) -> None:
+        """Test questions about a camera shorten its refresh interval."""
+        for _ in range(5):
+            self.scheduler.record_query("busy")
+
+        self.assertLess(self.scheduler.interval_for("busy"), self.scheduler.interval_for("quiet"))
+        self.assertGreaterEqual(self.scheduler.interval_for("busy"), self.scheduler.min_interval_s)
+
+    def test_unchanged_clip_is_not_reanalyzed_until_max_interval(self) -> None:
+        """Test a due camera whose clip did not change spends no upstream calls."""
+        self.run_and_wait()
+        self.clock.now = self.scheduler.interval_for("busy") + 1
+
+        self.assertEqual(self.run_and_wait(), 0)
+        self.assertEqual(self.scheduler.snapshot()["skipped_unchanged"], 2)
+
+        self.clock.now += self.scheduler.max_interval_s
+        self.assertEqual(self.run_and_wait(), 2)
+
+    def test_changing_answers_raise_the_change_rate(self) -> None:
+        """Test a scene whose answers keep changing is refreshed more often."""
+        self.run_and_wait()
+        before = self.scheduler.interval_for("busy")
+        for duration_s, answer in ((6, "Three people near the stairs."), (7, "A cart blocks the left door.")):
+            self.answer = answer
+            (self.root / "busy.mp4").write_bytes(mp4(duration_s))
+            self.clock.now += self.scheduler.max_interval_s
+            self.run_and_wait()
+
+        self.assertLess(self.scheduler.interval_for("busy"), before)
+
+    def test_budget_goes_to_the_most_popular_camera(self) -> None:
+        """Test a budget for one camera is spent on the camera asked about most."""
+        self.scheduler.budget = TokenBucket(rate=0, capacity=self.scheduler.cost, clock=self.clock)
+        self.scheduler.record_query("quiet")
+
+        self.assertEqual(self.run_and_wait(), 1)
+        self.assertEqual(self.analyzed, ["quiet"])
+        self.assertEqual(self.scheduler.snapshot()["skipped_budget"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
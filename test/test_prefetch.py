@@ -0,0 +1,124 @@
+"""Unit tests for speculative clip prefetching."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from helpers import FakeClock
+
+from loriens_guide.clips import ClipCatalog
+from loriens_guide.prefetch import BUDGET_EXHAUSTED, NO_CLIP, READY, SCHEDULED, ClipPrefetcher
+from loriens_guide.resilience import TokenBucket
+from loriens_guide.shared_cache import InProcessCache
+
+
+class TestClipPrefetcher(unittest.TestCase):
+    """Test cases for ClipPrefetcher."""
+
+    def setUp(self) -> None:
+        """Create a clip and a prefetcher with recording upload and delete functions."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.clip = Path(self.directory.name) / "clip.mp4"
+        self.clip.write_bytes(b"clip")
+        self.catalog = ClipCatalog(self.directory.name)
+        self.clock = FakeClock()
+        self.uploads: list[str] = []
+        self.deleted: list[str] = []
+        self.deleted_event = threading.Event()
+
+        def upload(video_path: str) -> dict:
+            self.uploads.append(video_path)
+            return {"asset_id": f"asset-{len(self.uploads)}"}
+
+        def delete(asset_id: str) -> bool:
+            self.deleted.append(asset_id)
+            self.deleted_event.set()
+            return True
+
+        self.prefetcher = ClipPrefetcher(
+            upload,
+            delete,
+            TokenBucket(rate=0, capacity=2, clock=self.clock),
+            catalog=self.catalog,
+            ttl_s=60,
+            hold_s=180,
+            clock=self.clock,
+        )
+
+    def tearDown(self) -> None:
+        """Remove the clip."""
+        self.directory.cleanup()
+
+    def test_claim_returns_prefetched_asset(self) -> None:
+        """Test a heartbeat's upload is handed to the question that follows."""
+        self.assertEqual(self.prefetcher.prefetch("cam", str(self.clip)), SCHEDULED)
+
+        self.assertEqual(self.prefetcher.claim("cam", str(self.clip), timeout=1), "asset-1")
+        self.assertEqual(self.prefetcher.prefetch("cam", str(self.clip)), READY)
+        self.assertEqual(len(self.uploads), 1)
+        snapshot = self.prefetcher.snapshot()
+        self.assertEqual(snapshot["hits"], 1)
+        self.assertEqual(snapshot["hit_rate"], 1.0)
+
+    def test_claim_misses_other_camera_or_changed_clip(self) -> None:
+        """Test nothing is claimed for another camera or a rewritten clip."""
+        self.prefetcher.prefetch("cam", str(self.clip))
+        self.prefetcher.claim("cam", str(self.clip), timeout=1)
+
+        self.assertIsNone(self.prefetcher.claim("other", str(self.clip), timeout=1))
+        self.clip.write_bytes(b"a newer clip")
+        self.assertIsNone(self.prefetcher.claim("cam", str(self.clip), timeout=1))
+        self.assertEqual(self.prefetcher.snapshot()["misses"], 2)
+
+    def test_budget_caps_speculative_uploads(self) -> None:
+        """Test heartbeats stop uploading once the budget is spent."""
+        for camera_id in ("a", "b"):
+            self.assertEqual(self.prefetcher.prefetch(camera_id, str(self.clip)), SCHEDULED)
+
+        self.assertEqual(self.prefetcher.prefetch("c", str(self.clip)), BUDGET_EXHAUSTED)
+        self.assertEqual(self.prefetcher.prefetch("d", "/nonexistent/clip.mp4"), NO_CLIP)
+
+    def test_unclaimed_asset_is_deleted_and_counted_as_wasted(self) -> None:
+        """Test expired prefetches nobody asked about are deleted."""
+        self.prefetcher.prefetch("cam", str(self.clip))
+        time.sleep(0.05)
+        self.clock.now = 61
+
+        self.assertEqual(self.prefetcher.prefetch("other", str(self.clip)), SCHEDULED)
+
+        self.assertTrue(self.deleted_event.wait(1))
+        self.assertEqual(self.deleted, ["asset-1"])
+        self.assertEqual(self.prefetcher.snapshot()["wasted_uploads"], 1)
+
+    def test_other_worker_claims_published_asset(self) -> None:
+        """Test a prefetch made by one worker is claimed by another through the shared cache."""
+        shared = InProcessCache()
+        owner = ClipPrefetcher(
+            lambda _path: {"asset_id": "shared-asset"},
+            self.deleted.append,
+            TokenBucket(rate=0, capacity=1, clock=self.clock),
+            catalog=self.catalog,
+            shared=shared,
+            clock=self.clock,
+        )
+        other = ClipPrefetcher(
+            lambda _path: {"asset_id": "unused"},
+            self.deleted.append,
+            TokenBucket(rate=0, capacity=1, clock=self.clock),
+            catalog=self.catalog,
+            shared=shared,
+            clock=self.clock,
+        )
+        owner.prefetch("cam", str(self.clip))
+        self.assertEqual(owner.claim("cam", str(self.clip), timeout=1), "shared-asset")
+
+        self.assertEqual(other.claim("cam", str(self.clip), timeout=1), "shared-asset")
+        self.assertEqual(other.snapshot()["shared_hits"], 1)
+        self.clip.write_bytes(b"a newer clip")
+        self.assertIsNone(other.claim("cam", str(self.clip), timeout=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Unit tests for the opt-in request sampling profiler."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from flask import Flask, jsonify
+
+import loriens_guide
+from loriens_guide.dispatcher import PriorityDispatcher
+from loriens_guide.profile_context import propagate
+from loriens_guide.profiling import CPU, Profiler, install_profiler, profiler_from_env
+
+TOKEN = "profile-token"  # noqa: S105
+PREFIX = "/api/debug/profiles"
+
+
+def spin(seconds: float) -> int:
+    """Keep the CPU busy for a while."""
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for Profiler installed on a Flask app."""
+
+    def setUp(self) -> None:
+        """Set up an app with a CPU-bound endpoint and one handing work to a dispatcher."""
+        self.profiler = Profiler(interval_s=0.001, token=TOKEN)
+        self.dispatcher = PriorityDispatcher(workers=1)
+        app = Flask(__name__)
+        install_profiler(app, self.profiler, prefix=PREFIX)
+
+        @app.route("/busy")
+        def busy() -> tuple:
+            return jsonify({"count": spin(0.15)}), 200
+
+        @app.route("/dispatched")
+        def dispatched() -> tuple:
+            return jsonify({"count": self.dispatcher.run("Describe the room", spin, 0.15)}), 200
+
+        self.client = app.test_client()
+        self.admin = {"Authorization": f"Bearer {TOKEN}"}
+
+    def test_profiles_request_asked_for_with_token(self) -> None:
+        """Test a request sent with the token is profiled and its profile served as folded stacks."""
+        response = self.client.get("/busy", headers={"X-Profile": TOKEN, "X-Request-Id": "req-1"})
+
+        self.assertEqual(response.headers["X-Request-Id"], "req-1")
+        self.assertEqual(response.headers["X-Profile"], f"{PREFIX}/req-1")
+        folded = self.client.get(f"{PREFIX}/req-1", headers=self.admin).get_data(as_text=True)
+        spin_lines = [line for line in folded.splitlines() if "spin (" in line]
+        self.assertTrue(spin_lines)
+        stack, count = spin_lines[0].rsplit(" ", 1)
+        self.assertIn("busy (", stack)
+        self.assertGreater(int(count), 0)
+
+        listing = self.client.get(PREFIX, headers=self.admin).get_json()
+        summary = listing["profiles"][0]
+        self.assertEqual((summary["request_id"], summary["path"], summary["status"]), ("req-1", "/busy", 200))
+        self.assertGreater(summary["samples"], 10)
+        if hasattr(time, "pthread_getcpuclockid"):
+            self.assertEqual(summary["hottest_kind"], CPU)
+            self.assertIn("spin (", summary["hottest"][0]["frame"])
+
+    def test_not_profiled_without_token(self) -> None:
+        """Test requests without the right token are not profiled, and profiles need the token."""
+        self.assertNotIn("X-Profile", self.client.get("/busy").headers)
+        self.assertNotIn("X-Profile", self.client.get("/busy", headers={"X-Profile": "guess"}).headers)
+
+        self.assertEqual(self.profiler.recent(), [])
+        self.assertEqual(self.client.get(PREFIX).status_code, 403)
+        self.assertEqual(self.client.get(f"{PREFIX}/missing", headers=self.admin).status_code, 404)
+
+    def test_sampled_requests_get_a_safe_request_id(self) -> None:
+        """Test sampled requests are profiled, replacing request ids unsafe to store."""
+        self.profiler.sample_rate = 0.5
+        self.profiler._random = lambda: 0.1  # noqa: SLF001
+
+        response = self.client.get("/busy", headers={"X-Request-Id": "../../etc/passwd"})
+
+        self.assertRegex(response.headers["X-Request-Id"], r"^[0-9a-f]{32}$")
+        self.assertEqual(self.profiler.snapshot()["profiled"], 1)
+
+    def test_follows_work_onto_dispatcher_workers(self) -> None:
+        """Test work a profiled request hands to the dispatcher is sampled on the worker."""
+        response = self.client.get("/dispatched", headers={"X-Profile": TOKEN})
+
+        folded = self.client.get(response.headers["X-Profile"], headers=self.admin).get_data(as_text=True)
+        self.assertTrue(any("_work (" in line and "spin (" in line for line in folded.splitlines()))
+
+    def test_limits_concurrent_profiles(self) -> None:
+        """Test requests beyond max_active are served without being profiled."""
+        profiler = Profiler(max_active=1)
+        first = profiler.start("a", "GET", "/a")
+
+        self.assertIsNone(profiler.start("b", "GET", "/b"))
+        profiler.finish(first, 200)
+        self.assertEqual(profiler.snapshot()["skipped_busy"], 1)
+        self.assertEqual([summary["request_id"] for summary in profiler.recent()], ["a"])
+
+
+class TestProfilingHelpers(unittest.TestCase):
+    """Test cases for propagate, profiling blocks and configuration."""
+
+    def test_propagate_is_a_no_op_when_not_profiled(self) -> None:
+        """Test work is passed on unchanged when the current thread is not profiled."""
+        self.assertIs(propagate(spin), spin)
+
+    def test_dispatcher_does_not_import_flask(self) -> None:
+        """Test the dispatcher carries profiles along without pulling in the web framework."""
+        code = "import sys, loriens_guide.dispatcher; print('flask' in sys.modules)"
+        env = {**os.environ, "PYTHONPATH": str(Path(loriens_guide.__file__).parents[1])}
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)  # noqa: S603
+
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_profiling_block_written_to_directory(self) -> None:
+        """Test a profiled block of code is written as folded stacks named after it."""
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = Profiler(interval_s=0.001, directory=directory)
+            with profiler.profiling("clip-1"):
+                spin(0.05)
+
+            self.assertIn("spin (", (Path(directory) / "clip-1.folded").read_text())
+            self.assertTrue((Path(directory) / "clip-1.cpu.folded").exists())
+
+    def test_disabled_by_default(self) -> None:
+        """Test no profiler is created unless PROFILER_ENABLED is true."""
+        with mock.patch.dict(os.environ, {"PROFILER_ENABLED": "false"}):
+            self.assertIsNone(profiler_from_env())
+        with mock.patch.dict(os.environ, {"PROFILER_ENABLED": "true", "PROFILER_SAMPLE_RATE": "0.01"}):
+            self.assertEqual(profiler_from_env().snapshot()["sample_rate"], 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Unit tests for prompt micro-batching."""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from loriens_guide.prompt_batching import PromptBatcher, build_batch_prompt, parse_batch_answers
+
+
+class TestBatchPrompt(unittest.TestCase):
+    """Test cases for building and parsing batched prompts."""
+
+    def test_build_batch_prompt_numbers_questions(self) -> None:
+        """Test every prompt is included, numbered, with the expected answer count."""
+        prompt = build_batch_prompt(["Where is the exit?", "Is it busy?"])
+
+        self.assertIn("Question 1:\nWhere is the exit?", prompt)
+        self.assertIn("Question 2:\nIs it busy?", prompt)
+        self.assertIn("exactly 2 answers", prompt)
+
+    def test_parse_batch_answers(self) -> None:
+        """Test answers are extracted from plain and fenced JSON."""
+        self.assertEqual(parse_batch_answers('{"answers": ["Left.", "No."]}', 2), ["Left.", "No."])
+        self.assertEqual(parse_batch_answers('```json\n{"answers": ["Left.", "No."]}\n```', 2), ["Left.", "No."])
+
+    def test_parse_batch_answers_rejects_malformed_responses(self) -> None:
+        """Test free text, wrong counts and wrong types are not accepted."""
+        self.assertIsNone(parse_batch_answers("The exit is on your left.", 2))
+        self.assertIsNone(parse_batch_answers('{"answers": ["Left."]}', 2))
+        self.assertIsNone(parse_batch_answers('{"answers": ["Left.", 3]}', 2))
+        self.assertIsNone(parse_batch_answers('["Left.", "No."]', 2))
+
+
+class TestPromptBatcher(unittest.TestCase):
+    """Test cases for PromptBatcher."""
+
+    def ask_concurrently(self, batcher: PromptBatcher, prompts: list[str], run_batch: object) -> tuple[list, list]:
+        """Submit prompts for the same key from several threads."""
+        singles = []
+        lock = threading.Lock()
+
+        def run_single(prompt: str) -> dict:
+            with lock:
+                singles.append(prompt)
+            return {"text": f"single:{prompt}"}
+
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            futures = [pool.submit(batcher.submit, "asset", prompt, run_batch, run_single) for prompt in prompts]
+            return [future.result() for future in futures], singles
+
+    def test_concurrent_prompts_share_one_call(self) -> None:
+        """Test prompts arriving within the window are answered by one batched call."""
+        calls = []
+
+        def run_batch(prompts: list[str]) -> list[dict]:
+            calls.append(list(prompts))
+            return [{"text": f"batched:{prompt}"} for prompt in prompts]
+
+        batcher = PromptBatcher(window_s=0.5, max_batch=3)
+        results, singles = self.ask_concurrently(batcher, ["a", "b", "c"], run_batch)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result["text"] for result in results], ["batched:a", "batched:b", "batched:c"])
+        self.assertEqual(singles, [])
+        snapshot = batcher.snapshot()
+        self.assertEqual(snapshot["batches"], 1)
+        self.assertEqual(snapshot["calls_saved"], 2)
+        self.assertEqual(snapshot["largest_batch"], 3)
+
+    def test_unparseable_batch_falls_back_to_individual_calls(self) -> None:
+        """Test every caller asks on its own when the batched answer cannot be split."""
+        batcher = PromptBatcher(window_s=0.5, max_batch=2)
+        results, singles = self.ask_concurrently(batcher, ["a", "b"], lambda _prompts: None)
+
+        self.assertEqual(sorted(singles), ["a", "b"])
+        self.assertEqual([result["text"] for result in results], ["single:a", "single:b"])
+        self.assertEqual(batcher.snapshot()["parse_fallbacks"], 1)
+
+    def test_lone_prompt_is_asked_individually(self) -> None:
+        """Test a prompt without company is not wrapped in a batch prompt."""
+        batcher = PromptBatcher(window_s=0.01)
+
+        result = batcher.submit("asset", "a", lambda _prompts: self.fail("No batch expected"), lambda p: {"text": p})
+
+        self.assertEqual(result, {"text": "a"})
+        self.assertEqual(batcher.snapshot()["batches"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
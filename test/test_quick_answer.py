@@ -0,0 +1,52 @@
+"""Unit tests for two-phase quick answers."""
+
+import unittest
+
+from loriens_guide.quick_answer import (
+    MAX_SUMMARY_CHARS,
+    build_quick_prompt,
+    parse_quick_answer,
+    spoken_quick_answer,
+)
+
+
+class TestQuickAnswer(unittest.TestCase):
+    """Test cases for parsing and speaking quick answers."""
+
+    def test_prompt_asks_for_structured_answer(self) -> None:
+        """Test the quick prompt contains the question and the expected keys."""
+        prompt = build_quick_prompt("Is the path clear?")
+
+        self.assertIn("Is the path clear?", prompt)
+        self.assertIn('"hazard"', prompt)
+        self.assertIn('"direction"', prompt)
+
+    def test_parse_structured_answer(self) -> None:
+        """Test a fenced JSON answer is parsed and normalized."""
+        answer = parse_quick_answer('```json\n{"hazard": "Stairs", "direction": "AHEAD", "summary": "Go slowly."}\n```')
+
+        self.assertEqual(
+            answer, {"hazard": "Stairs", "direction": "ahead", "summary": "Go slowly.", "structured": True}
+        )
+        self.assertEqual(spoken_quick_answer(answer), "Caution: Stairs ahead of you. Go slowly.")
+
+    def test_no_hazard(self) -> None:
+        """Test a null or 'none' hazard is spoken as the summary only."""
+        for hazard in ("null", '"none"'):
+            answer = parse_quick_answer(f'{{"hazard": {hazard}, "direction": "sideways", "summary": "All clear."}}')
+
+            self.assertIsNone(answer["hazard"])
+            self.assertEqual(answer["direction"], "none")
+            self.assertEqual(spoken_quick_answer(answer), "All clear.")
+
+    def test_unstructured_answer_is_shortened(self) -> None:
+        """Test text ignoring the schema is kept, cut to the summary length."""
+        answer = parse_quick_answer("The corridor is clear. " * 20)
+
+        self.assertFalse(answer["structured"])
+        self.assertLessEqual(len(answer["summary"]), MAX_SUMMARY_CHARS)
+        self.assertTrue(answer["summary"].startswith("The corridor is clear."))
+
+
+if __name__ == "__main__":
+    unittest.main()
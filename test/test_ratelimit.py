@@ -0,0 +1,100 @@
+"""Unit tests for per-client rate limiting."""
+
+import os
+import unittest
+from unittest import mock
+
+from helpers import FakeClock
+
+from loriens_guide.ratelimit import ClientRateLimiter, _hash_key, api_keys_from_env, client_key, request_cost
+
+
+class TestClientKey(unittest.TestCase):
+    """Test cases for client_key."""
+
+    def test_known_key_takes_precedence_and_is_hashed(self) -> None:
+        """Test clients sending a known API key are identified by its hash, not their address."""
+        api_keys = frozenset({_hash_key("secret")})
+        key = client_key({"X-API-Key": "secret"}, "10.0.0.1", api_keys=api_keys)
+
+        self.assertTrue(key.startswith("token:"))
+        self.assertNotIn("secret", key)
+        self.assertEqual(client_key({"Authorization": "Bearer secret"}, "10.0.0.2", api_keys=api_keys), key)
+
+    def test_unknown_keys_are_keyed_by_address(self) -> None:
+        """Test made-up keys do not give a client new buckets."""
+        api_keys = frozenset({_hash_key("secret")})
+
+        self.assertEqual(client_key({"X-API-Key": "random-1"}, "10.0.0.1", api_keys=api_keys), "ip:10.0.0.1")
+        self.assertEqual(client_key({"Authorization": "Bearer random-2"}, "10.0.0.1"), "ip:10.0.0.1")
+
+    def test_forwarded_for_only_when_trusted(self) -> None:
+        """Test X-Forwarded-For is ignored unless the proxy is trusted, and then only the proxy's entry is used."""
+        headers = {"X-Forwarded-For": "203.0.113.7, 10.0.0.1"}
+
+        self.assertEqual(client_key(headers, "10.0.0.9"), "ip:10.0.0.9")
+        self.assertEqual(client_key(headers, "10.0.0.9", trust_forwarded=True), "ip:10.0.0.1")
+
+    def test_api_keys_from_env(self) -> None:
+        """Test the known keys are read from RATE_LIMIT_API_KEYS as hashes."""
+        with mock.patch.dict(os.environ, {"RATE_LIMIT_API_KEYS": "kiosk-1, kiosk-2,"}):
+            self.assertEqual(api_keys_from_env(), {_hash_key("kiosk-1"), _hash_key("kiosk-2")})
+
+    def test_request_cost(self) -> None:
+        """Test batches cost one token per item and fan-outs one per camera they may ask."""
+        self.assertEqual(request_cost({"items": [{}, {}, {}]}, batch=True), 3)
+        self.assertEqual(request_cost({"mode": "merge", "max_cameras": 5}), 5)
+        self.assertEqual(request_cost({"mode": "first"}), 3)
+        self.assertEqual(request_cost({"camera_id": "cam", "max_cameras": 5}), 1)
+        self.assertEqual(request_cost(None), 1)
+
+
+class TestClientRateLimiter(unittest.TestCase):
+    """Test cases for ClientRateLimiter."""
+
+    def setUp(self) -> None:
+        """Set up a limiter of one request per second with a burst of 3."""
+        self.clock = FakeClock()
+        self.limiter = ClientRateLimiter(rate_per_s=1.0, burst=3, clock=self.clock)
+
+    def test_burst_then_retry_after(self) -> None:
+        """Test a client gets its burst, then a retry delay matching the refill."""
+        results = [self.limiter.acquire("ip:kiosk") for _ in range(4)]
+
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertAlmostEqual(results[3], 1.0)
+
+        self.clock.now = 1.0
+        self.assertEqual(self.limiter.acquire("ip:kiosk"), 0)
+
+    def test_clients_are_limited_independently(self) -> None:
+        """Test one client exhausting its bucket does not limit another."""
+        for _ in range(10):
+            self.limiter.acquire("ip:kiosk")
+
+        self.assertEqual(self.limiter.acquire("ip:phone"), 0)
+
+        snapshot = self.limiter.snapshot()
+        self.assertEqual(snapshot["allowed"], 4)
+        self.assertEqual(snapshot["limited"], 7)
+        self.assertEqual(snapshot["top_clients"]["ip:kiosk"]["limited"], 7)
+        self.assertEqual(list(snapshot["top_clients"]), ["ip:kiosk", "ip:phone"])
+
+    def test_cost_is_capped_at_burst(self) -> None:
+        """Test a request costing more than the burst is still possible with a full bucket."""
+        self.assertEqual(self.limiter.acquire("ip:batch", cost=10), 0)
+        self.assertAlmostEqual(self.limiter.acquire("ip:batch", cost=10), 3.0)
+
+    def test_least_recently_seen_clients_are_forgotten(self) -> None:
+        """Test the number of tracked clients is bounded."""
+        limiter = ClientRateLimiter(rate_per_s=1.0, burst=1, max_clients=2, clock=self.clock)
+        limiter.acquire("ip:a")
+        limiter.acquire("ip:b")
+        limiter.acquire("ip:a")
+        limiter.acquire("ip:c")
+
+        self.assertEqual(set(limiter.snapshot()["top_clients"]), {"ip:a", "ip:c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
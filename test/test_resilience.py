@@ -0,0 +1,166 @@
+"""Unit tests for the resilience primitives."""
+
+import unittest
+
+from helpers import FakeClock
+
+from loriens_guide.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    TokenBucket,
+)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker."""
+
+    def setUp(self) -> None:
+        """Set up a breaker with a fake clock."""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        """Test the breaker opens once the failure threshold is reached."""
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.snapshot()["rejected"], 1)
+
+    def test_success_resets_failure_count(self) -> None:
+        """Test a success in between failures keeps the breaker closed."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_allows_single_probe(self) -> None:
+        """Test the breaker lets one probe through after the reset timeout."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now = 10
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_failed_probe_reopens(self) -> None:
+        """Test a failed probe re-opens the breaker."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.allow_request()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_ignored_probe_frees_the_probe_slot(self) -> None:
+        """Test a probe whose outcome is ignored lets the next probe through."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.allow_request()
+        self.breaker.record_ignored()
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    """Test cases for AdaptiveConcurrencyLimiter."""
+
+    def test_rejects_above_limit(self) -> None:
+        """Test calls beyond the limit are rejected immediately."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+
+        self.assertTrue(limiter.try_acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        self.assertEqual(limiter.in_flight, 2)
+
+    def test_failure_halves_limit(self) -> None:
+        """Test congestion shrinks the limit multiplicatively."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        limiter.try_acquire()
+        limiter.release(latency=1.0, success=False)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_latency_spike_counts_as_congestion(self) -> None:
+        """Test a latency far above the baseline shrinks the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_tolerance=2.0)
+        limiter.try_acquire()
+        limiter.release(latency=1.0, success=True)
+        limiter.try_acquire()
+        limiter.release(latency=5.0, success=True)
+
+        self.assertLess(limiter.limit, 8)
+
+    def test_operations_have_their_own_baseline(self) -> None:
+        """Test fast calls of one kind do not make normal calls of another look congested."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_tolerance=2.0)
+        for _ in range(50):
+            limiter.try_acquire()
+            limiter.release(latency=0.2, success=True, operation="upload")
+            limiter.try_acquire()
+            limiter.release(latency=3.0, success=True, operation="chat")
+
+        self.assertGreaterEqual(limiter.limit, 10)
+        self.assertEqual(limiter.snapshot()["baseline_latency_s"], {"upload": 0.2, "chat": 3.0})
+
+    def test_healthy_latency_grows_limit(self) -> None:
+        """Test steady healthy latency grows the limit additively up to the maximum."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+        for _ in range(50):
+            limiter.try_acquire()
+            limiter.release(latency=1.0, success=True)
+
+        self.assertEqual(limiter.limit, 4)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket."""
+
+    def test_allows_burst_then_refills_at_rate(self) -> None:
+        """Test the bucket grants its capacity at once and then its rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        clock.now = 2.0
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        clock.now = 100.0
+        self.assertEqual(bucket.snapshot()["tokens"], 2)
+        self.assertEqual(bucket.snapshot()["rejected"], 2)
+
+    def test_retry_after(self) -> None:
+        """Test the bucket reports when enough tokens will have refilled."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+        self.assertEqual(bucket.retry_after(), 0)
+
+        bucket.try_acquire(2)
+        self.assertAlmostEqual(bucket.retry_after(), 2.0)
+        self.assertAlmostEqual(bucket.retry_after(5), 4.0)
+
+        clock.now = 1.0
+        self.assertAlmostEqual(bucket.retry_after(), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+"""Unit tests for routing camera requests to their shard."""
+
+import json
+import socket
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+from loriens_guide.router import NearestCamera, ShardRouter, create_app, routing_key
+from loriens_guide.sharding import HashRing
+
+ADMIN_TOKEN = "test-admin-token"  # noqa: S105
+
+
+def shard_app(name: str) -> Flask:
+    """Return a stand-in shard answering with its name and what it received."""
+    app = Flask(name)
+
+    @app.route("/api/vlm/analyze", methods=["POST"])
+    @app.route("/api/assistance/request", methods=["POST"])
+    @app.route("/api/location/heartbeat", methods=["POST"])
+    @app.route("/api/v1/query", methods=["POST"])
+    def answer() -> tuple:
+        data = request.get_json()
+        if data.get("query") == "too many":
+            return jsonify({"error": True, "message": "Rate limit exceeded"}), 429, {"Retry-After": "7"}
+        return jsonify({"shard": name, "data": data, "forwarded_for": request.headers.get("X-Forwarded-For")}), 200
+
+    return app
+
+
+def free_url() -> str:
+    """Return the URL of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def dropping_url() -> tuple[str, list[bytes]]:
+    """Return the URL of a local server that reads a request and drops the connection, and what it read."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    received: list[bytes] = []
+
+    def serve() -> None:
+        with server:
+            connection, _ = server.accept()
+            with connection:
+                received.append(connection.recv(65536))
+
+    threading.Thread(target=serve, daemon=True).start()
+    return f"http://127.0.0.1:{server.getsockname()[1]}", received
+
+
+class TestRoutingKey(unittest.TestCase):
+    """Test cases for routing_key and NearestCamera."""
+
+    def test_camera_id_then_location(self) -> None:
+        """Test requests are keyed by their camera, else the camera nearest their location."""
+        nearest = {(55.0, 12.0): "cam_b"}.get
+
+        self.assertEqual(routing_key({"camera_id": "cam_a", "latitude": 55.0, "longitude": 12.0}), "cam_a")
+        self.assertEqual(routing_key({"lat": 55.0, "long": 12.0}, lambda lat, long: nearest((lat, long))), "cam_b")
+        self.assertEqual(
+            routing_key({"location": {"latitude": "55.0", "longitude": "12.0"}}, lambda *_: "cam_c"), "cam_c"
+        )
+        self.assertEqual(routing_key({"lat": 55.00001, "long": 12.0}), "cell:55.0:12.0")
+        self.assertIsNone(routing_key({"query": "hello"}))
+        self.assertIsNone(routing_key(None))
+
+    def test_nearest_camera_from_json_registry(self) -> None:
+        """Test a location resolves to the nearest camera of a JSON registry."""
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "cameras.json"
+            cameras = [
+                {"id": "north", "location": {"lat": 55.01, "long": 12.0}},
+                {"id": "south", "location": {"lat": 54.99, "long": 12.0}},
+                {"id": "nowhere"},
+            ]
+            path.write_text(json.dumps({"cameras": cameras}))
+            resolve = NearestCamera(cameras_file=path)
+
+            self.assertEqual(resolve(55.009, 12.0), "north")
+            self.assertEqual(resolve(54.5, 12.0), "south")
+            self.assertIsNone(NearestCamera(cameras_file=Path(directory) / "missing.json")(55.0, 12.0))
+
+
+class TestShardRouter(unittest.TestCase):
+    """Test cases for the router in front of several local shard servers."""
+
+    def setUp(self) -> None:
+        """Start three shard servers and a router in front of them."""
+        self.servers = []
+        self.shards = []
+        for index in range(3):
+            server = make_server("127.0.0.1", 0, shard_app(f"shard{index}"), threaded=True)
+            threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+            self.servers.append(server)
+            self.shards.append(f"http://127.0.0.1:{server.server_port}")
+        self.router = ShardRouter(
+            HashRing(self.shards), resolve_camera=lambda *_: "cam_nearest", admin_token=ADMIN_TOKEN
+        )
+        self.client = create_app(self.router).test_client()
+
+    def tearDown(self) -> None:
+        """Stop the shard servers."""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_camera_requests_reach_the_owning_shard(self) -> None:
+        """Test every request about a camera is answered by the shard owning it."""
+        for index in range(20):
+            camera_id = f"cam_{index}"
+            owner = self.router.ring.shard_for(camera_id)
+            for _ in range(2):
+                response = self.client.post("/api/vlm/analyze", json={"camera_id": camera_id, "query": "Any stairs?"})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers["X-Shard"], owner)
+                self.assertEqual(response.get_json()["data"]["camera_id"], camera_id)
+        self.assertEqual(sum(self.router.snapshot()["forwarded"].values()), 40)
+
+    def test_location_query_routed_by_nearest_camera(self) -> None:
+        """Test a location-only query goes to the shard of the camera nearest the user."""
+        response = self.client.post(
+            "/api/v1/query", json={"lat": 55.0, "long": 12.0, "question_text": "Where is the exit?"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Shard"], self.router.ring.shard_for("cam_nearest"))
+        self.assertEqual(response.get_json()["forwarded_for"], "127.0.0.1")
+
+    def test_heartbeat_reaches_the_shard_of_its_questions(self) -> None:
+        """Test a heartbeat's prefetch is made on the shard the question from there is sent to."""
+        location = {"latitude": 55.0, "longitude": 12.0}
+        heartbeat = self.client.post("/api/location/heartbeat", json=location)
+        question = self.client.post("/api/assistance/request", json={**location, "query": "Any stairs?"})
+
+        self.assertEqual(heartbeat.status_code, 200)
+        self.assertEqual(heartbeat.headers["X-Shard"], self.router.ring.shard_for("cam_nearest"))
+        self.assertEqual(heartbeat.headers["X-Shard"], question.headers["X-Shard"])
+
+    def test_client_forwarded_for_is_replaced(self) -> None:
+        """Test a client cannot pass its own X-Forwarded-For on to the shards."""
+        response = self.client.post(
+            "/api/v1/query", json={"camera_id": "cam_1"}, headers={"X-Forwarded-For": "203.0.113.9"}
+        )
+
+        self.assertEqual(response.get_json()["forwarded_for"], "127.0.0.1")
+
+    def test_shard_errors_and_retry_after_passed_through(self) -> None:
+        """Test a shard's error status and headers reach the client unchanged."""
+        response = self.client.post("/api/vlm/analyze", json={"camera_id": "cam_1", "query": "too many"})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "7")
+
+    def test_fails_over_when_the_owner_is_down(self) -> None:
+        """Test a request for a camera of an unreachable shard is served by the next shard."""
+        down = free_url()
+        self.router.ring.add(down)
+        camera_id = next(f"cam_{index}" for index in range(1000) if self.router.ring.shard_for(f"cam_{index}") == down)
+
+        response = self.client.post("/api/vlm/analyze", json={"camera_id": camera_id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Shard"], self.router.ring.preference_list(camera_id)[1])
+        snapshot = self.router.snapshot()
+        self.assertEqual(snapshot["failed"], {down: 1})
+        self.assertEqual(snapshot["failovers"], 1)
+
+    def test_no_fail_over_after_the_request_was_sent(self) -> None:
+        """Test a connection dropped after sending is not retried on another shard."""
+        dropping, received = dropping_url()
+        self.router.ring.add(dropping)
+        camera_id = next(
+            f"cam_{index}" for index in range(1000) if self.router.ring.shard_for(f"cam_{index}") == dropping
+        )
+
+        response = self.client.post("/api/vlm/analyze", json={"camera_id": camera_id})
+
+        self.assertEqual(response.status_code, 502)
+        self.assertTrue(received)
+        snapshot = self.router.snapshot()
+        self.assertEqual(snapshot["failed"], {dropping: 1})
+        self.assertEqual((snapshot["failovers"], snapshot["forwarded"]), (0, {}))
+
+    def test_no_shard_reachable(self) -> None:
+        """Test the router answers 502 when no shard can be reached, and 503 without shards."""
+        client = create_app(ShardRouter(HashRing([free_url(), free_url()]))).test_client()
+        self.assertEqual(client.post("/api/vlm/analyze", json={"camera_id": "cam_1"}).status_code, 502)
+
+        client = create_app(ShardRouter(HashRing())).test_client()
+        self.assertEqual(client.post("/api/vlm/analyze", json={"camera_id": "cam_1"}).status_code, 503)
+
+    def test_shards_join_and_leave_with_admin_token(self) -> None:
+        """Test shards are added and removed at runtime only with the admin token."""
+        new_shard = free_url()
+        admin = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+        self.assertEqual(self.client.post("/router/shards", json={"shard": new_shard}).status_code, 403)
+        self.assertEqual(
+            self.client.post("/router/shards", json={"shard": "file:///etc"}, headers=admin).status_code, 400
+        )
+        response = self.client.post("/router/shards", json={"shard": new_shard + "/"}, headers=admin)
+        self.assertTrue(response.get_json()["changed"])
+        self.assertIn(new_shard, self.router.ring.shards)
+
+        response = self.client.delete("/router/shards", json={"shard": new_shard}, headers=admin)
+        self.assertTrue(response.get_json()["changed"])
+        self.assertEqual(self.client.get("/router/shards").get_json()["shards"], sorted(self.shards))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Unit tests for client sessions used by follow-up questions."""
+
+import threading
+import unittest
+
+from helpers import FakeClock
+
+from loriens_guide.sessions import SessionStore, estimate_tokens, truncate_to_tokens
+
+
+class TestSessionStore(unittest.TestCase):
+    """Test cases for SessionStore."""
+
+    def setUp(self) -> None:
+        """Create a store recording deleted assets."""
+        self.clock = FakeClock()
+        self.deleted: list[str] = []
+        self.deleted_count = threading.Semaphore(0)
+
+        def delete(asset_id: str) -> bool:
+            self.deleted.append(asset_id)
+            self.deleted_count.release()
+            return True
+
+        self.store = SessionStore(delete, ttl_s=60, max_sessions=2, max_history_tokens=40, clock=self.clock)
+
+    def wait_for_deletes(self, count: int) -> None:
+        """Wait until the given number of assets were deleted."""
+        for _ in range(count):
+            self.assertTrue(self.deleted_count.acquire(timeout=1))
+
+    def test_follow_up_reuses_session(self) -> None:
+        """Test a question about the same camera and clip continues the session."""
+        self.store.start("s1", "cam", "clip-1", "asset-1")
+        self.store.record("s1", "What is ahead?", "A door.")
+
+        session = self.store.get("s1", "cam", "clip-1")
+
+        self.assertEqual(session.asset_id, "asset-1")
+        self.assertEqual([m["role"] for m in self.store.history("s1")], ["user", "assistant"])
+        self.assertEqual(self.store.snapshot()["follow_ups"], 1)
+
+    def test_other_camera_or_new_clip_ends_session(self) -> None:
+        """Test a session's asset is deleted once the user asks about something else."""
+        self.store.start("s1", "cam", "clip-1", "asset-1")
+
+        self.assertIsNone(self.store.get("s1", "cam", "clip-2"))
+        self.wait_for_deletes(1)
+        self.assertEqual(self.deleted, ["asset-1"])
+
+    def test_idle_sessions_expire(self) -> None:
+        """Test sessions end after their time-to-live."""
+        self.store.start("s1", "cam", "clip-1", "asset-1")
+        self.clock.now = 61
+
+        self.assertIsNone(self.store.get("s1", "cam", "clip-1"))
+        self.wait_for_deletes(1)
+        self.assertEqual(self.store.snapshot()["expired"], 1)
+
+    def test_least_recently_used_session_is_evicted(self) -> None:
+        """Test the store keeps at most max_sessions, dropping the least recently used."""
+        self.store.start("s1", "cam", "clip", "asset-1")
+        self.store.start("s2", "cam", "clip", "asset-2")
+        self.store.get("s1", "cam", "clip")
+
+        self.store.start("s3", "cam", "clip", "asset-3")
+
+        self.wait_for_deletes(1)
+        self.assertEqual(self.deleted, ["asset-2"])
+        self.assertIsNotNone(self.store.get("s1", "cam", "clip"))
+
+    def test_borrowed_asset_is_not_deleted(self) -> None:
+        """Test assets owned elsewhere survive the end of the session."""
+        self.store.start("s1", "cam", "clip", "prefetched", owned=False)
+
+        self.store.end("s1")
+
+        self.assertFalse(self.deleted_count.acquire(timeout=0.1))
+
+    def test_history_bounded_by_tokens(self) -> None:
+        """Test the oldest turns are dropped and long answers are truncated."""
+        self.store.start("s1", "cam", "clip", "asset-1")
+        for turn in range(5):
+            self.store.record("s1", f"Question {turn}?", "x" * 200)
+
+        history = self.store.history("s1")
+
+        self.assertLessEqual(sum(estimate_tokens(m["text"]) for m in history), 40)
+        self.assertEqual(history[-2]["text"], "Question 4?")
+        self.assertTrue(history[-1]["text"].endswith("…"))
+
+    def test_truncate_to_tokens(self) -> None:
+        """Test short texts are kept and long ones cut to the token bound."""
+        self.assertEqual(truncate_to_tokens("short", 10), "short")
+        self.assertEqual(len(truncate_to_tokens("y" * 100, 5)), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
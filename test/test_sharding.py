@@ -0,0 +1,91 @@
+"""Unit tests for consistent hashing of cameras onto shards."""
+
+import unittest
+from unittest import mock
+
+from loriens_guide.sharding import HashRing, ring_from_env
+
+SHARDS = ["http://127.0.0.1:5001", "http://127.0.0.1:5002", "http://127.0.0.1:5003"]
+CAMERAS = [f"camera_{index}" for index in range(3000)]
+
+
+class TestHashRing(unittest.TestCase):
+    """Test cases for HashRing."""
+
+    def setUp(self) -> None:
+        """Set up a ring of three shards."""
+        self.ring = HashRing(SHARDS)
+
+    def owners(self) -> dict[str, str]:
+        """Return the owner of every camera."""
+        return {camera: self.ring.shard_for(camera) for camera in CAMERAS}
+
+    def test_same_camera_same_shard(self) -> None:
+        """Test a camera always maps to the same shard, in any ring built from the same shards."""
+        other = HashRing(reversed(SHARDS))
+
+        self.assertEqual(self.owners(), {camera: other.shard_for(camera) for camera in CAMERAS})
+
+    def test_cameras_spread_over_all_shards(self) -> None:
+        """Test every shard owns a fair share of the cameras."""
+        counts = dict.fromkeys(SHARDS, 0)
+        for shard in self.owners().values():
+            counts[shard] += 1
+
+        for count in counts.values():
+            self.assertGreater(count, len(CAMERAS) / len(SHARDS) * 0.7)
+        self.assertAlmostEqual(sum(self.ring.snapshot()["share"].values()), 1.0, places=2)
+
+    def test_join_moves_only_cameras_to_the_new_shard(self) -> None:
+        """Test a joining shard takes about its share of cameras, and only from the others."""
+        before = self.owners()
+        self.assertTrue(self.ring.add("http://127.0.0.1:5004"))
+        after = self.owners()
+
+        moved = [camera for camera in CAMERAS if before[camera] != after[camera]]
+        self.assertTrue(all(after[camera] == "http://127.0.0.1:5004" for camera in moved))
+        self.assertLess(len(moved), len(CAMERAS) / 4 * 1.3)
+        self.assertGreater(len(moved), len(CAMERAS) / 4 * 0.7)
+
+    def test_leave_moves_only_the_leaving_shards_cameras(self) -> None:
+        """Test only the cameras of a leaving shard move."""
+        before = self.owners()
+        self.assertTrue(self.ring.remove(SHARDS[0]))
+        after = self.owners()
+
+        for camera in CAMERAS:
+            if before[camera] != SHARDS[0]:
+                self.assertEqual(after[camera], before[camera])
+            else:
+                self.assertIn(after[camera], SHARDS[1:])
+
+    def test_preference_list_is_distinct_and_starts_with_owner(self) -> None:
+        """Test the fail-over order holds each shard once, after the owner."""
+        shards = self.ring.preference_list("camera_7")
+
+        self.assertEqual(shards[0], self.ring.shard_for("camera_7"))
+        self.assertEqual(sorted(shards), sorted(SHARDS))
+        self.assertEqual(len(self.ring.preference_list("camera_7", 2)), 2)
+
+    def test_empty_ring_and_repeated_changes(self) -> None:
+        """Test an empty ring owns nothing and adding or removing twice changes nothing."""
+        ring = HashRing()
+
+        self.assertIsNone(ring.shard_for("camera_1"))
+        self.assertEqual(ring.preference_list("camera_1"), [])
+        self.assertTrue(ring.add(SHARDS[0]))
+        self.assertFalse(ring.add(SHARDS[0]))
+        self.assertTrue(ring.remove(SHARDS[0]))
+        self.assertFalse(ring.remove(SHARDS[0]))
+
+    def test_ring_from_env(self) -> None:
+        """Test the shards are read from SHARDS, without trailing slashes."""
+        with mock.patch.dict("os.environ", {"SHARDS": " http://a:1/, http://b:2 ,", "SHARD_REPLICAS": "10"}):
+            ring = ring_from_env()
+
+        self.assertEqual(ring.shards, ["http://a:1", "http://b:2"])
+        self.assertEqual(ring.replicas, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
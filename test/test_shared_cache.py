@@ -0,0 +1,154 @@
+"""Unit tests for the cache shared between worker processes."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+from helpers import FakeClock
+
+from loriens_guide.shared_cache import InProcessCache, SQLiteCache
+
+
+class SharedCacheTests:
+    """Behaviour every cache backend must have; mixed into a TestCase per backend."""
+
+    def make_cache(self, max_entries: int = 100) -> object:
+        """Create an empty cache of the backend under test."""
+        raise NotImplementedError
+
+    def test_set_and_get(self) -> None:
+        """Test stored JSON values are returned until deleted."""
+        cache = self.make_cache()
+        cache.set("answer", {"text": "A door."}, ttl_s=60)
+
+        self.assertEqual(cache.get("answer"), {"text": "A door."})
+        cache.delete("answer")
+        self.assertIsNone(cache.get("answer"))
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        """Test the cache keeps at most max_entries, dropping the least recently used."""
+        cache = self.make_cache(max_entries=2)
+        cache.set("a", 1, ttl_s=60)
+        cache.set("b", 2, ttl_s=60)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", 3, ttl_s=60)
+
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual(cache.snapshot()["evictions"], 1)
+
+    def test_get_or_set_computes_once(self) -> None:
+        """Test concurrent callers share one computation of a missing value."""
+        cache = self.make_cache()
+        calls = []
+        results = []
+
+        def factory() -> dict:
+            calls.append(1)
+            time.sleep(0.1)
+            return {"text": "computed"}
+
+        threads = [threading.Thread(target=lambda: results.append(self.get_or_set(cache, factory))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"text": "computed"}] * 4)
+
+    def test_get_or_set_does_not_store_none(self) -> None:
+        """Test a factory returning None leaves the key free for the next caller."""
+        cache = self.make_cache()
+
+        self.assertIsNone(cache.get_or_set("key", lambda: None, ttl_s=60))
+        self.assertEqual(cache.get_or_set("key", lambda: "value", ttl_s=60), "value")
+
+    def get_or_set(self, cache: object, factory: object) -> object:
+        """Call get_or_set on the cache (a backend may use a separate handle per caller)."""
+        return cache.get_or_set("key", factory, ttl_s=60)
+
+
+class TestInProcessCache(SharedCacheTests, unittest.TestCase):
+    """Test cases for InProcessCache."""
+
+    def make_cache(self, max_entries: int = 100) -> InProcessCache:
+        """Create an empty in-process cache."""
+        self.clock = FakeClock()
+        return InProcessCache(max_entries=max_entries, clock=self.clock)
+
+    def test_entries_expire(self) -> None:
+        """Test entries are not served after their time-to-live."""
+        cache = self.make_cache()
+        cache.set("key", "value", ttl_s=10)
+        self.clock.now = 11
+
+        self.assertIsNone(cache.get("key"))
+
+
+class TestSQLiteCache(SharedCacheTests, unittest.TestCase):
+    """Test cases for SQLiteCache."""
+
+    def setUp(self) -> None:
+        """Create a directory for the database."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "cache.db"
+
+    def tearDown(self) -> None:
+        """Remove the database."""
+        self.directory.cleanup()
+
+    def make_cache(self, max_entries: int = 100) -> SQLiteCache:
+        """Create a cache on the test database."""
+        return SQLiteCache(self.path, max_entries=max_entries, poll_s=0.01)
+
+    def get_or_set(self, cache: SQLiteCache, factory: object) -> object:
+        """Use a separate cache per caller, like separate worker processes would."""
+        return SQLiteCache(cache.db_path, poll_s=0.01).get_or_set("key", factory, ttl_s=60)
+
+    def test_entries_expire(self) -> None:
+        """Test entries are not served after their time-to-live."""
+        cache = self.make_cache()
+        cache.set("key", "value", ttl_s=0.05)
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("key"))
+
+    def test_values_are_shared_between_handles(self) -> None:
+        """Test a value stored through one handle is read through another."""
+        self.make_cache().set("key", [1, 2], ttl_s=60)
+
+        self.assertEqual(self.make_cache().get("key"), [1, 2])
+
+    def test_abandoned_lease_expires(self) -> None:
+        """Test a lease left by a crashed process does not block the key forever."""
+        cache = SQLiteCache(self.path, lease_s=0.1, poll_s=0.01)
+        with cache._write() as conn:  # noqa: SLF001
+            conn.execute(
+                "INSERT INTO cache (key, value, expires_at, accessed_at, lease_owner) VALUES ('key', NULL, ?, ?, 'x')",
+                (time.time() + 0.1, time.time()),
+            )
+
+        self.assertEqual(cache.get_or_set("key", lambda: "value", ttl_s=60), "value")
+        self.assertEqual(cache.snapshot()["lease_waits"], 1)
+
+    def test_failed_factory_releases_lease(self) -> None:
+        """Test the next caller computes the value at once after a factory failed."""
+        cache = self.make_cache()
+
+        def fail() -> None:
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            cache.get_or_set("key", fail, ttl_s=60)
+
+        self.assertEqual(cache.get_or_set("key", lambda: "value", ttl_s=60), "value")
+        self.assertEqual(cache.snapshot()["lease_waits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Unit tests for the near-duplicate question cache."""
+
+import unittest
+
+from helpers import FakeClock
+
+from loriens_guide.similarity_cache import SimilarityCache, jaccard, normalize_question
+
+
+class TestNormalizeQuestion(unittest.TestCase):
+    """Test cases for question normalization."""
+
+    def test_paraphrases_normalize_to_the_same_tokens(self) -> None:
+        """Test common phrasings of the same intent share their tokens."""
+        expected = normalize_question("What do you see?")
+        for question in ("Describe the scene", "Describe my surroundings", "what can you SEE"):
+            self.assertEqual(normalize_question(question), expected)
+
+    def test_opposite_words_are_not_folded(self) -> None:
+        """Test words with opposite meanings stay distinct tokens."""
+        self.assertNotEqual(normalize_question("Is it safe to cross?"), normalize_question("Is it dangerous to cross?"))
+        self.assertNotEqual(normalize_question("Is it safe ahead?"), normalize_question("Is there a hazard ahead?"))
+
+    def test_plurals_are_stripped(self) -> None:
+        """Test plural nouns match their singular."""
+        self.assertEqual(normalize_question("Are there cars?"), normalize_question("Is there a car?"))
+        self.assertEqual(normalize_question("bus"), frozenset({"bus"}))
+
+    def test_jaccard(self) -> None:
+        """Test Jaccard similarity of token sets."""
+        self.assertEqual(jaccard(frozenset({"a", "b"}), frozenset({"b", "c"})), 1 / 3)
+        self.assertEqual(jaccard(frozenset(), frozenset()), 1.0)
+
+
+class TestSimilarityCache(unittest.TestCase):
+    """Test cases for SimilarityCache."""
+
+    def test_similar_question_about_same_clip_is_served(self) -> None:
+        """Test a paraphrase is answered from the cache with its similarity."""
+        cache = SimilarityCache()
+        cache.put("clip-1", "What do you see?", "A hallway with a door ahead.")
+
+        cached = cache.get("clip-1", "Describe the scene")
+
+        self.assertEqual(cached["text"], "A hallway with a door ahead.")
+        self.assertEqual(cached["similar_question"], "What do you see?")
+        self.assertEqual(cached["similarity"], 1.0)
+        self.assertEqual(cache.snapshot()["hits"], 1)
+
+    def test_other_clip_or_dissimilar_question_misses(self) -> None:
+        """Test answers are scoped to the clip and questions below the threshold miss."""
+        cache = SimilarityCache()
+        cache.put("clip-1", "Is it safe to cross the street?", "Wait, a car is coming.")
+
+        self.assertIsNone(cache.get("clip-2", "Is it safe to cross the street?"))
+        self.assertIsNone(cache.get("clip-1", "Is it safe to cross?"))
+        self.assertIsNone(cache.get("clip-1", "Hello"))
+        self.assertEqual(cache.snapshot()["misses"], 3)
+
+    def test_safe_and_dangerous_questions_never_match(self) -> None:
+        """Test a question about safety is never answered with the answer to one about danger."""
+        cache = SimilarityCache(threshold=0.5)
+        cache.put("clip-1", "Is it safe to cross?", "Yes, it is safe to cross now.")
+        cache.put("clip-1", "Is there a hazard ahead?", "Yes, a bike is coming.")
+
+        self.assertIsNone(cache.get("clip-1", "Is it dangerous to cross?"))
+        self.assertIsNone(cache.get("clip-1", "Is it safe ahead?"))
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        """Test the index stays bounded and keeps recently used entries."""
+        cache = SimilarityCache(max_entries=2)
+        cache.put("clip-1", "Where is the exit?", "On your left.")
+        cache.put("clip-1", "Are there stairs?", "No stairs.")
+        cache.get("clip-1", "Where is the exit?")
+        cache.put("clip-1", "Is it crowded?", "Very busy.")
+
+        self.assertIsNotNone(cache.get("clip-1", "Where is the exit?"))
+        self.assertIsNone(cache.get("clip-1", "Are there stairs?"))
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot["entries"], 2)
+        self.assertEqual(snapshot["evictions"], 1)
+
+    def test_expired_entries_are_not_served(self) -> None:
+        """Test entries older than the TTL miss."""
+        clock = FakeClock()
+        cache = SimilarityCache(ttl_s=60, clock=clock)
+        cache.put("clip-1", "Where is the exit?", "On your left.")
+        clock.now = 61
+
+        self.assertIsNone(cache.get("clip-1", "Where is the exit?"))
+        self.assertEqual(cache.snapshot()["entries"], 0)
+
+    def test_repeated_question_replaces_answer(self) -> None:
+        """Test the newest answer to the same question wins."""
+        cache = SimilarityCache()
+        cache.put("clip-1", "Where is the exit?", "On your left.")
+        cache.put("clip-1", "where's the exit", "On your right.")
+
+        self.assertEqual(cache.get("clip-1", "Where is the exit?")["text"], "On your right.")
+        self.assertEqual(cache.snapshot()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
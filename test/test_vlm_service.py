@@ -1,8 +1,18 @@
 """Unit tests for VLM Service."""
 
+import json
+import os
+import struct
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+import requests
+
+from loriens_guide.deadline import Deadline
 from loriens_guide.vlm_service import VLMService
 
 
@@ -43,6 +53,16 @@ class TestVLMService(unittest.TestCase):
         self.assertIsNotNone(nearest)
         self.assertEqual(nearest["camera_id"], "lib_lobby_01")  # pyright: ignore[reportOptionalSubscript]
 
+    def test_select_camera_avoids_failing_camera(self) -> None:
+        """Test the nearest camera is chosen until its VLM requests keep failing."""
+        lat, long = 55.6761, 12.5683
+        self.assertEqual(self.service.select_camera(lat, long, "What is ahead?")["camera_id"], "lib_lobby_01")
+
+        for _ in range(5):
+            self.service.camera_health.record("lib_lobby_01", 60.0, success=False)
+
+        self.assertNotEqual(self.service.select_camera(lat, long, "What is ahead?")["camera_id"], "lib_lobby_01")
+
     def test_find_nearest_camera_different_location(self) -> None:
         """Test finding nearest camera from a different location."""
         # Location closer to lib_exit_01
@@ -53,6 +73,60 @@ class TestVLMService(unittest.TestCase):
         self.assertIsNotNone(nearest)
         self.assertEqual(nearest["camera_id"], "lib_exit_01")  # pyright: ignore[reportOptionalSubscript]
 
+    def test_default_cameras_file_independent_of_working_directory(self) -> None:
+        """Test the default registry is found from any working directory."""
+        cwd = Path.cwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                service = VLMService()
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(len(service.cameras), len(self.service.cameras))
+        self.assertGreater(len(service.cameras), 0)
+
+    def test_credentials_read_when_needed(self) -> None:
+        """Test credentials set after the service was built are used."""
+        with patch.dict(os.environ, {"HACKATHON_API_KEY": "late-key"}):
+            self.assertEqual(self.service.api_key, "late-key")
+
+    def test_http_session_reopened_after_fork(self) -> None:
+        """Test each process gets its own pooled HTTP session."""
+        session = self.service._http()  # noqa: SLF001
+        self.assertIs(self.service._http(), session)  # noqa: SLF001
+        with patch("loriens_guide.vlm_service.os.getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(self.service._http(), session)  # noqa: SLF001
+
+    def test_close_connections(self) -> None:
+        """Test closed connections are reopened when next needed."""
+        session = self.service._http()  # noqa: SLF001
+        self.service.close_connections()
+        self.assertIsNot(self.service._http(), session)  # noqa: SLF001
+
+    def test_cameras_without_usable_clip_are_not_selected(self) -> None:
+        """Test selection for analysis skips cameras whose clip is missing or invalid."""
+        with tempfile.TemporaryDirectory() as tmp:
+            videos = Path(tmp) / "videos"
+            videos.mkdir()
+            (videos / "library_lobby.mp4").write_bytes(b"")
+            service = VLMService(clip_root=tmp)
+            # Closest to lib_exit_01, which has no clip at all
+            lat, long = 55.6759, 12.5681
+
+            self.assertEqual(service.find_nearest_camera(lat, long)["camera_id"], "lib_exit_01")
+            self.assertIsNone(service.find_nearest_camera(lat, long, with_clip=True))
+            self.assertEqual(service.clip_problem(service.get_camera("lib_lobby_01")), "empty")
+
+            # A 5 second clip: just a moov box with its movie header
+            mvhd = struct.pack(">I4s4xIIII", 28, b"mvhd", 0, 0, 1000, 5000)
+            (videos / "library_lobby.mp4").write_bytes(struct.pack(">I4s", 8 + len(mvhd), b"moov") + mvhd)
+            os.utime(videos / "library_lobby.mp4", ns=(1, 1))
+            nearest = service.find_nearest_camera(lat, long, with_clip=True)
+            nearby = service.find_nearby_cameras(lat, long, 1000, 3, with_clip=True)
+
+        self.assertEqual(nearest["camera_id"], "lib_lobby_01")
+        self.assertEqual([camera["camera_id"] for camera in nearby], ["lib_lobby_01"])
+
     def test_construct_vlm_prompt(self) -> None:
         """Test VLM prompt construction."""
         question = "Where is the exit?"
@@ -68,7 +142,7 @@ class TestVLMService(unittest.TestCase):
         self.assertIn("landmarks and steps", prompt)
         self.assertIn("not colors", prompt)
 
-    @patch("loriens_guide.vlm_service.requests.post")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
     def test_call_vlm_api_success(self, mock_post: MagicMock) -> None:
         """Test successful VLM API call."""
         # Mock successful response
@@ -84,7 +158,7 @@ class TestVLMService(unittest.TestCase):
         self.assertFalse(result.get("error", False))
         self.assertEqual(result["text"], "The exit is 20 steps forward.")
 
-    @patch("loriens_guide.vlm_service.requests.post")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
     def test_call_vlm_api_error(self, mock_post: MagicMock) -> None:
         """Test VLM API call with error response."""
         # Mock error response
@@ -97,7 +171,7 @@ class TestVLMService(unittest.TestCase):
         self.assertTrue(result.get("error", False))
         self.assertIn("text", result)
 
-    @patch("loriens_guide.vlm_service.requests.post")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
     def test_process_user_request(self, mock_post: MagicMock) -> None:
         """Test complete user request processing."""
         # Mock successful VLM response
@@ -117,6 +191,454 @@ class TestVLMService(unittest.TestCase):
         self.assertEqual(result["question"], "Where is the bathroom?")
         self.assertFalse(result.get("error", False))
 
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_open_breaker_serves_stale_analysis(self, mock_post: MagicMock) -> None:
+        """Test an open circuit breaker fails fast with the last known answer."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"text": "The exit is on your left."}
+        mock_post.return_value = mock_response
+        # Repeating the question must exercise the breaker, not the similarity cache
+        self.service.similarity_cache = None
+        self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Where is the exit?")
+
+        for _ in range(self.service.breaker.failure_threshold):
+            self.service.breaker.record_failure()
+        mock_post.reset_mock()
+
+        result = self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Where is the exit?")
+
+        mock_post.assert_not_called()
+        self.assertTrue(result["stale"])
+        self.assertFalse(result["error"])
+        self.assertEqual(result["answer"], "The exit is on your left.")
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_open_breaker_without_cache_returns_error(self, mock_post: MagicMock) -> None:
+        """Test an open circuit breaker without a cached answer returns an error."""
+        for _ in range(self.service.breaker.failure_threshold):
+            self.service.breaker.record_failure()
+
+        result = self.service.call_vlm_api("test-asset-id", "Test prompt")
+
+        mock_post.assert_not_called()
+        self.assertTrue(result["error"])
+        self.assertEqual(result["rejected"], "circuit_open")
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_local_errors_do_not_trip_breaker(self, mock_post: MagicMock) -> None:
+        """Test only transport errors and 5xx/429 responses count against the upstream."""
+        for _ in range(self.service.breaker.failure_threshold):
+            result = self.service.upload_video_asset("/nonexistent/clip.mp4")
+            self.assertTrue(result["error"])
+        mock_post.return_value = MagicMock(status_code=400)
+        self.service.call_vlm_api("test-asset-id", "Test prompt")
+
+        mock_post.assert_called_once()
+        self.assertEqual(self.service.breaker.snapshot()["consecutive_failures"], 0)
+
+        mock_post.side_effect = requests.ConnectionError("refused")
+        self.service.call_vlm_api("test-asset-id", "Test prompt")
+        mock_post.side_effect = None
+        mock_post.return_value = MagicMock(status_code=503)
+        self.service.call_vlm_api("test-asset-id", "Test prompt")
+
+        self.assertEqual(self.service.breaker.snapshot()["consecutive_failures"], 2)
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_timeout_of_client_budget_not_counted_against_upstream(self, mock_post: MagicMock) -> None:
+        """Test timeouts of a client's short deadline neither trip the breaker nor shrink the limit."""
+        mock_post.side_effect = requests.Timeout("read timed out")
+        limit = self.service.limiter.limit
+
+        for _ in range(self.service.breaker.failure_threshold):
+            result = self.service.call_vlm_api("test-asset-id", "Test prompt", deadline=Deadline(8))
+            self.assertTrue(result["timed_out"])
+
+        self.assertEqual(self.service.breaker.snapshot()["consecutive_failures"], 0)
+        self.assertEqual((self.service.limiter.limit, self.service.limiter.in_flight), (limit, 0))
+
+        self.service.call_vlm_api("test-asset-id", "Test prompt")
+        self.assertEqual(self.service.breaker.snapshot()["consecutive_failures"], 1)
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_chat_timeout_bounded_by_deadline(self, mock_post: MagicMock) -> None:
+        """Test the chat completion only waits for the remaining request budget."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"text": "Clear path ahead."}
+        mock_post.return_value = mock_response
+
+        self.service.call_vlm_api("test-asset-id", "Test prompt", deadline=Deadline(20))
+
+        self.assertLessEqual(mock_post.call_args.kwargs["timeout"], 20)
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_expired_deadline_returns_degraded_answer(self, mock_post: MagicMock) -> None:
+        """Test a request without enough budget left skips the VLM and degrades."""
+        result = self.service.process_user_request(
+            lat=55.6761, long=12.5683, question_text="Where is the exit?", deadline=Deadline(1)
+        )
+
+        mock_post.assert_not_called()
+        self.assertTrue(result["degraded"])
+        self.assertFalse(result["error"])
+        self.assertTrue(result["answer"])
+
+    def test_find_nearby_cameras(self) -> None:
+        """Test nearby cameras are limited to the radius and sorted by distance."""
+        cameras = self.service.find_nearby_cameras(55.6759, 12.5681, radius_m=30, limit=3)
+
+        self.assertEqual([camera["camera_id"] for camera in cameras], ["lib_exit_01", "lib_lobby_01"])
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_process_user_request_fanout(self, mock_post: MagicMock) -> None:
+        """Test fan-out answers from nearby cameras and tracks per-camera health."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"text": "The exit is straight ahead."}
+        mock_post.return_value = mock_response
+
+        result = self.service.process_user_request_fanout(
+            55.6761, 12.5683, "Where is the exit?", max_cameras=2, radius_m=100, strategy="merge"
+        )
+
+        self.assertFalse(result["error"])
+        self.assertEqual(len(result["camera_ids"]), 2)
+        self.assertIn("The exit is straight ahead.", result["answer"])
+        self.assertEqual(self.service.camera_health.get(result["camera_id"])["requests"], 1)
+
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_analyze_batch_uploads_clip_once(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test a batch uploads and deletes each clip once and answers every query."""
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "All clear."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            clips = {"lib_lobby_01": {"video_path": clip.name, "queries": {0: "Where?", 1: "Safe?", 2: "Busy?"}}}
+            results = dict(self.service.analyze_batch(clips))
+
+        self.assertEqual(
+            {index: result["text"] for index, result in results.items()}, dict.fromkeys(range(3), "All clear.")
+        )
+        uploads = [call for call in mock_post.call_args_list if call.args[0].endswith("/assets")]
+        self.assertEqual(len(uploads), 1)
+        mock_delete.assert_called_once()
+        self.assertEqual(self.service.get_metrics()["batch_uploads_saved"], 2)
+
+    @patch.dict(os.environ, {"VLM_PROMPT_BATCHING": "true", "VLM_PROMPT_BATCH_WINDOW_MS": "500"})
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_analyze_batch_merges_prompts_into_one_call(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test prompt batching answers a clip's questions with a single chat completion."""
+        service = VLMService()
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+
+        def chat(payload: dict) -> MagicMock:
+            # Echo each numbered question back as its answer
+            prompt = payload["messages"][-1]["content"][0]["text"]
+            answers = [line for line in prompt.splitlines() if line.endswith("?")]
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"choices": [{"message": {"content": json.dumps({"answers": answers})}}]}
+            return response
+
+        mock_post.side_effect = lambda url, **kwargs: (
+            upload_response if url.endswith("/assets") else chat(kwargs["json"])
+        )
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            clips = {"lib_lobby_01": {"video_path": clip.name, "queries": {0: "Where?", 1: "Busy?", 2: "Safe?"}}}
+            results = dict(service.analyze_batch(clips))
+
+        self.assertEqual(
+            {index: result["text"] for index, result in results.items()}, {0: "Where?", 1: "Busy?", 2: "Safe?"}
+        )
+        chats = [call for call in mock_post.call_args_list if call.args[0].endswith("/chat/completions")]
+        self.assertEqual(len(chats), 1)
+        self.assertEqual(service.get_metrics()["prompt_batching"]["calls_saved"], 2)
+
+    @patch.dict(os.environ, {"VLM_PROMPT_BATCHING": "true", "VLM_PROMPT_BATCH_WINDOW_MS": "500"})
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_concurrent_questions_share_one_upload(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test separate requests about the same camera's clip are merged into one upload and call."""
+        service = VLMService()
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+
+        def chat(payload: dict) -> MagicMock:
+            prompt = payload["messages"][-1]["content"][0]["text"]
+            answers = [line for line in prompt.splitlines() if line.endswith("?")]
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"choices": [{"message": {"content": json.dumps({"answers": answers})}}]}
+            return response
+
+        mock_post.side_effect = lambda url, **kwargs: (
+            upload_response if url.endswith("/assets") else chat(kwargs["json"])
+        )
+        mock_delete.return_value = MagicMock(status_code=204)
+        questions = ("Is it busy?", "Any signs?", "How many people?")
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip, ThreadPoolExecutor(len(questions)) as pool:
+            results = list(
+                pool.map(lambda question: service.analyze_clip(clip.name, question, camera_id="cam"), questions)
+            )
+
+        self.assertEqual([result["text"] for result in results], list(questions))
+        urls = [call.args[0] for call in mock_post.call_args_list]
+        self.assertEqual(sum(url.endswith("/assets") for url in urls), 1)
+        self.assertEqual(sum(url.endswith("/chat/completions") for url in urls), 1)
+        mock_delete.assert_called_once()
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_similar_question_answered_from_cache(self, mock_post: MagicMock) -> None:
+        """Test a rephrased question about the same clip does not call the VLM again."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"text": "A hallway with a door ahead."}
+        mock_post.return_value = mock_response
+        self.service.process_user_request(lat=55.6761, long=12.5683, question_text="What do you see?")
+        mock_post.reset_mock()
+
+        result = self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Describe the scene")
+
+        mock_post.assert_not_called()
+        self.assertEqual(result["answer"], "A hallway with a door ahead.")
+        self.assertEqual(self.service.get_metrics()["similarity_cache"]["hits"], 1)
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_urgent_question_never_answered_from_similarity_cache(self, mock_post: MagicMock) -> None:
+        """Test hazard questions always reach the VLM, so "dangerous" is never answered as "safe"."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"text": "Yes, it is safe to cross now."}
+        mock_post.return_value = mock_response
+        self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Is it safe to cross?")
+        mock_post.reset_mock()
+
+        self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Is it dangerous to cross?")
+        self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Is it safe to cross?")
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(self.service.get_metrics()["similarity_cache"]["entries"], 0)
+
+    @patch.dict(os.environ, {"VLM_PREANALYSIS": "true"})
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_preanalyzed_answer_serves_user_question(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test a standard prompt answered in the background answers a user's rephrasing."""
+        service = VLMService()
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "A corridor with a door ahead."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            answers = service.preanalyze({"id": "cam"}, clip.name, ["Describe the scene", "Is it crowded?"])
+            mock_post.reset_mock()
+            result = service.analyze_clip(clip.name, "What do you see?", camera_id="cam")
+
+        self.assertEqual(len(answers), 2)
+        mock_post.assert_not_called()
+        self.assertEqual(result["text"], "A corridor with a door ahead.")
+        self.assertEqual(service.get_metrics()["preanalysis"]["cameras"]["cam"]["popularity"], 1)
+
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_preanalysis_does_not_replace_last_analysis(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test background answers are not served as the camera's last analysis when shedding load."""
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "A corridor."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            self.service.preanalyze({"id": "cam"}, clip.name, ["Describe the scene"])
+
+        self.assertEqual(self.service.get_metrics()["stale_cache_cameras"], 0)
+
+    @patch.dict(
+        os.environ, {"VLM_PREANALYSIS": "true", "VLM_PREANALYSIS_PROMPTS": "Is it safe to cross?|Is it crowded?"}
+    )
+    def test_urgent_preanalysis_prompts_are_skipped(self) -> None:
+        """Test hazard and navigation prompts are not run in the background."""
+        service = VLMService()
+
+        self.assertEqual(service.preanalysis.prompts, ["Is it crowded?"])
+
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_follow_up_reuses_asset_and_history(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test a follow-up in a session skips the upload and sends the earlier turn."""
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "A door ahead."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            self.service.analyze_clip(clip.name, "What is ahead?", camera_id="cam", session_id="s1")
+            mock_post.reset_mock()
+            result = self.service.analyze_clip(clip.name, "And on my left?", camera_id="cam", session_id="s1")
+
+        mock_delete.assert_not_called()
+        self.assertTrue(result["follow_up"])
+        self.assertEqual(len(mock_post.call_args_list), 1)
+        messages = mock_post.call_args.kwargs["json"]["messages"]
+        self.assertEqual(
+            [message["content"][0]["text"] for message in messages],
+            ["What is ahead?", "A door ahead.", "And on my left?"],
+        )
+        self.assertEqual(messages[-1]["content"][1]["asset_id"], "asset-1")
+
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_quick_answer_then_detail(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test a bounded structured answer comes first and the detail reuses its upload."""
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        quick_response = MagicMock(status_code=200)
+        quick_response.json.return_value = {
+            "choices": [
+                {"message": {"content": '{"hazard": "wet floor", "direction": "left", "summary": "Exit ahead."}'}}
+            ]
+        }
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else quick_response
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            quick = self.service.quick_answer(clip.name, "Where is the exit?", "cam")
+            payload = mock_post.call_args.kwargs["json"]
+            detail_response = MagicMock(status_code=200)
+            detail_response.json.return_value = {"choices": [{"message": {"content": "The exit is 10 m ahead."}}]}
+            mock_post.side_effect = None
+            mock_post.return_value = detail_response
+            mock_post.reset_mock()
+            detail = self.service.detailed_answer(
+                clip.name, "Where is the exit?", "cam", session_id=quick["session_id"]
+            )
+
+        self.assertEqual(quick["text"], "Caution: wet floor on your left. Exit ahead.")
+        self.assertEqual(quick["quick"]["direction"], "left")
+        self.assertEqual(payload["max_tokens"], self.service.quick_max_tokens)
+        self.assertEqual(payload["response_format"]["type"], "json_schema")
+        self.assertEqual(set(quick["timings_ms"]), {"upload", "answer", "total"})
+        mock_delete.assert_not_called()
+        self.assertEqual(detail["text"], "The exit is 10 m ahead.")
+        self.assertEqual(detail["phase"], "detail")
+        self.assertEqual(len(mock_post.call_args_list), 1)
+        messages = mock_post.call_args.kwargs["json"]["messages"]
+        self.assertEqual(messages[-1]["content"][1]["asset_id"], "asset-1")
+        self.assertNotIn("response_format", mock_post.call_args.kwargs["json"])
+        phases = self.service.get_metrics()["answer_phases"]
+        self.assertEqual((phases["quick"]["answers"], phases["detail"]["answers"]), (1, 1))
+
+    def test_quick_answer_deletes_its_upload_when_the_call_fails(self) -> None:
+        """Test the quick answer's asset is not leaked when asking the VLM raises."""
+        with (
+            patch.object(self.service, "upload_video_asset", return_value={"asset_id": "asset-1"}),
+            patch.object(self.service, "call_vlm_api", side_effect=RuntimeError("connection reset")),
+            patch.object(self.service, "delete_asset") as delete,
+            tempfile.NamedTemporaryFile(suffix=".mp4") as clip,
+            pytest.raises(RuntimeError),
+        ):
+            self.service.quick_answer(clip.name, "Where is the exit?", "cam")
+
+        delete.assert_called_once_with("asset-1", deadline=None)
+
+    @patch.dict(os.environ, {"VLM_SHARED_CACHE": "memory"})
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_answer_shared_between_workers(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test a second worker answers a question about the same clip from the shared cache."""
+        first, second = VLMService(), VLMService()
+        second.shared_cache = first.shared_cache
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "Stairs ahead."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            first.analyze_clip(clip.name, "Is there a staircase?", camera_id="cam")
+            mock_post.reset_mock()
+            result = second.analyze_clip(clip.name, "Is there a staircase?", camera_id="cam")
+
+        mock_post.assert_not_called()
+        self.assertEqual(result["text"], "Stairs ahead.")
+        self.assertTrue(result["shared"])
+
+    @patch.dict(os.environ, {"VLM_SHARED_CACHE": "memory", "VLM_SIMILARITY_CACHE": "false"})
+    @patch("loriens_guide.vlm_service.requests.Session.delete")
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_only_exact_non_urgent_questions_shared(self, mock_post: MagicMock, mock_delete: MagicMock) -> None:
+        """Test workers share answers only to the same question, and never to hazard questions."""
+        first, second = VLMService(), VLMService()
+        second.shared_cache = first.shared_cache
+        upload_response = MagicMock(status_code=201)
+        upload_response.json.return_value = {"id": "asset-1"}
+        chat_response = MagicMock(status_code=200)
+        chat_response.json.return_value = {"choices": [{"message": {"content": "Yes, it is safe to cross now."}}]}
+        mock_post.side_effect = lambda url, **_kwargs: upload_response if url.endswith("/assets") else chat_response
+        mock_delete.return_value = MagicMock(status_code=204)
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as clip:
+            first.analyze_clip(clip.name, "Is it safe to cross?", camera_id="cam")
+            first.analyze_clip(clip.name, "Is the cup left of the lamp?", camera_id="cam")
+            mock_post.reset_mock()
+            self.assertNotIn("shared", second.analyze_clip(clip.name, "Is it dangerous to cross?", camera_id="cam"))
+            self.assertNotIn("shared", second.analyze_clip(clip.name, "Is it safe to cross?", camera_id="cam"))
+            self.assertNotIn("shared", second.analyze_clip(clip.name, "Is the lamp left of the cup?", camera_id="cam"))
+            self.assertEqual(mock_post.call_count, 6)
+            result = second.analyze_clip(clip.name, "  is the CUP left of the lamp? ", camera_id="cam")
+
+        self.assertTrue(result["shared"])
+
+    @patch("loriens_guide.vlm_service.requests.Session.post")
+    def test_non_visual_question_answered_locally(self, mock_post: MagicMock) -> None:
+        """Test location questions are answered from the registry without the VLM."""
+        result = self.service.process_user_request(lat=55.6761, long=12.5683, question_text="Where am I?")
+
+        mock_post.assert_not_called()
+        self.assertFalse(result["error"])
+        self.assertEqual(result["intent"], "location")
+        self.assertIn("Library Lobby - Main Entrance", result["answer"])
+        self.assertEqual(self.service.get_metrics()["intents"]["deflected"], 1)
+
+    def test_process_batch_request_reports_missing_cameras(self) -> None:
+        """Test batch items without a camera or clip are answered with an error."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.service.cameras_file = Path(directory) / "cameras.json"
+            results = list(
+                self.service.process_batch_request(
+                    [
+                        {"camera_id": "unknown", "question_text": "Where is the exit?"},
+                        {"camera_id": "lib_lobby_01", "question_text": "Is it busy?"},
+                    ]
+                )
+            )
+
+        self.assertEqual(sorted(result["index"] for result in results), [0, 1])
+        self.assertTrue(all(result["error"] for result in results))
+
+    def test_get_metrics(self) -> None:
+        """Test breaker state and concurrency limit are exposed."""
+        metrics = self.service.get_metrics()
+
+        self.assertEqual(metrics["circuit_breaker"]["state"], "closed")
+        self.assertIn("limit", metrics["concurrency"])
+
 
 if __name__ == "__main__":
     unittest.main()